@@ -0,0 +1,181 @@
+"""
+Moteur d'analyse en colonnes (NumPy) pour les rapports pluriannuels.
+
+Les rapports par mois et par catégorie sont servis depuis le rollup
+monthly_category_spend : une requête par année lit au plus une ligne par
+catégorie, type et mois (total et nombre de transactions), chargée en
+colonnes NumPy. Les regroupements sont des bincount pondérés, fenêtres
+glissantes et cumuls des cumsum ; le coût ne dépend pas du nombre de
+transactions et une écriture n'impose aucun rechargement.
+
+Les totaux restent des entiers exacts : bincount additionne en float64, exact
+tant que les sommes restent sous 2**53 centimes.
+"""
+from itertools import chain
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import Integer, cast, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models import Categorie, MonthlyCategorySpend
+
+TYPES = ("depense", "revenu")
+
+
+class Colonnes:
+    """
+    Lignes d'une année en tableaux parallèles : une ligne par transaction, ou
+    par ligne du rollup (total et nombre de transactions d'un mois).
+
+    Attributes:
+        annee: année couverte
+        categories: noms des catégories ; le code d'une ligne est l'indice dans ce tuple
+        mois: mois de l'année, de 0 à 11 (int8)
+        categorie: code de catégorie (int32)
+        depense: True pour une dépense, False pour un revenu
+        montants: montants en centimes (int64)
+        nombres: transactions représentées par chaque ligne (int64), None pour une par ligne
+    """
+
+    def __init__(self, annee: int, categories: Sequence[str], mois, categorie, depense, montants,
+                 nombres=None):
+        self.annee = annee
+        self.categories = tuple(categories)
+        self.mois = np.asarray(mois, dtype=np.int8)
+        self.categorie = np.asarray(categorie, dtype=np.int32)
+        self.depense = np.asarray(depense, dtype=bool)
+        self.montants = np.asarray(montants, dtype=np.int64)
+        self.nombres = None if nombres is None else np.asarray(nombres, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.montants)
+
+    def filtre(self, type: str = "depense", categorie: Optional[str] = None) -> np.ndarray:
+        """Masque des lignes du type et, si précisée, de la catégorie"""
+        masque = self.depense if type == "depense" else ~self.depense
+        if categorie is not None:
+            if categorie not in self.categories:
+                return np.zeros(len(self), dtype=bool)
+            masque = masque & (self.categorie == self.categories.index(categorie))
+        return masque
+
+
+def _categories(conn) -> Tuple[List[str], np.ndarray]:
+    """Noms des catégories par ordre alphabétique et table id -> code (indice du nom)"""
+    lignes = conn.execute(select(Categorie.id, Categorie.nom).order_by(Categorie.nom)).all()
+    codes = np.zeros(max((categorie_id for categorie_id, _ in lignes), default=0) + 1, dtype=np.int32)
+    codes[[categorie_id for categorie_id, _ in lignes]] = np.arange(len(lignes), dtype=np.int32)
+    return [nom for _, nom in lignes], codes
+
+
+def agregats_annee(db: Session, annee: int) -> Colonnes:
+    """Lignes du rollup d'une année en colonnes : un total et un nombre par catégorie, type et mois"""
+    conn = db.connection()
+    categories, codes = _categories(conn)
+    lignes = conn.execute(
+        select(
+            MonthlyCategorySpend.mois - 1,
+            MonthlyCategorySpend.categorie_id,
+            cast(MonthlyCategorySpend.type == "depense", Integer),
+            MonthlyCategorySpend.total_centimes,
+            MonthlyCategorySpend.nombre
+        ).where(MonthlyCategorySpend.annee == annee, MonthlyCategorySpend.nombre > 0)
+    )
+    valeurs = np.fromiter(chain.from_iterable(lignes), dtype=np.int64).reshape(-1, 5)
+    return Colonnes(
+        annee, categories, valeurs[:, 0], codes[valeurs[:, 1]], valeurs[:, 2], valeurs[:, 3], nombres=valeurs[:, 4]
+    )
+
+
+def totaux_par_mois(colonnes: Colonnes, type: str = "depense", categorie: Optional[str] = None) -> np.ndarray:
+    """Total en centimes de chacun des 12 mois de l'année (int64)"""
+    masque = colonnes.filtre(type, categorie)
+    return np.bincount(colonnes.mois[masque], weights=colonnes.montants[masque], minlength=12).astype(np.int64)
+
+
+def totaux_par_categorie(colonnes: Colonnes, type: str = "depense") -> Tuple[np.ndarray, np.ndarray]:
+    """Total en centimes et nombre de transactions de chaque code de catégorie"""
+    masque = colonnes.filtre(type)
+    nombre_categories = len(colonnes.categories)
+    codes = colonnes.categorie[masque]
+    totaux = np.bincount(codes, weights=colonnes.montants[masque], minlength=nombre_categories)
+    poids = None if colonnes.nombres is None else colonnes.nombres[masque]
+    return totaux.astype(np.int64), np.bincount(codes, weights=poids, minlength=nombre_categories).astype(np.int64)
+
+
+def somme_glissante(valeurs: np.ndarray, fenetre: int) -> np.ndarray:
+    """
+    Somme des `fenetre` dernières valeurs à chaque position (fenêtre tronquée
+    au début de la série), par différence de sommes cumulées.
+    """
+    cumul = np.cumsum(valeurs)
+    glissante = cumul.copy()
+    glissante[fenetre:] -= cumul[:-fenetre]
+    return glissante
+
+
+def rapport_mensuel(db: Session, annee_debut: int, annee_fin: int, type: str = "depense",
+                    categorie: Optional[str] = None, fenetre: int = 3) -> List[dict]:
+    """
+    Totaux mensuels des années annee_debut à annee_fin, avec leur cumul depuis
+    le début de la période et leur somme glissante sur `fenetre` mois.
+    Montants en centimes.
+    """
+    totaux = np.concatenate([
+        totaux_par_mois(agregats_annee(db, annee), type, categorie)
+        for annee in range(annee_debut, annee_fin + 1)
+    ])
+    cumuls = np.cumsum(totaux)
+    glissantes = somme_glissante(totaux, fenetre)
+    return [
+        {
+            "annee": annee_debut + i // 12,
+            "mois": i % 12 + 1,
+            "total_centimes": int(totaux[i]),
+            "cumul_centimes": int(cumuls[i]),
+            "total_glissant_centimes": int(glissantes[i]),
+        }
+        for i in range(len(totaux))
+    ]
+
+
+def rapport_categories(db: Session, annee_debut: int, annee_fin: int, type: str = "depense") -> List[dict]:
+    """
+    Total, nombre de transactions et part du total de chaque catégorie sur les
+    années annee_debut à annee_fin, de la plus grosse à la plus petite.
+    Montants en centimes.
+    """
+    par_categorie: Dict[str, List[int]] = {}
+    for annee in range(annee_debut, annee_fin + 1):
+        colonnes = agregats_annee(db, annee)
+        totaux, nombres = totaux_par_categorie(colonnes, type)
+        for code, nom in enumerate(colonnes.categories):
+            if nombres[code]:
+                cumul = par_categorie.setdefault(nom, [0, 0])
+                cumul[0] += int(totaux[code])
+                cumul[1] += int(nombres[code])
+    total = sum(valeurs[0] for valeurs in par_categorie.values())
+    rapport = [
+        {
+            "categorie": nom,
+            "total_centimes": total_categorie,
+            "nombre_transactions": nombre,
+            "part": round(total_categorie / total * 100, 2) if total else 0.0,
+        }
+        for nom, (total_categorie, nombre) in par_categorie.items()
+    ]
+    return sorted(rapport, key=lambda ligne: (-ligne["total_centimes"], ligne["categorie"]))
+
+
+async def rapport_mensuel_async(db: AsyncSession, annee_debut: int, annee_fin: int, type: str = "depense",
+                                categorie: Optional[str] = None, fenetre: int = 3) -> List[dict]:
+    """rapport_mensuel sur une session asynchrone"""
+    return await db.run_sync(rapport_mensuel, annee_debut, annee_fin, type, categorie, fenetre)
+
+
+async def rapport_categories_async(db: AsyncSession, annee_debut: int, annee_fin: int,
+                                   type: str = "depense") -> List[dict]:
+    """rapport_categories sur une session asynchrone"""
+    return await db.run_sync(rapport_categories, annee_debut, annee_fin, type)
@@ -1,17 +1,64 @@
 """
 Logique métier pour les calculs de budgets et transactions
 """
+from sqlalchemy import and_, case, func, literal, null, select, tuple_, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from datetime import date
-from app.models import Transaction, Budget
+from typing import Iterable, List, Optional, Tuple
+from app.models import Budget, Categorie, MonthlyCategorySpend
+from app.montants import en_centimes, en_euros
+from app import categories as dictionnaire, metriques
 
 
-def calculer_total_depense_par_categorie(
+def _total_depense_rollup(categorie_id: int, mois: int, annee: int):
+    """
+    Expression SQL du total dépensé (en centimes) pour une catégorie sur un mois.
+
+    Le total est lu dans le rollup monthly_category_spend (une ligne par clé) :
+    le coût ne dépend pas du nombre de transactions du mois.
+    """
+    total = select(MonthlyCategorySpend.total_centimes).where(
+        MonthlyCategorySpend.categorie_id == categorie_id,
+        MonthlyCategorySpend.type == "depense",
+        MonthlyCategorySpend.annee == annee,
+        MonthlyCategorySpend.mois == mois
+    ).scalar_subquery()
+    return func.coalesce(total, 0)
+
+
+def _charger_budget_et_depense(
+    db: Session,
+    categorie: str,
+    mois: int,
+    annee: int
+) -> Optional[Tuple[int, int]]:
+    """
+    Récupère en une seule requête le montant du budget et le total dépensé.
+
+    Returns:
+        (montant_budget, total_depense) en centimes, ou None si aucun budget n'est défini
+    """
+    categorie_id = dictionnaire.cache.identifiant(db, categorie)
+    if categorie_id is None:
+        return None
+    ligne = db.execute(
+        select(Budget.montant_budget_centimes, _total_depense_rollup(categorie_id, mois, annee)).where(
+            Budget.categorie_id == categorie_id,
+            Budget.mois == mois,
+            Budget.annee == annee
+        ).limit(1)
+    ).first()
+    if ligne is None:
+        return None
+    return ligne[0], ligne[1]
+
+
+def calculer_total_depense_par_categorie_centimes(
     db: Session, 
     categorie: str, 
     mois: int,
     annee: int
-) -> float:
+) -> int:
     """
     Calcule le total des dépenses pour une catégorie sur un mois donné.
     
@@ -22,31 +69,20 @@ def calculer_total_depense_par_categorie(
         annee: Année
         
     Returns:
-        Total des dépenses pour cette catégorie sur ce mois
+        Total des dépenses pour cette catégorie sur ce mois, en centimes
     """
-    # Calculer la date de début et de fin du mois
-    date_debut = date(annee, mois, 1)
-    if mois == 12:
-        date_fin = date(annee + 1, 1, 1)
-    else:
-        date_fin = date(annee, mois + 1, 1)
-    
-    transactions = db.query(Transaction).filter(
-        Transaction.categorie == categorie,
-        Transaction.type == "depense",
-        Transaction.date_transaction >= date_debut,
-        Transaction.date_transaction < date_fin
-    ).all()
-    
-    return sum(t.montant for t in transactions)
+    categorie_id = dictionnaire.cache.identifiant(db, categorie)
+    if categorie_id is None:
+        return 0
+    return db.execute(select(_total_depense_rollup(categorie_id, mois, annee))).scalar_one()
 
 
-def calculer_montant_restant_budget(
+def calculer_montant_restant_budget_centimes(
     db: Session,
     categorie: str,
     mois: int,
     annee: int
-) -> float:
+) -> int:
     """
     Calcule le montant restant sur un budget.
     
@@ -57,19 +93,15 @@ def calculer_montant_restant_budget(
         annee: Année
         
     Returns:
-        Montant restant (peut être négatif si dépassement)
+        Montant restant en centimes (peut être négatif si dépassement)
     """
-    budget = db.query(Budget).filter(
-        Budget.categorie == categorie,
-        Budget.mois == mois,
-        Budget.annee == annee
-    ).first()
+    budget_et_depense = _charger_budget_et_depense(db, categorie, mois, annee)
     
-    if not budget:
-        return 0.0
+    if budget_et_depense is None:
+        return 0
     
-    total_depense = calculer_total_depense_par_categorie(db, categorie, mois, annee)
-    return budget.montant_budget - total_depense
+    montant_budget, total_depense = budget_et_depense
+    return montant_budget - total_depense
 
 
 def calculer_pourcentage_consomme(
@@ -90,20 +122,16 @@ def calculer_pourcentage_consomme(
     Returns:
         Pourcentage consommé (peut dépasser 100% en cas de dépassement)
     """
-    budget = db.query(Budget).filter(
-        Budget.categorie == categorie,
-        Budget.mois == mois,
-        Budget.annee == annee
-    ).first()
+    budget_et_depense = _charger_budget_et_depense(db, categorie, mois, annee)
     
-    if not budget or budget.montant_budget == 0:
+    if budget_et_depense is None or budget_et_depense[0] == 0:
         return 0.0
     
-    total_depense = calculer_total_depense_par_categorie(db, categorie, mois, annee)
-    return (total_depense / budget.montant_budget) * 100
+    montant_budget, total_depense = budget_et_depense
+    return (total_depense / montant_budget) * 100
 
 
-def obtenir_statistiques_budget(
+def obtenir_statistiques_budget_centimes(
     db: Session,
     categorie: str,
     mois: int,
@@ -119,85 +147,567 @@ def obtenir_statistiques_budget(
         annee: Année
         
     Returns:
-        Dictionnaire avec toutes les statistiques
+        Dictionnaire avec toutes les statistiques (montants en centimes)
     """
-    budget = db.query(Budget).filter(
-        Budget.categorie == categorie,
-        Budget.mois == mois,
-        Budget.annee == annee
-    ).first()
+    budget_et_depense = _charger_budget_et_depense(db, categorie, mois, annee)
     
-    if not budget:
+    if budget_et_depense is None:
         return {
             "categorie": categorie,
             "periode": f"{mois:02d}/{annee}",
-            "montant_total_depense": 0.0,
-            "budget_fixe": 0.0,
-            "montant_restant": 0.0,
+            "montant_total_depense_centimes": 0,
+            "budget_fixe_centimes": 0,
+            "montant_restant_centimes": 0,
             "pourcentage_consomme": 0.0
         }
     
-    total_depense = calculer_total_depense_par_categorie(db, categorie, mois, annee)
-    montant_restant = budget.montant_budget - total_depense
-    pourcentage = (total_depense / budget.montant_budget) * 100 if budget.montant_budget > 0 else 0.0
+    montant_budget, total_depense = budget_et_depense
+    return _construire_statistiques(categorie, mois, annee, montant_budget, total_depense)
+
+
+def obtenir_statistiques_periode_centimes(
+    db: Session,
+    mois: int,
+    annee: int
+) -> List[dict]:
+    """
+    Obtient les statistiques de tous les budgets d'une période en une seule requête.
+    
+    Les budgets de la période sont joints (LEFT JOIN) à leur ligne du rollup
+    mensuel : le nombre de requêtes ne dépend pas du nombre de budgets.
+    
+    Args:
+        db: Session de base de données
+        mois: Mois (1-12)
+        annee: Année
+        
+    Returns:
+        Liste de dictionnaires de statistiques, dans l'ordre de création des budgets
+    """
+    lignes = db.execute(
+        select(
+            Categorie.nom,
+            Budget.montant_budget_centimes,
+            func.coalesce(MonthlyCategorySpend.total_centimes, 0)
+        ).select_from(Budget).join(Categorie, Categorie.id == Budget.categorie_id).outerjoin(
+            MonthlyCategorySpend,
+            and_(
+                MonthlyCategorySpend.categorie_id == Budget.categorie_id,
+                MonthlyCategorySpend.type == "depense",
+                MonthlyCategorySpend.annee == Budget.annee,
+                MonthlyCategorySpend.mois == Budget.mois
+            )
+        ).where(
+            Budget.mois == mois,
+            Budget.annee == annee
+        ).order_by(Budget.id)
+    ).all()
+    
+    return [
+        _construire_statistiques(categorie, mois, annee, montant_budget, total_depense)
+        for categorie, montant_budget, total_depense in lignes
+    ]
+
+
+def _construire_statistiques(
+    categorie: str,
+    mois: int,
+    annee: int,
+    montant_budget: int,
+    total_depense: int
+) -> dict:
+    """Construit le dictionnaire de statistiques à partir du budget et du total dépensé (centimes)."""
+    pourcentage = (total_depense / montant_budget) * 100 if montant_budget > 0 else 0.0
     
     return {
         "categorie": categorie,
         "periode": f"{mois:02d}/{annee}",
-        "montant_total_depense": round(total_depense, 2),
-        "budget_fixe": round(budget.montant_budget, 2),
-        "montant_restant": round(montant_restant, 2),
+        "montant_total_depense_centimes": total_depense,
+        "budget_fixe_centimes": montant_budget,
+        "montant_restant_centimes": montant_budget - total_depense,
         "pourcentage_consomme": round(pourcentage, 2)
     }
 
 
-def verifier_depassement_budget(
+def verifier_depassement_budget_centimes(
     db: Session,
     categorie: str,
     mois: int,
     annee: int,
-    montant_ajoute: float
+    montant_ajoute: int
 ) -> dict:
     """
-    Vérifie si l'ajout d'une dépense ferait dépasser le budget de la catégorie.
+    Vérifie si l'ajout d'une dépense (en centimes) ferait dépasser le budget de la catégorie.
     
     Returns:
-        dict avec depasse (bool), message_alerte (str), montant_restant_avant (float),
-        budget_fixe (float), montant_total_apres (float)
+        dict avec depasse (bool), message_alerte (str), et en centimes
+        montant_restant_avant_centimes, budget_fixe_centimes, montant_total_apres_centimes
     """
-    budget = db.query(Budget).filter(
-        Budget.categorie == categorie,
-        Budget.mois == mois,
-        Budget.annee == annee
-    ).first()
+    budget_et_depense = _charger_budget_et_depense(db, categorie, mois, annee)
     
-    if not budget:
+    if budget_et_depense is None:
         return {
             "depasse": False,
             "message_alerte": None,
-            "montant_restant_avant": None,
-            "budget_fixe": None,
-            "montant_total_apres": None
+            "montant_restant_avant_centimes": None,
+            "budget_fixe_centimes": None,
+            "montant_total_apres_centimes": None
         }
     
-    total_actuel = calculer_total_depense_par_categorie(db, categorie, mois, annee)
-    montant_restant_avant = budget.montant_budget - total_actuel
+    montant_budget, total_actuel = budget_et_depense
+    return _alerte_depassement(categorie, mois, annee, montant_budget, total_actuel, montant_ajoute)
+
+
+def _alerte_depassement(
+    categorie: str,
+    mois: int,
+    annee: int,
+    montant_budget: int,
+    total_actuel: int,
+    montant_ajoute: int
+) -> dict:
+    """Construit le résultat de verifier_depassement_budget_centimes pour un budget existant (centimes)."""
     montant_total_apres = total_actuel + montant_ajoute
-    depasse = montant_total_apres > budget.montant_budget
+    depasse = montant_total_apres > montant_budget
+    metriques.compter_verification(depasse)
     
     message_alerte = None
     if depasse:
-        depassement = round(montant_total_apres - budget.montant_budget, 2)
         message_alerte = (
             f"Dépassement du budget {categorie} ({mois:02d}/{annee}) ! "
-            f"Budget: {budget.montant_budget} €, après cette dépense: {montant_total_apres} € "
-            f"(dépassement: {depassement} €)."
+            f"Budget: {en_euros(montant_budget)} €, après cette dépense: {en_euros(montant_total_apres)} € "
+            f"(dépassement: {en_euros(montant_total_apres - montant_budget)} €)."
         )
     
     return {
         "depasse": depasse,
         "message_alerte": message_alerte,
-        "montant_restant_avant": round(montant_restant_avant, 2),
-        "budget_fixe": round(budget.montant_budget, 2),
-        "montant_total_apres": round(montant_total_apres, 2)
+        "montant_restant_avant_centimes": montant_budget - total_actuel,
+        "budget_fixe_centimes": montant_budget,
+        "montant_total_apres_centimes": montant_total_apres
     }
+
+
+def verifier_depassements_lot_centimes(
+    db: Session,
+    depenses: List[Tuple[str, int, int, int]]
+) -> List[Optional[dict]]:
+    """
+    Vérifie les dépassements d'un lot de dépenses comme des ajouts successifs.
+    
+    Le budget et le total dépensé de chaque (categorie, mois, annee) sont lus
+    une seule fois pour tout le lot ; le total est ensuite cumulé dans l'ordre
+    du lot, de sorte que chaque dépense reçoit l'alerte qu'aurait produite
+    verifier_depassement_budget_centimes si elles avaient été créées une par une.
+    
+    Args:
+        db: Session de base de données
+        depenses: Dépenses (categorie, mois, annee, montant en centimes), dans l'ordre du lot
+        
+    Returns:
+        Pour chaque dépense, le résultat de verifier_depassement_budget_centimes, ou None
+        si aucun budget n'est défini pour sa catégorie et son mois
+    """
+    ids = dictionnaire.cache.identifiants(db, {categorie for categorie, _, _, _ in depenses})
+    cles = sorted({(ids[categorie], mois, annee) for categorie, mois, annee, _ in depenses if categorie in ids})
+    budgets = {}
+    # Par paquets, pour rester sous la limite de paramètres de SQLite
+    for debut in range(0, len(cles), 500):
+        lignes = db.execute(
+            select(
+                Budget.categorie_id,
+                Budget.mois,
+                Budget.annee,
+                Budget.montant_budget_centimes,
+                func.coalesce(MonthlyCategorySpend.total_centimes, 0)
+            ).outerjoin(
+                MonthlyCategorySpend,
+                and_(
+                    MonthlyCategorySpend.categorie_id == Budget.categorie_id,
+                    MonthlyCategorySpend.type == "depense",
+                    MonthlyCategorySpend.annee == Budget.annee,
+                    MonthlyCategorySpend.mois == Budget.mois
+                )
+            ).where(tuple_(Budget.categorie_id, Budget.mois, Budget.annee).in_(cles[debut:debut + 500]))
+        ).all()
+        for categorie_id, mois, annee, montant_budget, total_depense in lignes:
+            budgets[(categorie_id, mois, annee)] = [montant_budget, total_depense]
+    
+    resultats = []
+    for categorie, mois, annee, montant in depenses:
+        budget = budgets.get((ids.get(categorie), mois, annee))
+        if budget is None:
+            resultats.append(None)
+            continue
+        montant_budget, total_actuel = budget
+        resultats.append(_alerte_depassement(categorie, mois, annee, montant_budget, total_actuel, montant))
+        budget[1] = total_actuel + montant
+    return resultats
+
+
+def verifier_depassements_periodes_centimes(
+    db: Session,
+    cles: Iterable[Tuple[str, int, int]]
+) -> List[dict]:
+    """
+    Recherche les budgets dépassés parmi un ensemble de catégories et de mois.
+    
+    Utilisé après une écriture en masse : chaque couple catégorie/mois touché
+    est vérifié une seule fois, quel que soit le nombre de dépenses ajoutées.
+    
+    Args:
+        db: Session de base de données
+        cles: Couples (categorie, mois, annee) à vérifier
+        
+    Returns:
+        Liste des dépassements : categorie, periode, message_alerte et, en
+        centimes, budget_fixe_centimes, montant_total_depense_centimes et depassement_centimes
+    """
+    cles = set(cles)
+    ids = dictionnaire.cache.identifiants(db, {categorie for categorie, _, _ in cles})
+    cles = sorted({(ids[categorie], mois, annee) for categorie, mois, annee in cles if categorie in ids})
+    alertes = []
+    # Par paquets, pour rester sous la limite de paramètres de SQLite
+    for debut in range(0, len(cles), 500):
+        lignes = db.execute(
+            select(
+                Categorie.nom,
+                Budget.mois,
+                Budget.annee,
+                Budget.montant_budget_centimes,
+                MonthlyCategorySpend.total_centimes
+            ).select_from(Budget).join(Categorie, Categorie.id == Budget.categorie_id).join(
+                MonthlyCategorySpend,
+                and_(
+                    MonthlyCategorySpend.categorie_id == Budget.categorie_id,
+                    MonthlyCategorySpend.type == "depense",
+                    MonthlyCategorySpend.annee == Budget.annee,
+                    MonthlyCategorySpend.mois == Budget.mois
+                )
+            ).where(
+                tuple_(Budget.categorie_id, Budget.mois, Budget.annee).in_(cles[debut:debut + 500]),
+                MonthlyCategorySpend.total_centimes > Budget.montant_budget_centimes
+            )
+        ).all()
+        for categorie, mois, annee, montant_budget, total_depense in lignes:
+            depassement = total_depense - montant_budget
+            alertes.append(((categorie, annee, mois), {
+                "categorie": categorie,
+                "periode": f"{mois:02d}/{annee}",
+                "budget_fixe_centimes": montant_budget,
+                "montant_total_depense_centimes": total_depense,
+                "depassement_centimes": depassement,
+                "message_alerte": (
+                    f"Dépassement du budget {categorie} ({mois:02d}/{annee}) ! "
+                    f"Budget: {en_euros(montant_budget)} €, total dépensé: {en_euros(total_depense)} € "
+                    f"(dépassement: {en_euros(depassement)} €)."
+                )
+            }))
+    return [alerte for _, alerte in sorted(alertes, key=lambda a: a[0])]
+
+
+# ========== API EN EUROS ==========
+# Les fonctions *_centimes ci-dessus calculent en centimes entiers ; les
+# fonctions publiques gardent leur contrat d'origine, en euros : montants en
+# float et clés sans le suffixe _centimes.
+
+_SUFFIXE_CENTIMES = "_centimes"
+
+
+def _en_euros(resultat: Optional[dict]) -> Optional[dict]:
+    """Convertit en euros les clés <champ>_centimes d'un résultat, renommées <champ>"""
+    if resultat is None:
+        return None
+    converti = {}
+    for cle, valeur in resultat.items():
+        if cle.endswith(_SUFFIXE_CENTIMES):
+            cle = cle[:-len(_SUFFIXE_CENTIMES)]
+            valeur = None if valeur is None else en_euros(valeur)
+        converti[cle] = valeur
+    return converti
+
+
+def calculer_total_depense_par_categorie(
+    db: Session, 
+    categorie: str, 
+    mois: int,
+    annee: int
+) -> float:
+    """
+    Calcule le total des dépenses pour une catégorie sur un mois donné.
+    
+    Args:
+        db: Session de base de données
+        categorie: Nom de la catégorie
+        mois: Mois (1-12)
+        annee: Année
+        
+    Returns:
+        Total des dépenses pour cette catégorie sur ce mois
+    """
+    return en_euros(calculer_total_depense_par_categorie_centimes(db, categorie, mois, annee))
+
+
+def calculer_montant_restant_budget(
+    db: Session,
+    categorie: str,
+    mois: int,
+    annee: int
+) -> float:
+    """
+    Calcule le montant restant sur un budget.
+    
+    Args:
+        db: Session de base de données
+        categorie: Nom de la catégorie
+        mois: Mois (1-12)
+        annee: Année
+        
+    Returns:
+        Montant restant (peut être négatif si dépassement)
+    """
+    return en_euros(calculer_montant_restant_budget_centimes(db, categorie, mois, annee))
+
+
+def obtenir_statistiques_budget(
+    db: Session,
+    categorie: str,
+    mois: int,
+    annee: int
+) -> dict:
+    """
+    Obtient toutes les statistiques d'un budget pour une catégorie et une période.
+    
+    Args:
+        db: Session de base de données
+        categorie: Nom de la catégorie
+        mois: Mois (1-12)
+        annee: Année
+        
+    Returns:
+        Dictionnaire avec toutes les statistiques
+    """
+    return _en_euros(obtenir_statistiques_budget_centimes(db, categorie, mois, annee))
+
+
+def obtenir_statistiques_periode(
+    db: Session,
+    mois: int,
+    annee: int
+) -> List[dict]:
+    """
+    Obtient les statistiques de tous les budgets d'une période en une seule requête.
+    
+    Returns:
+        Liste de dictionnaires de statistiques, dans l'ordre de création des budgets
+    """
+    return [_en_euros(stats) for stats in obtenir_statistiques_periode_centimes(db, mois, annee)]
+
+
+def verifier_depassement_budget(
+    db: Session,
+    categorie: str,
+    mois: int,
+    annee: int,
+    montant_ajoute: float
+) -> dict:
+    """
+    Vérifie si l'ajout d'une dépense ferait dépasser le budget de la catégorie.
+    
+    Returns:
+        dict avec depasse (bool), message_alerte (str), montant_restant_avant, 
+        budget_fixe, montant_total_apres
+    """
+    return _en_euros(verifier_depassement_budget_centimes(db, categorie, mois, annee, en_centimes(montant_ajoute)))
+
+
+def verifier_depassements_lot(
+    db: Session,
+    depenses: List[Tuple[str, int, int, float]]
+) -> List[Optional[dict]]:
+    """
+    Vérifie les dépassements d'un lot de dépenses comme des ajouts successifs.
+    
+    Args:
+        db: Session de base de données
+        depenses: Dépenses (categorie, mois, annee, montant), dans l'ordre du lot
+        
+    Returns:
+        Pour chaque dépense, le résultat de verifier_depassement_budget, ou None
+        si aucun budget n'est défini pour sa catégorie et son mois
+    """
+    depenses = [(categorie, mois, annee, en_centimes(montant)) for categorie, mois, annee, montant in depenses]
+    return [_en_euros(alerte) for alerte in verifier_depassements_lot_centimes(db, depenses)]
+
+
+def verifier_depassements_periodes(
+    db: Session,
+    cles: Iterable[Tuple[str, int, int]]
+) -> List[dict]:
+    """
+    Recherche les budgets dépassés parmi un ensemble de catégories et de mois.
+    
+    Returns:
+        Liste des dépassements : categorie, periode, budget_fixe,
+        montant_total_depense, depassement et message_alerte
+    """
+    return [_en_euros(alerte) for alerte in verifier_depassements_periodes_centimes(db, cles)]
+
+
+def obtenir_tendance(
+    db: Session,
+    annee: int,
+    nombre_mois: int = 12,
+    categories: Optional[List[str]] = None
+) -> List[dict]:
+    """
+    Tendance mensuelle de chaque catégorie sur les 12 ou 24 derniers mois de l'année.
+    
+    Une seule requête groupée : les lignes du rollup (dépenses et revenus) et
+    les budgets de la période sont réunis (UNION ALL) puis agrégés par
+    catégorie et par mois. Le coût dépend du nombre de catégories et de mois,
+    pas du nombre de transactions.
+    
+    Args:
+        db: Session de base de données
+        annee: Dernière année de la période (jusqu'à décembre)
+        nombre_mois: 12 (l'année) ou 24 (l'année et la précédente)
+        categories: Catégories à inclure ; toutes celles qui ont un budget ou
+            une transaction sur la période si None
+        
+    Returns:
+        Par catégorie (ordre alphabétique), la liste des mois avec, en centimes,
+        depenses_centimes, revenus_centimes et, si un budget est défini,
+        budget_centimes, montant_restant_centimes et pourcentage_consomme
+    """
+    annee_debut = annee - nombre_mois // 12 + 1
+    rollup = select(
+        MonthlyCategorySpend.categorie_id,
+        MonthlyCategorySpend.annee,
+        MonthlyCategorySpend.mois,
+        case((MonthlyCategorySpend.type == "depense", MonthlyCategorySpend.total_centimes), else_=0).label("depenses"),
+        case((MonthlyCategorySpend.type == "revenu", MonthlyCategorySpend.total_centimes), else_=0).label("revenus"),
+        null().label("budget")
+    ).where(MonthlyCategorySpend.annee.between(annee_debut, annee))
+    budgets = select(
+        Budget.categorie_id,
+        Budget.annee,
+        Budget.mois,
+        literal(0).label("depenses"),
+        literal(0).label("revenus"),
+        Budget.montant_budget_centimes.label("budget")
+    ).where(Budget.annee.between(annee_debut, annee))
+    if categories is not None:
+        ids = list(dictionnaire.cache.identifiants(db, categories).values())
+        rollup = rollup.where(MonthlyCategorySpend.categorie_id.in_(ids))
+        budgets = budgets.where(Budget.categorie_id.in_(ids))
+    lignes = union_all(rollup, budgets).subquery()
+    resultats = db.execute(
+        select(
+            Categorie.nom,
+            lignes.c.annee,
+            lignes.c.mois,
+            func.sum(lignes.c.depenses),
+            func.sum(lignes.c.revenus),
+            func.max(lignes.c.budget)
+        ).select_from(lignes).join(Categorie, Categorie.id == lignes.c.categorie_id)
+        .group_by(lignes.c.categorie_id, lignes.c.annee, lignes.c.mois)
+    ).all()
+    
+    par_categorie = {categorie: {} for categorie in categories or ()}
+    for categorie, annee_ligne, mois, depenses, revenus, budget in resultats:
+        par_categorie.setdefault(categorie, {})[annee_ligne, mois] = (depenses, revenus, budget)
+    
+    tendance = []
+    for categorie in sorted(par_categorie):
+        mois_categorie = []
+        for rang in range(nombre_mois):
+            annee_mois, mois = annee_debut + rang // 12, rang % 12 + 1
+            depenses, revenus, budget = par_categorie[categorie].get((annee_mois, mois), (0, 0, None))
+            pourcentage = None
+            if budget is not None:
+                pourcentage = round(depenses / budget * 100, 2) if budget > 0 else 0.0
+            mois_categorie.append({
+                "annee": annee_mois,
+                "mois": mois,
+                "depenses_centimes": depenses,
+                "revenus_centimes": revenus,
+                "budget_centimes": budget,
+                "montant_restant_centimes": None if budget is None else budget - depenses,
+                "pourcentage_consomme": pourcentage
+            })
+        tendance.append({"categorie": categorie, "mois": mois_categorie})
+    return tendance
+
+
+# ========== VERSIONS ASYNCHRONES ==========
+# Mêmes calculs sur une AsyncSession : run_sync exécute la fonction synchrone
+# sur la session sous-jacente, les requêtes passant par le pilote asynchrone
+# sans bloquer la boucle d'événements.
+
+async def calculer_total_depense_par_categorie_async(
+    db: AsyncSession, categorie: str, mois: int, annee: int
+) -> float:
+    """Version asynchrone de calculer_total_depense_par_categorie"""
+    return await db.run_sync(calculer_total_depense_par_categorie, categorie, mois, annee)
+
+
+async def calculer_montant_restant_budget_async(
+    db: AsyncSession, categorie: str, mois: int, annee: int
+) -> float:
+    """Version asynchrone de calculer_montant_restant_budget"""
+    return await db.run_sync(calculer_montant_restant_budget, categorie, mois, annee)
+
+
+async def calculer_pourcentage_consomme_async(
+    db: AsyncSession, categorie: str, mois: int, annee: int
+) -> float:
+    """Version asynchrone de calculer_pourcentage_consomme"""
+    return await db.run_sync(calculer_pourcentage_consomme, categorie, mois, annee)
+
+
+async def obtenir_statistiques_budget_async(
+    db: AsyncSession, categorie: str, mois: int, annee: int
+) -> dict:
+    """Version asynchrone de obtenir_statistiques_budget"""
+    return await db.run_sync(obtenir_statistiques_budget, categorie, mois, annee)
+
+
+async def obtenir_statistiques_periode_async(db: AsyncSession, mois: int, annee: int) -> List[dict]:
+    """Version asynchrone de obtenir_statistiques_periode"""
+    return await db.run_sync(obtenir_statistiques_periode, mois, annee)
+
+
+async def verifier_depassement_budget_async(
+    db: AsyncSession, categorie: str, mois: int, annee: int, montant_ajoute: float
+) -> dict:
+    """Version asynchrone de verifier_depassement_budget"""
+    return await db.run_sync(verifier_depassement_budget, categorie, mois, annee, montant_ajoute)
+
+
+async def verifier_depassements_lot_async(
+    db: AsyncSession, depenses: List[Tuple[str, int, int, float]]
+) -> List[Optional[dict]]:
+    """Version asynchrone de verifier_depassements_lot"""
+    return await db.run_sync(verifier_depassements_lot, depenses)
+
+
+async def verifier_depassements_lot_centimes_async(
+    db: AsyncSession, depenses: List[Tuple[str, int, int, int]]
+) -> List[Optional[dict]]:
+    """Version asynchrone de verifier_depassements_lot_centimes"""
+    return await db.run_sync(verifier_depassements_lot_centimes, depenses)
+
+
+async def verifier_depassements_periodes_async(
+    db: AsyncSession, cles: Iterable[Tuple[str, int, int]]
+) -> List[dict]:
+    """Version asynchrone de verifier_depassements_periodes"""
+    return await db.run_sync(verifier_depassements_periodes, list(cles))
+
+
+async def obtenir_tendance_async(
+    db: AsyncSession, annee: int, nombre_mois: int = 12, categories: Optional[List[str]] = None
+) -> List[dict]:
+    """Version asynchrone de obtenir_tendance"""
+    return await db.run_sync(obtenir_tendance, annee, nombre_mois, categories)
@@ -0,0 +1,246 @@
+"""
+Cache en mémoire des statistiques de budget, invalidé par les écritures.
+
+Les statistiques sont mises en cache par clé (categorie, mois, annee). Toute
+écriture ORM d'une transaction ou d'un budget invalide exactement les clés
+qu'elle touche (ancienne et nouvelle période en cas de déplacement), au flush
+puis à nouveau au commit pour ne pas conserver une valeur lue entre les deux.
+
+Le cache est propre au processus, mais chaque entrée est enregistrée avec la
+version de sa clé (app.versions, table versions_statistiques, incrémentée dans
+la même transaction que l'écriture) et n'est servie que si elle n'a pas changé.
+Une écriture d'un autre worker, ou d'un script, ne rend périmées que les
+entrées de sa clé ; une valeur calculée pendant une écriture concurrente porte
+la version lue avant le calcul et n'est jamais servie après elle. La liste des
+catégories d'une période se valide sur les versions de période de ses clés,
+qui ne changent qu'avec la création, la suppression ou le déplacement d'un budget.
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Hashable, Iterable, List, Set, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models import Transaction, Budget
+from app import business_logic, categories as dictionnaire, versions
+
+_ABSENT = object()
+_CLES_SESSION = "cles_cache_a_invalider"
+
+
+class CacheLRU:
+    """
+    Cache LRU borné et thread-safe, avec compteurs de succès et d'échecs.
+
+    Une entrée peut être enregistrée avec une version : lue avec une autre
+    version, elle est retirée (comptée comme invalidation) et la lecture échoue.
+    """
+
+    def __init__(self, taille_max: int):
+        self.taille_max = taille_max
+        self._entrees = OrderedDict()
+        self._verrou = threading.Lock()
+        self.succes = 0
+        self.echecs = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def obtenir(self, cle: Hashable, defaut=None, version=_ABSENT):
+        with self._verrou:
+            entree = self._entrees.get(cle, _ABSENT)
+            if entree is not _ABSENT and version is not _ABSENT and entree[0] != version:
+                del self._entrees[cle]
+                self.invalidations += 1
+                entree = _ABSENT
+            if entree is _ABSENT:
+                self.echecs += 1
+                return defaut
+            self._entrees.move_to_end(cle)
+            self.succes += 1
+            return entree[1]
+
+    def enregistrer(self, cle: Hashable, valeur, version=None) -> None:
+        if self.taille_max <= 0:
+            return
+        with self._verrou:
+            self._entrees[cle] = (version, valeur)
+            self._entrees.move_to_end(cle)
+            while len(self._entrees) > self.taille_max:
+                self._entrees.popitem(last=False)
+                self.evictions += 1
+
+    def invalider(self, cle: Hashable) -> None:
+        with self._verrou:
+            if self._entrees.pop(cle, _ABSENT) is not _ABSENT:
+                self.invalidations += 1
+
+    def vider(self) -> None:
+        with self._verrou:
+            self._entrees.clear()
+            self.succes = self.echecs = self.evictions = self.invalidations = 0
+
+    def etat(self) -> dict:
+        with self._verrou:
+            total = self.succes + self.echecs
+            return {
+                "taille": len(self._entrees),
+                "taille_max": self.taille_max,
+                "succes": self.succes,
+                "echecs": self.echecs,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "taux_succes": round(self.succes / total, 4) if total else 0.0,
+            }
+
+
+TAILLE_MAX = int(os.getenv("BUDGET_CACHE_STATS_TAILLE", "1024"))
+
+# (categorie, mois, annee) -> statistiques du budget
+cache_statistiques = CacheLRU(TAILLE_MAX)
+# (mois, annee) -> catégories budgétées sur la période, dans l'ordre de création
+cache_periodes = CacheLRU(TAILLE_MAX)
+
+
+def enregistrable(db: Session) -> bool:
+    """
+    Faux si la session a écrit sans valider : ce qu'elle lit peut être annulé,
+    et la version qu'elle voit n'est pas encore celle des autres connexions.
+    """
+    return _CLES_SESSION not in db.info
+
+
+def statistiques_budget(db: Session, categorie: str, mois: int, annee: int) -> dict:
+    """obtenir_statistiques_budget servi depuis le cache lorsque c'est possible"""
+    cle = (categorie, mois, annee)
+    categorie_id = dictionnaire.cache.identifiant(db, categorie)
+    version = versions.lire_statistiques(db, mois, annee, [categorie_id]).get(categorie_id, (0, 0))[0]
+    stats = cache_statistiques.obtenir(cle, version=version)
+    if stats is None:
+        stats = business_logic.obtenir_statistiques_budget(db, categorie, mois, annee)
+        if enregistrable(db):
+            cache_statistiques.enregistrer(cle, stats, version)
+    return dict(stats)
+
+
+def statistiques_periode(db: Session, mois: int, annee: int) -> List[dict]:
+    """obtenir_statistiques_periode servi depuis le cache lorsque c'est possible"""
+    courantes = versions.lire_statistiques(db, mois, annee)
+    version_periode = tuple(sorted((c, periode) for c, (_, periode) in courantes.items() if periode))
+    categories = cache_periodes.obtenir((mois, annee), version=version_periode)
+    if categories is not None:
+        ids = dictionnaire.cache.identifiants(db, categories)
+        stats_list = [
+            cache_statistiques.obtenir((c, mois, annee), version=courantes.get(ids.get(c), (0, 0))[0])
+            for c in categories
+        ]
+        if all(stats is not None for stats in stats_list):
+            return [dict(stats) for stats in stats_list]
+    stats_list = business_logic.obtenir_statistiques_periode(db, mois, annee)
+    if enregistrable(db):
+        ids = dictionnaire.cache.identifiants(db, {stats["categorie"] for stats in stats_list})
+        for stats in stats_list:
+            version = courantes.get(ids.get(stats["categorie"]), (0, 0))[0]
+            cache_statistiques.enregistrer((stats["categorie"], mois, annee), stats, version)
+        cache_periodes.enregistrer((mois, annee), tuple(s["categorie"] for s in stats_list), version_periode)
+    return [dict(stats) for stats in stats_list]
+
+
+async def statistiques_budget_async(db: AsyncSession, categorie: str, mois: int, annee: int) -> dict:
+    """statistiques_budget sur une session asynchrone"""
+    return await db.run_sync(statistiques_budget, categorie, mois, annee)
+
+
+async def statistiques_periode_async(db: AsyncSession, mois: int, annee: int) -> List[dict]:
+    """statistiques_periode sur une session asynchrone"""
+    return await db.run_sync(statistiques_periode, mois, annee)
+
+
+def invalider(cles_statistiques: Iterable[Tuple[str, int, int]], periodes: Iterable[Tuple[int, int]] = ()) -> None:
+    """Invalide des clés de statistiques et, pour les écritures de budgets, des périodes"""
+    for cle in cles_statistiques:
+        cache_statistiques.invalider(cle)
+    for periode in periodes:
+        cache_periodes.invalider(periode)
+
+
+def invalider_au_commit(db: Session, cles_statistiques: Iterable[Tuple[str, int, int]],
+                        periodes: Iterable[Tuple[int, int]] = ()) -> None:
+    """
+    Invalide tout de suite et à nouveau au commit de la session.
+
+    À utiliser par les écritures qui contournent l'ORM (insertions Core en masse).
+    """
+    cles_statistiques, periodes = set(cles_statistiques), set(periodes)
+    invalider(cles_statistiques, periodes)
+    cles = db.info.setdefault(_CLES_SESSION, (set(), set()))
+    cles[0].update(cles_statistiques)
+    cles[1].update(periodes)
+
+
+def _etats(objet, attributs: Tuple[str, ...]) -> Set[tuple]:
+    """Valeurs courantes des attributs et, en cas de modification, leurs anciennes valeurs"""
+    etat = inspect(objet)
+    nouvelles = tuple(getattr(objet, a) for a in attributs)
+    anciennes = tuple(
+        etat.attrs[a].history.deleted[0] if etat.attrs[a].history.deleted else valeur
+        for a, valeur in zip(attributs, nouvelles)
+    )
+    return {anciennes, nouvelles}
+
+
+def _cles_touchees(objets: Iterable, modifies: bool) -> Tuple[Set[Tuple[int, int, int]], Set[Tuple[int, int, int]]]:
+    """
+    Clés (categorie_id, mois, annee) touchées par des objets écrits, et parmi
+    elles les clés de budgets dont la période change de liste de catégories.
+
+    La liste des catégories d'une période ne change qu'à la création ou à la
+    suppression d'un budget, ou lorsqu'il change de catégorie ou de période.
+    """
+    cles, cles_periode = set(), set()
+    for objet in objets:
+        if isinstance(objet, Transaction):
+            for categorie_id, jour in _etats(objet, ("categorie_id", "date_transaction")):
+                cles.add((categorie_id, jour.month, jour.year))
+        elif isinstance(objet, Budget):
+            etats = _etats(objet, ("categorie_id", "mois", "annee"))
+            cles |= etats
+            if not modifies or len(etats) > 1:
+                cles_periode |= etats
+    return cles, cles_periode
+
+
+@event.listens_for(Session, "after_flush")
+def _invalider_au_flush(session, flush_context):
+    cles, cles_periode = _cles_touchees(list(session.new) + list(session.deleted), modifies=False)
+    cles_modifiees, cles_periode_modifiees = _cles_touchees(session.dirty, modifies=True)
+    cles |= cles_modifiees
+    cles_periode |= cles_periode_modifiees
+    budgets = [o for o in (*session.new, *session.dirty, *session.deleted) if isinstance(o, Budget)]
+    if budgets:
+        # Les versions des clés de transactions suivent le rollup (app.rollup) ;
+        # celles des budgets sont incrémentées ici, dans la transaction du flush
+        cles_budgets, _ = _cles_touchees(budgets, modifies=False)
+        versions.incrementer_statistiques(session, cles_budgets, cles_periode)
+    if cles:
+        # Le cache des statistiques est indexé par nom, comme l'API
+        noms = dictionnaire.cache.noms(session, {categorie_id for categorie_id, _, _ in cles})
+        invalider_au_commit(
+            session,
+            {(noms.get(categorie_id), mois, annee) for categorie_id, mois, annee in cles},
+            {(mois, annee) for _, mois, annee in cles_periode}
+        )
+
+
+@event.listens_for(Session, "after_commit")
+def _invalider_au_commit(session):
+    cles, periodes = session.info.pop(_CLES_SESSION, (set(), set()))
+    invalider(cles, periodes)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _invalider_au_rollback(session, previous_transaction):
+    cles, periodes = session.info.pop(_CLES_SESSION, (set(), set()))
+    invalider(cles, periodes)
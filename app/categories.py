@@ -0,0 +1,190 @@
+"""
+Dictionnaire des catégories : table categories (id entier, nom unique).
+
+Transactions, budgets et rollup référencent une catégorie par son id ; l'API
+continue d'échanger des noms. Le cache de processus nom <-> id évite une
+requête par appel : un id n'est jamais réattribué à un autre nom, une
+correspondance lue en base reste donc valable pour tous les workers.
+
+Deux précautions :
+- seules les correspondances trouvées sont mises en cache, une catégorie
+  absente pouvant être créée entre-temps par un autre processus ;
+- une catégorie créée dans une transaction n'entre dans le cache qu'au commit
+  de cette transaction, pour ne pas conserver l'id d'une ligne annulée.
+"""
+import os
+import threading
+import weakref
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.models import Categorie
+
+# Clé de Connection.info : catégories créées dans la transaction en cours
+_CLE_CREEES = "categories_creees"
+
+
+def _base(moteur):
+    """
+    Clé d'une base dans le cache : l'engine synchrone et l'engine asynchrone
+    d'un même fichier SQLite partagent leurs correspondances ; une base en
+    mémoire est propre à son engine.
+    """
+    url = moteur.url
+    if url.get_backend_name() == "sqlite":
+        if url.database in (None, "", ":memory:"):
+            return moteur
+        return "sqlite", os.path.abspath(url.database)
+    return url.get_backend_name(), url.host, url.port, url.database
+
+
+def _connexion(db):
+    """Connexion d'une Session (les requêtes n'y déclenchent pas d'autoflush, même pendant un flush)"""
+    return db.connection() if isinstance(db, Session) else db
+
+
+class CacheCategories:
+    """Correspondances nom <-> id, par base de données, partagées par les threads du processus."""
+
+    def __init__(self):
+        # Base -> ({nom: id}, {id: nom}) ; bases en mémoire par engine, oubliées avec lui
+        self._fichiers = {}
+        self._memoire = weakref.WeakKeyDictionary()
+        self._verrou = threading.Lock()
+
+    def _conteneur(self, base):
+        return self._fichiers if isinstance(base, tuple) else self._memoire
+
+    def _tables(self, moteur) -> Tuple[Dict[str, int], Dict[int, str]]:
+        base = _base(moteur)
+        with self._verrou:
+            return self._conteneur(base).setdefault(base, ({}, {}))
+
+    def enregistrer(self, moteur, correspondances: Dict[str, int]) -> None:
+        """Ajoute au cache des correspondances validées en base"""
+        ids, noms = self._tables(moteur)
+        with self._verrou:
+            for nom, identifiant in correspondances.items():
+                ids[nom] = identifiant
+                noms[identifiant] = nom
+
+    def vider(self, moteur=None) -> None:
+        """Oublie les correspondances d'une base (de toutes si moteur est None)"""
+        with self._verrou:
+            if moteur is None:
+                self._fichiers.clear()
+                self._memoire.clear()
+            else:
+                base = _base(moteur)
+                self._conteneur(base).pop(base, None)
+
+    def _lire(self, conn, requete) -> Dict[str, int]:
+        """Correspondances lues en base ; celles créées dans la transaction en cours restent hors cache"""
+        trouvees = {nom: identifiant for identifiant, nom in conn.execute(requete)}
+        creees = conn.info.get(_CLE_CREEES, {})
+        self.enregistrer(conn.engine, {n: i for n, i in trouvees.items() if n not in creees})
+        return trouvees
+
+    def identifiants(self, db, noms: Iterable[str], creer: bool = False) -> Dict[str, int]:
+        """
+        Ids de plusieurs catégories, en une requête au plus pour celles absentes du cache.
+
+        Args:
+            db: Session ou Connection
+            noms: Noms des catégories
+            creer: Créer les catégories inconnues (dans la transaction en cours)
+
+        Returns:
+            {nom: id} ; les catégories inconnues sont absentes si creer est faux
+        """
+        conn = _connexion(db)
+        ids, _ = self._tables(conn.engine)
+        noms = set(noms)
+        resultat = {nom: ids[nom] for nom in noms if nom in ids}
+        manquants = noms - resultat.keys()
+        if not manquants:
+            return resultat
+        resultat.update(self._lire(conn, select(Categorie.id, Categorie.nom).where(Categorie.nom.in_(manquants))))
+        manquants -= resultat.keys()
+        if manquants and creer:
+            conn.execute(
+                insert(Categorie).on_conflict_do_nothing(index_elements=["nom"]),
+                [{"nom": nom} for nom in sorted(manquants)]
+            )
+            creees = {
+                nom: identifiant for identifiant, nom in
+                conn.execute(select(Categorie.id, Categorie.nom).where(Categorie.nom.in_(manquants)))
+            }
+            conn.info.setdefault(_CLE_CREEES, {}).update(creees)
+            resultat.update(creees)
+        return resultat
+
+    def identifiant(self, db, nom: str, creer: bool = False) -> Optional[int]:
+        """Id d'une catégorie, None si elle n'existe pas et que creer est faux"""
+        return self.identifiants(db, [nom], creer).get(nom)
+
+    def noms(self, db, identifiants: Iterable[int]) -> Dict[int, str]:
+        """Noms de plusieurs catégories à partir de leur id, en une requête au plus"""
+        conn = _connexion(db)
+        _, noms = self._tables(conn.engine)
+        identifiants = set(identifiants)
+        resultat = {i: noms[i] for i in identifiants if i in noms}
+        manquants = identifiants - resultat.keys()
+        if manquants:
+            resultat.update({i: n for n, i in conn.info.get(_CLE_CREEES, {}).items() if i in manquants})
+            manquants -= resultat.keys()
+        if manquants:
+            trouvees = self._lire(conn, select(Categorie.id, Categorie.nom).where(Categorie.id.in_(manquants)))
+            resultat.update({i: n for n, i in trouvees.items()})
+        return resultat
+
+    def nom(self, db, identifiant: int) -> Optional[str]:
+        """Nom d'une catégorie, None si l'id n'existe pas"""
+        return self.noms(db, [identifiant]).get(identifiant)
+
+
+cache = CacheCategories()
+
+
+def id_par_nom(nom: str):
+    """
+    Id d'une catégorie en sous-requête non corrélée, évaluée une fois : un
+    filtre categorie_id == id_par_nom(nom) reste servi par les index sur
+    categorie_id, sans accès au cache (requêtes construites hors session).
+    """
+    return select(Categorie.id).where(Categorie.nom == nom).scalar_subquery()
+
+
+def remplacer_noms(db, lignes: List[dict]) -> List[dict]:
+    """
+    Lignes prêtes pour une insertion Core : la clé categorie (nom) est
+    remplacée par categorie_id, les catégories inconnues étant créées.
+    """
+    ids = cache.identifiants(db, {ligne["categorie"] for ligne in lignes}, creer=True)
+    return [
+        {**{c: v for c, v in ligne.items() if c != "categorie"}, "categorie_id": ids[ligne["categorie"]]}
+        for ligne in lignes
+    ]
+
+
+@event.listens_for(Engine, "commit")
+def _valider_creations(conn):
+    creees = conn.info.pop(_CLE_CREEES, None)
+    if creees:
+        cache.enregistrer(conn.engine, creees)
+
+
+@event.listens_for(Engine, "rollback")
+def _annuler_creations(conn):
+    conn.info.pop(_CLE_CREEES, None)
+
+
+@event.listens_for(Categorie.__table__, "after_create")
+@event.listens_for(Categorie.__table__, "after_drop")
+def _table_recreee(table, connection, **kw):
+    # Base réinitialisée (create_all / drop_all) : les ids peuvent être réattribués
+    cache.vider(connection.engine)
@@ -0,0 +1,335 @@
+"""
+Compression des réponses HTTP (gzip, et brotli ou zstd si le client les accepte).
+
+Le middleware négocie l'encodage avec Accept-Encoding (qualités q comprises)
+parmi les encodages configurés dont la bibliothèque est installée. Une réponse
+complète n'est compressée qu'au-delà d'un seuil de taille ; une réponse en flux
+(export CSV, gros fichiers) est compressée morceau par morceau, chaque morceau
+étant vidé (sync flush) pour que le client le reçoive aussitôt : l'export reste
+en flux. Seuls les types textuels sont compressés.
+
+Les fichiers statiques peuvent être précompressés une fois pour toutes au
+niveau maximal (`python -m app.compression precompresser static`) : les
+variantes .br, .zst et .gz à jour sont servies telles quelles, sans coût CPU
+par requête.
+
+Variables : BUDGET_COMPRESSION (0 pour désactiver), BUDGET_COMPRESSION_SEUIL
+(taille minimale en octets, 1024 par défaut), BUDGET_COMPRESSION_ENCODAGES
+(ordre de préférence du serveur, "zstd,br,gzip" par défaut) et
+BUDGET_COMPRESSION_NIVEAU_GZIP (6), _BR (1), _ZSTD (3) ; les niveaux par
+défaut sont les plus rapides qui restent à un point du taux des niveaux élevés
+(`python -m benchmarks.compression`).
+"""
+import argparse
+import mimetypes
+import os
+import sys
+import zlib
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dépend de l'installation
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - dépend de l'installation
+    zstandard = None
+
+# Niveaux acceptés et niveau par défaut (compression à la volée) de chaque encodage
+NIVEAUX = {"gzip": (range(1, 10), 6), "br": (range(0, 12), 1), "zstd": (range(1, 20), 3)}
+# Niveaux de la précompression des fichiers statiques
+NIVEAUX_MAX = {"gzip": 9, "br": 11, "zstd": 19}
+EXTENSIONS = {"br": ".br", "zstd": ".zst", "gzip": ".gz"}
+TYPES_COMPRESSIBLES = {
+    "application/json", "application/javascript", "application/x-ndjson", "image/svg+xml",
+    "text/css", "text/csv", "text/html", "text/javascript", "text/plain",
+}
+
+
+def encodages_disponibles() -> Tuple[str, ...]:
+    """Encodages dont la bibliothèque est installée (gzip fait partie de la bibliothèque standard)"""
+    return tuple(e for e, module in (("zstd", zstandard), ("br", brotli), ("gzip", zlib)) if module is not None)
+
+
+def lire_configuration(environ=None) -> dict:
+    """
+    Lit la configuration de la compression depuis les variables d'environnement.
+
+    Returns:
+        dict avec actif (bool), seuil (octets), encodages (par ordre de
+        préférence, limités aux disponibles) et niveaux ({encodage: niveau})
+    """
+    environ = os.environ if environ is None else environ
+    seuil = int(environ.get("BUDGET_COMPRESSION_SEUIL", "1024"))
+    if seuil < 0:
+        raise ValueError(f"BUDGET_COMPRESSION_SEUIL doit être positif : {seuil}")
+    demandes = [e.strip() for e in environ.get("BUDGET_COMPRESSION_ENCODAGES", "zstd,br,gzip").split(",") if e.strip()]
+    inconnus = set(demandes) - NIVEAUX.keys()
+    if inconnus:
+        raise ValueError(
+            f"Encodage inconnu '{', '.join(sorted(inconnus))}' (attendu : {', '.join(NIVEAUX)})"
+        )
+    niveaux = {}
+    for encodage, (acceptes, defaut) in NIVEAUX.items():
+        variable = f"BUDGET_COMPRESSION_NIVEAU_{encodage.upper()}"
+        niveau = int(environ.get(variable, defaut))
+        if niveau not in acceptes:
+            raise ValueError(f"{variable} doit être compris entre {acceptes[0]} et {acceptes[-1]} : {niveau}")
+        niveaux[encodage] = niveau
+    return {
+        "actif": environ.get("BUDGET_COMPRESSION", "1").lower() in ("1", "true", "oui"),
+        "seuil": seuil,
+        "encodages": tuple(e for e in demandes if e in encodages_disponibles()),
+        "niveaux": niveaux,
+    }
+
+
+def choisir_encodage(accept_encoding: str, encodages: Sequence[str]) -> Optional[str]:
+    """
+    Encodage à utiliser parmi `encodages` (ordre de préférence du serveur) :
+    celui de plus haute qualité pour le client, le serveur départageant les
+    égalités ; None si aucun n'est accepté (q=0 refuse un encodage).
+    """
+    qualites = {}
+    for element in accept_encoding.split(","):
+        nom, _, parametres = element.partition(";")
+        qualite = 1.0
+        for parametre in parametres.split(";"):
+            cle, _, valeur = parametre.strip().partition("=")
+            if cle == "q":
+                try:
+                    qualite = float(valeur)
+                except ValueError:
+                    qualite = 0.0
+        if nom.strip():
+            qualites[nom.strip().lower()] = qualite
+    candidats = [(qualites.get(e, qualites.get("*", 0.0)), -rang, e) for rang, e in enumerate(encodages)]
+    if not candidats:
+        return None
+    qualite, _, encodage = max(candidats)
+    return encodage if qualite > 0 else None
+
+
+class Compresseur:
+    """Compression en flux d'un corps de réponse dans un encodage donné"""
+
+    def __init__(self, encodage: str, niveau: int):
+        self.encodage = encodage
+        if encodage == "gzip":
+            self._objet = zlib.compressobj(niveau, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        elif encodage == "br":
+            self._objet = brotli.Compressor(quality=niveau)
+        else:
+            self._objet = zstandard.ZstdCompressor(level=niveau).compressobj()
+
+    def morceau(self, donnees: bytes) -> bytes:
+        """Compresse un morceau et vide le compresseur : le client peut le décoder aussitôt"""
+        if self.encodage == "gzip":
+            return self._objet.compress(donnees) + self._objet.flush(zlib.Z_SYNC_FLUSH)
+        if self.encodage == "br":
+            return self._objet.process(donnees) + self._objet.flush()
+        return self._objet.compress(donnees) + self._objet.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def fin(self, donnees: bytes = b"") -> bytes:
+        """Compresse le dernier morceau et termine le flux compressé"""
+        if self.encodage == "gzip":
+            return self._objet.compress(donnees) + self._objet.flush()
+        if self.encodage == "br":
+            return self._objet.process(donnees) + self._objet.finish()
+        return self._objet.compress(donnees) + self._objet.flush()
+
+
+def compresser(donnees: bytes, encodage: str, niveau: int) -> bytes:
+    """Compresse un corps complet"""
+    return Compresseur(encodage, niveau).fin(donnees)
+
+
+def _compressible(statut: int, en_tetes: MutableHeaders) -> bool:
+    type_contenu = en_tetes.get("content-type", "").split(";")[0].strip().lower()
+    return (
+        statut >= 200 and statut not in (204, 304)
+        and "content-encoding" not in en_tetes
+        and type_contenu in TYPES_COMPRESSIBLES
+    )
+
+
+class MiddlewareCompression:
+    """Middleware ASGI de compression des réponses, en flux pour les réponses en plusieurs morceaux"""
+
+    def __init__(self, app, seuil: int = 1024, encodages: Sequence[str] = ("gzip",),
+                 niveaux: Optional[Dict[str, int]] = None):
+        self.app = app
+        self.seuil = seuil
+        self.encodages = tuple(encodages)
+        self.niveaux = {e: defaut for e, (_, defaut) in NIVEAUX.items()}
+        self.niveaux.update(niveaux or {})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encodage = choisir_encodage(Headers(scope=scope).get("accept-encoding", ""), self.encodages)
+        if encodage is None:
+            await self.app(scope, receive, send)
+            return
+
+        debut_reponse = None
+        compresseur = None
+        transmettre = False
+
+        async def envoyer(message):
+            nonlocal debut_reponse, compresseur, transmettre
+            if message["type"] == "http.response.start":
+                # Retenu jusqu'au premier morceau : la décision dépend de sa taille
+                debut_reponse = message
+                return
+            if transmettre or message["type"] != "http.response.body":
+                await send(message)
+                return
+            corps = message.get("body", b"")
+            suite = message.get("more_body", False)
+            if compresseur is None:
+                en_tetes = MutableHeaders(scope=debut_reponse)
+                if not _compressible(debut_reponse["status"], en_tetes):
+                    transmettre = True
+                    await send(debut_reponse)
+                    await send(message)
+                    return
+                en_tetes.add_vary_header("Accept-Encoding")
+                if not suite and len(corps) < self.seuil:
+                    transmettre = True
+                    await send(debut_reponse)
+                    await send(message)
+                    return
+                compresseur = Compresseur(encodage, self.niveaux[encodage])
+                en_tetes["Content-Encoding"] = encodage
+                etag = en_tetes.get("etag")
+                if etag and not etag.startswith("W/"):
+                    # La représentation compressée n'est pas identique octet pour octet
+                    en_tetes["ETag"] = f"W/{etag}"
+                if suite:
+                    del en_tetes["content-length"]
+                else:
+                    corps = compresseur.fin(corps)
+                    en_tetes["Content-Length"] = str(len(corps))
+                    await send(debut_reponse)
+                    await send({"type": "http.response.body", "body": corps})
+                    return
+                await send(debut_reponse)
+            donnees = compresseur.morceau(corps) if suite else compresseur.fin(corps)
+            if donnees or not suite:
+                await send({"type": "http.response.body", "body": donnees, "more_body": suite})
+
+        await self.app(scope, receive, envoyer)
+
+
+def variante_precompressee(chemin: str, accept_encoding: str) -> Tuple[str, Optional[str]]:
+    """
+    Fichier à servir pour `chemin` et son encodage : la variante précompressée
+    acceptée par le client et au moins aussi récente que l'original, sinon
+    l'original (encodage None).
+    """
+    date_original = os.stat(chemin).st_mtime
+    a_jour = []
+    for encodage, extension in EXTENSIONS.items():
+        try:
+            if os.stat(chemin + extension).st_mtime >= date_original:
+                a_jour.append(encodage)
+        except FileNotFoundError:
+            continue
+    encodage = choisir_encodage(accept_encoding, a_jour)
+    if encodage is None:
+        return chemin, None
+    return chemin + EXTENSIONS[encodage], encodage
+
+
+def reponse_fichier(chemin: str, accept_encoding: str, **options) -> FileResponse:
+    """FileResponse servant la variante précompressée de `chemin` lorsqu'elle est acceptée"""
+    servi, encodage = variante_precompressee(str(chemin), accept_encoding)
+    if encodage is None:
+        return FileResponse(chemin, **options)
+    options.pop("stat_result", None)
+    return FileResponse(
+        servi, media_type=mimetypes.guess_type(str(chemin))[0] or "text/plain",
+        headers={"Content-Encoding": encodage, "Vary": "Accept-Encoding"}, **options
+    )
+
+
+class FichiersStatiques(StaticFiles):
+    """StaticFiles servant les variantes précompressées (.br, .zst, .gz) des fichiers"""
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200):
+        en_tetes_requete = Headers(scope=scope)
+        reponse = reponse_fichier(
+            str(full_path), en_tetes_requete.get("accept-encoding", ""),
+            status_code=status_code, stat_result=stat_result, method=scope["method"]
+        )
+        if self.is_not_modified(reponse.headers, en_tetes_requete):
+            return NotModifiedResponse(reponse.headers)
+        return reponse
+
+
+def precompresser(repertoire: Path) -> Dict[str, Dict[str, int]]:
+    """
+    Écrit les variantes compressées, au niveau maximal, des fichiers textuels
+    d'un répertoire (avec les encodages disponibles).
+
+    Returns:
+        {fichier: {"identity": taille, encodage: taille compressée}}
+    """
+    tailles = {}
+    for fichier in sorted(repertoire.rglob("*")):
+        if not fichier.is_file() or fichier.suffix in EXTENSIONS.values():
+            continue
+        if mimetypes.guess_type(fichier.name)[0] not in TYPES_COMPRESSIBLES:
+            continue
+        contenu = fichier.read_bytes()
+        tailles[str(fichier)] = {"identity": len(contenu)}
+        for encodage in encodages_disponibles():
+            compresse = compresser(contenu, encodage, NIVEAUX_MAX[encodage])
+            fichier.with_name(fichier.name + EXTENSIONS[encodage]).write_bytes(compresse)
+            tailles[str(fichier)][encodage] = len(compresse)
+    return tailles
+
+
+def activer(app, configuration: dict = None) -> bool:
+    """
+    Installe le middleware de compression si elle est active.
+
+    Returns:
+        True si la compression a été activée
+    """
+    configuration = lire_configuration() if configuration is None else configuration
+    if not configuration["actif"] or not configuration["encodages"]:
+        return False
+    app.add_middleware(
+        MiddlewareCompression,
+        seuil=configuration["seuil"],
+        encodages=configuration["encodages"],
+        niveaux=configuration["niveaux"]
+    )
+    return True
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Précompression des fichiers statiques")
+    sous_commandes = parser.add_subparsers(dest="commande", required=True)
+    commande = sous_commandes.add_parser("precompresser", help="Écrire les variantes .gz, .br et .zst")
+    commande.add_argument("repertoire", nargs="?", default="static", type=Path)
+    args = parser.parse_args(argv)
+
+    for fichier, tailles in precompresser(args.repertoire).items():
+        detail = ", ".join(f"{e} {t}" for e, t in tailles.items() if e != "identity")
+        print(f"{fichier} : {tailles['identity']} octets -> {detail}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
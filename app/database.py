@@ -1,14 +1,285 @@
-from sqlalchemy import create_engine
+import os
+import time
+import weakref
+from typing import Callable
+
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./budget.db"
+from app import requetes_lentes as journal_sql
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+# Profils de PRAGMA appliqués à chaque nouvelle connexion SQLite.
+# "standard" conserve les réglages par défaut de SQLite (journal rollback) ;
+# "performance" active le WAL pour que les lectures ne bloquent plus les
+# écritures, et attend un verrou plutôt que d'échouer sur "database is locked".
+PROFILS_SQLITE = {
+    "standard": {},
+    "performance": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,       # ms
+        "cache_size": -64000,       # Kio (valeur négative), soit 64 Mo
+        "mmap_size": 268435456,     # octets, soit 256 Mo
+        "temp_store": "MEMORY",
+    },
+}
+
+# Variable d'environnement surchargeant chaque PRAGMA du profil
+VARIABLES_PRAGMAS = {
+    "journal_mode": "BUDGET_SQLITE_JOURNAL_MODE",
+    "synchronous": "BUDGET_SQLITE_SYNCHRONOUS",
+    "busy_timeout": "BUDGET_SQLITE_BUSY_TIMEOUT",
+    "cache_size": "BUDGET_SQLITE_CACHE_SIZE",
+    "mmap_size": "BUDGET_SQLITE_MMAP_SIZE",
+    "temp_store": "BUDGET_SQLITE_TEMP_STORE",
+}
+
+VALEURS_TEXTE = {
+    "journal_mode": {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"},
+    "synchronous": {"OFF", "NORMAL", "FULL", "EXTRA"},
+    "temp_store": {"DEFAULT", "FILE", "MEMORY"},
+}
+
+
+def lire_configuration(environ=None) -> dict:
+    """
+    Lit la configuration de la base depuis les variables d'environnement.
+
+    Variables : BUDGET_DATABASE_URL, BUDGET_DB_PROFIL (standard | performance),
+    BUDGET_SQLITE_* pour surcharger un PRAGMA du profil, BUDGET_DB_POOL_SIZE,
+    BUDGET_DB_MAX_OVERFLOW, BUDGET_DB_POOL_TIMEOUT pour le pool de connexions, et
+    BUDGET_SQL_LENTE_MS (seuil, 200 ms par défaut), BUDGET_SQL_LENTE_EXPLAIN
+    (1 pour joindre le plan d'exécution) et BUDGET_SQL_LENTE_TAILLE (requêtes
+    lentes conservées, 100 par défaut) pour le journal des requêtes lentes.
+
+    Returns:
+        dict avec url, pragmas (PRAGMA à appliquer), pool (options du pool) et
+        requetes_lentes (seuil_ms, explain, taille)
+    """
+    environ = os.environ if environ is None else environ
+    profil = environ.get("BUDGET_DB_PROFIL", "performance")
+    if profil not in PROFILS_SQLITE:
+        raise ValueError(
+            f"Profil de base inconnu '{profil}' (attendu : {', '.join(PROFILS_SQLITE)})"
+        )
+    pragmas = dict(PROFILS_SQLITE[profil])
+    for pragma, variable in VARIABLES_PRAGMAS.items():
+        if variable in environ:
+            pragmas[pragma] = environ[variable]
+    for pragma, valeur in pragmas.items():
+        if pragma in VALEURS_TEXTE:
+            valeur = str(valeur).upper()
+            if valeur not in VALEURS_TEXTE[pragma]:
+                raise ValueError(f"Valeur invalide pour le PRAGMA {pragma} : {valeur}")
+        else:
+            valeur = int(valeur)
+        pragmas[pragma] = valeur
+
+    pool = {}
+    for option, variable in (
+        ("pool_size", "BUDGET_DB_POOL_SIZE"),
+        ("max_overflow", "BUDGET_DB_MAX_OVERFLOW"),
+        ("pool_timeout", "BUDGET_DB_POOL_TIMEOUT"),
+    ):
+        if variable in environ:
+            pool[option] = int(environ[variable])
+
+    requetes_lentes = {
+        "seuil_ms": float(environ.get("BUDGET_SQL_LENTE_MS", "200")),
+        "explain": environ.get("BUDGET_SQL_LENTE_EXPLAIN", "0").lower() in ("1", "true", "oui"),
+        "taille": int(environ.get("BUDGET_SQL_LENTE_TAILLE", "100")),
+    }
+    if requetes_lentes["seuil_ms"] < 0 or requetes_lentes["taille"] < 1:
+        raise ValueError("BUDGET_SQL_LENTE_MS doit être positif et BUDGET_SQL_LENTE_TAILLE au moins 1")
+
+    return {
+        "url": environ.get("BUDGET_DATABASE_URL", "sqlite:///./budget.db"),
+        "pragmas": pragmas,
+        "pool": pool,
+        "requetes_lentes": requetes_lentes,
+    }
+
+
+class _PoolMesure:
+    """
+    Classe de pool complétée (creer_engine) pour publier à ses abonnés la durée
+    d'obtention de chaque connexion, attente d'une connexion libre comprise.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.abonnes_attente = []
+
+    def connect(self):
+        debut = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            duree = time.perf_counter() - debut
+            for abonne in self.abonnes_attente:
+                abonne(duree)
+
+    def recreate(self):
+        # engine.dispose() remplace le pool : les abonnés passent au nouveau
+        pool = super().recreate()
+        pool.abonnes_attente = self.abonnes_attente
+        return pool
+
+
+_classes_pool_mesure = {}
+
+
+def _classe_pool_mesure(classe):
+    """Sous-classe de la classe de pool qui mesure l'attente (une par classe)"""
+    if classe not in _classes_pool_mesure:
+        _classes_pool_mesure[classe] = type(f"{classe.__name__}Mesure", (_PoolMesure, classe), {})
+    return _classes_pool_mesure[classe]
+
+
+def abonner_attente_pool(moteur, abonne: Callable) -> None:
+    """
+    Appelle abonne(duree) à chaque connexion obtenue du pool de l'engine
+    (synchrone, ou sync_engine d'un AsyncEngine), la durée d'obtention étant
+    en secondes. L'engine doit avoir été créé par creer_engine ou creer_engine_async.
+    """
+    if not isinstance(moteur.pool, _PoolMesure):
+        raise TypeError("Le pool de cet engine ne mesure pas l'attente (engine créé hors de creer_engine)")
+    if abonne not in moteur.pool.abonnes_attente:
+        moteur.pool.abonnes_attente.append(abonne)
+
+
+def _options_engine(url: str, pool: dict = None, poolclass=None) -> dict:
+    """
+    Options de create_engine communes aux engines synchrone et asynchrone ; la
+    classe de pool (celle du dialecte par défaut) mesure l'attente des connexions.
+    """
+    classe = poolclass or make_url(url).get_dialect().get_pool_class(make_url(url))
+    options = {"poolclass": _classe_pool_mesure(classe)}
+    if make_url(url).get_backend_name() == "sqlite":
+        options["connect_args"] = {"check_same_thread": False}
+        # Les bases en mémoire utilisent un pool à connexion unique, sans réglage de taille
+        if make_url(url).database not in (None, "", ":memory:"):
+            options.update(pool or {})
+    else:
+        options.update(pool or {})
+    return options
+
+
+def _installer_pragmas(moteur, pragmas: dict = None) -> None:
+    """Applique les PRAGMA à chaque nouvelle connexion SQLite de l'engine (synchrone)"""
+    if not pragmas or moteur.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(moteur, "connect")
+    def _appliquer_pragmas(connexion_dbapi, enregistrement):
+        curseur = connexion_dbapi.cursor()
+        for pragma, valeur in pragmas.items():
+            curseur.execute(f"PRAGMA {pragma}={valeur}")
+        curseur.close()
+
+
+# Abonnés à la durée des requêtes SQL, par engine (journal des requêtes lentes,
+# métriques, profilage) : chaque requête n'est chronométrée qu'une fois
+_CLE_DEBUTS_SQL = "debuts_sql"
+_abonnes_duree_sql = weakref.WeakKeyDictionary()
+
+
+def _chronometrer(moteur, abonnes: list) -> None:
+    """Installe sur l'engine le chronométrage publié aux abonnés"""
+
+    @event.listens_for(moteur, "before_cursor_execute")
+    def _avant_execution(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault(_CLE_DEBUTS_SQL, []).append(time.perf_counter())
+
+    @event.listens_for(moteur, "after_cursor_execute")
+    def _apres_execution(conn, cursor, statement, parameters, context, executemany):
+        duree = time.perf_counter() - conn.info[_CLE_DEBUTS_SQL].pop()
+        for abonne in abonnes:
+            abonne(conn, statement, parameters, executemany, duree)
+
+    @event.listens_for(moteur, "handle_error")
+    def _erreur_execution(contexte):
+        # after_cursor_execute n'est pas appelé quand l'exécution échoue
+        if contexte.connection is not None and contexte.execution_context is not None:
+            debuts = contexte.connection.info.get(_CLE_DEBUTS_SQL)
+            if debuts:
+                debuts.pop()
+
+
+def abonner_duree_sql(moteur, abonne: Callable) -> None:
+    """
+    Appelle abonne(conn, statement, parameters, executemany, duree) après chaque
+    requête de l'engine (synchrone, ou sync_engine d'un AsyncEngine), la durée
+    étant en secondes. Un abonné déjà inscrit ne l'est pas une seconde fois.
+    """
+    abonnes = _abonnes_duree_sql.get(moteur)
+    if abonnes is None:
+        abonnes = _abonnes_duree_sql[moteur] = []
+        _chronometrer(moteur, abonnes)
+    if abonne not in abonnes:
+        abonnes.append(abonne)
+
+
+def desabonner_duree_sql(moteur, abonne: Callable) -> None:
+    """Retire un abonné de l'engine ; sans effet s'il n'est pas inscrit"""
+    abonnes = _abonnes_duree_sql.get(moteur, [])
+    if abonne in abonnes:
+        abonnes.remove(abonne)
+
+
+def creer_engine(url: str, pragmas: dict = None, pool: dict = None, requetes_lentes: dict = None):
+    """
+    Crée l'engine SQLAlchemy et applique les PRAGMA à chaque nouvelle connexion
+    SQLite ; avec requetes_lentes, les requêtes au-delà du seuil sont journalisées.
+    """
+    moteur = create_engine(url, **_options_engine(url, pool))
+    _installer_pragmas(moteur, pragmas)
+    if requetes_lentes:
+        journal_sql.surveiller(moteur, **requetes_lentes)
+    return moteur
+
+
+def url_asynchrone(url: str) -> str:
+    """URL équivalente avec un pilote asynchrone (aiosqlite pour SQLite)"""
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite" and url.get_driver_name() == "pysqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    return url.render_as_string(hide_password=False)
+
+
+def creer_engine_async(url: str, pragmas: dict = None, pool: dict = None, requetes_lentes: dict = None):
+    """Crée l'AsyncEngine de la même base, avec les mêmes PRAGMA, pool et seuil de lenteur"""
+    url = url_asynchrone(url)
+    poolclass = None
+    if make_url(url).get_backend_name() == "sqlite" and make_url(url).database not in (None, "", ":memory:"):
+        # aiosqlite ouvre par défaut une connexion (et un thread) par requête
+        poolclass = AsyncAdaptedQueuePool
+    options = _options_engine(url, pool, poolclass)
+    options.pop("connect_args", None)
+    moteur = create_async_engine(url, **options)
+    _installer_pragmas(moteur.sync_engine, pragmas)
+    if requetes_lentes:
+        journal_sql.surveiller(moteur.sync_engine, **requetes_lentes)
+    return moteur
+
+
+CONFIGURATION = lire_configuration()
+SQLALCHEMY_DATABASE_URL = CONFIGURATION["url"]
+
+engine = creer_engine(**CONFIGURATION)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Accès asynchrone utilisé par les endpoints : les requêtes SQL n'occupent plus
+# un thread du pool de FastAPI. expire_on_commit=False évite un rechargement
+# implicite (impossible hors await) des objets renvoyés après le commit.
+async_engine = creer_engine_async(**CONFIGURATION)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 
@@ -21,6 +292,188 @@ def get_db():
         db.close()
 
 
-def init_db():
-    """Initialise la base de données en créant toutes les tables"""
-    Base.metadata.create_all(bind=engine)
+async def get_async_db():
+    """Génère une session de base de données asynchrone"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def init_db(bind=None):
+    """
+    Initialise la base de données : migrations, tables, rollup puis index.
+
+    Le rollup est alimenté avant la création des index : si un index unique
+    échoue sur des doublons, il reste cohérent. Un rollup vide alors que des
+    transactions existent (base antérieure au rollup, migration qui l'a
+    supprimé, démarrage interrompu) est reconstruit à chaque démarrage.
+    """
+    from app.rollup import reconstruire_rollup, rollup_incomplet
+
+    bind = engine if bind is None else bind
+    migrer_montants_en_centimes(bind)
+    migrer_categories(bind)
+    Base.metadata.create_all(bind=bind)
+    db = sessionmaker(bind=bind)()
+    try:
+        if rollup_incomplet(db):
+            reconstruire_rollup(db)
+    finally:
+        db.close()
+    mettre_a_niveau_schema(bind)
+
+
+# Index retirés des modèles, supprimés des bases qui les ont encore
+INDEX_RETIRES = ("ix_transactions_date_categorie_type_montant",)
+
+
+def mettre_a_niveau_schema(bind, tables=None):
+    """
+    Met à niveau une base existante en y créant les index déclarés sur les modèles.
+
+    create_all() ignore les tables déjà présentes, et donc leurs index : les
+    fichiers budget.db créés avant l'ajout d'un index sont complétés ici, après
+    la conversion éventuelle des montants en centimes et des catégories en ids.
+    Les index de INDEX_RETIRES sont supprimés.
+
+    Args:
+        bind: Engine ou connexion
+        tables: Tables dont les index sont créés (toutes par défaut)
+    """
+    migrer_montants_en_centimes(bind)
+    migrer_categories(bind)
+    for table in Base.metadata.sorted_tables if tables is None else tables:
+        for index in table.indexes:
+            try:
+                index.create(bind=bind, checkfirst=True)
+            except IntegrityError as exc:
+                raise RuntimeError(
+                    f"Impossible de créer l'index unique '{index.name}' : "
+                    f"la table '{table.name}' contient des doublons à corriger"
+                ) from exc
+    with bind.begin() as conn:
+        for nom in INDEX_RETIRES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {nom}"))
+
+
+# (table, colonne en euros (REAL), colonne en centimes qui la remplace)
+MIGRATIONS_CENTIMES = (
+    ("transactions", "montant", "montant_centimes"),
+    ("budgets", "montant_budget", "montant_budget_centimes"),
+)
+TAILLE_LOT_MIGRATION = 50_000
+
+
+def migrer_montants_en_centimes(bind, taille_lot: int = TAILLE_LOT_MIGRATION) -> bool:
+    """
+    Convertit les montants d'une base antérieure au stockage en centimes.
+
+    La migration se fait en ligne, table par table : la colonne en centimes est
+    ajoutée, remplie par lots de rowid validés séparément (la base reste
+    utilisable entre deux lots), puis une dernière transaction rattrape les
+    lignes écrites entre-temps et supprime l'ancienne colonne avec ses index.
+    Le rollup, dont le total était en euros, est supprimé pour être reconstruit
+    par init_db. Sans effet sur une base déjà migrée.
+
+    Returns:
+        True si une migration a été effectuée
+    """
+    migration = False
+    for table, ancienne, nouvelle in MIGRATIONS_CENTIMES:
+        inspecteur = inspect(bind)
+        if not inspecteur.has_table(table):
+            continue
+        colonnes = {colonne["name"] for colonne in inspecteur.get_columns(table)}
+        if ancienne not in colonnes:
+            continue
+        migration = True
+        conversion = f"CAST(ROUND({ancienne} * 100) AS INTEGER)"
+        with bind.connect() as conn:
+            if nouvelle not in colonnes:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {nouvelle} BIGINT NOT NULL DEFAULT 0"))
+                conn.commit()
+            dernier = conn.execute(text(f"SELECT coalesce(max(rowid), 0) FROM {table}")).scalar()
+            conn.commit()
+            for debut in range(0, dernier, taille_lot):
+                conn.execute(
+                    text(f"UPDATE {table} SET {nouvelle} = {conversion} WHERE rowid > :debut AND rowid <= :fin"),
+                    {"debut": debut, "fin": debut + taille_lot}
+                )
+                conn.commit()
+            conn.execute(text(f"UPDATE {table} SET {nouvelle} = {conversion} WHERE {nouvelle} != {conversion}"))
+            for index in inspecteur.get_indexes(table):
+                if ancienne in index["column_names"]:
+                    conn.execute(text(f"DROP INDEX {index['name']}"))
+            conn.execute(text(f"ALTER TABLE {table} DROP COLUMN {ancienne}"))
+            conn.commit()
+    inspecteur = inspect(bind)
+    if inspecteur.has_table("monthly_category_spend") and "total" in {
+        colonne["name"] for colonne in inspecteur.get_columns("monthly_category_spend")
+    }:
+        migration = True
+        with bind.begin() as conn:
+            conn.execute(text("DROP TABLE monthly_category_spend"))
+    return migration
+
+
+# Tables dont la colonne texte categorie est remplacée par categorie_id
+TABLES_CATEGORIE = ("transactions", "budgets")
+
+
+def migrer_categories(bind, taille_lot: int = TAILLE_LOT_MIGRATION) -> bool:
+    """
+    Remplace la colonne texte categorie d'une base existante par categorie_id.
+
+    Même déroulé que la migration des montants : la table categories est
+    remplie des noms distincts, categorie_id est ajoutée puis renseignée par
+    lots de rowid validés séparément, et une dernière transaction rattrape les
+    lignes écrites entre-temps avant de supprimer l'ancienne colonne et ses
+    index (recréés sur categorie_id par mettre_a_niveau_schema). Le rollup,
+    indexé par nom, est supprimé pour être reconstruit par init_db. Sans effet
+    sur une base déjà migrée.
+
+    Returns:
+        True si une migration a été effectuée
+    """
+    from app.models import Categorie
+
+    inspecteur = inspect(bind)
+    tables = [
+        table for table in TABLES_CATEGORIE
+        if inspecteur.has_table(table)
+        and "categorie" in {colonne["name"] for colonne in inspecteur.get_columns(table)}
+    ]
+    rollup_par_nom = inspecteur.has_table("monthly_category_spend") and "categorie" in {
+        colonne["name"] for colonne in inspecteur.get_columns("monthly_category_spend")
+    }
+    if not tables and not rollup_par_nom:
+        return False
+    Categorie.__table__.create(bind=bind, checkfirst=True)
+    for table in tables:
+        identifiant = f"(SELECT id FROM categories WHERE nom = {table}.categorie)"
+        nouveaux_noms = f"INSERT OR IGNORE INTO categories (nom) SELECT DISTINCT categorie FROM {table}"
+        with bind.connect() as conn:
+            conn.execute(text(nouveaux_noms))
+            if "categorie_id" not in {colonne["name"] for colonne in inspecteur.get_columns(table)}:
+                conn.execute(text(
+                    f"ALTER TABLE {table} ADD COLUMN categorie_id INTEGER NOT NULL DEFAULT 0 REFERENCES categories(id)"
+                ))
+            conn.commit()
+            dernier = conn.execute(text(f"SELECT coalesce(max(rowid), 0) FROM {table}")).scalar()
+            conn.commit()
+            for debut in range(0, dernier, taille_lot):
+                conn.execute(
+                    text(f"UPDATE {table} SET categorie_id = {identifiant} WHERE rowid > :debut AND rowid <= :fin"),
+                    {"debut": debut, "fin": debut + taille_lot}
+                )
+                conn.commit()
+            conn.execute(text(nouveaux_noms))
+            conn.execute(text(f"UPDATE {table} SET categorie_id = {identifiant} WHERE categorie_id IS NOT {identifiant}"))
+            for index in inspecteur.get_indexes(table):
+                if "categorie" in index["column_names"]:
+                    conn.execute(text(f"DROP INDEX {index['name']}"))
+            conn.execute(text(f"ALTER TABLE {table} DROP COLUMN categorie"))
+            conn.commit()
+    if rollup_par_nom:
+        with bind.begin() as conn:
+            conn.execute(text("DROP TABLE monthly_category_spend"))
+    return True
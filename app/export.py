@@ -0,0 +1,93 @@
+"""
+Export des transactions en flux, lot par lot depuis un curseur côté serveur.
+
+Les lignes sont lues par lots (yield_per) et converties au fil de l'eau : la
+mémoire utilisée ne dépend pas du nombre de transactions exportées, et le
+premier octet part dès que le premier lot est lu.
+"""
+import csv
+import io
+from datetime import date
+from typing import AsyncIterator, Iterator, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app import categories
+from app.models import Categorie, Transaction
+from app.montants import en_euros
+
+COLONNES_CSV = ["id", "date", "libelle", "type", "categorie", "montant"]
+TAILLE_LOT = 1000
+
+
+def requete_transactions(
+    categorie: Optional[str] = None,
+    date_debut: Optional[date] = None,
+    date_fin: Optional[date] = None
+):
+    """Sélection des colonnes exportées, avec les filtres de list_transactions"""
+    requete = select(
+        Transaction.id,
+        Transaction.date_transaction,
+        Transaction.libelle,
+        Transaction.type,
+        Categorie.nom,
+        Transaction.montant_centimes
+    ).join(Categorie, Categorie.id == Transaction.categorie_id)
+    if categorie:
+        requete = requete.where(Transaction.categorie_id == categories.id_par_nom(categorie))
+    if date_debut:
+        requete = requete.where(Transaction.date_transaction >= date_debut)
+    if date_fin:
+        requete = requete.where(Transaction.date_transaction <= date_fin)
+    return requete.order_by(Transaction.date_transaction.desc(), Transaction.id.desc())
+
+
+def iterer_lots(db: Session, requete, taille_lot: int = TAILLE_LOT) -> Iterator[list]:
+    """Parcourt le résultat d'une requête par lots, sans le charger entièrement"""
+    resultat = db.execute(requete.execution_options(yield_per=taille_lot))
+    try:
+        for lot in resultat.partitions():
+            yield lot
+    finally:
+        resultat.close()
+
+
+def _en_tete_csv(writer, tampon) -> str:
+    writer.writerow(COLONNES_CSV)
+    return tampon.getvalue()
+
+
+def _morceau_csv(writer, tampon, lot) -> str:
+    """Convertit un lot de lignes en un morceau de CSV, en réutilisant le tampon"""
+    tampon.seek(0)
+    tampon.truncate()
+    writer.writerows(
+        (t_id, jour.isoformat(), libelle, type_transaction, categorie, en_euros(montant))
+        for t_id, jour, libelle, type_transaction, categorie, montant in lot
+    )
+    return tampon.getvalue()
+
+
+def generer_csv(db: Session, requete, taille_lot: int = TAILLE_LOT) -> Iterator[str]:
+    """Produit le CSV par morceaux : l'en-tête, puis un morceau par lot de lignes"""
+    tampon = io.StringIO()
+    writer = csv.writer(tampon)
+    yield _en_tete_csv(writer, tampon)
+    for lot in iterer_lots(db, requete, taille_lot):
+        yield _morceau_csv(writer, tampon, lot)
+
+
+async def generer_csv_async(db: AsyncSession, requete, taille_lot: int = TAILLE_LOT) -> AsyncIterator[str]:
+    """generer_csv sur une session asynchrone, à partir d'un résultat en flux"""
+    tampon = io.StringIO()
+    writer = csv.writer(tampon)
+    yield _en_tete_csv(writer, tampon)
+    resultat = await db.stream(requete.execution_options(yield_per=taille_lot))
+    try:
+        async for lot in resultat.partitions():
+            yield _morceau_csv(writer, tampon, lot)
+    finally:
+        await resultat.close()
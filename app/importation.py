@@ -0,0 +1,245 @@
+"""
+Import en masse de transactions depuis un CSV au format de l'export.
+
+Le corps de la requête est lu en flux : les enregistrements CSV sont extraits
+au fil des morceaux reçus, validés par lots avec TransactionCreate, puis
+insérés par executemany avec un commit par lot. Le rollup mensuel et le cache
+des statistiques sont mis à jour une fois par lot, et les dépassements de
+budget sont vérifiés une fois par catégorie/mois touché, en fin d'import.
+"""
+import codecs
+import csv
+from typing import AsyncIterator, List, Optional, Set, Tuple, Union
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.export import COLONNES_CSV
+from app.models import Transaction
+from app.schemas import TransactionCreate
+from app import business_logic, cache, categories, rollup, versions
+
+TAILLE_LOT = 5000
+ERREURS_MAX = 1000
+COLONNES_REQUISES = [c for c in COLONNES_CSV if c != "id"]
+
+
+class CsvInvalide(ValueError):
+    """Le fichier CSV ne peut pas être importé (encodage ou en-tête)"""
+
+
+class LecteurCsvIncremental:
+    """
+    Découpe en enregistrements CSV un texte reçu par morceaux.
+
+    Un retour à la ligne ne termine un enregistrement que s'il est hors
+    guillemets (nombre pair de guillemets depuis le début de l'enregistrement),
+    ce qui préserve les libellés multi-lignes.
+    """
+
+    def __init__(self, encodage: str = "utf-8-sig"):
+        self._decodeur = codecs.getincrementaldecoder(encodage)()
+        self._en_cours = ""
+        self._guillemets = 0
+
+    def alimenter(self, morceau: bytes, final: bool = False) -> List[List[str]]:
+        try:
+            texte = self._decodeur.decode(morceau, final=final)
+        except UnicodeDecodeError as exc:
+            raise CsvInvalide("Le fichier n'est pas encodé en UTF-8") from exc
+        lignes_completes = []
+        for ligne in texte.splitlines(keepends=True):
+            self._en_cours += ligne
+            self._guillemets += ligne.count('"')
+            if self._guillemets % 2 == 0 and ligne.endswith(("\n", "\r")):
+                lignes_completes.append(self._en_cours)
+                self._en_cours, self._guillemets = "", 0
+        if final and self._en_cours:
+            lignes_completes.append(self._en_cours)
+            self._en_cours, self._guillemets = "", 0
+        return [
+            enregistrement for enregistrement in csv.reader(lignes_completes)
+            if enregistrement
+        ]
+
+
+async def lire_enregistrements(flux: AsyncIterator[bytes]) -> AsyncIterator[List[str]]:
+    """Enregistrements CSV d'un flux d'octets, au fur et à mesure de leur réception"""
+    lecteur = LecteurCsvIncremental()
+    async for morceau in flux:
+        for enregistrement in lecteur.alimenter(morceau):
+            yield enregistrement
+    for enregistrement in lecteur.alimenter(b"", final=True):
+        yield enregistrement
+
+
+def indexer_en_tete(en_tete: List[str]) -> dict:
+    """Position de chaque colonne requise dans l'en-tête"""
+    en_tete = [colonne.strip() for colonne in en_tete]
+    manquantes = [c for c in COLONNES_REQUISES if c not in en_tete]
+    if manquantes:
+        raise CsvInvalide(f"Colonnes manquantes dans l'en-tête : {', '.join(manquantes)}")
+    return {colonne: en_tete.index(colonne) for colonne in COLONNES_REQUISES}
+
+
+class RapportImport:
+    """Compteurs, erreurs par ligne et clés touchées au cours d'un import"""
+
+    def __init__(self):
+        self.lignes_lues = 0
+        self.transactions_importees = 0
+        self.nombre_erreurs = 0
+        self.erreurs = []
+        self.cles_depenses: Set[Tuple[str, int, int]] = set()
+
+    def ajouter_erreur(self, ligne: int, messages: List[str]) -> None:
+        self.nombre_erreurs += 1
+        if len(self.erreurs) < ERREURS_MAX:
+            self.erreurs.append({"ligne": ligne, "erreurs": messages})
+
+
+def _messages(exc: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(l) for l in erreur['loc']) or 'ligne'}: {erreur['msg']}"
+        for erreur in exc.errors()
+    ]
+
+
+def valider_lot(lot: List[Tuple[int, List[str]]], colonnes: dict, rapport: RapportImport) -> List[dict]:
+    """Valide un lot d'enregistrements ; les lignes invalides alimentent le rapport"""
+    valides = []
+    for numero, enregistrement in lot:
+        try:
+            valeurs = {c: enregistrement[i] for c, i in colonnes.items()}
+        except IndexError:
+            rapport.ajouter_erreur(numero, [f"{len(enregistrement)} colonnes au lieu de {len(colonnes)} attendues"])
+            continue
+        try:
+            transaction = TransactionCreate(
+                montant=valeurs["montant"],
+                libelle=valeurs["libelle"],
+                type=valeurs["type"],
+                categorie=valeurs["categorie"],
+                date_transaction=valeurs["date"]
+            )
+        except ValidationError as exc:
+            rapport.ajouter_erreur(numero, _messages(exc))
+            continue
+        valides.append(transaction.vers_modele())
+    return valides
+
+
+def ecrire_transactions(db: Session, lignes: List[dict], retourner_ids: bool = False) -> Optional[List[int]]:
+    """
+    Insère des transactions en masse et met à jour le rollup et le cache, sans commit.
+
+    Args:
+        db: Session de base de données
+        lignes: Transactions validées (TransactionCreate.vers_modele())
+        retourner_ids: Renvoyer les identifiants attribués, dans l'ordre des lignes
+
+    Returns:
+        Les identifiants si retourner_ids, sinon None
+    """
+    # Les catégories sont écrites par id, créées au besoin dans la même transaction
+    lignes_par_id = categories.remplacer_noms(db, lignes)
+    ids = None
+    if retourner_ids:
+        # Une seule instruction INSERT ... RETURNING, lignes renvoyées dans l'ordre des paramètres
+        resultat = db.execute(
+            insert(Transaction).returning(Transaction.id, sort_by_parameter_order=True), lignes_par_id
+        )
+        ids = list(resultat.scalars())
+    else:
+        db.execute(insert(Transaction), lignes_par_id)
+    rollup.appliquer_variations(db, rollup.cumuler_variations(lignes_par_id))
+    versions.incrementer(db, [versions.TRANSACTIONS])
+    cache.invalider_au_commit(db, {
+        (ligne["categorie"], ligne["date_transaction"].month, ligne["date_transaction"].year) for ligne in lignes
+    })
+    return ids
+
+
+def inserer_lot(db: Session, lignes: List[dict], rapport: RapportImport) -> None:
+    """Insère un lot validé (executemany), met à jour rollup et cache, puis valide le lot"""
+    if not lignes:
+        return
+    ecrire_transactions(db, lignes)
+    db.commit()
+    rapport.transactions_importees += len(lignes)
+    rapport.cles_depenses.update(
+        (ligne["categorie"], ligne["date_transaction"].month, ligne["date_transaction"].year)
+        for ligne in lignes if ligne["type"] == "depense"
+    )
+
+
+def traiter_lot(db: Session, lot: List[Tuple[int, List[str]]], colonnes: dict, rapport: RapportImport) -> None:
+    """Valide puis insère un lot d'enregistrements"""
+    inserer_lot(db, valider_lot(lot, colonnes, rapport), rapport)
+
+
+def conclure(db: Session, rapport: RapportImport) -> dict:
+    """Vérifie les dépassements une fois par catégorie/mois touché et construit la réponse"""
+    return {
+        "lignes_lues": rapport.lignes_lues,
+        "transactions_importees": rapport.transactions_importees,
+        "nombre_erreurs": rapport.nombre_erreurs,
+        "erreurs": rapport.erreurs,
+        "alertes": business_logic.verifier_depassements_periodes(db, rapport.cles_depenses),
+    }
+
+
+async def _executer(db: Union[Session, AsyncSession], fonction, *args):
+    """
+    Exécute une étape de l'import qui accède à la base.
+
+    Sur une AsyncSession, la fonction reçoit la session synchrone sous-jacente
+    (run_sync) : elle tourne sur la boucle d'événements, dont ses requêtes ne
+    bloquent pas le thread, et doit donc se limiter aux accès à la base. Sur
+    une Session, elle est exécutée dans le pool de threads.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fonction, *args)
+    return await run_in_threadpool(fonction, db, *args)
+
+
+async def _traiter_lot(db: Union[Session, AsyncSession], lot: List[Tuple[int, List[str]]],
+                       colonnes: dict, rapport: RapportImport) -> None:
+    """Valide un lot dans le pool de threads (pydantic, calcul pur), puis l'insère"""
+    lignes = await run_in_threadpool(valider_lot, lot, colonnes, rapport)
+    await _executer(db, inserer_lot, lignes, rapport)
+
+
+async def importer_csv(db: Union[Session, AsyncSession], flux: AsyncIterator[bytes], taille_lot: int = TAILLE_LOT) -> dict:
+    """
+    Importe un CSV reçu en flux, par lots validés et committés séparément.
+
+    Les lots déjà committés restent en base si une erreur bloquante (encodage)
+    survient plus loin dans le fichier.
+
+    Returns:
+        Rapport d'import : lignes lues, transactions importées, erreurs par
+        ligne (numérotées comme dans le fichier, en-tête = ligne 1) et alertes
+    """
+    rapport = RapportImport()
+    colonnes = None
+    lot = []
+    numero = 1
+    async for enregistrement in lire_enregistrements(flux):
+        if colonnes is None:
+            colonnes = indexer_en_tete(enregistrement)
+            continue
+        numero += 1
+        rapport.lignes_lues += 1
+        lot.append((numero, enregistrement))
+        if len(lot) >= taille_lot:
+            await _traiter_lot(db, lot, colonnes, rapport)
+            lot = []
+    if colonnes is None:
+        raise CsvInvalide("Le fichier CSV est vide")
+    if lot:
+        await _traiter_lot(db, lot, colonnes, rapport)
+    return await _executer(db, conclure, rapport)
@@ -1,53 +1,73 @@
-from fastapi import FastAPI, Depends, HTTPException, Query
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, StreamingResponse
-from sqlalchemy.orm import Session
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import date
-import io
-import csv
 
-from app.database import get_db, init_db
+from app.database import async_engine, engine, get_async_db, init_db
 from app.models import Transaction, Budget
 from app.schemas import (
-    TransactionCreate, TransactionResponse, TransactionCreateResponse,
-    BudgetCreate, BudgetResponse, BudgetStatResponse, BudgetUpdate
+    TransactionCreate, TransactionResponse, TransactionCreateResponse, ImportCsvResponse,
+    BudgetCreate, BudgetResponse, BudgetStatResponse, BudgetUpdate,
+    CacheStatistiquesResponse, RequeteLenteResponse, RapportMensuelResponse, RapportCategorieResponse,
+    TendanceCategorieResponse
 )
-from app import business_logic
+from app import analytique, business_logic, cache, categories, compression, export, export_colonnes, importation, metriques, pagination, profilage, requetes_lentes, serialisation, versions
 
 app = FastAPI(title="Gestion de Budget Personnel", version="1.0.0")
 
+# Mesures par requête (Server-Timing, journal JSON), si BUDGET_PROFILAGE=1
+profilage.activer(app, [engine, async_engine.sync_engine])
+
+# Métriques Prometheus, exposées par GET /metrics
+metriques.instrumenter(engine, "sync")
+metriques.instrumenter(async_engine.sync_engine, "async")
+app.add_middleware(metriques.MiddlewareMetriques)
+
+# Endpoint d'origine des requêtes SQL lentes (seuil : BUDGET_SQL_LENTE_MS)
+app.add_middleware(requetes_lentes.MiddlewareOrigine)
+
+# Compression des réponses (gzip, brotli, zstd), ajoutée en dernier pour
+# envelopper toutes les autres : BUDGET_COMPRESSION, BUDGET_COMPRESSION_SEUIL
+compression.activer(app)
+
 # Initialiser la base de données au démarrage
 @app.on_event("startup")
 def startup_event():
     init_db()
 
-# Servir les fichiers statiques (frontend)
-app.mount("/static", StaticFiles(directory="static"), name="static")
+
+@app.on_event("shutdown")
+def shutdown_event():
+    metriques.processus_termine()
+
+# Servir les fichiers statiques (frontend), variantes précompressées comprises
+app.mount("/static", compression.FichiersStatiques(directory="static"), name="static")
 
 
 @app.get("/")
-async def read_root():
+async def read_root(request: Request):
     """Redirige vers l'interface web"""
-    return FileResponse("static/index.html")
+    return compression.reponse_fichier("static/index.html", request.headers.get("accept-encoding", ""))
 
 
 # ========== ENDPOINTS TRANSACTIONS ==========
 
 @app.post("/api/transactions", response_model=TransactionCreateResponse, status_code=201)
-def create_transaction(transaction: TransactionCreate, db: Session = Depends(get_db)):
+async def create_transaction(transaction: TransactionCreate, db: AsyncSession = Depends(get_async_db)):
     """Crée une nouvelle transaction. Retourne une alerte si la dépense dépasse le budget."""
     alerte = None
     if transaction.type == "depense":
-        alerte = business_logic.verifier_depassement_budget(
+        alerte = await business_logic.verifier_depassement_budget_async(
             db, transaction.categorie,
             transaction.date_transaction.month, transaction.date_transaction.year,
             transaction.montant
         )
-    db_transaction = Transaction(**transaction.model_dump())
+    db_transaction = Transaction(**transaction.vers_modele())
     db.add(db_transaction)
-    db.commit()
-    db.refresh(db_transaction)
+    await db.commit()
+    await db.refresh(db_transaction)
     result = TransactionCreateResponse.model_validate(db_transaction)
     if alerte and alerte["depasse"]:
         result.alerte_depassement = True
@@ -55,162 +75,299 @@ def create_transaction(transaction: TransactionCreate, db: Session = Depends(get
     return result
 
 
+@app.post("/api/transactions/batch", response_model=List[TransactionCreateResponse], status_code=201)
+async def create_transactions_batch(transactions: List[TransactionCreate], db: AsyncSession = Depends(get_async_db)):
+    """
+    Crée un lot de transactions dans une seule transaction de base de données.
+
+    Les alertes de dépassement sont celles qu'auraient produites des appels
+    successifs à POST /api/transactions, dans l'ordre du lot ; chaque budget
+    concerné n'est lu qu'une fois.
+    """
+    lignes = [transaction.vers_modele() for transaction in transactions]
+    if not lignes:
+        return []
+    depenses = [
+        (l["categorie"], l["date_transaction"].month, l["date_transaction"].year, l["montant_centimes"])
+        for l in lignes if l["type"] == "depense"
+    ]
+    alertes = iter(await business_logic.verifier_depassements_lot_centimes_async(db, depenses))
+
+    ids = await db.run_sync(importation.ecrire_transactions, lignes, True)
+    await db.commit()
+
+    resultats = []
+    for transaction_id, ligne in zip(ids, lignes):
+        result = TransactionCreateResponse(id=transaction_id, **ligne)
+        alerte = next(alertes) if ligne["type"] == "depense" else None
+        if alerte and alerte["depasse"]:
+            result.alerte_depassement = True
+            result.message_alerte = alerte["message_alerte"]
+        resultats.append(result)
+    return resultats
+
+
+def _filtrer_transactions(query, categorie: Optional[str], date_debut: Optional[date], date_fin: Optional[date]):
+    if categorie:
+        query = query.where(Transaction.categorie_id == categories.id_par_nom(categorie))
+    if date_debut:
+        query = query.where(Transaction.date_transaction >= date_debut)
+    if date_fin:
+        query = query.where(Transaction.date_transaction <= date_fin)
+    return query
+
+
 @app.get("/api/transactions", response_model=List[TransactionResponse])
-def list_transactions(
+async def list_transactions(
+    request: Request,
+    response: Response,
     categorie: Optional[str] = Query(None, description="Filtrer par catégorie"),
     date_debut: Optional[date] = Query(None, description="Date de début (YYYY-MM-DD)"),
     date_fin: Optional[date] = Query(None, description="Date de fin (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Taille de page (pagination par curseur)"),
+    cursor: Optional[str] = Query(None, description="Curseur renvoyé dans l'en-tête X-Next-Cursor"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Liste toutes les transactions avec filtres optionnels"""
-    query = db.query(Transaction)
+    """
+    Liste toutes les transactions avec filtres optionnels.
+
+    Avec `limit`, la liste est paginée par curseur : l'en-tête X-Next-Cursor
+    de la réponse, à repasser dans `cursor`, donne accès à la page suivante.
+    Les lignes sont lues en tuples et encodées directement en JSON
+    (app.serialisation), au format de TransactionResponse.
+    """
+    non_modifie = await versions.reponse_conditionnelle(request, response, db, versions.TRANSACTIONS)
+    if non_modifie is not None:
+        return non_modifie
+    query = _filtrer_transactions(serialisation.selection_transactions(), categorie, date_debut, date_fin)
     
-    if categorie:
-        query = query.filter(Transaction.categorie == categorie)
+    if cursor:
+        try:
+            query = query.where(pagination.apres_curseur(cursor))
+        except pagination.CurseurInvalide as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
     
-    if date_debut:
-        query = query.filter(Transaction.date_transaction >= date_debut)
+    query = query.order_by(Transaction.date_transaction.desc(), Transaction.id.desc())
+    if limit is None:
+        transactions = (await db.execute(query)).all()
+        return serialisation.reponse_json(serialisation.transactions_json(transactions), response)
     
-    if date_fin:
-        query = query.filter(Transaction.date_transaction <= date_fin)
-    
-    transactions = query.order_by(Transaction.date_transaction.desc()).all()
-    return transactions
+    transactions = (await db.execute(query.limit(limit + 1))).all()
+    if len(transactions) > limit:
+        transactions = transactions[:limit]
+        dernier = transactions[-1]
+        response.headers["X-Next-Cursor"] = pagination.encoder_curseur(
+            dernier.date_transaction, dernier.id
+        )
+    return serialisation.reponse_json(serialisation.transactions_json(transactions), response)
+
+
+@app.get("/api/transactions/stream")
+async def stream_transactions(
+    categorie: Optional[str] = Query(None, description="Filtrer par catégorie"),
+    date_debut: Optional[date] = Query(None, description="Date de début (YYYY-MM-DD)"),
+    date_fin: Optional[date] = Query(None, description="Date de fin (YYYY-MM-DD)"),
+    since_id: Optional[int] = Query(None, ge=0, description="Reprendre après la transaction de cet id"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Flux NDJSON des transactions : un objet TransactionResponse par ligne.
+
+    Mêmes filtres que list_transactions. Les transactions sont émises par id
+    croissant, en suivant la clé primaire sans tri préalable : la première
+    ligne part dès le premier lot lu, quelle que soit la taille du résultat.
+    Pour reprendre un flux interrompu, repasser le dernier id reçu dans
+    `since_id`.
+    """
+    query = _filtrer_transactions(serialisation.selection_transactions(), categorie, date_debut, date_fin)
+    if since_id is not None:
+        query = query.where(Transaction.id > since_id)
+    return StreamingResponse(
+        serialisation.generer_ndjson_async(db, query.order_by(Transaction.id)),
+        media_type="application/x-ndjson"
+    )
 
 
 @app.get("/api/transactions/{transaction_id}", response_model=TransactionResponse)
-def get_transaction(transaction_id: int, db: Session = Depends(get_db)):
+async def get_transaction(transaction_id: int, db: AsyncSession = Depends(get_async_db)):
     """Récupère une transaction par son ID"""
-    transaction = db.query(Transaction).filter(Transaction.id == transaction_id).first()
+    transaction = await db.get(Transaction, transaction_id)
     if not transaction:
         raise HTTPException(status_code=404, detail="Transaction non trouvée")
     return transaction
 
 
 @app.put("/api/transactions/{transaction_id}", response_model=TransactionResponse)
-def update_transaction(
+async def update_transaction(
     transaction_id: int,
     transaction: TransactionCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Modifie une transaction existante"""
-    db_transaction = db.query(Transaction).filter(Transaction.id == transaction_id).first()
+    db_transaction = await db.get(Transaction, transaction_id)
     if not db_transaction:
         raise HTTPException(status_code=404, detail="Transaction non trouvée")
-    for key, value in transaction.model_dump().items():
+    for key, value in transaction.vers_modele().items():
         setattr(db_transaction, key, value)
-    db.commit()
-    db.refresh(db_transaction)
+    await db.commit()
+    await db.refresh(db_transaction)
     return db_transaction
 
 
 @app.delete("/api/transactions/{transaction_id}", status_code=204)
-def delete_transaction(transaction_id: int, db: Session = Depends(get_db)):
+async def delete_transaction(transaction_id: int, db: AsyncSession = Depends(get_async_db)):
     """Supprime une transaction"""
-    transaction = db.query(Transaction).filter(Transaction.id == transaction_id).first()
+    transaction = await db.get(Transaction, transaction_id)
     if not transaction:
         raise HTTPException(status_code=404, detail="Transaction non trouvée")
-    db.delete(transaction)
-    db.commit()
+    await db.delete(transaction)
+    await db.commit()
     return None
 
 
 @app.get("/api/transactions/export/csv")
-def export_transactions_csv(
+async def export_transactions_csv(
     categorie: Optional[str] = Query(None),
     date_debut: Optional[date] = Query(None),
     date_fin: Optional[date] = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Exporte les transactions en CSV."""
-    query = db.query(Transaction)
-    if categorie:
-        query = query.filter(Transaction.categorie == categorie)
-    if date_debut:
-        query = query.filter(Transaction.date_transaction >= date_debut)
-    if date_fin:
-        query = query.filter(Transaction.date_transaction <= date_fin)
-    transactions = query.order_by(Transaction.date_transaction.desc()).all()
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["id", "date", "libelle", "type", "categorie", "montant"])
-    for t in transactions:
-        writer.writerow([
-            t.id, t.date_transaction.isoformat(), t.libelle, t.type, t.categorie, t.montant
-        ])
-    output.seek(0)
+    """Exporte les transactions en CSV, en flux à partir d'un curseur lu par lots."""
+    requete = export.requete_transactions(categorie, date_debut, date_fin)
     return StreamingResponse(
-        iter([output.getvalue()]),
+        metriques.compter_octets_export(export.generer_csv_async(db, requete)),
         media_type="text/csv",
         headers={"Content-Disposition": "attachment; filename=transactions.csv"}
     )
 
 
+def _export_colonnes(db: AsyncSession, requete, format_export: str) -> StreamingResponse:
+    return StreamingResponse(
+        export_colonnes.generer_async(db, requete, format_export),
+        media_type=export_colonnes.TYPES_MEDIA[format_export],
+        headers={
+            "Content-Disposition":
+                f"attachment; filename=transactions.{export_colonnes.EXTENSIONS[format_export]}"
+        }
+    )
+
+
+@app.get("/api/transactions/export/parquet")
+async def export_transactions_parquet(
+    categorie: Optional[str] = Query(None),
+    date_debut: Optional[date] = Query(None),
+    date_fin: Optional[date] = Query(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Exporte les transactions en Parquet, un row group par lot lu sur le curseur."""
+    requete = export.requete_transactions(categorie, date_debut, date_fin)
+    return _export_colonnes(db, requete, export_colonnes.PARQUET)
+
+
+@app.get("/api/transactions/export/arrow")
+async def export_transactions_arrow(
+    categorie: Optional[str] = Query(None),
+    date_debut: Optional[date] = Query(None),
+    date_fin: Optional[date] = Query(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Exporte les transactions en flux Arrow IPC, un RecordBatch par lot lu sur le curseur."""
+    requete = export.requete_transactions(categorie, date_debut, date_fin)
+    return _export_colonnes(db, requete, export_colonnes.ARROW)
+
+
+@app.post("/api/transactions/import/csv", response_model=ImportCsvResponse)
+async def import_transactions_csv(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Importe des transactions depuis un CSV au format de l'export (corps de la requête).
+
+    La colonne id est ignorée. Les lignes invalides sont signalées dans le
+    rapport sans bloquer l'import des autres ; les dépassements de budget sont
+    vérifiés une fois par catégorie et par mois touchés.
+    """
+    try:
+        return await importation.importer_csv(db, request.stream())
+    except importation.CsvInvalide as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
 # ========== ENDPOINTS BUDGETS ==========
 
+def _erreur_budget_existant(categorie: str, mois: int, annee: int) -> HTTPException:
+    """Erreur renvoyée lorsque la contrainte d'unicité des budgets est violée"""
+    return HTTPException(
+        status_code=400,
+        detail=f"Un budget existe déjà pour la catégorie '{categorie}' en {mois:02d}/{annee}"
+    )
+
+
 @app.post("/api/budgets", response_model=BudgetResponse, status_code=201)
-def create_budget(budget: BudgetCreate, db: Session = Depends(get_db)):
+async def create_budget(budget: BudgetCreate, db: AsyncSession = Depends(get_async_db)):
     """Crée un nouveau budget pour une catégorie et une période"""
-    # Vérifier si un budget existe déjà pour cette catégorie et période
-    existing = db.query(Budget).filter(
-        Budget.categorie == budget.categorie,
-        Budget.mois == budget.mois,
-        Budget.annee == budget.annee
-    ).first()
-    
-    if existing:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Un budget existe déjà pour la catégorie '{budget.categorie}' en {budget.mois:02d}/{budget.annee}"
-        )
-    
-    db_budget = Budget(**budget.model_dump())
+    db_budget = Budget(**budget.vers_modele())
     db.add(db_budget)
-    db.commit()
-    db.refresh(db_budget)
+    # L'index unique (categorie, mois, annee) garantit l'absence de doublon
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise _erreur_budget_existant(budget.categorie, budget.mois, budget.annee)
+    await db.refresh(db_budget)
     return db_budget
 
 
 @app.get("/api/budgets", response_model=List[BudgetResponse])
-def list_budgets(
+async def list_budgets(
+    request: Request,
+    response: Response,
     categorie: Optional[str] = Query(None, description="Filtrer par catégorie"),
     mois: Optional[int] = Query(None, ge=1, le=12, description="Filtrer par mois"),
     annee: Optional[int] = Query(None, description="Filtrer par année"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Liste tous les budgets avec filtres optionnels"""
-    query = db.query(Budget)
+    """Liste tous les budgets avec filtres optionnels, encodés directement en JSON"""
+    non_modifie = await versions.reponse_conditionnelle(request, response, db, versions.BUDGETS)
+    if non_modifie is not None:
+        return non_modifie
+    query = serialisation.selection_budgets()
     
     if categorie:
-        query = query.filter(Budget.categorie == categorie)
+        query = query.where(Budget.categorie_id == categories.id_par_nom(categorie))
     
     if mois:
-        query = query.filter(Budget.mois == mois)
+        query = query.where(Budget.mois == mois)
     
     if annee:
-        query = query.filter(Budget.annee == annee)
+        query = query.where(Budget.annee == annee)
     
-    budgets = query.order_by(Budget.annee.desc(), Budget.mois.desc()).all()
-    return budgets
+    budgets = (await db.execute(query.order_by(Budget.annee.desc(), Budget.mois.desc()))).all()
+    return serialisation.reponse_json(serialisation.budgets_json(budgets), response)
 
 
 @app.get("/api/budgets/stats/{categorie}", response_model=BudgetStatResponse)
-def get_budget_stats(
+async def get_budget_stats(
+    request: Request,
+    response: Response,
     categorie: str,
     mois: int = Query(..., ge=1, le=12, description="Mois (1-12)"),
     annee: int = Query(..., ge=2000, description="Année"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Obtient les statistiques d'un budget pour une catégorie et une période"""
-    stats = business_logic.obtenir_statistiques_budget(db, categorie, mois, annee)
+    non_modifie = await versions.reponse_conditionnelle(request, response, db, versions.TRANSACTIONS, versions.BUDGETS)
+    if non_modifie is not None:
+        return non_modifie
+    stats = await cache.statistiques_budget_async(db, categorie, mois, annee)
     return BudgetStatResponse(**stats)
 
 
 @app.get("/api/budgets/stats", response_model=List[BudgetStatResponse])
-def list_all_budget_stats(
+async def list_all_budget_stats(
+    request: Request,
+    response: Response,
     mois: Optional[int] = Query(None, ge=1, le=12, description="Mois (1-12)"),
     annee: Optional[int] = Query(None, ge=2000, description="Année"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Liste les statistiques de tous les budgets pour une période donnée"""
     if not mois or not annee:
@@ -219,66 +376,166 @@ def list_all_budget_stats(
             detail="Les paramètres 'mois' et 'annee' sont requis"
         )
     
-    budgets = db.query(Budget).filter(
-        Budget.mois == mois,
-        Budget.annee == annee
-    ).all()
-    
-    stats_list = []
-    for budget in budgets:
-        stats = business_logic.obtenir_statistiques_budget(
-            db, budget.categorie, budget.mois, budget.annee
-        )
-        stats_list.append(BudgetStatResponse(**stats))
-    
-    return stats_list
+    non_modifie = await versions.reponse_conditionnelle(request, response, db, versions.TRANSACTIONS, versions.BUDGETS)
+    if non_modifie is not None:
+        return non_modifie
+    stats_list = await cache.statistiques_periode_async(db, mois, annee)
+    return [BudgetStatResponse(**stats) for stats in stats_list]
 
 
 @app.get("/api/budgets/{budget_id}", response_model=BudgetResponse)
-def get_budget(budget_id: int, db: Session = Depends(get_db)):
+async def get_budget(budget_id: int, db: AsyncSession = Depends(get_async_db)):
     """Récupère un budget par son ID"""
-    budget = db.query(Budget).filter(Budget.id == budget_id).first()
+    budget = await db.get(Budget, budget_id)
     if not budget:
         raise HTTPException(status_code=404, detail="Budget non trouvé")
     return budget
 
 
 @app.put("/api/budgets/{budget_id}", response_model=BudgetResponse)
-def update_budget(
+async def update_budget(
     budget_id: int,
     budget_update: BudgetUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Modifie un budget existant"""
-    db_budget = db.query(Budget).filter(Budget.id == budget_id).first()
+    db_budget = await db.get(Budget, budget_id)
     if not db_budget:
         raise HTTPException(status_code=404, detail="Budget non trouvé")
-    data = budget_update.model_dump(exclude_unset=True)
-    if data:
-        for key, value in data.items():
-            setattr(db_budget, key, value)
-        existing = db.query(Budget).filter(
-            Budget.categorie == db_budget.categorie,
-            Budget.mois == db_budget.mois,
-            Budget.annee == db_budget.annee,
-            Budget.id != budget_id
-        ).first()
-        if existing:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Un budget existe déjà pour la catégorie '{db_budget.categorie}' en {db_budget.mois:02d}/{db_budget.annee}"
-            )
-    db.commit()
-    db.refresh(db_budget)
+    data = budget_update.vers_modele()
+    for key, value in data.items():
+        setattr(db_budget, key, value)
+    categorie, mois, annee = db_budget.categorie, db_budget.mois, db_budget.annee
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise _erreur_budget_existant(categorie, mois, annee)
+    await db.refresh(db_budget)
     return db_budget
 
 
 @app.delete("/api/budgets/{budget_id}", status_code=204)
-def delete_budget(budget_id: int, db: Session = Depends(get_db)):
+async def delete_budget(budget_id: int, db: AsyncSession = Depends(get_async_db)):
     """Supprime un budget"""
-    budget = db.query(Budget).filter(Budget.id == budget_id).first()
+    budget = await db.get(Budget, budget_id)
     if not budget:
         raise HTTPException(status_code=404, detail="Budget non trouvé")
-    db.delete(budget)
-    db.commit()
+    await db.delete(budget)
+    await db.commit()
+    return None
+
+
+# ========== ENDPOINTS RAPPORTS ==========
+
+def _verifier_periode(annee_debut: int, annee_fin: Optional[int]) -> int:
+    """Année de fin de la période (annee_debut par défaut), postérieure à l'année de début"""
+    if annee_fin is None:
+        return annee_debut
+    if annee_fin < annee_debut:
+        raise HTTPException(
+            status_code=400,
+            detail="L'année de fin doit être postérieure ou égale à l'année de début"
+        )
+    return annee_fin
+
+
+@app.get("/api/reports/monthly", response_model=List[RapportMensuelResponse])
+async def get_monthly_report(
+    request: Request,
+    response: Response,
+    annee_debut: int = Query(..., ge=2000, description="Première année de la période"),
+    annee_fin: Optional[int] = Query(None, ge=2000, description="Dernière année incluse (annee_debut par défaut)"),
+    type: str = Query("depense", pattern="^(revenu|depense)$", description="Type de transaction"),
+    categorie: Optional[str] = Query(None, description="Limiter à une catégorie"),
+    fenetre: int = Query(3, ge=1, le=120, description="Taille de la somme glissante, en mois"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Totaux mensuels de la période, avec cumul et somme glissante"""
+    annee_fin = _verifier_periode(annee_debut, annee_fin)
+    non_modifie = await versions.reponse_conditionnelle(request, response, db, versions.TRANSACTIONS)
+    if non_modifie is not None:
+        return non_modifie
+    return await analytique.rapport_mensuel_async(db, annee_debut, annee_fin, type, categorie, fenetre)
+
+
+@app.get("/api/reports/categories", response_model=List[RapportCategorieResponse])
+async def get_categories_report(
+    request: Request,
+    response: Response,
+    annee_debut: int = Query(..., ge=2000, description="Première année de la période"),
+    annee_fin: Optional[int] = Query(None, ge=2000, description="Dernière année incluse (annee_debut par défaut)"),
+    type: str = Query("depense", pattern="^(revenu|depense)$", description="Type de transaction"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Total et part de chaque catégorie sur la période, de la plus grosse à la plus petite"""
+    annee_fin = _verifier_periode(annee_debut, annee_fin)
+    non_modifie = await versions.reponse_conditionnelle(request, response, db, versions.TRANSACTIONS)
+    if non_modifie is not None:
+        return non_modifie
+    return await analytique.rapport_categories_async(db, annee_debut, annee_fin, type)
+
+
+@app.get("/api/reports/trend", response_model=List[TendanceCategorieResponse])
+async def get_trend_report(
+    request: Request,
+    response: Response,
+    annee: int = Query(..., ge=2000, description="Dernière année de la période"),
+    nombre_mois: int = Query(12, description="12 (l'année) ou 24 (l'année et la précédente)"),
+    categories: Optional[str] = Query(None, description="Catégories séparées par des virgules (toutes par défaut)"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Tendance mensuelle par catégorie : dépenses, revenus, budget, reste et
+    pourcentage consommé de chaque mois, en une seule requête groupée sur le rollup.
+    """
+    if nombre_mois not in (12, 24):
+        raise HTTPException(
+            status_code=400,
+            detail="Le paramètre 'nombre_mois' doit valoir 12 ou 24"
+        )
+    non_modifie = await versions.reponse_conditionnelle(request, response, db, versions.TRANSACTIONS, versions.BUDGETS)
+    if non_modifie is not None:
+        return non_modifie
+    liste_categories = None
+    if categories:
+        liste_categories = [c.strip() for c in categories.split(",") if c.strip()]
+    return await business_logic.obtenir_tendance_async(db, annee, nombre_mois, liste_categories)
+
+
+# ========== ENDPOINTS ADMINISTRATION ==========
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Métriques au format d'exposition Prometheus"""
+    return Response(content=metriques.exposer(), media_type=metriques.TYPE_CONTENU)
+
+
+@app.get("/api/admin/cache", response_model=CacheStatistiquesResponse)
+async def get_cache_state():
+    """État des caches de statistiques (taille, succès, échecs, évictions)"""
+    return CacheStatistiquesResponse(
+        statistiques=cache.cache_statistiques.etat(),
+        periodes=cache.cache_periodes.etat()
+    )
+
+
+@app.delete("/api/admin/cache", status_code=204)
+async def clear_cache():
+    """Vide les caches de statistiques et remet leurs compteurs à zéro"""
+    cache.cache_statistiques.vider()
+    cache.cache_periodes.vider()
+    return None
+
+
+@app.get("/api/admin/requetes-lentes", response_model=List[RequeteLenteResponse])
+async def list_slow_queries():
+    """Dernières requêtes SQL lentes, de la plus récente à la plus ancienne"""
+    return requetes_lentes.journal.entrees()
+
+
+@app.delete("/api/admin/requetes-lentes", status_code=204)
+async def clear_slow_queries():
+    """Vide le journal des requêtes lentes"""
+    requetes_lentes.journal.vider()
     return None
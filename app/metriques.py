@@ -0,0 +1,156 @@
+"""
+Métriques Prometheus de l'application, exposées par GET /metrics.
+
+- budget_http_request_duration_seconds : latence par méthode, gabarit de route
+  (ex. /api/transactions/{transaction_id}) et code de statut ; le _count de
+  l'histogramme donne le nombre de requêtes
+- budget_db_pool_checkouts_total, budget_db_pool_wait_seconds,
+  budget_db_pool_checked_out : emprunts de connexions au pool, attente pour
+  obtenir une connexion (mesurée par le pool de app.database), connexions en cours
+- budget_sql_duration_seconds : durée des requêtes SQL
+- budget_overrun_checks_total / budget_overrun_alerts_total : vérifications de
+  dépassement de budget et alertes produites (taux : rate() côté Prometheus)
+- budget_export_csv_bytes_total : octets envoyés par l'export CSV
+
+Chaque série a son propre verrou (prometheus_client) : aucun verrou global
+n'est pris sur le chemin des requêtes. Avec plusieurs workers uvicorn,
+définir PROMETHEUS_MULTIPROC_DIR (répertoire vide, recréé à chaque
+démarrage) : chaque processus écrit ses valeurs dans des fichiers mappés en
+mémoire, agrégés par le worker qui sert /metrics.
+"""
+import os
+import time
+from typing import AsyncIterator
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+from sqlalchemy import event
+
+from app.database import abonner_attente_pool, abonner_duree_sql
+
+TYPE_CONTENU = CONTENT_TYPE_LATEST
+ROUTE_INCONNUE = "non_routee"
+
+DUREE_REQUETES = Histogram(
+    "budget_http_request_duration_seconds",
+    "Durée de traitement des requêtes HTTP",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+EMPRUNTS_POOL = Counter(
+    "budget_db_pool_checkouts_total", "Connexions empruntées au pool", ["engine"]
+)
+ATTENTE_POOL = Histogram(
+    "budget_db_pool_wait_seconds",
+    "Attente pour obtenir une connexion du pool",
+    ["engine"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+)
+CONNEXIONS_EMPRUNTEES = Gauge(
+    "budget_db_pool_checked_out", "Connexions actuellement empruntées au pool", ["engine"],
+    multiprocess_mode="livesum"
+)
+DUREE_SQL = Histogram(
+    "budget_sql_duration_seconds",
+    "Durée des requêtes SQL",
+    ["engine"],
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+)
+VERIFICATIONS_DEPASSEMENT = Counter(
+    "budget_overrun_checks_total", "Dépenses vérifiées par rapport à leur budget"
+)
+ALERTES_DEPASSEMENT = Counter(
+    "budget_overrun_alerts_total", "Dépenses ayant déclenché une alerte de dépassement"
+)
+OCTETS_EXPORT = Counter(
+    "budget_export_csv_bytes_total", "Octets envoyés par l'export CSV des transactions"
+)
+
+
+def compter_verification(depasse: bool) -> None:
+    """Comptabilise une vérification de dépassement et, le cas échéant, l'alerte"""
+    VERIFICATIONS_DEPASSEMENT.inc()
+    if depasse:
+        ALERTES_DEPASSEMENT.inc()
+
+
+async def compter_octets_export(morceaux: AsyncIterator[str]) -> AsyncIterator[bytes]:
+    """Encode les morceaux du CSV et comptabilise les octets envoyés"""
+    async for morceau in morceaux:
+        donnees = morceau.encode("utf-8")
+        OCTETS_EXPORT.inc(len(donnees))
+        yield donnees
+
+
+def instrumenter(engine, nom: str) -> None:
+    """
+    Mesure les requêtes SQL et les emprunts au pool d'un engine synchrone
+    (ou du sync_engine d'un AsyncEngine) créé par app.database.
+    """
+    duree_sql = DUREE_SQL.labels(engine=nom)
+    emprunts = EMPRUNTS_POOL.labels(engine=nom)
+    empruntees = CONNEXIONS_EMPRUNTEES.labels(engine=nom)
+
+    def _observer_sql(conn, statement, parameters, executemany, duree):
+        duree_sql.observe(duree)
+
+    abonner_duree_sql(engine, _observer_sql)
+    abonner_attente_pool(engine, ATTENTE_POOL.labels(engine=nom).observe)
+
+    @event.listens_for(engine, "checkout")
+    def _emprunt(connexion_dbapi, enregistrement, proxy):
+        emprunts.inc()
+        empruntees.inc()
+
+    @event.listens_for(engine, "checkin")
+    def _restitution(connexion_dbapi, enregistrement):
+        empruntees.dec()
+
+
+class MiddlewareMetriques:
+    """Middleware ASGI mesurant la latence des requêtes par gabarit de route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        statut = 500
+        debut = time.perf_counter()
+
+        async def envoyer(message):
+            nonlocal statut
+            if message["type"] == "http.response.start":
+                statut = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, envoyer)
+        finally:
+            # Le routeur de FastAPI dépose la route trouvée dans le scope : le
+            # gabarit évite une série par identifiant de transaction
+            route = scope.get("route")
+            DUREE_REQUETES.labels(
+                method=scope["method"],
+                route=getattr(route, "path", ROUTE_INCONNUE),
+                status=str(statut)
+            ).observe(time.perf_counter() - debut)
+
+
+def exposer() -> bytes:
+    """Texte au format Prometheus, agrégé sur tous les workers en mode multiprocessus"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registre = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registre)
+        return generate_latest(registre)
+    return generate_latest()
+
+
+def processus_termine() -> None:
+    """Retire les valeurs « live » du processus qui s'arrête (mode multiprocessus)"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(os.getpid())
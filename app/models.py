@@ -1,30 +1,225 @@
-from sqlalchemy import Column, Integer, String, Float, Date
+from sqlalchemy import BigInteger, Column, ForeignKey, Integer, String, Date, Index, event, inspect, select
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import Session, column_property
 from datetime import date
 from app.database import Base
+from app.montants import en_centimes, en_euros
 
 
-class Transaction(Base):
+class Categorie(Base):
+    """Dictionnaire des catégories : transactions, budgets et rollup en référencent l'id."""
+    __tablename__ = "categories"
+
+    id = Column(Integer, primary_key=True)
+    nom = Column(String, nullable=False, unique=True)
+
+    def __repr__(self):
+        return f"<Categorie(id={self.id}, nom='{self.nom}')>"
+
+
+class CategorieNommee:
+    """
+    Attribut categorie (nom) des modèles qui stockent categorie_id.
+
+    L'API et le code métier continuent de lire et d'affecter un nom : le nom
+    affecté est conservé jusqu'au flush, où il est résolu en id (catégorie
+    créée si besoin) ; le nom lu vient de nom_categorie, chargé avec la ligne.
+    En requête, Modele.categorie est le nom (sous-requête, non indexée) :
+    filtrer plutôt sur categorie_id.
+    """
+
+    @hybrid_property
+    def categorie(self):
+        if "_categorie_a_resoudre" in self.__dict__:
+            return self.__dict__["_categorie_a_resoudre"]
+        return self.nom_categorie
+
+    @categorie.inplace.setter
+    def _categorie_setter(self, nom: str) -> None:
+        self.__dict__["_categorie_a_resoudre"] = nom
+        if inspect(self).persistent:
+            # Réaffectation : l'objet passe parmi les modifiés (le flush résoudra
+            # le nom) et l'id d'origine est conservé dans l'historique
+            self.categorie_id = self.categorie_id
+
+    @categorie.inplace.expression
+    @classmethod
+    def _categorie_expression(cls):
+        return cls.nom_categorie
+
+
+def _nom_categorie(modele):
+    """Nom de la catégorie, lu avec la ligne (recherche par clé primaire)"""
+    return column_property(
+        select(Categorie.nom).where(Categorie.id == modele.categorie_id).scalar_subquery()
+    )
+
+
+class Transaction(CategorieNommee, Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Filtre catégorie + type + période de business_logic ; montant en fin
+        # d'index pour que le SUM des dépenses soit servi par l'index seul.
+        Index("ix_transactions_categorie_type_date", "categorie_id", "type", "date_transaction", "montant_centimes"),
+        # Tri et filtres par date de list_transactions et de l'export CSV
+        Index("ix_transactions_date_transaction", "date_transaction"),
+        # Pagination par curseur filtrée par catégorie, sans tri en mémoire
+        Index("ix_transactions_categorie_date", "categorie_id", "date_transaction"),
+        # Flux NDJSON filtré par catégorie : l'index suit l'ordre des ids (rowid
+        # implicite), la reprise après since_id se fait sans tri
+        Index("ix_transactions_categorie_id", "categorie_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    montant = Column(Float, nullable=False)
+    # Montants en centimes entiers : convertis en euros par les schémas de l'API
+    montant_centimes = Column(BigInteger, nullable=False)
     libelle = Column(String, nullable=False)
     type = Column(String, nullable=False)  # "revenu" ou "depense"
-    categorie = Column(String, nullable=False)
-    date_transaction = Column(Date, nullable=False, default=date.today)
+    # active_history : l'ancienne valeur est chargée avant modification, pour
+    # invalider le cache de la catégorie et du mois d'origine
+    categorie_id = column_property(Column(Integer, ForeignKey("categories.id"), nullable=False), active_history=True)
+    date_transaction = column_property(Column(Date, nullable=False, default=date.today), active_history=True)
+
+    @hybrid_property
+    def montant(self) -> float:
+        """Montant en euros, lu et affecté via montant_centimes"""
+        return None if self.montant_centimes is None else en_euros(self.montant_centimes)
+
+    @montant.inplace.setter
+    def _montant_setter(self, euros: float) -> None:
+        self.montant_centimes = en_centimes(euros)
+
+    @montant.inplace.expression
+    @classmethod
+    def _montant_expression(cls):
+        return cls.montant_centimes / 100.0
 
     def __repr__(self):
-        return f"<Transaction(id={self.id}, montant={self.montant}, libelle='{self.libelle}', type='{self.type}', categorie='{self.categorie}', date={self.date_transaction})>"
+        return f"<Transaction(id={self.id}, montant_centimes={self.montant_centimes}, libelle='{self.libelle}', type='{self.type}', categorie='{self.categorie}', date={self.date_transaction})>"
 
 
-class Budget(Base):
+class Budget(CategorieNommee, Base):
     __tablename__ = "budgets"
+    __table_args__ = (
+        # Un seul budget par catégorie et par période
+        Index("uq_budgets_categorie_periode", "categorie_id", "mois", "annee", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    categorie = Column(String, nullable=False)
-    montant_budget = Column(Float, nullable=False)
-    mois = Column(Integer, nullable=False)  # 1-12
-    annee = Column(Integer, nullable=False)
+    categorie_id = column_property(Column(Integer, ForeignKey("categories.id"), nullable=False), active_history=True)
+    montant_budget_centimes = Column(BigInteger, nullable=False)
+    mois = column_property(Column(Integer, nullable=False), active_history=True)  # 1-12
+    annee = column_property(Column(Integer, nullable=False), active_history=True)
+
+    @hybrid_property
+    def montant_budget(self) -> float:
+        """Montant du budget en euros, lu et affecté via montant_budget_centimes"""
+        return None if self.montant_budget_centimes is None else en_euros(self.montant_budget_centimes)
+
+    @montant_budget.inplace.setter
+    def _montant_budget_setter(self, euros: float) -> None:
+        self.montant_budget_centimes = en_centimes(euros)
+
+    @montant_budget.inplace.expression
+    @classmethod
+    def _montant_budget_expression(cls):
+        return cls.montant_budget_centimes / 100.0
+
+    def __repr__(self):
+        return f"<Budget(id={self.id}, categorie='{self.categorie}', montant_centimes={self.montant_budget_centimes}, periode={self.mois}/{self.annee})>"
+
+
+class MonthlyCategorySpend(Base):
+    """Rollup des totaux mensuels par catégorie et par type, tenu à jour à chaque écriture."""
+    __tablename__ = "monthly_category_spend"
+
+    categorie_id = Column(Integer, ForeignKey("categories.id"), primary_key=True)
+    type = Column(String, primary_key=True)  # "revenu" ou "depense"
+    annee = Column(Integer, primary_key=True)
+    mois = Column(Integer, primary_key=True)  # 1-12
+    total_centimes = Column(BigInteger, nullable=False, default=0)
+    nombre = Column(Integer, nullable=False, default=0)
 
     def __repr__(self):
-        return f"<Budget(id={self.id}, categorie='{self.categorie}', montant={self.montant_budget}, periode={self.mois}/{self.annee})>"
+        return f"<MonthlyCategorySpend(categorie_id={self.categorie_id}, type='{self.type}', periode={self.mois}/{self.annee}, total_centimes={self.total_centimes}, nombre={self.nombre})>"
+
+
+class VersionDonnees(Base):
+    """Compteur de version d'une table lue par l'API, incrémenté à chaque écriture (app.versions)."""
+    __tablename__ = "versions_donnees"
+
+    nom_table = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False)
+
+    def __repr__(self):
+        return f"<VersionDonnees(nom_table='{self.nom_table}', version={self.version})>"
+
+
+class VersionStatistiques(Base):
+    """
+    Versions d'une clé de statistiques (categorie_id, mois, annee) : version
+    change à chaque écriture d'une transaction ou d'un budget de la clé,
+    version_periode quand un budget y est créé, supprimé ou déplacé (app.versions).
+    """
+    __tablename__ = "versions_statistiques"
+
+    annee = Column(Integer, primary_key=True)
+    mois = Column(Integer, primary_key=True)
+    categorie_id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False)
+    version_periode = Column(BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<VersionStatistiques(categorie_id={self.categorie_id}, periode={self.mois}/{self.annee}, version={self.version}, version_periode={self.version_periode})>"
+
+
+Transaction.nom_categorie = _nom_categorie(Transaction)
+Budget.nom_categorie = _nom_categorie(Budget)
+
+
+@event.listens_for(Session, "before_flush")
+def _resoudre_categories(session, flush_context, instances):
+    """Renseigne categorie_id des transactions et budgets dont la catégorie a été nommée"""
+    objets = [o for o in (*session.new, *session.dirty) if "_categorie_a_resoudre" in o.__dict__]
+    if objets:
+        from app import categories
+        ids = categories.cache.identifiants(
+            session, {o.__dict__["_categorie_a_resoudre"] for o in objets}, creer=True
+        )
+        for objet in objets:
+            objet.categorie_id = ids[objet.__dict__.pop("_categorie_a_resoudre")]
+
+
+# Maintenance du rollup dans la même transaction que l'écriture ORM (flush).
+# Les insertions en masse via Core ne déclenchent pas ces événements : elles
+# doivent appeler app.rollup.appliquer_variations elles-mêmes.
+
+@event.listens_for(Transaction, "after_insert")
+def _rollup_apres_insertion(mapper, connection, target):
+    from app import rollup
+    rollup.appliquer_variations(connection, rollup.variations_transaction(target))
+
+
+@event.listens_for(Transaction, "before_update")
+def _rollup_avant_modification(mapper, connection, target):
+    from app import rollup
+    rollup.appliquer_modification(connection, target)
+
+
+@event.listens_for(Transaction, "before_delete")
+def _rollup_avant_suppression(mapper, connection, target):
+    from app import rollup
+    rollup.appliquer_suppression(connection, target)
+
+
+# Version des données (ETag des GET) incrémentée dans la même transaction que
+# l'écriture ORM ; les insertions Core appellent app.versions.incrementer.
+@event.listens_for(Session, "after_flush")
+def _incrementer_versions(session, flush_context):
+    tables = {
+        objet.__tablename__ for objet in (*session.new, *session.dirty, *session.deleted)
+        if isinstance(objet, (Transaction, Budget))
+    }
+    if tables:
+        from app import versions
+        versions.incrementer(session, tables)
@@ -0,0 +1,38 @@
+"""
+Conversion des montants entre euros et centimes.
+
+Les montants sont stockés et calculés en centimes entiers (sommes SQL exactes,
+sans dérive flottante) ; ils ne sont exprimés en euros qu'aux frontières :
+schémas de l'API, CSV, messages d'alerte.
+"""
+from typing import Union
+
+# Plus grand montant accepté en entrée, en euros : 10**14 centimes, loin de la
+# limite d'un BIGINT (2**63 - 1) même cumulés dans le rollup, et des centimes
+# encore exacts en flottant
+MONTANT_MAX = 1_000_000_000_000
+
+
+def en_centimes(euros: Union[float, int, str]) -> int:
+    """Montant en euros arrondi au centime le plus proche"""
+    return round(float(euros) * 100)
+
+
+def en_euros(centimes: int) -> float:
+    """Montant en centimes exprimé en euros"""
+    return centimes / 100
+
+
+def verifier_montant(euros: float) -> float:
+    """
+    Refuse un montant saisi qui ne ferait pas au moins un centime une fois
+    arrondi, ou qui dépasse MONTANT_MAX.
+
+    Raises:
+        ValueError: Montant hors bornes (message destiné au client)
+    """
+    if euros > MONTANT_MAX:
+        raise ValueError(f"Le montant ne peut pas dépasser {MONTANT_MAX} euros")
+    if en_centimes(euros) < 1:
+        raise ValueError("Le montant doit valoir au moins 0.01 une fois arrondi au centime")
+    return euros
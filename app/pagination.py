@@ -0,0 +1,42 @@
+"""
+Pagination par curseur (keyset) des listes de transactions.
+
+Le curseur encode la clé de tri (date_transaction, id) de la dernière ligne
+renvoyée ; la page suivante reprend strictement après cette clé grâce à
+l'index sur date_transaction, sans OFFSET : une page profonde coûte autant
+que la première.
+"""
+import base64
+import binascii
+from datetime import date
+from typing import Tuple
+
+from sqlalchemy import tuple_
+
+from app.models import Transaction
+
+
+class CurseurInvalide(ValueError):
+    """Le curseur fourni ne peut pas être décodé"""
+
+
+def encoder_curseur(date_transaction: date, transaction_id: int) -> str:
+    """Encode la clé de tri d'une transaction en curseur opaque"""
+    brut = f"{date_transaction.isoformat()}|{transaction_id}".encode()
+    return base64.urlsafe_b64encode(brut).decode().rstrip("=")
+
+
+def decoder_curseur(curseur: str) -> Tuple[date, int]:
+    """Décode un curseur opaque en clé de tri (date_transaction, id)"""
+    try:
+        brut = base64.urlsafe_b64decode(curseur + "=" * (-len(curseur) % 4)).decode()
+        jour, transaction_id = brut.split("|")
+        return date.fromisoformat(jour), int(transaction_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise CurseurInvalide(f"Curseur invalide : {curseur!r}") from exc
+
+
+def apres_curseur(curseur: str):
+    """Condition SQL sélectionnant les transactions situées après le curseur (tri décroissant)"""
+    jour, transaction_id = decoder_curseur(curseur)
+    return tuple_(Transaction.date_transaction, Transaction.id) < tuple_(jour, transaction_id)
@@ -0,0 +1,179 @@
+"""
+Profilage des requêtes HTTP, activable par variable d'environnement.
+
+Pour chaque requête, le middleware mesure la durée totale, le nombre de
+requêtes SQL et le temps passé dans SQL (durées publiées par
+app.database.abonner_duree_sql). Les mesures sont renvoyées dans l'en-tête
+Server-Timing et journalisées en JSON sur le logger "budget.profilage". Une fraction des
+requêtes peut en plus être profilée avec cProfile, le profil étant écrit sur
+disque (lisible avec `python -m pstats` ou snakeviz).
+
+Variables : BUDGET_PROFILAGE (1 pour activer), BUDGET_PROFILAGE_ECHANTILLON
+(fraction des requêtes profilées avec cProfile, 0 par défaut) et
+BUDGET_PROFILAGE_REPERTOIRE (répertoire des profils, "profils" par défaut).
+"""
+import cProfile
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+
+from app.database import abonner_duree_sql
+
+logger = logging.getLogger("budget.profilage")
+
+
+class MesuresRequete:
+    """Mesures SQL cumulées pendant le traitement d'une requête"""
+
+    def __init__(self):
+        self.nombre_requetes_sql = 0
+        self.duree_sql = 0.0
+
+    def server_timing(self, duree_totale: float) -> str:
+        """Valeur de l'en-tête Server-Timing (durées en millisecondes)"""
+        return (
+            f"total;dur={duree_totale * 1000:.2f}, "
+            f"sql;dur={self.duree_sql * 1000:.2f};desc=\"{self.nombre_requetes_sql} requetes\", "
+            f"app;dur={max(duree_totale - self.duree_sql, 0.0) * 1000:.2f}"
+        )
+
+
+_mesures_courantes: ContextVar[Optional[MesuresRequete]] = ContextVar("mesures_requete", default=None)
+
+
+def lire_configuration(environ=None) -> dict:
+    """
+    Lit la configuration du profilage depuis les variables d'environnement.
+
+    Returns:
+        dict avec actif (bool), echantillon (fraction entre 0 et 1) et repertoire
+    """
+    environ = os.environ if environ is None else environ
+    echantillon = float(environ.get("BUDGET_PROFILAGE_ECHANTILLON", "0"))
+    if not 0 <= echantillon <= 1:
+        raise ValueError(f"BUDGET_PROFILAGE_ECHANTILLON doit être compris entre 0 et 1 : {echantillon}")
+    return {
+        "actif": environ.get("BUDGET_PROFILAGE", "0").lower() in ("1", "true", "oui"),
+        "echantillon": echantillon,
+        "repertoire": environ.get("BUDGET_PROFILAGE_REPERTOIRE", "profils"),
+    }
+
+
+def _duree_sql(conn, statement, parameters, executemany, duree):
+    mesures = _mesures_courantes.get()
+    if mesures is not None:
+        mesures.nombre_requetes_sql += 1
+        mesures.duree_sql += duree
+
+
+def instrumenter(engine) -> None:
+    """Compte les requêtes SQL d'un engine (synchrone, ou sync_engine d'un AsyncEngine)"""
+    abonner_duree_sql(engine, _duree_sql)
+
+
+class MiddlewareProfilage:
+    """
+    Middleware ASGI de mesure par requête.
+
+    Pour une réponse en flux (export CSV), l'en-tête est émis avant l'envoi du
+    corps : il ne couvre que le début du traitement, alors que le journal
+    couvre la requête complète.
+    """
+
+    def __init__(self, app, echantillon: float = 0.0, repertoire: str = "profils"):
+        self.app = app
+        self.echantillon = echantillon
+        self.repertoire = Path(repertoire)
+        # cProfile profile tout le thread de la boucle d'événements : un seul à la fois
+        self._verrou_profil = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        mesures = MesuresRequete()
+        jeton = _mesures_courantes.set(mesures)
+        statut = None
+        debut = time.perf_counter()
+
+        async def envoyer(message):
+            nonlocal statut
+            if message["type"] == "http.response.start":
+                statut = message["status"]
+                MutableHeaders(scope=message).append(
+                    "Server-Timing", mesures.server_timing(time.perf_counter() - debut)
+                )
+            await send(message)
+
+        profil = None
+        if self.echantillon and random.random() < self.echantillon and self._verrou_profil.acquire(blocking=False):
+            profil = cProfile.Profile()
+            profil.enable()
+        try:
+            await self.app(scope, receive, envoyer)
+        finally:
+            duree = time.perf_counter() - debut
+            fichier_profil = None
+            if profil is not None:
+                profil.disable()
+                self._verrou_profil.release()
+                fichier_profil = self._ecrire_profil(profil, scope)
+            _mesures_courantes.reset(jeton)
+            logger.info(json.dumps({
+                "methode": scope["method"],
+                "chemin": scope["path"],
+                "statut": statut,
+                "duree_ms": round(duree * 1000, 2),
+                "sql_requetes": mesures.nombre_requetes_sql,
+                "sql_ms": round(mesures.duree_sql * 1000, 2),
+                "profil": fichier_profil,
+            }, ensure_ascii=False))
+
+    def _ecrire_profil(self, profil: cProfile.Profile, scope) -> Optional[str]:
+        self.repertoire.mkdir(parents=True, exist_ok=True)
+        chemin = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_") or "racine"
+        horodatage = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        fichier = self.repertoire / f"{horodatage}_{scope['method']}_{chemin}.prof"
+        try:
+            profil.dump_stats(fichier)
+        except OSError:
+            logger.exception("Impossible d'écrire le profil %s", fichier)
+            return None
+        return str(fichier)
+
+
+def activer(app, engines, configuration: dict = None) -> bool:
+    """
+    Installe le middleware et instrumente les engines si le profilage est actif.
+
+    Returns:
+        True si le profilage a été activé
+    """
+    configuration = lire_configuration() if configuration is None else configuration
+    if not configuration["actif"]:
+        return False
+    if not logger.handlers:
+        # Journal visible sous uvicorn, qui ne configure que ses propres loggers
+        gestionnaire = logging.StreamHandler()
+        gestionnaire.setFormatter(logging.Formatter("%(asctime)s %(name)s %(message)s"))
+        logger.addHandler(gestionnaire)
+        logger.setLevel(logging.INFO)
+    for engine in engines:
+        instrumenter(engine)
+    app.add_middleware(
+        MiddlewareProfilage,
+        echantillon=configuration["echantillon"],
+        repertoire=configuration["repertoire"]
+    )
+    return True
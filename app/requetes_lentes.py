@@ -0,0 +1,152 @@
+"""
+Journal des requêtes SQL lentes.
+
+Toute requête dont la durée dépasse le seuil de l'engine est journalisée
+(logger "budget.requetes_lentes") avec son SQL, ses paramètres, sa durée et
+l'endpoint à son origine, puis conservée dans un tampon circulaire borné
+consultable par GET /api/admin/requetes-lentes. En mode debug, le plan
+d'exécution (EXPLAIN QUERY PLAN) est ajouté, ce qui montre les parcours
+complets de table ("SCAN transactions") là où un index était attendu.
+
+Le seuil et le mode debug se règlent dans app.database (BUDGET_SQL_LENTE_*),
+qui chronomètre les requêtes (abonner_duree_sql).
+"""
+import json
+import logging
+import threading
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+from typing import List, Optional
+
+logger = logging.getLogger("budget.requetes_lentes")
+
+TAILLE_PARAMETRES = 500
+
+# Scope ASGI de la requête HTTP en cours ; la route n'y est déposée qu'après le
+# routage, elle est donc lue au moment où la requête lente est journalisée
+_scope_courant: ContextVar[Optional[dict]] = ContextVar("scope_requete_sql", default=None)
+
+
+class JournalRequetesLentes:
+    """Tampon circulaire des dernières requêtes lentes (les plus anciennes sont écartées)"""
+
+    def __init__(self, taille: int = 100):
+        self._entrees = deque(maxlen=taille)
+        self._verrou = threading.Lock()
+
+    @property
+    def taille_max(self) -> int:
+        return self._entrees.maxlen
+
+    def redimensionner(self, taille: int) -> None:
+        """Change la capacité en conservant les entrées les plus récentes"""
+        with self._verrou:
+            self._entrees = deque(self._entrees, maxlen=taille)
+
+    def ajouter(self, entree: dict) -> None:
+        with self._verrou:
+            self._entrees.append(entree)
+
+    def entrees(self) -> List[dict]:
+        """Copie des entrées, de la plus récente à la plus ancienne"""
+        with self._verrou:
+            return list(reversed(self._entrees))
+
+    def vider(self) -> None:
+        with self._verrou:
+            self._entrees.clear()
+
+
+journal = JournalRequetesLentes()
+
+
+def endpoint_courant() -> Optional[str]:
+    """Méthode et gabarit de route de la requête HTTP en cours, s'il y en a une"""
+    scope = _scope_courant.get()
+    if scope is None:
+        return None
+    route = scope.get("route")
+    return f"{scope['method']} {getattr(route, 'path', scope['path'])}"
+
+
+def _formater_parametres(parametres) -> str:
+    texte = repr(parametres)
+    if len(texte) > TAILLE_PARAMETRES:
+        texte = texte[:TAILLE_PARAMETRES] + "..."
+    return texte
+
+
+def _plan_execution(conn, statement: str, parametres) -> Optional[List[str]]:
+    """
+    Plan EXPLAIN QUERY PLAN de la requête, une ligne par étape, indentée selon
+    sa profondeur. Exécuté sur un curseur distinct : celui de la requête
+    n'a pas encore rendu ses lignes.
+    """
+    curseur = conn.connection.dbapi_connection.cursor()
+    try:
+        curseur.execute(f"EXPLAIN QUERY PLAN {statement}", parametres)
+        profondeurs = {0: -1}
+        plan = []
+        for identifiant, parent, _, detail in curseur.fetchall():
+            profondeurs[identifiant] = profondeurs.get(parent, -1) + 1
+            plan.append("  " * profondeurs[identifiant] + detail)
+        return plan
+    except Exception as exc:
+        return [f"Plan indisponible : {exc}"]
+    finally:
+        curseur.close()
+
+
+def surveiller(moteur, seuil_ms: float, explain: bool = False, taille: int = None) -> None:
+    """
+    Journalise les requêtes de l'engine (synchrone, ou sync_engine d'un
+    AsyncEngine) plus longues que seuil_ms.
+
+    Args:
+        seuil_ms: durée à partir de laquelle une requête est lente, en millisecondes
+        explain: ajoute le plan EXPLAIN QUERY PLAN (SQLite uniquement)
+        taille: capacité du tampon circulaire partagé, inchangée si None
+    """
+    # Import différé : app.database importe ce module pour configurer ses engines
+    from app.database import abonner_duree_sql
+
+    if taille is not None:
+        journal.redimensionner(taille)
+    seuil = seuil_ms / 1000
+    expliquer = explain and moteur.dialect.name == "sqlite"
+
+    def _journaliser(conn, statement, parameters, executemany, duree):
+        if duree < seuil:
+            return
+        entree = {
+            "horodatage": datetime.now().isoformat(timespec="milliseconds"),
+            "duree_ms": round(duree * 1000, 2),
+            "endpoint": endpoint_courant(),
+            "sql": statement,
+            "parametres": _formater_parametres(parameters),
+            "plan": None,
+        }
+        if expliquer and not executemany:
+            entree["plan"] = _plan_execution(conn, statement, parameters)
+        journal.ajouter(entree)
+        logger.warning(json.dumps(entree, ensure_ascii=False))
+
+    abonner_duree_sql(moteur, _journaliser)
+
+
+class MiddlewareOrigine:
+    """Middleware ASGI rendant la requête HTTP en cours visible du journal"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        jeton = _scope_courant.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _scope_courant.reset(jeton)
@@ -0,0 +1,218 @@
+"""
+Rollup des dépenses et revenus mensuels par catégorie (table monthly_category_spend).
+
+Le rollup est maintenu de façon incrémentale par les événements ORM déclarés
+dans app.models ; ce module fournit les variations à appliquer, ainsi que la
+vérification et la reconstruction complète à partir de la table transactions.
+
+Usage :
+    python -m app.rollup verifier
+    python -m app.rollup reconstruire
+"""
+import argparse
+import sys
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import Integer, cast, delete, func, inspect, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app import categories, versions
+from app.models import Transaction, MonthlyCategorySpend
+
+# (categorie_id, type, annee, mois) -> (variation du total en centimes, variation du nombre)
+Variations = Dict[Tuple[int, str, int, int], Tuple[int, int]]
+
+COLONNES_SUIVIES = ("categorie_id", "type", "date_transaction", "montant_centimes")
+
+
+def cle_rollup(categorie_id: int, type_transaction: str, date_transaction: date) -> Tuple[int, str, int, int]:
+    """Clé du rollup pour une transaction"""
+    return categorie_id, type_transaction, date_transaction.year, date_transaction.month
+
+
+def cumuler_variations(lignes: Iterable[dict], signe: int = 1) -> Variations:
+    """
+    Agrège les variations du rollup pour un lot de transactions.
+
+    Args:
+        lignes: Dictionnaires avec categorie_id, type, date_transaction et montant_centimes
+        signe: 1 pour un ajout, -1 pour un retrait
+    """
+    cumul = defaultdict(lambda: [0, 0])
+    for ligne in lignes:
+        cle = cle_rollup(ligne["categorie_id"], ligne["type"], ligne["date_transaction"])
+        cumul[cle][0] += signe * ligne["montant_centimes"]
+        cumul[cle][1] += signe
+    return {cle: (total, nombre) for cle, (total, nombre) in cumul.items()}
+
+
+def variations_transaction(transaction: Transaction, signe: int = 1) -> Variations:
+    """Variations du rollup induites par une seule transaction"""
+    return cumuler_variations([{c: getattr(transaction, c) for c in COLONNES_SUIVIES}], signe)
+
+
+def appliquer_variations(connection, variations: Variations) -> None:
+    """
+    Applique des variations au rollup par UPSERT, dans la transaction courante,
+    et incrémente la version des statistiques des clés touchées.
+
+    Args:
+        connection: Connexion ou session SQLAlchemy
+        variations: Variations par clé (categorie_id, type, annee, mois)
+    """
+    if not variations:
+        return
+    requete = insert(MonthlyCategorySpend)
+    requete = requete.on_conflict_do_update(
+        index_elements=["categorie_id", "type", "annee", "mois"],
+        set_={
+            "total_centimes": MonthlyCategorySpend.total_centimes + requete.excluded.total_centimes,
+            "nombre": MonthlyCategorySpend.nombre + requete.excluded.nombre,
+        }
+    )
+    connection.execute(requete, [
+        {
+            "categorie_id": categorie_id, "type": type_transaction, "annee": annee, "mois": mois,
+            "total_centimes": total, "nombre": nombre
+        }
+        for (categorie_id, type_transaction, annee, mois), (total, nombre) in variations.items()
+    ])
+    versions.incrementer_statistiques(
+        connection, {(categorie_id, mois, annee) for categorie_id, _, annee, mois in variations}
+    )
+
+
+def _valeurs_enregistrees(connection, transaction_id: int) -> dict:
+    """Lit l'état en base d'une transaction (avant modification ou suppression)"""
+    ligne = connection.execute(
+        select(*(getattr(Transaction, c) for c in COLONNES_SUIVIES))
+        .where(Transaction.id == transaction_id)
+    ).mappings().first()
+    return dict(ligne) if ligne else None
+
+
+def appliquer_modification(connection, transaction: Transaction) -> None:
+    """Retire l'ancienne contribution d'une transaction modifiée et ajoute la nouvelle"""
+    etat = inspect(transaction)
+    if not any(etat.attrs[c].history.has_changes() for c in COLONNES_SUIVIES):
+        return
+    ancienne = _valeurs_enregistrees(connection, transaction.id)
+    nouvelle = {c: getattr(transaction, c) for c in COLONNES_SUIVIES}
+    variations = defaultdict(lambda: (0, 0))
+    for lignes, signe in (([ancienne] if ancienne else [], -1), ([nouvelle], 1)):
+        for cle, (total, nombre) in cumuler_variations(lignes, signe).items():
+            variations[cle] = (variations[cle][0] + total, variations[cle][1] + nombre)
+    appliquer_variations(connection, dict(variations))
+
+
+def appliquer_suppression(connection, transaction: Transaction) -> None:
+    """Retire la contribution d'une transaction supprimée"""
+    ancienne = _valeurs_enregistrees(connection, transaction.id)
+    if ancienne:
+        appliquer_variations(connection, cumuler_variations([ancienne], -1))
+
+
+def _requete_agregats_transactions():
+    """Agrégats attendus du rollup, recalculés depuis la table transactions"""
+    return select(
+        Transaction.categorie_id,
+        Transaction.type,
+        cast(func.strftime("%Y", Transaction.date_transaction), Integer).label("annee"),
+        cast(func.strftime("%m", Transaction.date_transaction), Integer).label("mois"),
+        func.sum(Transaction.montant_centimes).label("total_centimes"),
+        func.count(Transaction.id).label("nombre"),
+    ).group_by("categorie_id", "type", "annee", "mois")
+
+
+def reconstruire_rollup(db: Session) -> int:
+    """
+    Recalcule entièrement le rollup depuis la table transactions.
+
+    Returns:
+        Nombre de lignes du rollup après reconstruction
+    """
+    db.execute(delete(MonthlyCategorySpend))
+    agregats = _requete_agregats_transactions().subquery()
+    db.execute(
+        insert(MonthlyCategorySpend).from_select(
+            ["categorie_id", "type", "annee", "mois", "total_centimes", "nombre"],
+            select(agregats)
+        )
+    )
+    # Les statistiques en cache de toutes les clés reconstruites sont périmées
+    versions.incrementer_statistiques(db, db.execute(
+        select(MonthlyCategorySpend.categorie_id, MonthlyCategorySpend.mois, MonthlyCategorySpend.annee).distinct()
+    ).all())
+    db.commit()
+    return db.query(MonthlyCategorySpend).count()
+
+
+def rollup_incomplet(db: Session) -> bool:
+    """Vrai si le rollup est vide alors que la table transactions ne l'est pas"""
+    rollup_vide = db.scalar(select(MonthlyCategorySpend.categorie_id).limit(1)) is None
+    return rollup_vide and db.scalar(select(Transaction.id).limit(1)) is not None
+
+
+def verifier_rollup(db: Session) -> List[dict]:
+    """
+    Compare le rollup aux agrégats recalculés depuis la table transactions.
+
+    Returns:
+        Liste des écarts (vide si le rollup est cohérent)
+    """
+    attendus = {
+        (l.categorie_id, l.type, l.annee, l.mois): (l.total_centimes, l.nombre)
+        for l in db.execute(_requete_agregats_transactions())
+    }
+    presents = {
+        (r.categorie_id, r.type, r.annee, r.mois): (r.total_centimes, r.nombre)
+        for r in db.query(MonthlyCategorySpend).filter(MonthlyCategorySpend.nombre != 0)
+    }
+    differentes = [
+        cle for cle in sorted(attendus.keys() | presents.keys())
+        if attendus.get(cle, (0, 0)) != presents.get(cle, (0, 0))
+    ]
+    noms = categories.cache.noms(db, {cle[0] for cle in differentes})
+    ecarts = []
+    for cle in differentes:
+        attendu = attendus.get(cle, (0, 0))
+        present = presents.get(cle, (0, 0))
+        categorie_id, type_transaction, annee, mois = cle
+        ecarts.append({
+            "categorie": noms.get(categorie_id, str(categorie_id)),
+            "type": type_transaction,
+            "periode": f"{mois:02d}/{annee}",
+            "total_attendu_centimes": attendu[0],
+            "total_rollup_centimes": present[0],
+            "nombre_attendu": attendu[1],
+            "nombre_rollup": present[1],
+        })
+    return ecarts
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Vérification et reconstruction du rollup mensuel")
+    parser.add_argument("commande", choices=["verifier", "reconstruire"])
+    args = parser.parse_args(argv)
+
+    from app.database import SessionLocal, init_db
+    init_db()
+    db = SessionLocal()
+    try:
+        if args.commande == "reconstruire":
+            print(f"Rollup reconstruit : {reconstruire_rollup(db)} lignes")
+            return 0
+        ecarts = verifier_rollup(db)
+        for ecart in ecarts:
+            print(f"Écart {ecart}")
+        print("Rollup cohérent" if not ecarts else f"{len(ecarts)} écart(s) détecté(s)")
+        return 1 if ecarts else 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,39 @@
-from pydantic import BaseModel, Field, validator
-from datetime import date
-from typing import Optional
+from pydantic import BaseModel, Field, model_validator, validator
+from datetime import date, datetime
+from typing import ClassVar, List, Optional, Tuple
+
+from app.montants import en_centimes, en_euros, verifier_montant
+
+
+class MontantsEnEuros(BaseModel):
+    """
+    Base des réponses dont les montants sont stockés en centimes.
+
+    Chaque champ de CHAMPS_CENTIMES est lu depuis l'attribut ou la clé
+    <champ>_centimes (modèle ORM, dictionnaire de business_logic) et converti
+    en euros ; une valeur déjà en euros (clé <champ>) est acceptée telle quelle.
+    """
+    CHAMPS_CENTIMES: ClassVar[Tuple[str, ...]] = ()
+
+    @model_validator(mode="before")
+    @classmethod
+    def _centimes_en_euros(cls, valeur):
+        if isinstance(valeur, dict):
+            donnees = dict(valeur)
+        else:
+            donnees = {nom: getattr(valeur, nom) for nom in cls.model_fields if hasattr(valeur, nom)}
+            for nom in cls.CHAMPS_CENTIMES:
+                if hasattr(valeur, f"{nom}_centimes"):
+                    donnees[f"{nom}_centimes"] = getattr(valeur, f"{nom}_centimes")
+        for nom in cls.CHAMPS_CENTIMES:
+            if f"{nom}_centimes" in donnees:
+                centimes = donnees.pop(f"{nom}_centimes")
+                donnees[nom] = None if centimes is None else en_euros(centimes)
+        return donnees
 
 
 class TransactionBase(BaseModel):
-    montant: float = Field(..., gt=0, description="Montant de la transaction (doit être positif)")
+    montant: float = Field(..., gt=0, allow_inf_nan=False, description="Montant de la transaction (doit être positif)")
     libelle: str = Field(..., min_length=1, description="Description de la transaction")
     type: str = Field(..., description="Type: 'revenu' ou 'depense'")
     categorie: str = Field(..., min_length=1, description="Catégorie de la transaction")
@@ -20,14 +49,20 @@ class TransactionBase(BaseModel):
     def validate_montant(cls, v):
         if v <= 0:
             raise ValueError("Le montant doit être strictement positif")
-        return v
+        return verifier_montant(v)
 
 
 class TransactionCreate(TransactionBase):
-    pass
+    def vers_modele(self) -> dict:
+        """Colonnes du modèle Transaction, montant converti en centimes"""
+        valeurs = self.model_dump(exclude={"montant"})
+        valeurs["montant_centimes"] = en_centimes(self.montant)
+        return valeurs
+
 
+class TransactionResponse(TransactionBase, MontantsEnEuros):
+    CHAMPS_CENTIMES: ClassVar[Tuple[str, ...]] = ("montant",)
 
-class TransactionResponse(TransactionBase):
     id: int
 
     class Config:
@@ -40,9 +75,36 @@ class TransactionCreateResponse(TransactionResponse):
     message_alerte: Optional[str] = None
 
 
+class ImportErreurLigne(BaseModel):
+    """Erreurs de validation d'une ligne du fichier importé."""
+    ligne: int
+    erreurs: List[str]
+
+
+class AlerteDepassementResponse(MontantsEnEuros):
+    """Budget dépassé après une écriture en masse."""
+    CHAMPS_CENTIMES: ClassVar[Tuple[str, ...]] = ("budget_fixe", "montant_total_depense", "depassement")
+
+    categorie: str
+    periode: str  # "01/2026"
+    budget_fixe: float
+    montant_total_depense: float
+    depassement: float
+    message_alerte: str
+
+
+class ImportCsvResponse(BaseModel):
+    """Rapport d'import d'un fichier CSV de transactions."""
+    lignes_lues: int
+    transactions_importees: int
+    nombre_erreurs: int
+    erreurs: List[ImportErreurLigne]  # limité aux premières erreurs
+    alertes: List[AlerteDepassementResponse]
+
+
 class BudgetBase(BaseModel):
     categorie: str = Field(..., min_length=1, description="Catégorie du budget")
-    montant_budget: float = Field(..., gt=0, description="Montant du budget (doit être positif)")
+    montant_budget: float = Field(..., gt=0, allow_inf_nan=False, description="Montant du budget (doit être positif)")
     mois: int = Field(..., ge=1, le=12, description="Mois (1-12)")
     annee: int = Field(..., ge=2000, le=2100, description="Année")
 
@@ -50,29 +112,48 @@ class BudgetBase(BaseModel):
     def validate_montant(cls, v):
         if v <= 0:
             raise ValueError("Le montant du budget doit être strictement positif")
-        return v
+        return verifier_montant(v)
 
 
 class BudgetCreate(BudgetBase):
-    pass
+    def vers_modele(self) -> dict:
+        """Colonnes du modèle Budget, montant converti en centimes"""
+        valeurs = self.model_dump(exclude={"montant_budget"})
+        valeurs["montant_budget_centimes"] = en_centimes(self.montant_budget)
+        return valeurs
 
 
 class BudgetUpdate(BaseModel):
     """Schéma pour la mise à jour partielle d'un budget."""
     categorie: Optional[str] = Field(None, min_length=1)
-    montant_budget: Optional[float] = Field(None, gt=0)
+    montant_budget: Optional[float] = Field(None, gt=0, allow_inf_nan=False)
     mois: Optional[int] = Field(None, ge=1, le=12)
     annee: Optional[int] = Field(None, ge=2000, le=2100)
 
+    @validator('montant_budget')
+    def validate_montant(cls, v):
+        return v if v is None else verifier_montant(v)
+
+    def vers_modele(self) -> dict:
+        """Colonnes du modèle Budget à modifier (champs fournis), montant en centimes"""
+        valeurs = self.model_dump(exclude_unset=True)
+        if "montant_budget" in valeurs:
+            valeurs["montant_budget_centimes"] = en_centimes(valeurs.pop("montant_budget"))
+        return valeurs
+
+
+class BudgetResponse(BudgetBase, MontantsEnEuros):
+    CHAMPS_CENTIMES: ClassVar[Tuple[str, ...]] = ("montant_budget",)
 
-class BudgetResponse(BudgetBase):
     id: int
 
     class Config:
         from_attributes = True
 
 
-class BudgetStatResponse(BaseModel):
+class BudgetStatResponse(MontantsEnEuros):
+    CHAMPS_CENTIMES: ClassVar[Tuple[str, ...]] = ("montant_total_depense", "budget_fixe", "montant_restant")
+
     categorie: str
     periode: str  # "01/2026"
     montant_total_depense: float
@@ -82,3 +163,70 @@ class BudgetStatResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class RapportMensuelResponse(MontantsEnEuros):
+    """Total d'un mois, cumul depuis le début de la période et somme glissante."""
+    CHAMPS_CENTIMES: ClassVar[Tuple[str, ...]] = ("total", "cumul", "total_glissant")
+
+    annee: int
+    mois: int
+    total: float
+    cumul: float
+    total_glissant: float
+
+
+class RapportCategorieResponse(MontantsEnEuros):
+    """Total d'une catégorie sur la période et sa part du total (en %)."""
+    CHAMPS_CENTIMES: ClassVar[Tuple[str, ...]] = ("total",)
+
+    categorie: str
+    total: float
+    nombre_transactions: int
+    part: float
+
+
+class TendanceMoisResponse(MontantsEnEuros):
+    """Dépenses, revenus et, si un budget est défini, budget, reste et consommation d'un mois."""
+    CHAMPS_CENTIMES: ClassVar[Tuple[str, ...]] = ("depenses", "revenus", "budget", "montant_restant")
+
+    annee: int
+    mois: int
+    depenses: float
+    revenus: float
+    budget: Optional[float] = None
+    montant_restant: Optional[float] = None
+    pourcentage_consomme: Optional[float] = None
+
+
+class TendanceCategorieResponse(BaseModel):
+    """Tendance mensuelle d'une catégorie, du mois le plus ancien au plus récent."""
+    categorie: str
+    mois: List[TendanceMoisResponse]
+
+
+class CacheEtatResponse(BaseModel):
+    """État d'un cache LRU en mémoire."""
+    taille: int
+    taille_max: int
+    succes: int
+    echecs: int
+    evictions: int
+    invalidations: int
+    taux_succes: float
+
+
+class CacheStatistiquesResponse(BaseModel):
+    """État des caches de statistiques de budgets."""
+    statistiques: CacheEtatResponse
+    periodes: CacheEtatResponse
+
+
+class RequeteLenteResponse(BaseModel):
+    """Requête SQL ayant dépassé le seuil de lenteur."""
+    horodatage: datetime
+    duree_ms: float
+    endpoint: Optional[str]
+    sql: str
+    parametres: str
+    plan: Optional[List[str]]
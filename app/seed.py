@@ -0,0 +1,336 @@
+"""
+Remplissage en masse de la base avec des données synthétiques ou rejouées.
+
+Les lignes sont écrites par insert() Core en lots, dans de grandes transactions,
+avec des PRAGMA de chargement (synchronous=OFF, grand cache) et sans les index
+secondaires de la table transactions. Le rollup mensuel puis ces index sont
+reconstruits à la fin du chargement.
+
+Usage :
+    python -m app.seed generer --transactions 1000000 [--categories alimentation:30,logement:10]
+                               [--debut 2024-01-01] [--fin 2026-12-31] [--part-revenus 0.1]
+                               [--saisonnalite 0.3] [--budgets 400]
+    python -m app.seed rejouer export.csv --repetitions 100 [--decalage-jours 365]
+
+Le chargement incrémente la version des données et celle des statistiques
+de chaque clé chargée : un serveur déjà lancé ne sert plus les statistiques
+qu'il avait en cache.
+"""
+import argparse
+import csv
+import math
+import random
+import sys
+import time
+from datetime import date, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import insert, select, text
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Transaction, Budget
+from app.montants import en_centimes
+from app import categories as dictionnaire, importation, versions
+from app.rollup import reconstruire_rollup
+
+TAILLE_LOT = 50_000
+# Lignes écrites par transaction SQL : un commit par million de lignes
+LIGNES_PAR_TRANSACTION = 1_000_000
+# Réglages valables le temps du chargement, sur la connexion qui écrit
+PRAGMAS_CHARGEMENT = {"synchronous": "OFF", "cache_size": -262144, "temp_store": "MEMORY"}
+
+CATEGORIES_DEFAUT = "alimentation:30,logement:10,transport:15,loisirs:15,sante:8,education:5,autre:17"
+
+
+def lire_categories(texte: str) -> Dict[str, float]:
+    """
+    Lit une liste de catégories pondérées, par exemple "alimentation:30,loisirs:10".
+
+    Une catégorie sans poids compte pour 1.
+    """
+    categories = {}
+    for element in texte.split(","):
+        nom, _, poids = element.strip().partition(":")
+        if not nom:
+            continue
+        try:
+            categories[nom] = float(poids) if poids else 1.0
+        except ValueError:
+            raise ValueError(f"Poids invalide pour la catégorie '{nom}' : {poids}")
+        if categories[nom] <= 0:
+            raise ValueError(f"Le poids de la catégorie '{nom}' doit être positif")
+    if not categories:
+        raise ValueError("Aucune catégorie fournie")
+    return categories
+
+
+def poids_saisonnier(jour: date, saisonnalite: float) -> float:
+    """
+    Poids relatif d'un jour : 1 ± saisonnalite selon le mois, avec un pic en décembre.
+
+    Avec saisonnalite=0.3, décembre reçoit 1,3 fois et juin 0,7 fois la moyenne.
+    """
+    return 1 + saisonnalite * math.cos(2 * math.pi * (jour.month - 12) / 12)
+
+
+def generer_transactions(
+    nombre: int,
+    categories: Dict[str, float],
+    debut: date,
+    fin: date,
+    depense_min: float = 1.0,
+    depense_max: float = 200.0,
+    part_revenus: float = 0.1,
+    revenu_min: float = 1500.0,
+    revenu_max: float = 3500.0,
+    categorie_revenus: str = "salaire",
+    saisonnalite: float = 0.0,
+    graine: int = 42,
+    taille_lot: int = TAILLE_LOT
+) -> Iterator[List[dict]]:
+    """
+    Produit des transactions synthétiques par lots, de façon déterministe pour une graine.
+
+    Les dépenses sont réparties entre les catégories selon leur poids, avec un
+    montant tiré d'une loi triangulaire (beaucoup de petits montants, quelques
+    gros) ; les dates suivent la saisonnalité demandée entre debut et fin inclus.
+    """
+    if not 0 <= part_revenus <= 1:
+        raise ValueError("part_revenus doit être comprise entre 0 et 1")
+    if not 0 <= saisonnalite < 1:
+        raise ValueError("saisonnalite doit être comprise entre 0 et 1 (exclu)")
+    aleatoire = random.Random(graine)
+    noms, poids = list(categories), list(categories.values())
+    nombre_jours = (fin - debut).days + 1
+    if nombre_jours <= 0:
+        raise ValueError("La date de fin précède la date de début")
+    mode = depense_min + (depense_max - depense_min) * 0.15
+
+    def tirer_jour():
+        # Rejet : un jour est conservé avec une probabilité proportionnelle à son poids
+        while True:
+            jour = debut + timedelta(days=aleatoire.randrange(nombre_jours))
+            if aleatoire.random() * (1 + saisonnalite) <= poids_saisonnier(jour, saisonnalite):
+                return jour
+
+    for premier in range(0, nombre, taille_lot):
+        lot = []
+        for i in range(premier, min(premier + taille_lot, nombre)):
+            if aleatoire.random() < part_revenus:
+                lot.append({
+                    "montant_centimes": en_centimes(aleatoire.uniform(revenu_min, revenu_max)),
+                    "libelle": f"Revenu {i}",
+                    "type": "revenu",
+                    "categorie": categorie_revenus,
+                    "date_transaction": tirer_jour(),
+                })
+            else:
+                categorie = aleatoire.choices(noms, poids)[0]
+                lot.append({
+                    "montant_centimes": en_centimes(aleatoire.triangular(depense_min, depense_max, mode)),
+                    "libelle": f"Dépense {categorie} {i}",
+                    "type": "depense",
+                    "categorie": categorie,
+                    "date_transaction": tirer_jour(),
+                })
+        yield lot
+
+
+def generer_budgets(categories: Iterable[str], debut: date, fin: date, montant: float) -> List[dict]:
+    """Un budget du même montant (en euros) par catégorie et par mois couvert par la période"""
+    mois_couverts = []
+    annee, mois = debut.year, debut.month
+    while (annee, mois) <= (fin.year, fin.month):
+        mois_couverts.append((annee, mois))
+        annee, mois = (annee + 1, 1) if mois == 12 else (annee, mois + 1)
+    return [
+        {"categorie": categorie, "montant_budget_centimes": en_centimes(montant), "mois": mois, "annee": annee}
+        for categorie in categories
+        for annee, mois in mois_couverts
+    ]
+
+
+def lire_csv(chemin: str) -> List[dict]:
+    """
+    Lit et valide un CSV au format de l'export, comme l'import de l'API.
+
+    Raises:
+        importation.CsvInvalide: si l'en-tête est incomplet ou si une ligne est invalide
+    """
+    with open(chemin, newline="", encoding="utf-8-sig") as fichier:
+        lecteur = csv.reader(fichier)
+        en_tete = next(lecteur, None)
+        if en_tete is None:
+            raise importation.CsvInvalide("Le fichier CSV est vide")
+        colonnes = importation.indexer_en_tete(en_tete)
+        rapport = importation.RapportImport()
+        lignes = importation.valider_lot(list(enumerate(lecteur, start=2)), colonnes, rapport)
+    if rapport.nombre_erreurs:
+        premiere = rapport.erreurs[0]
+        raise importation.CsvInvalide(
+            f"{rapport.nombre_erreurs} ligne(s) invalide(s), "
+            f"dont la ligne {premiere['ligne']} : {'; '.join(premiere['erreurs'])}"
+        )
+    return lignes
+
+
+def rejouer(
+    lignes: List[dict],
+    repetitions: int,
+    decalage_jours: Optional[int] = None,
+    taille_lot: int = TAILLE_LOT
+) -> Iterator[List[dict]]:
+    """
+    Répète des transactions en décalant leurs dates à chaque passage.
+
+    Par défaut, le décalage est la durée couverte par les lignes : les copies
+    se suivent dans le temps sans se chevaucher.
+    """
+    if not lignes:
+        return
+    if decalage_jours is None:
+        dates = [ligne["date_transaction"] for ligne in lignes]
+        decalage_jours = (max(dates) - min(dates)).days + 1
+    lot = []
+    for repetition in range(repetitions):
+        decalage = timedelta(days=repetition * decalage_jours)
+        for ligne in lignes:
+            lot.append(dict(ligne, date_transaction=ligne["date_transaction"] + decalage))
+            if len(lot) >= taille_lot:
+                yield lot
+                lot = []
+    if lot:
+        yield lot
+
+
+def charger(engine, lots: Iterable[List[dict]], budgets: Iterable[dict] = ()) -> int:
+    """
+    Écrit des lots de transactions et des budgets, puis reconstruit rollup et index.
+
+    Les index secondaires de transactions sont supprimés pendant le chargement
+    et recréés ensuite. Ceux des autres tables, dont l'index unique des
+    budgets, sont créés avant : les budgets déjà présents (même catégorie et
+    période) sont conservés, y compris sur une base tout juste migrée.
+
+    Raises:
+        RuntimeError: si la base contient déjà des budgets en double
+
+    Returns:
+        Nombre de transactions insérées
+    """
+    from app.database import Base, mettre_a_niveau_schema, migrer_categories, migrer_montants_en_centimes
+
+    migrer_montants_en_centimes(engine)
+    migrer_categories(engine)
+    Base.metadata.create_all(bind=engine)
+    mettre_a_niveau_schema(engine, [t for t in Base.metadata.sorted_tables if t is not Transaction.__table__])
+    for index in Transaction.__table__.indexes:
+        index.drop(bind=engine, checkfirst=True)
+
+    total = 0
+    try:
+        with engine.connect() as conn:
+            for pragma, valeur in PRAGMAS_CHARGEMENT.items():
+                conn.exec_driver_sql(f"PRAGMA {pragma}={valeur}")
+            depuis_commit = 0
+            for lot in lots:
+                conn.execute(insert(Transaction.__table__), dictionnaire.remplacer_noms(conn, lot))
+                total += len(lot)
+                depuis_commit += len(lot)
+                if depuis_commit >= LIGNES_PAR_TRANSACTION:
+                    conn.commit()
+                    depuis_commit = 0
+            budgets = list(budgets)
+            if budgets:
+                conn.execute(
+                    insert(Budget.__table__).prefix_with("OR IGNORE"), dictionnaire.remplacer_noms(conn, budgets)
+                )
+            conn.commit()
+    finally:
+        # Même après une erreur, les lots déjà committés doivent être comptés et indexés
+        db = sessionmaker(bind=engine)()
+        try:
+            reconstruire_rollup(db)
+        finally:
+            db.close()
+        mettre_a_niveau_schema(engine, [Transaction.__table__])
+        # Les ETag servis avant le chargement ne doivent plus correspondre
+        with engine.begin() as conn:
+            versions.incrementer(conn, [versions.TRANSACTIONS, versions.BUDGETS])
+            cles_budgets = conn.execute(select(Budget.categorie_id, Budget.mois, Budget.annee)).all()
+            versions.incrementer_statistiques(conn, cles_budgets, cles_budgets)
+        with engine.connect() as conn:
+            conn.execute(text("ANALYZE"))
+    return total
+
+
+def _date(texte: str) -> date:
+    try:
+        return date.fromisoformat(texte)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Date invalide (AAAA-MM-JJ attendu) : {texte}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Remplissage en masse de la base de données")
+    parser.add_argument("--url", help="URL de la base (par défaut celle de l'application)")
+    parser.add_argument("--graine", type=int, default=42)
+    commandes = parser.add_subparsers(dest="commande", required=True)
+
+    generer = commandes.add_parser("generer", help="Transactions et budgets synthétiques")
+    generer.add_argument("--transactions", type=int, default=1_000_000)
+    generer.add_argument("--categories", default=CATEGORIES_DEFAUT,
+                         help="Catégories de dépenses pondérées, ex. alimentation:30,loisirs:10")
+    generer.add_argument("--debut", type=_date, default=date(date.today().year - 2, 1, 1))
+    generer.add_argument("--fin", type=_date, default=date(date.today().year, 12, 31))
+    generer.add_argument("--depense-min", type=float, default=1.0)
+    generer.add_argument("--depense-max", type=float, default=200.0)
+    generer.add_argument("--part-revenus", type=float, default=0.1)
+    generer.add_argument("--revenu-min", type=float, default=1500.0)
+    generer.add_argument("--revenu-max", type=float, default=3500.0)
+    generer.add_argument("--categorie-revenus", default="salaire")
+    generer.add_argument("--saisonnalite", type=float, default=0.0,
+                         help="Amplitude de la saisonnalité mensuelle (0 à 1, pic en décembre)")
+    generer.add_argument("--budgets", type=float, metavar="MONTANT",
+                         help="Crée un budget de ce montant par catégorie de dépense et par mois")
+
+    rejeu = commandes.add_parser("rejouer", help="Rejoue un export CSV avec des dates décalées")
+    rejeu.add_argument("fichier")
+    rejeu.add_argument("--repetitions", type=int, default=10)
+    rejeu.add_argument("--decalage-jours", type=int,
+                       help="Décalage entre deux copies (par défaut, la durée couverte par le fichier)")
+
+    args = parser.parse_args(argv)
+
+    from app.database import CONFIGURATION, creer_engine
+    engine = creer_engine(args.url or CONFIGURATION["url"], CONFIGURATION["pragmas"])
+    budgets = []
+    try:
+        if args.commande == "generer":
+            categories = lire_categories(args.categories)
+            lots = generer_transactions(
+                args.transactions, categories, args.debut, args.fin,
+                depense_min=args.depense_min, depense_max=args.depense_max,
+                part_revenus=args.part_revenus, revenu_min=args.revenu_min, revenu_max=args.revenu_max,
+                categorie_revenus=args.categorie_revenus, saisonnalite=args.saisonnalite,
+                graine=args.graine
+            )
+            if args.budgets is not None:
+                budgets = generer_budgets(categories, args.debut, args.fin, args.budgets)
+        else:
+            lots = rejouer(lire_csv(args.fichier), args.repetitions, args.decalage_jours)
+        chrono = time.perf_counter()
+        total = charger(engine, lots, budgets)
+    except (ValueError, OSError, RuntimeError) as exc:
+        print(f"Erreur : {exc}", file=sys.stderr)
+        return 1
+    finally:
+        engine.dispose()
+    duree = time.perf_counter() - chrono
+    print(f"{total} transactions et {len(budgets)} budgets écrits en {duree:.1f} s "
+          f"({total / duree if duree else 0:.0f} lignes/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+Sérialisation directe des listes de l'API en JSON (orjson).
+
+Les listes de transactions et de budgets sont lues en tuples Core (seulement
+les colonnes de la réponse, sans objets ORM) et encodées par orjson, sans
+repasser par la validation des schémas de réponse : les lignes viennent de
+notre base et ont été validées à l'écriture. Champs, ordre des champs et
+valeurs (montants en euros, dates ISO) sont ceux de TransactionResponse et
+BudgetResponse, que les endpoints gardent en response_model pour la
+documentation OpenAPI.
+
+Le flux NDJSON (une transaction par ligne) reprend le même format, lot par
+lot depuis un curseur côté serveur.
+"""
+from typing import AsyncIterator, Iterable
+
+import orjson
+from fastapi import Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Budget, Categorie, Transaction
+from app.montants import en_euros
+
+# Lignes lues par aller-retour du curseur du flux NDJSON : petit pour que la
+# première transaction parte vite, assez grand pour amortir chaque envoi
+TAILLE_LOT_FLUX = 500
+
+
+def selection_transactions():
+    """Colonnes de TransactionResponse, dans l'ordre des champs, nom de catégorie joint"""
+    return select(
+        Transaction.montant_centimes,
+        Transaction.libelle,
+        Transaction.type,
+        Categorie.nom,
+        Transaction.date_transaction,
+        Transaction.id
+    ).join(Categorie, Categorie.id == Transaction.categorie_id)
+
+
+def selection_budgets():
+    """Colonnes de BudgetResponse, dans l'ordre des champs, nom de catégorie joint"""
+    return select(
+        Categorie.nom,
+        Budget.montant_budget_centimes,
+        Budget.mois,
+        Budget.annee,
+        Budget.id
+    ).select_from(Budget).join(Categorie, Categorie.id == Budget.categorie_id)
+
+
+def _transaction(ligne: tuple) -> dict:
+    montant, libelle, type_transaction, categorie, jour, transaction_id = ligne
+    return {
+        "montant": en_euros(montant),
+        "libelle": libelle,
+        "type": type_transaction,
+        "categorie": categorie,
+        "date_transaction": jour,
+        "id": transaction_id,
+    }
+
+
+def transactions_json(lignes: Iterable[tuple]) -> bytes:
+    """Liste JSON de transactions lues par selection_transactions()"""
+    return orjson.dumps([_transaction(ligne) for ligne in lignes])
+
+
+def transactions_ndjson(lignes: Iterable[tuple]) -> bytes:
+    """Transactions lues par selection_transactions(), un objet JSON par ligne"""
+    return b"".join(orjson.dumps(_transaction(ligne), option=orjson.OPT_APPEND_NEWLINE) for ligne in lignes)
+
+
+async def generer_ndjson_async(
+    db: AsyncSession, requete, taille_lot: int = TAILLE_LOT_FLUX
+) -> AsyncIterator[bytes]:
+    """
+    Produit le flux NDJSON d'une requête de selection_transactions(), un
+    morceau par lot lu sur un résultat en flux.
+
+    Le lot suivant n'est lu qu'une fois le morceau précédent envoyé : un
+    client lent suspend la lecture du curseur (contre-pression) au lieu
+    d'accumuler les lignes en mémoire.
+    """
+    resultat = await db.stream(requete.execution_options(yield_per=taille_lot))
+    try:
+        async for lot in resultat.partitions():
+            yield transactions_ndjson(lot)
+    finally:
+        await resultat.close()
+
+
+def budgets_json(lignes: Iterable[tuple]) -> bytes:
+    """Liste JSON de budgets lus par selection_budgets()"""
+    return orjson.dumps([
+        {
+            "categorie": categorie,
+            "montant_budget": en_euros(montant),
+            "mois": mois,
+            "annee": annee,
+            "id": budget_id,
+        }
+        for categorie, montant, mois, annee, budget_id in lignes
+    ])
+
+
+def reponse_json(contenu: bytes, response: Response) -> Response:
+    """
+    Réponse JSON déjà encodée. FastAPI ne fusionne pas les en-têtes posés sur
+    la réponse injectée dans l'endpoint (ETag, curseur) avec une Response
+    renvoyée directement : ils sont recopiés ici.
+    """
+    return Response(content=contenu, media_type="application/json", headers=dict(response.headers))
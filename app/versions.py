@@ -0,0 +1,143 @@
+"""
+Versions des données et GET conditionnels (ETag / If-None-Match).
+
+Chaque table lue par l'API (transactions, budgets) a un compteur dans la table
+versions_donnees, incrémenté dans la même transaction que toute écriture : au
+flush pour les écritures ORM (événement déclaré dans app/models.py),
+explicitement pour les insertions Core (lots, import CSV, remplissage en
+masse). Le compteur étant en base, il reste juste avec plusieurs workers ou un
+script qui écrit à côté de l'API.
+
+Le cache des statistiques (app.cache) se valide sur des compteurs plus fins,
+un par clé (categorie_id, mois, annee) dans la table versions_statistiques :
+une écriture ne rend périmées que les statistiques de sa catégorie et de son mois.
+
+L'ETag d'une réponse combine les versions des tables qu'elle lit, son chemin et
+ses paramètres. S'il figure dans If-None-Match, l'endpoint répond 304 sans
+exécuter sa requête ni sérialiser de résultat : seul le compteur est lu.
+"""
+import hashlib
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models import VersionDonnees, VersionStatistiques
+
+TRANSACTIONS = "transactions"
+BUDGETS = "budgets"
+
+
+def incrementer(db, tables: Iterable[str]) -> None:
+    """
+    Incrémente la version des tables écrites, dans la transaction en cours.
+
+    Le premier compteur d'une table part de l'heure courante en microsecondes :
+    une base recréée ne redonne pas une version déjà servie par l'ancienne.
+
+    Args:
+        db: Session ou Connection
+        tables: Noms des tables écrites
+    """
+    conn = db.connection() if isinstance(db, Session) else db
+    initiale = time.time_ns() // 1000
+    conn.execute(
+        insert(VersionDonnees).on_conflict_do_update(
+            index_elements=["nom_table"], set_={"version": VersionDonnees.version + 1}
+        ),
+        [{"nom_table": table, "version": initiale} for table in sorted(set(tables))]
+    )
+
+
+def lire(db: Session, tables: Iterable[str]) -> Dict[str, int]:
+    """Version courante de chaque table (0 pour une table jamais écrite)"""
+    tables = sorted(set(tables))
+    versions = dict(db.execute(
+        select(VersionDonnees.nom_table, VersionDonnees.version).where(VersionDonnees.nom_table.in_(tables))
+    ).all())
+    return {table: versions.get(table, 0) for table in tables}
+
+
+def incrementer_statistiques(db, cles: Iterable[Tuple[int, int, int]],
+                             cles_periode: Iterable[Tuple[int, int, int]] = ()) -> None:
+    """
+    Incrémente la version des clés de statistiques écrites, dans la transaction en cours.
+
+    Args:
+        db: Session ou Connection
+        cles: Clés (categorie_id, mois, annee) dont les statistiques changent
+        cles_periode: Parmi elles, celles dont un budget est créé, supprimé ou
+            déplacé : la liste des catégories budgétées de leur mois change aussi
+    """
+    conn = db.connection() if isinstance(db, Session) else db
+    cles_periode = set(cles_periode)
+    initiale = time.time_ns() // 1000
+    for lot, periode in ((set(cles) - cles_periode, False), (cles_periode, True)):
+        if not lot:
+            continue
+        requete = insert(VersionStatistiques)
+        mises_a_jour = {"version": VersionStatistiques.version + 1}
+        if periode:
+            mises_a_jour["version_periode"] = VersionStatistiques.version_periode + 1
+        conn.execute(
+            requete.on_conflict_do_update(index_elements=["annee", "mois", "categorie_id"], set_=mises_a_jour),
+            [
+                {"categorie_id": categorie_id, "mois": mois, "annee": annee,
+                 "version": initiale, "version_periode": initiale if periode else 0}
+                for categorie_id, mois, annee in sorted(lot)
+            ]
+        )
+
+
+def lire_statistiques(db: Session, mois: int, annee: int,
+                      categorie_ids: Optional[Iterable[int]] = None) -> Dict[int, Tuple[int, int]]:
+    """
+    Versions (version, version_periode) des clés d'un mois, par categorie_id ;
+    une clé jamais écrite est absente. Limitée à categorie_ids s'il est donné.
+    """
+    requete = select(
+        VersionStatistiques.categorie_id, VersionStatistiques.version, VersionStatistiques.version_periode
+    ).where(VersionStatistiques.annee == annee, VersionStatistiques.mois == mois)
+    if categorie_ids is not None:
+        requete = requete.where(VersionStatistiques.categorie_id.in_(list(categorie_ids)))
+    return {categorie_id: (version, periode) for categorie_id, version, periode in db.execute(requete)}
+
+
+def calculer_etag(request: Request, versions: Dict[str, int]) -> str:
+    """ETag faible de la réponse à une requête, pour des versions de tables données"""
+    parametres = "&".join(f"{cle}={valeur}" for cle, valeur in sorted(request.query_params.multi_items()))
+    etat = ";".join(f"{table}={version}" for table, version in sorted(versions.items()))
+    empreinte = hashlib.blake2b(f"{request.url.path}?{parametres}|{etat}".encode(), digest_size=12)
+    return f'W/"{empreinte.hexdigest()}"'
+
+
+def correspond(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparaison faible de If-None-Match à un ETag (liste séparée par des virgules ou *)"""
+    if not if_none_match:
+        return False
+    valeurs = {valeur.strip() for valeur in if_none_match.split(",")}
+    if "*" in valeurs:
+        return True
+    return etag.removeprefix("W/") in {valeur.removeprefix("W/") for valeur in valeurs}
+
+
+async def reponse_conditionnelle(request: Request, response: Response, db: AsyncSession,
+                                 *tables: str) -> Optional[Response]:
+    """
+    Réponse 304 si le client détient déjà la représentation courante, sinon None
+    après avoir ajouté l'ETag aux en-têtes de la réponse à venir.
+
+    À appeler avant la requête de l'endpoint : une écriture validée entre les
+    deux donne au plus un ETag plus ancien que les données, que le client
+    renverra sans correspondance ; jamais des données plus anciennes que l'ETag.
+    """
+    etag = calculer_etag(request, await db.run_sync(lire, tables))
+    en_tetes = {"ETag": etag, "Cache-Control": "no-cache"}
+    if correspond(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=en_tetes)
+    response.headers.update(en_tetes)
+    return None
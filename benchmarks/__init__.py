@@ -0,0 +1 @@
+"""Benchmarks de performance de l'application (hors suite de tests)."""
@@ -0,0 +1,104 @@
+"""
+Benchmark : total dépensé par catégorie/mois, somme ORM vs SUM SQL vs rollup.
+
+Mesure le temps et le pic mémoire Python (tracemalloc) du calcul du total
+dépensé pour une catégorie/mois, en fonction du nombre de lignes concernées.
+
+Usage :
+    python -m benchmarks.agregation_depenses [--tailles 1000 10000 100000]
+"""
+import argparse
+import time
+import tracemalloc
+from datetime import date
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.categories import id_par_nom, remplacer_noms
+from app.database import Base
+from app.models import Transaction, Budget
+from app.rollup import reconstruire_rollup
+from app import business_logic
+
+
+def _filtre_mois(categorie, mois, annee):
+    date_debut = date(annee, mois, 1)
+    date_fin = date(annee + 1, 1, 1) if mois == 12 else date(annee, mois + 1, 1)
+    return (
+        Transaction.categorie_id == id_par_nom(categorie),
+        Transaction.type == "depense",
+        Transaction.date_transaction >= date_debut,
+        Transaction.date_transaction < date_fin,
+    )
+
+
+def _somme_orm(db, categorie, mois, annee):
+    """Implémentation d'origine : charge chaque ligne puis somme en Python."""
+    transactions = db.query(Transaction).filter(*_filtre_mois(categorie, mois, annee)).all()
+    return sum(t.montant_centimes for t in transactions)
+
+
+def _somme_sql(db, categorie, mois, annee):
+    """Agrégation SUM par la base sur la plage de dates du mois."""
+    return db.execute(
+        select(func.coalesce(func.sum(Transaction.montant_centimes), 0))
+        .where(*_filtre_mois(categorie, mois, annee))
+    ).scalar_one()
+
+
+def _preparer_base(nombre_lignes):
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    lignes = [
+        {
+            "montant_centimes": 100 + (i % 100) * 10,
+            "libelle": f"Achat {i}",
+            "type": "depense",
+            "categorie": "alimentation",
+            "date_transaction": date(2026, 1, 1 + i % 28),
+        }
+        for i in range(nombre_lignes)
+    ]
+    with engine.begin() as conn:
+        conn.execute(insert(Transaction), remplacer_noms(conn, lignes))
+        conn.execute(insert(Budget), remplacer_noms(conn, [
+            {"categorie": "alimentation", "montant_budget_centimes": 100_000, "mois": 1, "annee": 2026}
+        ]))
+    db = sessionmaker(bind=engine)()
+    reconstruire_rollup(db)
+    return db
+
+
+def _mesurer(fonction, db):
+    db.expunge_all()
+    tracemalloc.start()
+    debut = time.perf_counter()
+    resultat = fonction(db, "alimentation", 1, 2026)
+    duree = time.perf_counter() - debut
+    _, pic = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultat, duree, pic
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tailles", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    args = parser.parse_args()
+
+    print(f"{'lignes':>10} | {'méthode':<22} | {'temps (ms)':>10} | {'pic mémoire (Ko)':>16}")
+    for taille in args.tailles:
+        db = _preparer_base(taille)
+        for nom, fonction in [
+            ("somme ORM", _somme_orm),
+            ("SUM SQL", _somme_sql),
+            ("rollup", business_logic.calculer_total_depense_par_categorie),
+            ("statistiques budget", business_logic.obtenir_statistiques_budget),
+        ]:
+            _, duree, pic = _mesurer(fonction, db)
+            print(f"{taille:>10} | {nom:<22} | {duree * 1000:>10.2f} | {pic / 1024:>16.1f}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
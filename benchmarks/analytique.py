@@ -0,0 +1,107 @@
+"""
+Benchmark : rapports pluriannuels, requêtes SQL vs moteur en colonnes NumPy.
+
+Sur les Y années d'une base synthétique, calcule les totaux de dépenses par
+mois (avec cumul et somme glissante) et par catégorie :
+
+- SQL mois × catégorie : calculer_total_depense_par_categorie appelé pour
+  chaque mois et chaque catégorie, comme le ferait un rapport construit sur
+  la logique métier existante
+- SQL GROUP BY : une requête agrégée par mois, une par catégorie
+- Rollup + NumPy : les rapports de app.analytique, lignes du rollup chargées
+  en colonnes puis regroupées (chemin des endpoints /api/reports)
+
+Usage :
+    python -m benchmarks.analytique [--tailles 1000000 10000000] [--categories 20] [--annees 3]
+"""
+import argparse
+import statistics
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app import analytique, business_logic
+from app.models import Transaction
+from benchmarks import donnees
+
+
+def _sql_mois_categorie(db, categories, annees):
+    totaux = {}
+    for annee in annees:
+        for mois in range(1, 13):
+            for categorie in categories:
+                totaux[categorie, annee, mois] = business_logic.calculer_total_depense_par_categorie(
+                    db, categorie, mois, annee
+                )
+    return totaux
+
+
+def _sql_group_by(db, categories, annees):
+    periode = (
+        Transaction.type == "depense",
+        Transaction.date_transaction >= f"{annees[0]}-01-01",
+        Transaction.date_transaction < f"{annees[-1] + 1}-01-01",
+    )
+    mois = func.strftime("%Y-%m", Transaction.date_transaction)
+    par_mois = db.execute(
+        select(mois, func.sum(Transaction.montant_centimes)).where(*periode).group_by(mois)
+    ).all()
+    par_categorie = db.execute(
+        select(Transaction.categorie_id, func.sum(Transaction.montant_centimes), func.count())
+        .where(*periode).group_by(Transaction.categorie_id)
+    ).all()
+    return par_mois, par_categorie
+
+
+def _rollup(db, categories, annees):
+    return (
+        analytique.rapport_mensuel(db, annees[0], annees[-1]),
+        analytique.rapport_categories(db, annees[0], annees[-1]),
+    )
+
+
+def _chronometrer(fonction, db, categories, annees, repetitions):
+    durees = []
+    for _ in range(repetitions):
+        db.expunge_all()
+        debut = time.perf_counter()
+        fonction(db, categories, annees)
+        durees.append(time.perf_counter() - debut)
+    return statistics.median(durees)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tailles", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--annees", type=int, default=3)
+    parser.add_argument("--repetitions", type=int, default=3)
+    parser.add_argument("--cache", type=Path, default=Path(".bench_cache"),
+                        help="Répertoire des bases générées")
+    args = parser.parse_args()
+
+    categories = donnees.categories(args.categories)
+    annees = donnees.annees(args.annees)
+    methodes = [
+        ("SQL mois × catégorie", _sql_mois_categorie),
+        ("SQL GROUP BY", _sql_group_by),
+        ("Rollup + NumPy", _rollup),
+    ]
+    print(f"{'lignes':>10} | {'méthode':<22} | {'médiane (ms)':>12}")
+    for taille in args.tailles:
+        fichier = donnees.base_en_cache(args.cache, taille, args.categories, args.annees)
+        engine = create_engine(f"sqlite:///{fichier}")
+        db = sessionmaker(bind=engine)()
+        try:
+            for nom, fonction in methodes:
+                duree = _chronometrer(fonction, db, categories, annees, args.repetitions)
+                print(f"{taille:>10} | {nom:<22} | {duree * 1000:>12.1f}")
+        finally:
+            db.close()
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
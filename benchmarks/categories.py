@@ -0,0 +1,156 @@
+"""
+Benchmark : catégories en texte (schéma d'origine) vs dictionnaire d'ids entiers.
+
+Construit une base au schéma d'origine (colonne categorie TEXT indexée), mesure
+la taille de la table et de ses index (table virtuelle dbstat) et le temps des
+filtres par catégorie, puis applique migrer_categories() et refait les mêmes
+mesures sur categorie_id, l'id étant résolu par le cache de processus comme
+dans l'application.
+
+Usage :
+    python -m benchmarks.categories [--lignes 1000000] [--categories 20] [--annees 3]
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+
+from app import categories
+from app.database import mettre_a_niveau_schema, migrer_categories
+from benchmarks import donnees
+
+SCHEMA_TEXTE = [
+    """CREATE TABLE transactions (
+        id INTEGER PRIMARY KEY, montant_centimes BIGINT NOT NULL, libelle VARCHAR NOT NULL,
+        type VARCHAR NOT NULL, categorie VARCHAR NOT NULL, date_transaction DATE NOT NULL
+    )""",
+    "CREATE INDEX ix_transactions_categorie_type_date ON transactions "
+    "(categorie, type, date_transaction, montant_centimes)",
+    "CREATE INDEX ix_transactions_date_transaction ON transactions (date_transaction)",
+    "CREATE INDEX ix_transactions_id ON transactions (id)",
+    "CREATE INDEX ix_transactions_categorie_date ON transactions (categorie, date_transaction)",
+    """CREATE TABLE budgets (
+        id INTEGER PRIMARY KEY, categorie VARCHAR NOT NULL, montant_budget_centimes BIGINT NOT NULL,
+        mois INTEGER NOT NULL, annee INTEGER NOT NULL
+    )""",
+    "CREATE UNIQUE INDEX uq_budgets_categorie_periode ON budgets (categorie, mois, annee)",
+]
+
+# Filtres par catégorie de l'application ; {filtre} vaut "categorie = :nom"
+# avant la migration et "categorie_id = :id" après
+REQUETES = {
+    "total dépenses catégorie/mois": (
+        "SELECT coalesce(sum(montant_centimes), 0) FROM transactions "
+        "WHERE {filtre} AND type = 'depense' "
+        "AND date_transaction >= '{annee}-03-01' AND date_transaction < '{annee}-04-01'"
+    ),
+    "page catégorie (limit 50)": (
+        "SELECT * FROM transactions WHERE {filtre} "
+        "ORDER BY date_transaction DESC, id DESC LIMIT 50"
+    ),
+    "nombre par catégorie sur l'année": (
+        "SELECT count(*) FROM transactions WHERE {filtre} "
+        "AND date_transaction >= '{annee}-01-01' AND date_transaction < '{annee_suivante}-01-01'"
+    ),
+}
+
+
+def _remplir(engine, nombre, nombre_categories, nombre_annees):
+    colonnes = ("montant_centimes", "libelle", "type", "categorie", "date_transaction")
+    insertion = text(
+        f"INSERT INTO transactions ({', '.join(colonnes)}) VALUES ({', '.join(':' + c for c in colonnes)})"
+    )
+    with engine.begin() as conn:
+        for ddl in SCHEMA_TEXTE:
+            conn.execute(text(ddl))
+        for lot in donnees.generer_transactions(nombre, nombre_categories, nombre_annees):
+            conn.execute(insertion, [dict(l, date_transaction=l["date_transaction"].isoformat()) for l in lot])
+    with engine.connect() as conn:
+        conn.execute(text("ANALYZE"))
+
+
+def _tailles(engine):
+    """Taille en octets de la table transactions et de chacun de ses index"""
+    with engine.connect() as conn:
+        noms = {"transactions"} | {
+            ligne[0] for ligne in conn.execute(text("SELECT name FROM pragma_index_list('transactions')"))
+        }
+        return {
+            nom: taille for nom, taille in conn.execute(text("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name"))
+            if nom in noms
+        }
+
+
+def _chronometrer(engine, filtre, parametres, annee, nombre_categories, repetitions):
+    durees = {}
+    with engine.connect() as conn:
+        for nom, modele in REQUETES.items():
+            sql = text(modele.format(filtre=filtre, annee=annee, annee_suivante=annee + 1))
+            # Un premier passage sur chaque catégorie, non mesuré, charge les pages en cache
+            for i in range(nombre_categories):
+                conn.execute(sql, parametres(conn, i)).all()
+            mesures = []
+            for i in range(repetitions):
+                # La résolution du nom en id fait partie de la mesure, comme dans l'application
+                debut = time.perf_counter()
+                conn.execute(sql, parametres(conn, i)).all()
+                mesures.append(time.perf_counter() - debut)
+            durees[nom] = statistics.median(mesures)
+    return durees
+
+
+def _afficher(titre, tailles, durees):
+    print(titre)
+    for nom, taille in sorted(tailles.items()):
+        print(f"  {nom:<38} {taille / 2**20:>9.1f} Mo")
+    print(f"  {'index (total)':<38} {sum(t for n, t in tailles.items() if n != 'transactions') / 2**20:>9.1f} Mo")
+    for nom, duree in durees.items():
+        print(f"  {nom:<38} {duree * 1000:>9.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lignes", type=int, default=1_000_000)
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--annees", type=int, default=3)
+    parser.add_argument("--repetitions", type=int, default=50)
+    args = parser.parse_args()
+
+    noms = donnees.categories(args.categories)
+    annee = donnees.annees(args.annees)[-1]
+    with tempfile.TemporaryDirectory() as repertoire:
+        engine = create_engine(f"sqlite:///{Path(repertoire) / 'categories.db'}")
+        _remplir(engine, args.lignes, args.categories, args.annees)
+        def parametres_nom(conn, i):
+            return {"nom": noms[i % len(noms)]}
+
+        _afficher(
+            f"{args.lignes} transactions, catégorie en texte :",
+            _tailles(engine),
+            _chronometrer(engine, "categorie = :nom", parametres_nom, annee, args.categories, args.repetitions)
+        )
+
+        debut = time.perf_counter()
+        migrer_categories(engine)
+        mettre_a_niveau_schema(engine)
+        duree_migration = time.perf_counter() - debut
+        with engine.connect() as conn:
+            conn.execute(text("VACUUM"))
+            conn.execute(text("ANALYZE"))
+
+        def parametres_id(conn, i):
+            return {"id": categories.cache.identifiant(conn, noms[i % len(noms)])}
+
+        _afficher(
+            f"après migrer_categories ({duree_migration:.1f} s), categorie_id entier :",
+            _tailles(engine),
+            _chronometrer(engine, "categorie_id = :id", parametres_id, annee, args.categories, args.repetitions)
+        )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark : coût CPU de la compression vs octets économisés, par encodage et par niveau.
+
+Deux charges représentatives : la liste JSON de GET /api/transactions et
+l'export CSV. Le JSON est compressé d'un bloc (réponse complète) ; le CSV
+morceau par morceau, comme l'export en flux (un morceau par lot de 1000
+lignes, vidé à chaque morceau), ce qui coûte un peu de taux de compression.
+Le temps est du temps CPU du processus (médiane), ramené en Mo/s non compressés.
+
+Usage :
+    python -m benchmarks.compression [--lignes 20000] [--repetitions 5]
+"""
+import argparse
+import csv
+import io
+import statistics
+import time
+
+from app import compression, serialisation
+from app.export import COLONNES_CSV, TAILLE_LOT
+from app.montants import en_euros
+from benchmarks import donnees
+
+NIVEAUX_MESURES = {
+    "gzip": (1, 3, 6, 9),
+    "br": (0, 1, 4, 6, 9, 11),
+    "zstd": (1, 3, 6, 9, 12, 19),
+}
+
+
+def _charges(nombre):
+    lignes = [
+        (ligne["montant_centimes"], ligne["libelle"], ligne["type"], ligne["categorie"], ligne["date_transaction"], i)
+        for i, ligne in enumerate(
+            (ligne for lot in donnees.generer_transactions(nombre, 20, 3) for ligne in lot), start=1
+        )
+    ]
+    json_liste = serialisation.transactions_json(lignes)
+    morceaux = []
+    for debut in range(0, len(lignes), TAILLE_LOT):
+        tampon = io.StringIO()
+        writer = csv.writer(tampon)
+        if not debut:
+            writer.writerow(COLONNES_CSV)
+        writer.writerows(
+            (t_id, jour.isoformat(), libelle, type_transaction, categorie, en_euros(montant))
+            for montant, libelle, type_transaction, categorie, jour, t_id in lignes[debut:debut + TAILLE_LOT]
+        )
+        morceaux.append(tampon.getvalue().encode())
+    return {"JSON (réponse complète)": [json_liste], "CSV (flux, lots de 1000)": morceaux}
+
+
+def _compresser(morceaux, encodage, niveau):
+    compresseur = compression.Compresseur(encodage, niveau)
+    sortie = [compresseur.morceau(m) for m in morceaux[:-1]]
+    sortie.append(compresseur.fin(morceaux[-1]))
+    return sum(len(s) for s in sortie)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lignes", type=int, default=20_000)
+    parser.add_argument("--repetitions", type=int, default=5)
+    args = parser.parse_args()
+
+    for nom, morceaux in _charges(args.lignes).items():
+        taille = sum(len(m) for m in morceaux)
+        print(f"{nom} : {args.lignes} transactions, {taille / 1024:.0f} Ko")
+        for encodage in compression.encodages_disponibles():
+            for niveau in NIVEAUX_MESURES[encodage]:
+                durees = []
+                for _ in range(args.repetitions):
+                    debut = time.process_time()
+                    taille_compressee = _compresser(morceaux, encodage, niveau)
+                    durees.append(time.process_time() - debut)
+                duree = statistics.median(durees)
+                print(
+                    f"  {encodage:<5} niveau {niveau:>2} : {taille_compressee / 1024:>8.0f} Ko"
+                    f" ({100 * (1 - taille_compressee / taille):5.1f} % économisés)"
+                    f" | CPU {duree * 1000:>8.1f} ms ({taille / 2**20 / duree:>7.1f} Mo/s)"
+                )
+
+
+if __name__ == "__main__":
+    main()
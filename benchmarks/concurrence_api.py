@@ -0,0 +1,150 @@
+"""
+Benchmark : requêtes par seconde de l'API sous 50 et 200 clients concurrents.
+
+Un serveur uvicorn (un seul processus) est lancé sur une base SQLite
+temporaire pré-remplie ; chaque client enchaîne des requêtes mélangées
+(statistiques d'un budget, page de transactions, création d'une dépense)
+pendant une durée fixe. Avec --url, le benchmark cible un serveur déjà lancé,
+par exemple une version antérieure de l'application pour comparaison.
+
+Usage :
+    python -m benchmarks.concurrence_api [--clients 50 200] [--duree 10] [--url http://127.0.0.1:8000]
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import httpx
+from sqlalchemy import create_engine, insert
+
+from app.categories import remplacer_noms
+from app.database import Base
+from app.models import Budget, Transaction
+from app.montants import en_centimes
+
+CATEGORIES = ["alimentation", "logement", "transport", "loisirs", "sante"]
+
+
+def _remplir(fichier, nombre_lignes):
+    engine = create_engine(f"sqlite:///{fichier}")
+    Base.metadata.create_all(bind=engine)
+    aleatoire = random.Random(42)
+    with engine.begin() as conn:
+        conn.execute(insert(Budget), remplacer_noms(conn, [
+            {"categorie": c, "montant_budget_centimes": 500_000, "mois": m, "annee": 2026}
+            for c in CATEGORIES for m in range(1, 13)
+        ]))
+        conn.execute(insert(Transaction), remplacer_noms(conn, [
+            {
+                "montant_centimes": en_centimes(aleatoire.uniform(1, 100)),
+                "libelle": f"Opération {i}",
+                "type": "depense",
+                "categorie": aleatoire.choice(CATEGORIES),
+                "date_transaction": date(2026, 1, 1) + timedelta(days=aleatoire.randrange(365)),
+            }
+            for i in range(nombre_lignes)
+        ]))
+    engine.dispose()
+
+
+def _port_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _demarrer_serveur(fichier):
+    port = _port_libre()
+    env = dict(os.environ, BUDGET_DATABASE_URL=f"sqlite:///{fichier}")
+    serveur = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env
+    )
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            httpx.get(f"{url}/api/budgets?mois=1&annee=2026")
+            return serveur, url
+        except httpx.TransportError:
+            time.sleep(0.1)
+    serveur.terminate()
+    raise RuntimeError("Le serveur uvicorn n'a pas démarré")
+
+
+async def _client(http, fin, graine, latences, erreurs):
+    aleatoire = random.Random(graine)
+    while time.perf_counter() < fin:
+        tirage = aleatoire.random()
+        categorie = aleatoire.choice(CATEGORIES)
+        mois = aleatoire.randint(1, 12)
+        debut = time.perf_counter()
+        try:
+            if tirage < 0.6:
+                reponse = await http.get(f"/api/budgets/stats/{categorie}", params={"mois": mois, "annee": 2026})
+            elif tirage < 0.9:
+                reponse = await http.get("/api/transactions", params={"categorie": categorie, "limit": 50})
+            else:
+                reponse = await http.post("/api/transactions", json={
+                    "montant": 12.5, "libelle": "Bench", "type": "depense",
+                    "categorie": categorie, "date_transaction": f"2026-{mois:02d}-15"
+                })
+            if reponse.status_code >= 400:
+                erreurs.append(reponse.status_code)
+        except httpx.HTTPError as exc:
+            erreurs.append(type(exc).__name__)
+        latences.append(time.perf_counter() - debut)
+
+
+async def _mesurer(url, clients, duree):
+    latences, erreurs = [], []
+    limites = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=url, limits=limites, timeout=60) as http:
+        fin = time.perf_counter() + duree
+        debut = time.perf_counter()
+        await asyncio.gather(*(_client(http, fin, i, latences, erreurs) for i in range(clients)))
+        ecoule = time.perf_counter() - debut
+    quantiles = statistics.quantiles(latences, n=100)
+    print(
+        f"  {clients:>4} clients | {len(latences) / ecoule:>8.0f} req/s"
+        f" | p50 {quantiles[49] * 1000:>7.1f} ms | p99 {quantiles[98] * 1000:>7.1f} ms"
+        f" | {len(erreurs)} erreurs"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--duree", type=float, default=10.0)
+    parser.add_argument("--lignes", type=int, default=50_000)
+    parser.add_argument("--url", help="Serveur déjà lancé à mesurer (sinon un serveur temporaire est démarré)")
+    args = parser.parse_args()
+
+    if args.url:
+        for clients in args.clients:
+            asyncio.run(_mesurer(args.url, clients, args.duree))
+        return
+
+    with tempfile.TemporaryDirectory() as repertoire:
+        fichier = Path(repertoire) / "budget.db"
+        _remplir(fichier, args.lignes)
+        serveur, url = _demarrer_serveur(fichier)
+        try:
+            print(f"{args.lignes} transactions, {args.duree}s par palier :")
+            for clients in args.clients:
+                asyncio.run(_mesurer(url, clients, args.duree))
+        finally:
+            serveur.terminate()
+            serveur.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark : N appels à POST /api/transactions vs un appel à POST /api/transactions/batch.
+
+Les deux variantes passent par l'application FastAPI (TestClient) sur une base
+SQLite temporaire, avec des budgets définis pour que chaque dépense soit
+vérifiée.
+
+Usage :
+    python -m benchmarks.creation_lot [--elements 1000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.database import Base, get_async_db
+from app.main import app
+from app import cache
+
+CATEGORIES = ["alimentation", "logement", "transport", "loisirs", "sante"]
+
+
+def _client():
+    fichier = tempfile.NamedTemporaryFile(suffix=".db", delete=False).name
+    engine = create_engine(f"sqlite:///{fichier}")
+    Base.metadata.create_all(bind=engine)
+    SessionBench = async_sessionmaker(
+        create_async_engine(f"sqlite+aiosqlite:///{fichier}", poolclass=NullPool),
+        autoflush=False, expire_on_commit=False
+    )
+
+    async def get_db_bench():
+        async with SessionBench() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = get_db_bench
+    cache.cache_statistiques.vider()
+    cache.cache_periodes.vider()
+    client = TestClient(app)
+    for categorie in CATEGORIES:
+        for mois in range(1, 13):
+            client.post("/api/budgets", json={
+                "categorie": categorie, "montant_budget": 500.0, "mois": mois, "annee": 2026
+            })
+    return client, engine, fichier
+
+
+def _elements(nombre):
+    aleatoire = random.Random(42)
+    return [
+        {
+            "montant": round(aleatoire.uniform(1, 100), 2),
+            "libelle": f"Opération {i}",
+            "type": "depense",
+            "categorie": aleatoire.choice(CATEGORIES),
+            "date_transaction": f"2026-{aleatoire.randint(1, 12):02d}-{aleatoire.randint(1, 28):02d}",
+        }
+        for i in range(nombre)
+    ]
+
+
+def _mesurer(nom, fonction, elements):
+    client, engine, fichier = _client()
+    try:
+        debut = time.perf_counter()
+        alertes = fonction(client, elements)
+        duree = time.perf_counter() - debut
+    finally:
+        app.dependency_overrides.clear()
+        engine.dispose()
+        os.remove(fichier)
+    print(f"{nom:<28} | {duree:>8.3f} s | {len(elements) / duree:>12.0f} transactions/s | {alertes:>7} alertes")
+
+
+def _unitaires(client, elements):
+    reponses = [client.post("/api/transactions", json=e).json() for e in elements]
+    return sum(1 for r in reponses if r.get("alerte_depassement"))
+
+
+def _lot(client, elements):
+    reponses = client.post("/api/transactions/batch", json=elements).json()
+    return sum(1 for r in reponses if r.get("alerte_depassement"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--elements", type=int, default=1000)
+    args = parser.parse_args()
+
+    elements = _elements(args.elements)
+    print(f"{args.elements} transactions")
+    _mesurer(f"{args.elements} POST unitaires", _unitaires, elements)
+    _mesurer("1 POST /batch", _lot, elements)
+
+
+if __name__ == "__main__":
+    main()
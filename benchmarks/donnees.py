@@ -0,0 +1,140 @@
+"""
+Générateur déterministe de données synthétiques pour les benchmarks.
+
+N transactions réparties sur M catégories et Y années (à partir de 2026 - Y + 1),
+avec un budget par catégorie et par mois. Une même graine produit toujours les
+mêmes lignes, quelle que soit la taille des lots d'insertion.
+"""
+import random
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterator, List
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import sessionmaker
+
+from app.categories import remplacer_noms
+from app.database import Base, mettre_a_niveau_schema, migrer_categories, migrer_montants_en_centimes
+from app.models import Budget, Transaction
+from app.montants import en_centimes
+from app.rollup import reconstruire_rollup
+
+DERNIERE_ANNEE = 2026
+PART_REVENUS = 0.1
+TAILLE_LOT = 50_000
+
+
+def categories(nombre: int) -> List[str]:
+    """Noms des M catégories synthétiques"""
+    return [f"categorie_{i:03d}" for i in range(nombre)]
+
+
+def annees(nombre: int) -> List[int]:
+    """Les Y dernières années, jusqu'à DERNIERE_ANNEE incluse"""
+    return list(range(DERNIERE_ANNEE - nombre + 1, DERNIERE_ANNEE + 1))
+
+
+def generer_transactions(
+    nombre: int, nombre_categories: int, nombre_annees: int, graine: int = 42, taille_lot: int = TAILLE_LOT
+) -> Iterator[List[dict]]:
+    """
+    Produit les transactions par lots de dictionnaires prêts pour insert().
+
+    Les montants des dépenses sont tirés uniformément entre 1 et 200 €, ceux
+    des revenus entre 500 et 3000 € ; les dates couvrent uniformément les Y années.
+    """
+    aleatoire = random.Random(graine)
+    noms = categories(nombre_categories)
+    origine = date(annees(nombre_annees)[0], 1, 1)
+    nombre_jours = (date(DERNIERE_ANNEE + 1, 1, 1) - origine).days
+    for debut in range(0, nombre, taille_lot):
+        lot = []
+        for i in range(debut, min(debut + taille_lot, nombre)):
+            revenu = aleatoire.random() < PART_REVENUS
+            lot.append({
+                "montant_centimes": en_centimes(aleatoire.uniform(500, 3000) if revenu else aleatoire.uniform(1, 200)),
+                "libelle": f"Opération {i}",
+                "type": "revenu" if revenu else "depense",
+                "categorie": aleatoire.choice(noms),
+                "date_transaction": origine + timedelta(days=aleatoire.randrange(nombre_jours)),
+            })
+        yield lot
+
+
+def generer_budgets(nombre: int, nombre_categories: int, nombre_annees: int) -> List[dict]:
+    """
+    Un budget par catégorie et par mois, proche de la dépense moyenne attendue.
+
+    Le montant est fixé à la dépense mensuelle moyenne d'une catégorie : environ
+    la moitié des budgets sont dépassés, ce qui exerce les alertes.
+    """
+    nombre_mois = 12 * nombre_annees
+    depense_moyenne = nombre * (1 - PART_REVENUS) * 100.5 / (nombre_categories * nombre_mois)
+    return [
+        {
+            "categorie": categorie, "montant_budget_centimes": en_centimes(max(depense_moyenne, 1.0)),
+            "mois": mois, "annee": annee
+        }
+        for categorie in categories(nombre_categories)
+        for annee in annees(nombre_annees)
+        for mois in range(1, 13)
+    ]
+
+
+def remplir_base(url: str, nombre: int, nombre_categories: int, nombre_annees: int, graine: int = 42) -> None:
+    """Crée le schéma puis insère transactions et budgets en masse, et alimente le rollup"""
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for lot in generer_transactions(nombre, nombre_categories, nombre_annees, graine):
+            conn.execute(insert(Transaction), remplacer_noms(conn, lot))
+        conn.execute(insert(Budget), remplacer_noms(conn, generer_budgets(nombre, nombre_categories, nombre_annees)))
+    db = sessionmaker(bind=engine)()
+    try:
+        reconstruire_rollup(db)
+    finally:
+        db.close()
+    with engine.connect() as conn:
+        conn.execute(text("ANALYZE"))
+    engine.dispose()
+
+
+def base_en_cache(
+    repertoire: Path, nombre: int, nombre_categories: int, nombre_annees: int, graine: int = 42
+) -> Path:
+    """
+    Fichier SQLite rempli pour ces paramètres, généré une seule fois par répertoire.
+
+    Les bases de plusieurs millions de lignes sont longues à générer : elles
+    sont conservées d'un run à l'autre sous un nom dérivé des paramètres.
+    """
+    repertoire.mkdir(parents=True, exist_ok=True)
+    fichier = repertoire / f"bench_{nombre}_{nombre_categories}c_{nombre_annees}a_{graine}.db"
+    if not fichier.exists():
+        partiel = fichier.with_suffix(".partiel")
+        partiel.unlink(missing_ok=True)
+        remplir_base(f"sqlite:///{partiel}", nombre, nombre_categories, nombre_annees, graine)
+        partiel.rename(fichier)
+    else:
+        _mettre_a_niveau(f"sqlite:///{fichier}")
+    return fichier
+
+
+def _mettre_a_niveau(url: str) -> None:
+    """
+    Migre sur place une base mise en cache avant les centimes ou le dictionnaire
+    des catégories, et y crée les index ajoutés depuis sa génération.
+    """
+    engine = create_engine(url)
+    try:
+        migrations = [migrer_montants_en_centimes(engine), migrer_categories(engine)]
+        Base.metadata.create_all(bind=engine)
+        mettre_a_niveau_schema(engine)
+        if any(migrations):
+            db = sessionmaker(bind=engine)()
+            try:
+                reconstruire_rollup(db)
+            finally:
+                db.close()
+    finally:
+        engine.dispose()
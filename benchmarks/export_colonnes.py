@@ -0,0 +1,96 @@
+"""
+Benchmark : export CSV vs Parquet et flux Arrow IPC (taille, export, chargement).
+
+Les trois exports sont produits en flux depuis la même base, puis relus comme
+le ferait un analyste : le CSV par le module csv de la bibliothèque standard
+et par pyarrow.csv (lecteur multithread, types inférés), Parquet et Arrow par
+pyarrow. Le plus gros morceau envoyé borne ce que l'export garde en mémoire :
+un lot du curseur (65 536 lignes pour Parquet et Arrow, 1000 pour le CSV).
+
+Usage :
+    python -m benchmarks.export_colonnes [--lignes 1000000] [--cache .bench_cache]
+"""
+import argparse
+import csv
+import io
+import statistics
+import time
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import export, export_colonnes
+from benchmarks import donnees
+
+
+def _exporter(db, format_export):
+    requete = export.requete_transactions()
+    if format_export == "csv":
+        return [morceau.encode("utf-8") for morceau in export.generer_csv(db, requete)]
+    return list(export_colonnes.generer(db, requete, format_export))
+
+
+LECTEURS = {
+    "csv": {
+        "module csv": lambda contenu: sum(1 for _ in csv.DictReader(io.StringIO(contenu.decode("utf-8")))),
+        "pyarrow.csv": lambda contenu: pa_csv.read_csv(io.BytesIO(contenu)).num_rows,
+    },
+    export_colonnes.PARQUET: {
+        "pyarrow.parquet": lambda contenu: pq.read_table(io.BytesIO(contenu)).num_rows,
+    },
+    export_colonnes.ARROW: {
+        "pyarrow.ipc": lambda contenu: pa.ipc.open_stream(contenu).read_all().num_rows,
+    },
+}
+
+
+def _mediane(fonction, repetitions):
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        fonction()
+        durees.append(time.perf_counter() - debut)
+    return statistics.median(durees)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lignes", type=int, default=1_000_000)
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--annees", type=int, default=3)
+    parser.add_argument("--repetitions", type=int, default=3)
+    parser.add_argument("--cache", type=Path, default=Path(".bench_cache"),
+                        help="répertoire des bases générées, réutilisées d'un run à l'autre")
+    args = parser.parse_args()
+
+    fichier = donnees.base_en_cache(args.cache, args.lignes, args.categories, args.annees)
+    engine = create_engine(f"sqlite:///{fichier}")
+    Session = sessionmaker(bind=engine)
+    print(f"{args.lignes} transactions")
+    print(f"{'format':<8} | {'taille (Mo)':>11} | {'export (s)':>10} | {'morceau max (Ko)':>16} | chargement")
+    taille_csv = None
+    for format_export, lecteurs in LECTEURS.items():
+        with Session() as db:
+            debut = time.perf_counter()
+            morceaux = _exporter(db, format_export)
+            duree_export = time.perf_counter() - debut
+        morceau_max = max(len(morceau) for morceau in morceaux) / 1024
+        contenu = b"".join(morceaux)
+        taille_csv = taille_csv or len(contenu)
+        chargements = []
+        for nom, lecteur in lecteurs.items():
+            assert lecteur(contenu) == args.lignes
+            chargements.append(f"{nom} {_mediane(lambda: lecteur(contenu), args.repetitions) * 1000:.1f} ms")
+        print(
+            f"{format_export:<8} | {len(contenu) / 2**20:>11.1f} | {duree_export:>10.2f} | {morceau_max:>16.0f} "
+            f"| {', '.join(chargements)} ({100 * len(contenu) / taille_csv:.0f} % du CSV)"
+        )
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark : export CSV tamponné (implémentation d'origine) vs export en flux.
+
+Chaque variante s'exécute dans un processus séparé pour mesurer son pic de
+mémoire résidente (RSS), le délai avant le premier morceau (time-to-first-byte),
+le délai avant la première ligne de données et la durée totale de l'export.
+
+Usage :
+    python -m benchmarks.export_csv [--lignes 1000000] [--base /tmp/bench_export.db]
+"""
+import argparse
+import csv
+import io
+import multiprocessing
+import os
+import random
+import resource
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.categories import remplacer_noms
+from app.database import Base
+from app.models import Transaction
+from app import export
+from app.montants import en_centimes, en_euros
+
+
+def _export_tamponne(db, requete):
+    """Implémentation d'origine : tout charger, tout écrire, puis un seul morceau."""
+    transactions = db.execute(requete).all()
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(export.COLONNES_CSV)
+    for t in transactions:
+        writer.writerow([t[0], t[1].isoformat(), t[2], t[3], t[4], en_euros(t[5])])
+    return iter([output.getvalue()])
+
+
+VARIANTES = {
+    "tamponné (avant)": _export_tamponne,
+    "flux": export.generer_csv,
+}
+
+
+def _remplir(url, nombre_lignes, taille_lot=50_000):
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    aleatoire = random.Random(42)
+    origine = date(2020, 1, 1)
+    with engine.begin() as conn:
+        for debut in range(0, nombre_lignes, taille_lot):
+            conn.execute(insert(Transaction), remplacer_noms(conn, [
+                {
+                    "montant_centimes": en_centimes(aleatoire.uniform(1, 200)),
+                    "libelle": f"Opération {i}",
+                    "type": "depense",
+                    "categorie": "alimentation",
+                    "date_transaction": origine + timedelta(days=i % 2000),
+                }
+                for i in range(debut, min(debut + taille_lot, nombre_lignes))
+            ]))
+    engine.dispose()
+
+
+def _executer(url, nom, resultats):
+    db = sessionmaker(bind=create_engine(url))()
+    rss_initial = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    debut = time.perf_counter()
+    premier_octet = premiere_ligne = None
+    taille = lignes = 0
+    for morceau in VARIANTES[nom](db, export.requete_transactions()):
+        if premier_octet is None:
+            premier_octet = time.perf_counter() - debut
+        lignes += morceau.count("\n")
+        if premiere_ligne is None and lignes > 1:
+            premiere_ligne = time.perf_counter() - debut
+        taille += len(morceau)
+    duree = time.perf_counter() - debut
+    pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    resultats[nom] = (premier_octet, premiere_ligne, duree, (pic - rss_initial) / 1024, taille / 1024 / 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lignes", type=int, default=1_000_000)
+    parser.add_argument("--base", default="/tmp/bench_export.db")
+    args = parser.parse_args()
+
+    if os.path.exists(args.base):
+        os.remove(args.base)
+    url = f"sqlite:///{args.base}"
+    _remplir(url, args.lignes)
+
+    contexte = multiprocessing.get_context("spawn")
+    resultats = contexte.Manager().dict()
+    print(f"{args.lignes} transactions")
+    print(f"{'variante':<18} | {'TTFB (ms)':>10} | {'1re ligne (ms)':>14} | {'total (s)':>9} "
+          f"| {'pic RSS (Mo)':>12} | {'CSV (Mo)':>8}")
+    for nom in VARIANTES:
+        processus = contexte.Process(target=_executer, args=(url, nom, resultats))
+        processus.start()
+        processus.join()
+        premier_octet, premiere_ligne, duree, pic, taille = resultats[nom]
+        print(f"{nom:<18} | {premier_octet * 1000:>10.1f} | {premiere_ligne * 1000:>14.1f} | {duree:>9.2f} "
+              f"| {pic:>12.1f} | {taille:>8.1f}")
+    os.remove(args.base)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark : liste JSON complète vs flux NDJSON (premier enregistrement, durée, mémoire).
+
+La liste est la requête de GET /api/transactions sans pagination, lue en une
+fois puis encodée ; le flux est celui de GET /api/transactions/stream, lu par
+lots sur un curseur. Le délai avant le premier enregistrement et la durée
+totale sont mesurés sans instrumentation, puis le pic de mémoire Python
+(tracemalloc) sur une seconde exécution. Sans filtre, puis filtré sur une
+catégorie.
+
+Usage :
+    python -m benchmarks.flux_ndjson [--tailles 100000 1000000] [--cache .bench_cache]
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app import categories, serialisation
+from app.models import Transaction
+from benchmarks import donnees
+
+
+async def _liste(db, requete):
+    lignes = (await db.execute(requete.order_by(Transaction.date_transaction.desc(), Transaction.id.desc()))).all()
+    yield serialisation.transactions_json(lignes)
+
+
+def _flux(db, requete):
+    return serialisation.generer_ndjson_async(db, requete.order_by(Transaction.id))
+
+
+VARIANTES = {"liste JSON": _liste, "flux NDJSON": _flux}
+
+
+async def _mesurer(engine, variante, requete, memoire):
+    async with AsyncSession(engine) as db:
+        if memoire:
+            tracemalloc.start()
+        debut = time.perf_counter()
+        premier = None
+        taille = 0
+        async for morceau in variante(db, requete):
+            premier = premier or time.perf_counter() - debut
+            taille += len(morceau)
+        duree = time.perf_counter() - debut
+        if memoire:
+            pic = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            return pic
+        return premier, duree, taille
+
+
+async def _comparer(fichier, nom_categorie):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{fichier}")
+    filtres = {"sans filtre": None, f"catégorie {nom_categorie}": nom_categorie}
+    for libelle, categorie in filtres.items():
+        requete = serialisation.selection_transactions()
+        if categorie:
+            requete = requete.where(Transaction.categorie_id == categories.id_par_nom(categorie))
+        print(f"  {libelle}")
+        for nom, variante in VARIANTES.items():
+            premier, duree, taille = await _mesurer(engine, variante, requete, memoire=False)
+            pic = await _mesurer(engine, variante, requete, memoire=True)
+            print(
+                f"    {nom:<12} premier enregistrement {premier * 1000:>8.1f} ms | total {duree:>6.2f} s"
+                f" | pic mémoire {pic / 2**20:>7.1f} Mo | {taille / 2**20:>6.1f} Mo envoyés"
+            )
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tailles", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--annees", type=int, default=3)
+    parser.add_argument("--cache", type=Path, default=Path(".bench_cache"),
+                        help="répertoire des bases générées, réutilisées d'un run à l'autre")
+    args = parser.parse_args()
+
+    for taille in args.tailles:
+        fichier = donnees.base_en_cache(args.cache, taille, args.categories, args.annees)
+        print(f"{taille} transactions")
+        asyncio.run(_comparer(fichier, donnees.categories(args.categories)[0]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark : import CSV en masse vs une création de transaction par ligne.
+
+L'import en masse est mesuré sur l'ensemble du fichier ; la création ligne par
+ligne (vérification du budget puis commit, comme POST /api/transactions) est
+mesurée sur un échantillon puis extrapolée.
+
+Usage :
+    python -m benchmarks.import_csv [--lignes 100000] [--echantillon 2000]
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Transaction, Budget
+from app.schemas import TransactionCreate
+from app import business_logic, importation
+
+CATEGORIES = ["alimentation", "logement", "transport", "loisirs", "sante"]
+
+
+def _generer_csv(nombre_lignes):
+    aleatoire = random.Random(42)
+    origine = date(2026, 1, 1)
+    lignes = ["id,date,libelle,type,categorie,montant"]
+    for i in range(nombre_lignes):
+        jour = origine + timedelta(days=aleatoire.randrange(365))
+        lignes.append(
+            f",{jour.isoformat()},Opération {i},depense,"
+            f"{aleatoire.choice(CATEGORIES)},{round(aleatoire.uniform(1, 200), 2)}"
+        )
+    return ("\n".join(lignes) + "\n").encode()
+
+
+def _nouvelle_base():
+    fichier = tempfile.NamedTemporaryFile(suffix=".db", delete=False).name
+    engine = create_engine(f"sqlite:///{fichier}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all(
+        Budget(categorie=c, montant_budget_centimes=100_000, mois=m, annee=2026)
+        for c in CATEGORIES for m in range(1, 13)
+    )
+    db.commit()
+    return db, fichier
+
+
+async def _flux(contenu, taille_morceau=64 * 1024):
+    for debut in range(0, len(contenu), taille_morceau):
+        yield contenu[debut:debut + taille_morceau]
+
+
+def _creation_unitaire(db, contenu, echantillon):
+    lignes = contenu.decode().splitlines()[1:echantillon + 1]
+    debut = time.perf_counter()
+    for ligne in lignes:
+        _, jour, libelle, type_transaction, categorie, montant = ligne.split(",")
+        transaction = TransactionCreate(
+            montant=montant, libelle=libelle, type=type_transaction,
+            categorie=categorie, date_transaction=jour
+        )
+        business_logic.verifier_depassement_budget(
+            db, transaction.categorie, transaction.date_transaction.month,
+            transaction.date_transaction.year, transaction.montant
+        )
+        db.add(Transaction(**transaction.vers_modele()))
+        db.commit()
+    return time.perf_counter() - debut
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lignes", type=int, default=100_000)
+    parser.add_argument("--echantillon", type=int, default=2_000)
+    args = parser.parse_args()
+
+    contenu = _generer_csv(args.lignes)
+
+    db, fichier = _nouvelle_base()
+    debut = time.perf_counter()
+    rapport = asyncio.run(importation.importer_csv(db, _flux(contenu)))
+    duree_import = time.perf_counter() - debut
+    db.close()
+    os.remove(fichier)
+
+    db, fichier = _nouvelle_base()
+    duree_unitaire = _creation_unitaire(db, contenu, args.echantillon)
+    db.close()
+    os.remove(fichier)
+    extrapolation = duree_unitaire * args.lignes / args.echantillon
+
+    print(f"{args.lignes} lignes ({len(contenu) / 1024 / 1024:.1f} Mo), "
+          f"{rapport['transactions_importees']} importées, {len(rapport['alertes'])} alertes")
+    print(f"import en masse      : {duree_import:8.2f} s  ({args.lignes / duree_import:10.0f} lignes/s)")
+    print(f"création ligne/ligne : {extrapolation:8.2f} s  ({args.echantillon / duree_unitaire:10.0f} lignes/s, "
+          f"extrapolé depuis {args.echantillon} lignes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark : requêtes chaudes sur `transactions` sans index puis avec les index composites.
+
+Affiche le plan d'exécution SQLite (EXPLAIN QUERY PLAN) et le temps moyen de
+chaque requête, avant et après mettre_a_niveau_schema().
+
+Usage :
+    python -m benchmarks.index_transactions [--lignes 500000]
+"""
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine, insert, text
+
+from app.categories import remplacer_noms
+from app.database import Base, mettre_a_niveau_schema
+from app.models import Transaction
+from app.montants import en_centimes
+
+CATEGORIES = ["alimentation", "logement", "transport", "loisirs", "sante", "education", "autre"]
+
+REQUETES = {
+    "total dépenses catégorie/mois": (
+        "SELECT coalesce(sum(montant_centimes), 0) FROM transactions "
+        "WHERE categorie_id = (SELECT id FROM categories WHERE nom = 'alimentation') AND type = 'depense' "
+        "AND date_transaction >= '2026-01-01' AND date_transaction < '2026-02-01'"
+    ),
+    "liste filtrée par période": (
+        "SELECT * FROM transactions WHERE date_transaction >= '2026-01-01' "
+        "AND date_transaction <= '2026-01-31' ORDER BY date_transaction DESC"
+    ),
+}
+
+
+def _remplir(engine, nombre_lignes):
+    aleatoire = random.Random(42)
+    origine = date(2020, 1, 1)
+    lignes = [
+        {
+            "montant_centimes": en_centimes(aleatoire.uniform(1, 200)),
+            "libelle": f"Opération {i}",
+            "type": "revenu" if aleatoire.random() < 0.1 else "depense",
+            "categorie": aleatoire.choice(CATEGORIES),
+            "date_transaction": origine + timedelta(days=aleatoire.randrange(7 * 365)),
+        }
+        for i in range(nombre_lignes)
+    ]
+    with engine.begin() as conn:
+        conn.execute(insert(Transaction), remplacer_noms(conn, lignes))
+
+
+def _mesurer(engine, iterations=20):
+    with engine.connect() as conn:
+        for nom, sql in REQUETES.items():
+            plan = " / ".join(ligne[-1] for ligne in conn.execute(text("EXPLAIN QUERY PLAN " + sql)))
+            debut = time.perf_counter()
+            for _ in range(iterations):
+                conn.execute(text(sql)).all()
+            duree = (time.perf_counter() - debut) / iterations
+            print(f"  {nom:<32} {duree * 1000:>9.2f} ms  | {plan}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lignes", type=int, default=500_000)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                conn.execute(text(f"DROP INDEX {index.name}"))
+    _remplir(engine, args.lignes)
+
+    print(f"{args.lignes} transactions, sans index :")
+    _mesurer(engine)
+    mettre_a_niveau_schema(engine)
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    print("avec index :")
+    _mesurer(engine)
+
+
+if __name__ == "__main__":
+    main()
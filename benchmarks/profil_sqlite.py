@@ -0,0 +1,116 @@
+"""
+Benchmark : débit lectures/écritures concurrentes, profil SQLite standard vs performance.
+
+Des threads lecteurs (statistiques d'une catégorie) et écrivains (insertion
+d'une transaction, une transaction SQL par écriture) tournent en parallèle sur
+une base fichier temporaire, pour chaque profil de app.database.
+
+Usage :
+    python -m benchmarks.profil_sqlite [--lignes 50000] [--lecteurs 8] [--ecrivains 2] [--duree 5]
+"""
+import argparse
+import random
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from sqlalchemy import insert, text
+from sqlalchemy.exc import OperationalError
+
+from app.categories import remplacer_noms
+from app.database import PROFILS_SQLITE, Base, creer_engine, lire_configuration
+from app.models import Transaction
+from app.montants import en_centimes
+
+CATEGORIES = ["alimentation", "logement", "transport", "loisirs", "sante", "education", "autre"]
+
+LECTURE = text(
+    "SELECT coalesce(sum(montant_centimes), 0) FROM transactions "
+    "WHERE categorie_id = (SELECT id FROM categories WHERE nom = :categorie) AND type = 'depense' "
+    "AND date_transaction >= '2026-01-01' AND date_transaction < '2026-02-01'"
+)
+
+
+def _ligne(aleatoire, i):
+    return {
+        "montant_centimes": en_centimes(aleatoire.uniform(1, 200)),
+        "libelle": f"Opération {i}",
+        "type": "revenu" if aleatoire.random() < 0.1 else "depense",
+        "categorie": aleatoire.choice(CATEGORIES),
+        "date_transaction": date(2025, 1, 1) + timedelta(days=aleatoire.randrange(730)),
+    }
+
+
+def _executer(profil, args, repertoire):
+    configuration = lire_configuration({
+        "BUDGET_DATABASE_URL": f"sqlite:///{Path(repertoire) / f'{profil}.db'}",
+        "BUDGET_DB_PROFIL": profil,
+        "BUDGET_DB_POOL_SIZE": str(args.lecteurs + args.ecrivains),
+    })
+    engine = creer_engine(**configuration)
+    Base.metadata.create_all(bind=engine)
+    aleatoire = random.Random(42)
+    with engine.begin() as conn:
+        conn.execute(insert(Transaction.__table__), remplacer_noms(conn, [_ligne(aleatoire, i) for i in range(args.lignes)]))
+
+    compteurs = {"lectures": 0, "ecritures": 0, "verrous": 0}
+    verrou = threading.Lock()
+    fin = time.perf_counter() + args.duree
+
+    def lecteur(graine):
+        local = random.Random(graine)
+        while time.perf_counter() < fin:
+            try:
+                with engine.connect() as conn:
+                    conn.execute(LECTURE, {"categorie": local.choice(CATEGORIES)}).scalar()
+                cle = "lectures"
+            except OperationalError:
+                cle = "verrous"
+            with verrou:
+                compteurs[cle] += 1
+
+    def ecrivain(graine):
+        local = random.Random(graine)
+        while time.perf_counter() < fin:
+            try:
+                with engine.begin() as conn:
+                    conn.execute(insert(Transaction.__table__), remplacer_noms(conn, [_ligne(local, 0)]))
+                cle = "ecritures"
+            except OperationalError:
+                cle = "verrous"
+            with verrou:
+                compteurs[cle] += 1
+
+    threads = [threading.Thread(target=lecteur, args=(i,)) for i in range(args.lecteurs)]
+    threads += [threading.Thread(target=ecrivain, args=(1000 + i,)) for i in range(args.ecrivains)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    print(
+        f"  {profil:<12} {compteurs['lectures'] / args.duree:>10.0f} lectures/s"
+        f" {compteurs['ecritures'] / args.duree:>8.0f} écritures/s"
+        f" {compteurs['verrous']:>6} erreurs 'database is locked'"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lignes", type=int, default=50_000)
+    parser.add_argument("--lecteurs", type=int, default=8)
+    parser.add_argument("--ecrivains", type=int, default=2)
+    parser.add_argument("--duree", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"{args.lignes} transactions, {args.lecteurs} lecteurs, {args.ecrivains} écrivains, {args.duree}s :")
+    with tempfile.TemporaryDirectory() as repertoire:
+        for profil in PROFILS_SQLITE:
+            _executer(profil, args, repertoire)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark : liste de transactions par objets ORM et response_model (avant)
+vs tuples Core encodés par orjson (app.serialisation).
+
+« Avant » reproduit le chemin de FastAPI pour un endpoint qui renvoie des
+objets ORM : validation de chaque ligne par List[TransactionResponse]
+(serialize_response) puis encodage par JSONResponse. Les deux variantes lisent
+toute la table d'une base temporaire ; les temps (médianes) sont donnés pour
+10 000 lignes, requête SQL et sérialisation séparées.
+
+Usage :
+    python -m benchmarks.serialisation_json [--lignes 50000] [--repetitions 5]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app import serialisation
+from app.models import Transaction
+from app.schemas import TransactionResponse
+from benchmarks import donnees
+
+CHAMP_REPONSE = create_response_field(name="reponse", type_=List[TransactionResponse])
+ORDRE = (Transaction.date_transaction.desc(), Transaction.id.desc())
+
+
+def _avant(db):
+    debut = time.perf_counter()
+    transactions = db.scalars(select(Transaction).order_by(*ORDRE)).all()
+    lecture = time.perf_counter()
+    contenu = asyncio.run(serialize_response(field=CHAMP_REPONSE, response_content=transactions))
+    corps = JSONResponse(contenu).body
+    return lecture - debut, time.perf_counter() - lecture, corps
+
+
+def _apres(db):
+    debut = time.perf_counter()
+    lignes = db.execute(serialisation.selection_transactions().order_by(*ORDRE)).all()
+    lecture = time.perf_counter()
+    corps = serialisation.transactions_json(lignes)
+    return lecture - debut, time.perf_counter() - lecture, corps
+
+
+VARIANTES = {
+    "ORM + response_model (avant)": _avant,
+    "tuples + orjson": _apres,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lignes", type=int, default=50_000)
+    parser.add_argument("--repetitions", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as repertoire:
+        url = f"sqlite:///{Path(repertoire) / 'serialisation.db'}"
+        donnees.remplir_base(url, args.lignes, 20, 3)
+        engine = create_engine(url)
+        Session = sessionmaker(bind=engine)
+        par_10k = 10_000 / args.lignes
+        corps = {}
+        print(f"{args.lignes} transactions, temps pour 10 000 lignes :")
+        for nom, variante in VARIANTES.items():
+            mesures = []
+            for _ in range(args.repetitions + 1):
+                with Session() as db:
+                    mesures.append(variante(db))
+            requete = statistics.median(m[0] for m in mesures[1:]) * par_10k
+            serialisation_s = statistics.median(m[1] for m in mesures[1:]) * par_10k
+            corps[nom] = mesures[-1][2]
+            print(
+                f"  {nom:<30} requête {requete * 1000:>8.1f} ms | sérialisation {serialisation_s * 1000:>8.1f} ms"
+                f" | total {(requete + serialisation_s) * 1000:>8.1f} ms"
+            )
+        avant, apres = corps.values()
+        print(f"  réponses identiques : {json.loads(avant) == json.loads(apres)} ({len(apres)} octets)")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Suite de benchmarks des chemins chauds de l'API et de la logique métier.
+
+Pour chaque taille, une base synthétique déterministe (benchmarks.donnees) est
+générée puis chaque opération est chronométrée plusieurs fois : endpoints via
+l'application FastAPI (TestClient) et fonctions de app.business_logic appelées
+directement. Les résultats (min, médiane, p95, moyenne en ms) sont écrits en
+JSON ; --comparer affiche l'évolution des médianes par rapport à un run précédent.
+
+Usage :
+    python -m benchmarks.suite [--tailles 10000 100000 1000000 5000000] [--sortie resultats.json]
+                               [--categories 20] [--annees 3] [--repetitions 20]
+                               [--cache .bench_cache] [--comparer ancien.json]
+"""
+import argparse
+import json
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import sqlalchemy
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.database import get_async_db
+from app.main import app
+from app import business_logic, cache
+from benchmarks import donnees
+
+
+def _statistiques(durees):
+    durees = sorted(durees)
+    p95 = durees[min(len(durees) - 1, round(0.95 * (len(durees) - 1)))]
+    return {
+        "repetitions": len(durees),
+        "min_ms": round(durees[0] * 1000, 3),
+        "mediane_ms": round(statistics.median(durees) * 1000, 3),
+        "p95_ms": round(p95 * 1000, 3),
+        "moyenne_ms": round(statistics.fmean(durees) * 1000, 3),
+    }
+
+
+def _chronometrer(fonction, repetitions, avant=None):
+    durees = []
+    for i in range(repetitions):
+        if avant:
+            avant()
+        debut = time.perf_counter()
+        fonction(i)
+        durees.append(time.perf_counter() - debut)
+    return _statistiques(durees)
+
+
+def _vider_cache():
+    cache.cache_statistiques.vider()
+    cache.cache_periodes.vider()
+
+
+def _operations_api(client, categories, annee, repetitions, repetitions_export):
+    """Endpoints chronométrés, dans un ordre où les écritures viennent en dernier"""
+    def verifier(reponse, statut=200):
+        assert reponse.status_code == statut, reponse.text
+        return reponse
+
+    def categorie(i):
+        return categories[i % len(categories)]
+
+    def lister_filtre(i):
+        verifier(client.get("/api/transactions", params={
+            "categorie": categorie(i), "date_debut": f"{annee}-03-01", "date_fin": f"{annee}-03-31"
+        }))
+
+    def lister_page(i):
+        verifier(client.get("/api/transactions", params={"categorie": categorie(i), "limit": 50}))
+
+    def statistiques_periode(i):
+        verifier(client.get("/api/budgets/stats", params={"mois": 1 + i % 12, "annee": annee}))
+
+    def tendance(i):
+        verifier(client.get("/api/reports/trend", params={"annee": annee, "nombre_mois": 24}))
+
+    def exporter(i):
+        reponse = verifier(client.get("/api/transactions/export/csv", params={"date_debut": f"{annee}-01-01"}))
+        assert reponse.content
+
+    def creer(i):
+        verifier(client.post("/api/transactions", json={
+            "montant": 75.0, "libelle": "Bench", "type": "depense",
+            "categorie": categorie(i), "date_transaction": f"{annee}-{1 + i % 12:02d}-15"
+        }), 201)
+
+    return {
+        "api.list_transactions (catégorie + mois)": _chronometrer(lister_filtre, repetitions),
+        "api.list_transactions (catégorie, limit=50)": _chronometrer(lister_page, repetitions),
+        "api.list_all_budget_stats (cache froid)": _chronometrer(statistiques_periode, repetitions, _vider_cache),
+        "api.list_all_budget_stats (cache chaud)": _chronometrer(statistiques_periode, repetitions),
+        "api.get_trend_report (24 mois, toutes catégories)": _chronometrer(tendance, repetitions),
+        "api.export_transactions_csv (une année)": _chronometrer(exporter, repetitions_export),
+        "api.create_transaction (avec contrôle de dépassement)": _chronometrer(creer, repetitions),
+    }
+
+
+def _operations_metier(db, categories, annee, repetitions):
+    """Fonctions de business_logic appelées directement sur une Session"""
+    def cle(i):
+        return categories[i % len(categories)], 1 + i % 12, annee
+
+    lot = [(*cle(i), 20.0) for i in range(500)]
+    cles = [cle(i) for i in range(len(categories) * 12)]
+    operations = {
+        "calculer_total_depense_par_categorie": lambda i: business_logic.calculer_total_depense_par_categorie(db, *cle(i)),
+        "obtenir_statistiques_budget": lambda i: business_logic.obtenir_statistiques_budget(db, *cle(i)),
+        "obtenir_statistiques_periode": lambda i: business_logic.obtenir_statistiques_periode(db, 1 + i % 12, annee),
+        "verifier_depassement_budget": lambda i: business_logic.verifier_depassement_budget(db, *cle(i), 50.0),
+        "verifier_depassements_lot (500 dépenses)": lambda i: business_logic.verifier_depassements_lot(db, lot),
+        "verifier_depassements_periodes (toute l'année)": lambda i: business_logic.verifier_depassements_periodes(db, cles),
+        "obtenir_tendance (24 mois)": lambda i: business_logic.obtenir_tendance(db, annee, 24),
+    }
+    return {
+        f"business_logic.{nom}": _chronometrer(fonction, repetitions, db.expunge_all)
+        for nom, fonction in operations.items()
+    }
+
+
+def _mesurer_taille(fichier, args):
+    categories = donnees.categories(args.categories)
+    annee = donnees.DERNIERE_ANNEE
+    engine = create_engine(f"sqlite:///{fichier}")
+    db = sessionmaker(bind=engine)()
+    SessionBench = async_sessionmaker(
+        create_async_engine(f"sqlite+aiosqlite:///{fichier}", poolclass=NullPool),
+        autoflush=False, expire_on_commit=False
+    )
+
+    async def get_db_bench():
+        async with SessionBench() as session:
+            yield session
+
+    app.dependency_overrides[get_async_db] = get_db_bench
+    _vider_cache()
+    try:
+        resultats = _operations_metier(db, categories, annee, args.repetitions)
+        resultats.update(_operations_api(
+            TestClient(app), categories, annee, args.repetitions, args.repetitions_export
+        ))
+    finally:
+        app.dependency_overrides.clear()
+        db.close()
+        engine.dispose()
+    return resultats
+
+
+def _revision_git():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _comparer(ancien, nouveau):
+    for taille, operations in nouveau["resultats"].items():
+        precedentes = ancien.get("resultats", {}).get(taille, {})
+        print(f"\n{taille} transactions, médiane (ancien → nouveau) :")
+        for nom, stats in operations.items():
+            if nom in precedentes:
+                avant, apres = precedentes[nom]["mediane_ms"], stats["mediane_ms"]
+                ratio = apres / avant if avant else float("inf")
+                print(f"  {nom:<62} {avant:>10.2f} → {apres:>10.2f} ms  (x{ratio:.2f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tailles", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--annees", type=int, default=3)
+    parser.add_argument("--graine", type=int, default=42)
+    parser.add_argument("--repetitions", type=int, default=20)
+    parser.add_argument("--repetitions-export", type=int, default=3)
+    parser.add_argument("--cache", type=Path, default=Path(".bench_cache"),
+                        help="Répertoire où conserver les bases générées d'un run à l'autre")
+    parser.add_argument("--sortie", type=Path, default=Path("resultats_benchmarks.json"))
+    parser.add_argument("--comparer", type=Path, help="Résultats JSON d'un run précédent")
+    args = parser.parse_args()
+
+    rapport = {
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "revision": _revision_git(),
+        "environnement": {
+            "python": platform.python_version(),
+            "plateforme": platform.platform(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "sqlite": sqlite3.sqlite_version,
+        },
+        "parametres": {
+            "categories": args.categories, "annees": args.annees, "graine": args.graine,
+            "repetitions": args.repetitions, "repetitions_export": args.repetitions_export,
+        },
+        "resultats": {},
+    }
+    for taille in args.tailles:
+        debut = time.perf_counter()
+        source = donnees.base_en_cache(args.cache, taille, args.categories, args.annees, args.graine)
+        print(f"{taille} transactions (base prête en {time.perf_counter() - debut:.1f} s)")
+        # Copie de travail : les créations de transactions ne modifient pas la base en cache
+        with tempfile.TemporaryDirectory() as repertoire:
+            fichier = Path(repertoire) / "budget.db"
+            shutil.copyfile(source, fichier)
+            resultats = _mesurer_taille(fichier, args)
+        rapport["resultats"][str(taille)] = resultats
+        for nom, stats in resultats.items():
+            print(f"  {nom:<62} médiane {stats['mediane_ms']:>10.2f} ms | p95 {stats['p95_ms']:>10.2f} ms")
+
+    args.sortie.write_text(json.dumps(rapport, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\nRésultats écrits dans {args.sortie}")
+    if args.comparer:
+        _comparer(json.loads(args.comparer.read_text(encoding="utf-8")), rapport)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,22 @@
 """Configuration Behave : base de test et client API."""
 from fastapi.testclient import TestClient
 from app.main import app
-from app.database import Base, engine, get_db
-from app.models import Transaction, Budget
+from app.database import Base, engine, get_async_db
+from app import cache
 
 
 def before_scenario(context, scenario):
     """Avant chaque scénario : recréer la base et un client de test."""
     Base.metadata.create_all(bind=engine)
+    cache.cache_statistiques.vider()
+    cache.cache_periodes.vider()
 
-    def override_get_db():
-        from app.database import SessionLocal
-        db = SessionLocal()
-        try:
+    async def override_get_db():
+        from app.database import AsyncSessionLocal
+        async with AsyncSessionLocal() as db:
             yield db
-        finally:
-            db.close()
 
-    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_db
     context.client = TestClient(app)
     context.transaction_ids = []
     context.budget_ids = []
@@ -23,6 +23,34 @@ document.addEventListener('DOMContentLoaded', () => {
     document.getElementById('budget-form').addEventListener('submit', handleBudgetSubmit);
 });
 
+// Lectures conditionnelles : chaque réponse GET est conservée avec son ETag,
+// renvoyé dans If-None-Match à la lecture suivante ; sur 304 le serveur n'a
+// rien recalculé et la réponse conservée est réutilisée.
+const conditionalResponses = new Map();
+
+async function fetchConditional(url) {
+    const stored = conditionalResponses.get(url);
+    const response = await fetch(url, {
+        cache: 'no-store',
+        headers: stored ? { 'If-None-Match': stored.etag } : {}
+    });
+    if (response.status === 304 && stored) {
+        return stored;
+    }
+    const result = { etag: response.headers.get('ETag'), headers: response.headers, data: await response.json() };
+    if (response.ok && result.etag) {
+        conditionalResponses.set(url, result);
+    }
+    return result;
+}
+
+// Rechargement des données affichées par chaque onglet
+const TAB_LOADERS = {
+    transactions: () => loadTransactions(),
+    budgets: () => loadBudgets(),
+    stats: () => loadStats()
+};
+
 // Gestion des onglets
 function showTab(tabName) {
     // Masquer tous les onglets
@@ -36,6 +64,7 @@ function showTab(tabName) {
     // Afficher l'onglet sélectionné
     document.getElementById(`${tabName}-tab`).classList.add('active');
     event.target.classList.add('active');
+    TAB_LOADERS[tabName]();
 }
 
 // Transactions (édition en cours)
@@ -106,30 +135,74 @@ async function editTransaction(id) {
     }
 }
 
-async function loadTransactions() {
+// Pagination par curseur de la liste des transactions
+const TRANSACTIONS_PAGE_SIZE = 50;
+let transactionsNextCursor = null;
+
+function transactionFilterParams() {
     const categorie = document.getElementById('filter-categorie').value;
     const dateDebut = document.getElementById('filter-date-debut').value;
     const dateFin = document.getElementById('filter-date-fin').value;
-    
-    let url = `${API_BASE}/transactions?`;
     const params = [];
     if (categorie) params.push(`categorie=${encodeURIComponent(categorie)}`);
     if (dateDebut) params.push(`date_debut=${dateDebut}`);
     if (dateFin) params.push(`date_fin=${dateFin}`);
-    url += params.join('&');
+    return params;
+}
+
+async function loadTransactions() {
+    transactionsNextCursor = null;
+    await fetchTransactionsPage(false);
+}
+
+async function loadMoreTransactions() {
+    if (!transactionsNextCursor) return;
+    await fetchTransactionsPage(true);
+}
+
+async function fetchTransactionsPage(append) {
+    const params = transactionFilterParams();
+    params.push(`limit=${TRANSACTIONS_PAGE_SIZE}`);
+    if (append) params.push(`cursor=${encodeURIComponent(transactionsNextCursor)}`);
+    const url = `${API_BASE}/transactions?${params.join('&')}`;
     
     try {
-        const response = await fetch(url);
-        const transactions = await response.json();
-        displayTransactions(transactions);
+        const { data: transactions, headers } = await fetchConditional(url);
+        transactionsNextCursor = headers.get('X-Next-Cursor');
+        displayTransactions(transactions, append);
+        document.getElementById('transactions-load-more').style.display =
+            transactionsNextCursor ? 'inline-block' : 'none';
     } catch (error) {
         console.error('Erreur lors du chargement des transactions:', error);
     }
 }
 
-function displayTransactions(transactions) {
+function transactionRow(t) {
+    return `
+        <tr>
+            <td>${new Date(t.date_transaction).toLocaleDateString('fr-FR')}</td>
+            <td>${t.libelle}</td>
+            <td><span class="badge badge-${t.type}">${t.type}</span></td>
+            <td>${t.categorie}</td>
+            <td>${t.montant.toFixed(2)} €</td>
+            <td>
+                <button class="btn btn-secondary" onclick="editTransaction(${t.id})">Modifier</button>
+                <button class="btn btn-danger" onclick="deleteTransaction(${t.id})">Supprimer</button>
+            </td>
+        </tr>
+    `;
+}
+
+function displayTransactions(transactions, append = false) {
     const container = document.getElementById('transactions-list');
     
+    // Page suivante : ajouter les lignes au tableau existant
+    const tbody = container.querySelector('tbody');
+    if (append && tbody) {
+        tbody.insertAdjacentHTML('beforeend', transactions.map(transactionRow).join(''));
+        return;
+    }
+    
     if (transactions.length === 0) {
         container.innerHTML = '<div class="empty-message">Aucune transaction trouvée</div>';
         return;
@@ -148,19 +221,7 @@ function displayTransactions(transactions) {
                 </tr>
             </thead>
             <tbody>
-                ${transactions.map(t => `
-                    <tr>
-                        <td>${new Date(t.date_transaction).toLocaleDateString('fr-FR')}</td>
-                        <td>${t.libelle}</td>
-                        <td><span class="badge badge-${t.type}">${t.type}</span></td>
-                        <td>${t.categorie}</td>
-                        <td>${t.montant.toFixed(2)} €</td>
-                        <td>
-                            <button class="btn btn-secondary" onclick="editTransaction(${t.id})">Modifier</button>
-                            <button class="btn btn-danger" onclick="deleteTransaction(${t.id})">Supprimer</button>
-                        </td>
-                    </tr>
-                `).join('')}
+                ${transactions.map(transactionRow).join('')}
             </tbody>
         </table>
     `;
@@ -194,16 +255,43 @@ function clearFilters() {
 }
 
 function exportTransactionsCsv() {
-    const categorie = document.getElementById('filter-categorie').value;
-    const dateDebut = document.getElementById('filter-date-debut').value;
-    const dateFin = document.getElementById('filter-date-fin').value;
-    let url = `${API_BASE}/transactions/export/csv?`;
-    const params = [];
-    if (categorie) params.push(`categorie=${encodeURIComponent(categorie)}`);
-    if (dateDebut) params.push(`date_debut=${dateDebut}`);
-    if (dateFin) params.push(`date_fin=${dateFin}`);
-    url += params.join('&');
-    window.location.href = url;
+    window.location.href = `${API_BASE}/transactions/export/csv?${transactionFilterParams().join('&')}`;
+}
+
+async function importTransactionsCsv() {
+    const input = document.getElementById('import-csv-file');
+    const file = input.files[0];
+    if (!file) return;
+    
+    try {
+        // Le fichier est envoyé tel quel : le serveur le lit en flux
+        const response = await fetch(`${API_BASE}/transactions/import/csv`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'text/csv' },
+            body: file
+        });
+        const result = await response.json();
+        if (!response.ok) {
+            alert(`Erreur: ${result.detail || 'Erreur lors de l\'import'}`);
+            return;
+        }
+        let message = `${result.transactions_importees} transaction(s) importée(s) sur ${result.lignes_lues} ligne(s).`;
+        if (result.nombre_erreurs > 0) {
+            message += `\n${result.nombre_erreurs} ligne(s) en erreur, dont :\n` +
+                result.erreurs.slice(0, 5).map(e => `- ligne ${e.ligne} : ${e.erreurs.join(', ')}`).join('\n');
+        }
+        if (result.alertes.length > 0) {
+            message += '\n\n⚠️ Alertes dépassement de budget :\n' +
+                result.alertes.map(a => a.message_alerte).join('\n');
+        }
+        alert(message);
+        loadTransactions();
+        loadStats();
+    } catch (error) {
+        alert(`Erreur: ${error.message}`);
+    } finally {
+        input.value = '';
+    }
 }
 
 // Budgets
@@ -243,8 +331,7 @@ async function handleBudgetSubmit(e) {
 
 async function loadBudgets() {
     try {
-        const response = await fetch(`${API_BASE}/budgets`);
-        const budgets = await response.json();
+        const { data: budgets } = await fetchConditional(`${API_BASE}/budgets`);
         displayBudgets(budgets);
     } catch (error) {
         console.error('Erreur lors du chargement des budgets:', error);
@@ -342,8 +429,7 @@ async function loadStats() {
     }
     
     try {
-        const response = await fetch(`${API_BASE}/budgets/stats?mois=${mois}&annee=${annee}`);
-        const stats = await response.json();
+        const { data: stats } = await fetchConditional(`${API_BASE}/budgets/stats?mois=${mois}&annee=${annee}`);
         displayStats(stats);
     } catch (error) {
         console.error('Erreur lors du chargement des statistiques:', error);
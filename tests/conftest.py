@@ -1,9 +1,11 @@
 import pytest
-from sqlalchemy import create_engine
+import pytest_asyncio
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from datetime import date
 
-from app.database import Base, get_db
+from app.database import Base
 from app.models import Transaction, Budget
 
 
@@ -26,6 +28,32 @@ def db_session():
         Base.metadata.drop_all(bind=engine)
 
 
+@pytest_asyncio.fixture
+async def async_db_session():
+    """Session asynchrone sur une base en mémoire dédiée, recréée pour chaque test"""
+    async_engine = create_async_engine("sqlite+aiosqlite://")
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSession(async_engine, expire_on_commit=False) as db:
+        yield db
+    await async_engine.dispose()
+
+
+@pytest.fixture
+def compteur_requetes():
+    """Compte les requêtes SQL émises sur la base de test"""
+    requetes = []
+
+    def enregistrer(conn, cursor, statement, parameters, context, executemany):
+        requetes.append(statement)
+
+    event.listen(engine, "before_cursor_execute", enregistrer)
+    try:
+        yield requetes
+    finally:
+        event.remove(engine, "before_cursor_execute", enregistrer)
+
+
 @pytest.fixture
 def sample_transactions(db_session):
     """Crée des transactions de test"""
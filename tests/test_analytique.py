@@ -0,0 +1,135 @@
+"""
+Tests du moteur d'analyse en colonnes et des endpoints de rapports
+"""
+from datetime import date
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app import analytique, cache
+from app.database import Base, engine
+from app.main import app
+from app.models import Transaction
+
+
+@pytest.fixture
+def transactions_deux_ans(db_session):
+    """Dépenses et revenus sur 2025 et 2026"""
+    lignes = [
+        (1000, "depense", "alimentation", date(2025, 12, 5)),
+        (2550, "depense", "alimentation", date(2026, 1, 6)),
+        (5000, "depense", "alimentation", date(2026, 1, 31)),
+        (80000, "depense", "logement", date(2026, 2, 1)),
+        (300000, "revenu", "salaire", date(2026, 2, 1)),
+        (1234, "depense", "loisirs", date(2026, 3, 15)),
+    ]
+    db_session.add_all(
+        Transaction(montant_centimes=m, libelle="x", type=t, categorie=c, date_transaction=d)
+        for m, t, c, d in lignes
+    )
+    db_session.commit()
+    return db_session
+
+
+class TestColonnes:
+    """Tests pour le chargement du rollup en colonnes"""
+
+    def test_annee_vide(self, db_session):
+        """Une année sans transaction donne des colonnes vides"""
+        colonnes = analytique.agregats_annee(db_session, 2026)
+        assert len(colonnes) == 0
+        assert analytique.totaux_par_mois(colonnes).tolist() == [0] * 12
+
+    def test_agregats_annee(self, transactions_deux_ans):
+        """Une ligne du rollup par catégorie, type et mois, avec son nombre de transactions"""
+        colonnes = analytique.agregats_annee(transactions_deux_ans, 2026)
+        assert len(colonnes) == 4
+        totaux, nombres = analytique.totaux_par_categorie(colonnes)
+        assert totaux.tolist() == [7550, 80000, 1234, 0]
+        assert nombres.tolist() == [2, 1, 1, 0]
+
+
+class TestRapports:
+    """Tests pour les regroupements vectorisés"""
+
+    def test_rapport_mensuel(self, transactions_deux_ans):
+        """Totaux par mois, cumul et somme glissante, en centimes"""
+        rapport = analytique.rapport_mensuel(transactions_deux_ans, 2025, 2026, fenetre=2)
+        assert len(rapport) == 24
+        decembre, janvier, fevrier = rapport[11], rapport[12], rapport[13]
+        assert decembre["total_centimes"] == 1000
+        assert janvier == {
+            "annee": 2026, "mois": 1, "total_centimes": 7550,
+            "cumul_centimes": 8550, "total_glissant_centimes": 8550
+        }
+        assert fevrier["total_glissant_centimes"] == 7550 + 80000
+        assert rapport[-1]["cumul_centimes"] == 1000 + 7550 + 80000 + 1234
+
+    def test_rapport_mensuel_categorie_et_type(self, transactions_deux_ans):
+        """Le filtre de catégorie et de type s'applique avant le regroupement"""
+        alimentation = analytique.rapport_mensuel(transactions_deux_ans, 2026, 2026, categorie="alimentation")
+        assert [m["total_centimes"] for m in alimentation[:3]] == [7550, 0, 0]
+        revenus = analytique.rapport_mensuel(transactions_deux_ans, 2026, 2026, type="revenu")
+        assert revenus[1]["total_centimes"] == 300000
+        inconnue = analytique.rapport_mensuel(transactions_deux_ans, 2026, 2026, categorie="inconnue")
+        assert all(m["total_centimes"] == 0 for m in inconnue)
+
+    def test_rapport_categories(self, transactions_deux_ans):
+        """Catégories de la plus grosse à la plus petite, avec leur part"""
+        rapport = analytique.rapport_categories(transactions_deux_ans, 2025, 2026)
+        assert [c["categorie"] for c in rapport] == ["logement", "alimentation", "loisirs"]
+        assert rapport[1]["total_centimes"] == 8550
+        assert rapport[1]["nombre_transactions"] == 3
+        assert sum(c["part"] for c in rapport) == pytest.approx(100, abs=0.02)
+
+    def test_rapports_lus_dans_le_rollup(self, transactions_deux_ans, compteur_requetes):
+        """Les rapports ne lisent pas la table transactions"""
+        analytique.rapport_mensuel(transactions_deux_ans, 2025, 2026)
+        analytique.rapport_categories(transactions_deux_ans, 2025, 2026)
+        assert compteur_requetes
+        assert not any("FROM transactions" in requete for requete in compteur_requetes)
+
+    def test_somme_glissante(self):
+        """La fenêtre est tronquée au début de la série"""
+        glissante = analytique.somme_glissante(np.array([1, 2, 3, 4], dtype=np.int64), 3)
+        assert glissante.tolist() == [1, 3, 6, 9]
+
+
+class TestEndpointsRapports:
+    """Tests des endpoints /api/reports"""
+
+    @pytest.fixture
+    def client(self):
+        Base.metadata.create_all(bind=engine)
+        cache.cache_statistiques.vider()
+        cache.cache_periodes.vider()
+        client = TestClient(app)
+        for montant, categorie, jour in ((25.5, "alimentation", "2026-01-06"), (800.0, "logement", "2026-02-01")):
+            client.post("/api/transactions", json={
+                "montant": montant, "libelle": "x", "type": "depense",
+                "categorie": categorie, "date_transaction": jour
+            })
+        yield client
+        Base.metadata.drop_all(bind=engine)
+
+    def test_rapport_mensuel_en_euros(self, client):
+        """Les montants du rapport sont exprimés en euros"""
+        reponse = client.get("/api/reports/monthly", params={"annee_debut": 2026, "fenetre": 2})
+        assert reponse.status_code == 200
+        fevrier = reponse.json()[1]
+        assert fevrier == {"annee": 2026, "mois": 2, "total": 800.0, "cumul": 825.5, "total_glissant": 825.5}
+
+    def test_rapport_categories(self, client):
+        """Le rapport par catégorie reflète les transactions créées par l'API"""
+        reponse = client.get("/api/reports/categories", params={"annee_debut": 2026})
+        assert reponse.status_code == 200
+        assert reponse.json()[0] == {
+            "categorie": "logement", "total": 800.0, "nombre_transactions": 1, "part": 96.91
+        }
+
+    def test_periode_invalide(self, client):
+        """Une année de fin antérieure à l'année de début est refusée"""
+        reponse = client.get("/api/reports/categories", params={"annee_debut": 2026, "annee_fin": 2025})
+        assert reponse.status_code == 400
+        assert client.get("/api/reports/monthly", params={"annee_debut": 2026, "type": "autre"}).status_code == 422
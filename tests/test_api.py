@@ -1,12 +1,14 @@
 """
 Tests d'intégration pour l'API
 """
+import json
+
 import pytest
 from fastapi.testclient import TestClient
-from datetime import date
+from sqlalchemy import event
 from app.main import app
-from app.database import Base, engine, get_db
-from app.models import Transaction, Budget
+from app.database import Base, async_engine, engine, get_async_db
+from app import cache
 
 
 # Créer une base de données de test
@@ -14,16 +16,15 @@ from app.models import Transaction, Budget
 def client():
     """Crée un client de test pour l'API"""
     Base.metadata.create_all(bind=engine)
+    cache.cache_statistiques.vider()
+    cache.cache_periodes.vider()
     
-    def override_get_db():
-        from app.database import SessionLocal
-        db = SessionLocal()
-        try:
+    async def override_get_db():
+        from app.database import AsyncSessionLocal
+        async with AsyncSessionLocal() as db:
             yield db
-        finally:
-            db.close()
     
-    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_db
     client = TestClient(app)
     yield client
     app.dependency_overrides.clear()
@@ -67,6 +68,35 @@ class TestTransactionsAPI:
         )
         assert response.status_code == 422
     
+    @pytest.mark.parametrize("montant", [0.001, 0.004, 1e300])
+    def test_create_transaction_montant_hors_bornes(self, client, montant):
+        """Un montant nul une fois en centimes, ou trop grand pour la base, est refusé sans écriture"""
+        response = client.post("/api/transactions", json={
+            "montant": montant, "libelle": "Test", "type": "depense",
+            "categorie": "alimentation", "date_transaction": "2026-01-06"
+        })
+        assert response.status_code == 422
+        assert client.get("/api/transactions").json() == []
+
+    def test_create_transaction_montant_arrondi(self, client):
+        """Un montant qui fait au moins un centime une fois arrondi est accepté"""
+        response = client.post("/api/transactions", json={
+            "montant": 0.006, "libelle": "Test", "type": "depense",
+            "categorie": "alimentation", "date_transaction": "2026-01-06"
+        })
+        assert response.status_code == 201
+        assert client.get(f"/api/transactions/{response.json()['id']}").json()["montant"] == 0.01
+
+    def test_create_transactions_batch_montant_hors_bornes(self, client):
+        """Un seul montant hors bornes refuse tout le lot"""
+        corps = [
+            {"montant": montant, "libelle": "Test", "type": "depense",
+             "categorie": "alimentation", "date_transaction": "2026-01-06"}
+            for montant in (10.0, 0.001)
+        ]
+        assert client.post("/api/transactions/batch", json=corps).status_code == 422
+        assert client.get("/api/transactions").json() == []
+
     def test_create_transaction_invalide_type(self, client):
         """Test de rejet d'une transaction avec type invalide"""
         response = client.post(
@@ -150,6 +180,53 @@ class TestTransactionsAPI:
         assert len(data) == 1
         assert data[0]["date_transaction"] == "2026-01-06"
     
+    def test_list_transactions_pagination_curseur(self, client):
+        """Les pages successives couvrent toutes les transactions sans doublon"""
+        for i in range(7):
+            client.post("/api/transactions", json={
+                "montant": 10.0 + i,
+                "libelle": f"Achat {i}",
+                "type": "depense",
+                "categorie": "alimentation",
+                "date_transaction": f"2026-01-{1 + i // 2:02d}"
+            })
+        toutes = client.get("/api/transactions").json()
+        pages, cursor = [], None
+        while True:
+            url = "/api/transactions?limit=3" + (f"&cursor={cursor}" if cursor else "")
+            response = client.get(url)
+            assert response.status_code == 200
+            pages.append(response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+        assert [len(p) for p in pages] == [3, 3, 1]
+        assert [t["id"] for p in pages for t in p] == [t["id"] for t in toutes]
+
+    def test_list_transactions_pagination_avec_filtres(self, client):
+        """Les filtres s'appliquent à chaque page"""
+        for jour in range(1, 11):
+            client.post("/api/transactions", json={
+                "montant": 5.0,
+                "libelle": f"Ticket {jour}",
+                "type": "depense",
+                "categorie": "transport" if jour % 2 else "loisirs",
+                "date_transaction": f"2026-03-{jour:02d}"
+            })
+        first = client.get("/api/transactions?categorie=transport&date_debut=2026-03-02&limit=2")
+        second = client.get(
+            f"/api/transactions?categorie=transport&date_debut=2026-03-02&limit=2"
+            f"&cursor={first.headers['X-Next-Cursor']}"
+        )
+        dates = [t["date_transaction"] for t in first.json() + second.json()]
+        assert dates == ["2026-03-09", "2026-03-07", "2026-03-05", "2026-03-03"]
+        assert "X-Next-Cursor" not in second.headers
+
+    def test_list_transactions_curseur_invalide(self, client):
+        """Un curseur invalide est rejeté"""
+        response = client.get("/api/transactions?limit=2&cursor=invalide")
+        assert response.status_code == 400
+
     def test_get_transaction_by_id(self, client):
         """Test de récupération d'une transaction par ID"""
         create_response = client.post("/api/transactions", json={
@@ -188,6 +265,35 @@ class TestTransactionsAPI:
         # Vérifier que la transaction n'existe plus
         get_response = client.get(f"/api/transactions/{transaction_id}")
         assert get_response.status_code == 404
+    
+    def test_stream_transactions_ndjson(self, client):
+        """Le flux NDJSON émet une transaction par ligne, par id croissant, avec les filtres de la liste"""
+        for jour in range(1, 11):
+            client.post("/api/transactions", json={
+                "montant": 1.5 * jour, "libelle": f"Achat {jour}", "type": "depense",
+                "categorie": "alimentation" if jour % 2 else "loisirs",
+                "date_transaction": f"2026-02-{jour:02d}"
+            })
+        response = client.get("/api/transactions/stream", params={"categorie": "loisirs", "date_fin": "2026-02-08"})
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lignes = [json.loads(ligne) for ligne in response.text.splitlines()]
+        assert [l["libelle"] for l in lignes] == ["Achat 2", "Achat 4", "Achat 6", "Achat 8"]
+        assert lignes[0] == client.get(f"/api/transactions/{lignes[0]['id']}").json()
+    
+    def test_stream_transactions_reprise(self, client):
+        """since_id reprend le flux juste après la dernière transaction reçue"""
+        ids = [
+            client.post("/api/transactions", json={
+                "montant": 10.0, "libelle": f"Achat {i}", "type": "depense",
+                "categorie": "alimentation", "date_transaction": "2026-02-01"
+            }).json()["id"]
+            for i in range(5)
+        ]
+        response = client.get("/api/transactions/stream", params={"since_id": ids[2]})
+        assert [json.loads(ligne)["id"] for ligne in response.text.splitlines()] == ids[3:]
+        assert client.get("/api/transactions/stream", params={"since_id": ids[-1]}).text == ""
+        assert client.get("/api/transactions/stream", params={"since_id": -1}).status_code == 422
 
 
 class TestBudgetsAPI:
@@ -325,6 +431,84 @@ class TestBudgetsAPI:
         data = response.json()
         assert len(data) == 2
 
+    def test_list_all_budget_stats_sans_n_plus_1(self, client):
+        """Les statistiques de la période sont calculées en une seule requête SQL"""
+        categories = ["alimentation", "logement", "transport", "loisirs", "sante"]
+        for categorie in categories:
+            client.post("/api/budgets", json={
+                "categorie": categorie,
+                "montant_budget": 300.0,
+                "mois": 1,
+                "annee": 2026
+            })
+            client.post("/api/transactions", json={
+                "montant": 20.0,
+                "libelle": "Achat",
+                "type": "depense",
+                "categorie": categorie,
+                "date_transaction": "2026-01-10"
+            })
+
+        requetes = []
+
+        def enregistrer(conn, cursor, statement, parameters, context, executemany):
+            # La lecture des versions (ETag, cache) n'est pas un calcul de statistiques
+            if statement.lstrip().upper().startswith("SELECT") and "versions_" not in statement:
+                requetes.append(statement)
+
+        event.listen(async_engine.sync_engine, "before_cursor_execute", enregistrer)
+        try:
+            response = client.get("/api/budgets/stats?mois=1&annee=2026")
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", enregistrer)
+        assert response.status_code == 200
+        assert len(response.json()) == len(categories)
+        assert len(requetes) == 1
+
+    def test_list_all_budget_stats_identique_par_categorie(self, client):
+        """Les statistiques groupées sont identiques aux statistiques par catégorie"""
+        client.post("/api/budgets", json={
+            "categorie": "alimentation", "montant_budget": 300.0, "mois": 1, "annee": 2026
+        })
+        client.post("/api/budgets", json={
+            "categorie": "logement", "montant_budget": 800.0, "mois": 1, "annee": 2026
+        })
+        client.post("/api/transactions", json={
+            "montant": 25.50, "libelle": "Courses", "type": "depense",
+            "categorie": "alimentation", "date_transaction": "2026-01-06"
+        })
+        client.post("/api/transactions", json={
+            "montant": 900.0, "libelle": "Loyer", "type": "depense",
+            "categorie": "logement", "date_transaction": "2026-01-01"
+        })
+
+        data = client.get("/api/budgets/stats?mois=1&annee=2026").json()
+        for stats in data:
+            detail = client.get(f"/api/budgets/stats/{stats['categorie']}?mois=1&annee=2026")
+            assert detail.json() == stats
+
+    def test_etat_cache_statistiques(self, client):
+        """L'endpoint d'administration expose les succès et échecs du cache"""
+        client.post("/api/budgets", json={
+            "categorie": "alimentation", "montant_budget": 300.0, "mois": 1, "annee": 2026
+        })
+        client.get("/api/budgets/stats?mois=1&annee=2026")
+        client.get("/api/budgets/stats?mois=1&annee=2026")
+        data = client.get("/api/admin/cache").json()
+        assert data["periodes"]["succes"] == 1
+        assert data["statistiques"]["succes"] == 1
+        assert data["statistiques"]["taille"] == 1
+
+        client.post("/api/transactions", json={
+            "montant": 50.0, "libelle": "Courses", "type": "depense",
+            "categorie": "alimentation", "date_transaction": "2026-01-06"
+        })
+        stats = client.get("/api/budgets/stats/alimentation?mois=1&annee=2026").json()
+        assert stats["montant_total_depense"] == 50.0
+
+        assert client.delete("/api/admin/cache").status_code == 204
+        assert client.get("/api/admin/cache").json()["statistiques"]["taille"] == 0
+
     def test_create_transaction_alerte_depassement(self, client):
         """Alerte lorsque une dépense fait dépasser le budget"""
         client.post("/api/budgets", json={
@@ -367,6 +551,154 @@ class TestBudgetsAPI:
         assert "id,date,libelle,type,categorie,montant" in response.text
         assert "Courses" in response.text
 
+    def test_export_transactions_csv_plusieurs_lots(self, client):
+        """L'export en flux restitue toutes les lignes et applique les filtres"""
+        for jour in range(1, 29):
+            client.post("/api/transactions", json={
+                "montant": float(jour),
+                "libelle": f"Achat {jour}",
+                "type": "depense",
+                "categorie": "alimentation" if jour % 2 else "loisirs",
+                "date_transaction": f"2026-02-{jour:02d}"
+            })
+        response = client.get("/api/transactions/export/csv?categorie=loisirs&date_fin=2026-02-10")
+        assert response.status_code == 200
+        lignes = response.text.strip().splitlines()
+        assert lignes[0] == "id,date,libelle,type,categorie,montant"
+        assert [l.split(",")[1] for l in lignes[1:]] == [
+            "2026-02-10", "2026-02-08", "2026-02-06", "2026-02-04", "2026-02-02"
+        ]
+
+    def test_import_csv_depuis_export(self, client):
+        """Un export CSV réimporté recrée les mêmes transactions"""
+        client.post("/api/transactions", json={
+            "montant": 25.50, "libelle": "Courses, marché", "type": "depense",
+            "categorie": "alimentation", "date_transaction": "2026-01-06"
+        })
+        client.post("/api/transactions", json={
+            "montant": 2000.0, "libelle": "Salaire", "type": "revenu",
+            "categorie": "salaire", "date_transaction": "2026-01-01"
+        })
+        contenu = client.get("/api/transactions/export/csv").content
+        response = client.post(
+            "/api/transactions/import/csv", content=contenu,
+            headers={"Content-Type": "text/csv"}
+        )
+        assert response.status_code == 200
+        rapport = response.json()
+        assert rapport["lignes_lues"] == 2
+        assert rapport["transactions_importees"] == 2
+        assert rapport["nombre_erreurs"] == 0
+        transactions = client.get("/api/transactions").json()
+        assert len(transactions) == 4
+        assert sorted(t["libelle"] for t in transactions).count("Courses, marché") == 2
+
+    def test_import_csv_rapport_erreurs_et_alertes(self, client):
+        """Les lignes invalides sont signalées et chaque dépassement une seule fois"""
+        client.post("/api/budgets", json={
+            "categorie": "alimentation", "montant_budget": 100.0, "mois": 1, "annee": 2026
+        })
+        lignes = ["id,date,libelle,type,categorie,montant"]
+        lignes += [f",2026-01-{j:02d},Courses {j},depense,alimentation,30" for j in range(1, 6)]
+        lignes += [",2026-01-10,Erreur,inconnu,alimentation,30", ",pas-une-date,Erreur,depense,alimentation,30"]
+        response = client.post(
+            "/api/transactions/import/csv", content="\n".join(lignes).encode(),
+            headers={"Content-Type": "text/csv"}
+        )
+        rapport = response.json()
+        assert rapport["transactions_importees"] == 5
+        assert rapport["nombre_erreurs"] == 2
+        assert [e["ligne"] for e in rapport["erreurs"]] == [7, 8]
+        assert len(rapport["alertes"]) == 1
+        assert rapport["alertes"][0]["montant_total_depense"] == 150.0
+        stats = client.get("/api/budgets/stats/alimentation?mois=1&annee=2026").json()
+        assert stats["montant_total_depense"] == 150.0
+
+    @pytest.mark.parametrize("contenu", [b"", b"date,libelle\n2026-01-01,Test\n"])
+    def test_import_csv_invalide(self, client, contenu):
+        """Un fichier vide ou sans les colonnes attendues est rejeté"""
+        response = client.post(
+            "/api/transactions/import/csv", content=contenu,
+            headers={"Content-Type": "text/csv"}
+        )
+        assert response.status_code == 400
+
+    def test_create_transactions_batch_alertes_identiques_au_sequentiel(self, client):
+        """Le lot produit les mêmes alertes que des créations successives"""
+        for mois in (1, 2):
+            client.post("/api/budgets", json={
+                "categorie": "alimentation", "montant_budget": 100.0, "mois": mois, "annee": 2026
+            })
+            client.post("/api/budgets", json={
+                "categorie": "loisirs", "montant_budget": 50.0, "mois": mois, "annee": 2026
+            })
+        elements = [
+            ("alimentation", "depense", 60.0), ("loisirs", "depense", 45.0),
+            ("alimentation", "depense", 30.0), ("alimentation", "depense", 20.0),
+            ("salaire", "revenu", 2000.0), ("loisirs", "depense", 10.0),
+            ("transport", "depense", 500.0), ("alimentation", "depense", 0.1),
+        ]
+
+        def corps(mois):
+            return [
+                {"montant": montant, "libelle": f"Élément {i}", "type": type_transaction,
+                 "categorie": categorie, "date_transaction": f"2026-{mois:02d}-{i + 1:02d}"}
+                for i, (categorie, type_transaction, montant) in enumerate(elements)
+            ]
+
+        sequentiel = [client.post("/api/transactions", json=e).json() for e in corps(1)]
+        response = client.post("/api/transactions/batch", json=corps(2))
+        assert response.status_code == 201
+        lot = response.json()
+        assert [t["alerte_depassement"] for t in lot] == [t["alerte_depassement"] for t in sequentiel]
+        assert [(t["message_alerte"] or "").replace("02/2026", "01/2026") for t in lot] == [
+            t["message_alerte"] or "" for t in sequentiel
+        ]
+        assert [t["alerte_depassement"] for t in lot] == [None, None, None, True, None, True, None, True]
+        assert len({t["id"] for t in lot}) == len(elements)
+        assert [t["libelle"] for t in lot] == [e["libelle"] for e in corps(2)]
+        stats = client.get("/api/budgets/stats/alimentation?mois=2&annee=2026").json()
+        assert stats["montant_total_depense"] == 110.1
+
+    def test_create_transactions_batch_requetes_par_lot(self, client):
+        """Le nombre de requêtes ne dépend pas du nombre d'éléments du lot"""
+        for categorie in ("alimentation", "loisirs", "transport"):
+            client.post("/api/budgets", json={
+                "categorie": categorie, "montant_budget": 100.0, "mois": 1, "annee": 2026
+            })
+        corps = [
+            {"montant": 5.0, "libelle": f"Achat {i}", "type": "depense",
+             "categorie": ("alimentation", "loisirs", "transport")[i % 3],
+             "date_transaction": "2026-01-15"}
+            for i in range(60)
+        ]
+        requetes = []
+
+        def enregistrer(conn, cursor, statement, parameters, context, executemany):
+            requetes.append(statement)
+
+        event.listen(async_engine.sync_engine, "before_cursor_execute", enregistrer)
+        try:
+            response = client.post("/api/transactions/batch", json=corps)
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", enregistrer)
+        assert response.status_code == 201
+        assert len([r for r in requetes if r.lstrip().upper().startswith("SELECT")]) == 1
+        # Sans sentinelle côté SQLite, l'INSERT ... RETURNING ordonné s'exécute ligne par ligne
+        assert len([r for r in requetes if not r.startswith("INSERT INTO transactions")]) <= 4
+
+    def test_create_transactions_batch_invalide(self, client):
+        """Un élément invalide rejette tout le lot"""
+        response = client.post("/api/transactions/batch", json=[
+            {"montant": 5.0, "libelle": "Ok", "type": "depense",
+             "categorie": "alimentation", "date_transaction": "2026-01-15"},
+            {"montant": -5.0, "libelle": "Ko", "type": "depense",
+             "categorie": "alimentation", "date_transaction": "2026-01-15"},
+        ])
+        assert response.status_code == 422
+        assert client.get("/api/transactions").json() == []
+        assert client.post("/api/transactions/batch", json=[]).json() == []
+
     def test_update_transaction(self, client):
         """Modification d'une transaction"""
         create_resp = client.post("/api/transactions", json={
@@ -416,6 +748,39 @@ class TestBudgetsAPI:
         assert response.status_code == 200
         assert response.json()["montant_budget"] == 350.0
 
+    @pytest.mark.parametrize("montant", [0.001, 1e300])
+    def test_budget_montant_hors_bornes(self, client, montant):
+        """Création et modification refusent un montant nul en centimes ou trop grand"""
+        response = client.post("/api/budgets", json={
+            "categorie": "alimentation", "montant_budget": montant, "mois": 1, "annee": 2026
+        })
+        assert response.status_code == 422
+        bid = client.post("/api/budgets", json={
+            "categorie": "alimentation", "montant_budget": 300.0, "mois": 1, "annee": 2026
+        }).json()["id"]
+        response = client.put(f"/api/budgets/{bid}", json={"montant_budget": montant})
+        assert response.status_code == 422
+        assert client.get(f"/api/budgets/{bid}").json()["montant_budget"] == 300.0
+
+    def test_update_budget_conflit_periode(self, client):
+        """Déplacer un budget sur une période déjà budgétée est refusé"""
+        client.post("/api/budgets", json={
+            "categorie": "alimentation",
+            "montant_budget": 300.0,
+            "mois": 1,
+            "annee": 2026
+        })
+        create_resp = client.post("/api/budgets", json={
+            "categorie": "alimentation",
+            "montant_budget": 300.0,
+            "mois": 2,
+            "annee": 2026
+        })
+        bid = create_resp.json()["id"]
+        response = client.put(f"/api/budgets/{bid}", json={"mois": 1})
+        assert response.status_code == 400
+        assert client.get(f"/api/budgets/{bid}").json()["mois"] == 2
+
     def test_delete_budget(self, client):
         """Suppression d'un budget"""
         create_resp = client.post("/api/budgets", json={
@@ -428,3 +793,31 @@ class TestBudgetsAPI:
         response = client.delete(f"/api/budgets/{bid}")
         assert response.status_code == 204
         assert client.get(f"/api/budgets/{bid}").status_code == 404
+
+
+class TestTendanceAPI:
+    """Tests pour GET /api/reports/trend"""
+    
+    def test_tendance_en_euros(self, client):
+        """La tendance d'une catégorie est exprimée en euros, mois par mois"""
+        client.post("/api/budgets", json={
+            "categorie": "alimentation", "montant_budget": 300.0, "mois": 1, "annee": 2026
+        })
+        client.post("/api/transactions", json={
+            "montant": 75.5, "libelle": "Courses", "type": "depense",
+            "categorie": "alimentation", "date_transaction": "2026-01-06"
+        })
+        response = client.get("/api/reports/trend", params={"annee": 2026, "categories": "alimentation, logement"})
+        assert response.status_code == 200
+        data = response.json()
+        assert [t["categorie"] for t in data] == ["alimentation", "logement"]
+        assert data[0]["mois"][0] == {
+            "annee": 2026, "mois": 1, "depenses": 75.5, "revenus": 0.0,
+            "budget": 300.0, "montant_restant": 224.5, "pourcentage_consomme": 25.17
+        }
+        assert data[0]["mois"][1]["budget"] is None
+    
+    def test_nombre_mois_invalide(self, client):
+        """Seules les périodes de 12 et 24 mois sont acceptées"""
+        response = client.get("/api/reports/trend", params={"annee": 2026, "nombre_mois": 6})
+        assert response.status_code == 400
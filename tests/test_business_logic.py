@@ -172,3 +172,220 @@ class TestVerifierDepassementBudget:
         )
         assert alerte["depasse"] is False
         assert alerte["message_alerte"] is None
+
+
+class TestAgregationSQL:
+    """Tests de l'agrégation des dépenses faite par la base"""
+    
+    def test_total_depense_decembre(self, db_session):
+        """Le mois de décembre s'arrête au 1er janvier suivant"""
+        db_session.add_all([
+            Transaction(montant=40.0, libelle="Cadeaux", type="depense",
+                        categorie="loisirs", date_transaction=date(2025, 12, 31)),
+            Transaction(montant=15.0, libelle="Cinéma", type="depense",
+                        categorie="loisirs", date_transaction=date(2026, 1, 1)),
+        ])
+        db_session.commit()
+        total = business_logic.calculer_total_depense_par_categorie(
+            db_session, "loisirs", 12, 2025
+        )
+        assert total == 40.0
+    
+    @pytest.mark.parametrize("fonction", [
+        business_logic.calculer_montant_restant_budget,
+        business_logic.calculer_pourcentage_consomme,
+        business_logic.obtenir_statistiques_budget,
+    ])
+    def test_une_seule_requete(self, db_session, sample_transactions, sample_budgets,
+                               compteur_requetes, fonction):
+        """Budget et total dépensé sont obtenus en un seul aller-retour"""
+        fonction(db_session, "alimentation", 1, 2026)
+        assert len(compteur_requetes) == 1
+    
+    def test_verifier_depassement_une_seule_requete(self, db_session, sample_transactions,
+                                                    sample_budgets, compteur_requetes):
+        """La vérification de dépassement ne fait qu'un aller-retour"""
+        business_logic.verifier_depassement_budget(db_session, "alimentation", 1, 2026, 10.0)
+        assert len(compteur_requetes) == 1
+
+
+class TestObtenirStatistiquesPeriode:
+    """Tests pour obtenir_statistiques_periode (statistiques groupées)"""
+    
+    def test_identique_aux_statistiques_par_categorie(self, db_session, sample_transactions, sample_budgets):
+        """Chaque entrée correspond à obtenir_statistiques_budget"""
+        stats = business_logic.obtenir_statistiques_periode(db_session, 1, 2026)
+        attendu = [
+            business_logic.obtenir_statistiques_budget(db_session, b.categorie, 1, 2026)
+            for b in sample_budgets
+        ]
+        assert stats == attendu
+    
+    def test_budget_sans_depense(self, db_session, sample_budgets):
+        """Un budget sans dépense apparaît avec un total nul (LEFT JOIN)"""
+        stats = business_logic.obtenir_statistiques_periode(db_session, 1, 2026)
+        assert [s["categorie"] for s in stats] == ["alimentation", "logement"]
+        assert all(s["montant_total_depense"] == 0.0 for s in stats)
+    
+    def test_periode_sans_budget(self, db_session, sample_transactions):
+        """Aucun budget sur la période -> liste vide"""
+        assert business_logic.obtenir_statistiques_periode(db_session, 1, 2026) == []
+    
+    def test_une_seule_requete(self, db_session, sample_transactions, sample_budgets, compteur_requetes):
+        """Le nombre de requêtes ne dépend pas du nombre de budgets"""
+        business_logic.obtenir_statistiques_periode(db_session, 1, 2026)
+        assert len(compteur_requetes) == 1
+
+
+class TestVerifierDepassementsLot:
+    """Tests pour verifier_depassements_lot"""
+    
+    def test_cumul_dans_l_ordre_du_lot(self, db_session, sample_transactions, sample_budgets):
+        """Chaque dépense tient compte des dépenses précédentes du lot"""
+        # alimentation : budget 300, déjà 75.50 dépensés
+        resultats = business_logic.verifier_depassements_lot(db_session, [
+            ("alimentation", 1, 2026, 200.0),
+            ("loisirs", 1, 2026, 10.0),
+            ("alimentation", 1, 2026, 30.0),
+        ])
+        assert resultats[0]["depasse"] is False
+        assert resultats[1] is None
+        assert resultats[2]["depasse"] is True
+        assert resultats[2]["montant_restant_avant"] == 24.50
+        assert resultats[2]["montant_total_apres"] == 305.50
+    
+    def test_identique_a_verifier_depassement_budget(self, db_session, sample_transactions, sample_budgets):
+        """Pour une dépense seule, le résultat est celui de verifier_depassement_budget"""
+        attendu = business_logic.verifier_depassement_budget(db_session, "alimentation", 1, 2026, 250.0)
+        assert business_logic.verifier_depassements_lot(
+            db_session, [("alimentation", 1, 2026, 250.0)]
+        ) == [attendu]
+    
+    def test_une_seule_requete(self, db_session, sample_transactions, sample_budgets, compteur_requetes):
+        """Les budgets de tous les groupes sont lus en une requête"""
+        business_logic.verifier_depassements_lot(db_session, [
+            ("alimentation", 1, 2026, 1.0), ("logement", 1, 2026, 1.0), ("alimentation", 1, 2026, 1.0)
+        ])
+        assert len(compteur_requetes) == 1
+
+
+class TestFonctionsEnCentimes:
+    """Tests des variantes *_centimes utilisées en interne"""
+    
+    def test_memes_valeurs_en_centimes(self, db_session, sample_transactions, sample_budgets):
+        """Les variantes en centimes donnent les mêmes montants, en entiers"""
+        assert business_logic.calculer_total_depense_par_categorie_centimes(
+            db_session, "alimentation", 1, 2026
+        ) == 7550
+        assert business_logic.calculer_montant_restant_budget_centimes(
+            db_session, "alimentation", 1, 2026
+        ) == 22450
+        stats = business_logic.obtenir_statistiques_budget_centimes(db_session, "alimentation", 1, 2026)
+        assert stats["montant_total_depense_centimes"] == 7550
+        assert stats["budget_fixe_centimes"] == 30000
+    
+    def test_alerte_en_centimes(self, db_session, sample_transactions, sample_budgets):
+        """verifier_depassement_budget est la variante en centimes convertie en euros"""
+        alerte = business_logic.verifier_depassement_budget_centimes(db_session, "alimentation", 1, 2026, 25000)
+        assert alerte["montant_total_apres_centimes"] == 32550
+        assert business_logic.verifier_depassement_budget(db_session, "alimentation", 1, 2026, 250.0) == {
+            "depasse": True,
+            "message_alerte": alerte["message_alerte"],
+            "montant_restant_avant": 224.50,
+            "budget_fixe": 300.0,
+            "montant_total_apres": 325.50
+        }
+    
+    def test_montant_du_modele_en_euros(self, db_session, sample_transactions):
+        """Transaction.montant lit et affecte montant_centimes"""
+        transaction = sample_transactions[0]
+        assert transaction.montant == 25.50
+        transaction.montant = 12.34
+        assert transaction.montant_centimes == 1234
+        db_session.commit()
+        assert db_session.query(Transaction).filter(Transaction.montant >= 2000).count() == 1
+
+
+class TestObtenirTendance:
+    """Tests pour obtenir_tendance (tendance mensuelle sur 12 ou 24 mois)"""
+    
+    def test_mois_de_l_annee(self, db_session, sample_transactions, sample_budgets):
+        """Dépenses, budget, reste et pourcentage par mois ; zéros pour les mois vides"""
+        tendance = business_logic.obtenir_tendance(db_session, 2026)
+        assert [t["categorie"] for t in tendance] == ["alimentation", "logement", "salaire"]
+        janvier, fevrier = tendance[0]["mois"][0], tendance[0]["mois"][1]
+        assert len(tendance[0]["mois"]) == 12
+        assert janvier == {
+            "annee": 2026, "mois": 1, "depenses_centimes": 7550, "revenus_centimes": 0,
+            "budget_centimes": 30000, "montant_restant_centimes": 22450, "pourcentage_consomme": 25.17
+        }
+        assert fevrier["depenses_centimes"] == 0
+        assert fevrier["budget_centimes"] is None
+        assert fevrier["pourcentage_consomme"] is None
+        assert tendance[2]["mois"][0]["revenus_centimes"] == 200000
+    
+    def test_categories_et_24_mois(self, db_session, sample_transactions, sample_budgets):
+        """Le filtre de catégories inclut les catégories sans données, sur deux ans"""
+        tendance = business_logic.obtenir_tendance(db_session, 2026, 24, ["logement", "loisirs"])
+        assert [t["categorie"] for t in tendance] == ["logement", "loisirs"]
+        assert (tendance[0]["mois"][0]["annee"], tendance[0]["mois"][0]["mois"]) == (2025, 1)
+        assert tendance[0]["mois"][12]["pourcentage_consomme"] == 100.0
+        assert all(m["depenses_centimes"] == 0 for m in tendance[1]["mois"])
+    
+    def test_une_seule_requete(self, db_session, sample_transactions, sample_budgets, compteur_requetes):
+        """Toute la tendance est lue en une requête groupée"""
+        business_logic.obtenir_tendance(db_session, 2026, 24)
+        assert len(compteur_requetes) == 1
+
+
+class TestVersionsAsynchrones:
+    """Tests des versions asynchrones sur une AsyncSession"""
+    
+    @staticmethod
+    async def _remplir(db):
+        db.add_all([
+            Budget(categorie="alimentation", montant_budget=100.0, mois=1, annee=2026),
+            Transaction(montant=60.0, libelle="Courses", type="depense",
+                        categorie="alimentation", date_transaction=date(2026, 1, 6)),
+        ])
+        await db.commit()
+    
+    @pytest.mark.asyncio
+    async def test_statistiques_identiques(self, async_db_session):
+        """Les versions asynchrones renvoient les mêmes résultats que les synchrones"""
+        await self._remplir(async_db_session)
+        total = await business_logic.calculer_total_depense_par_categorie_async(
+            async_db_session, "alimentation", 1, 2026
+        )
+        restant = await business_logic.calculer_montant_restant_budget_async(
+            async_db_session, "alimentation", 1, 2026
+        )
+        pourcentage = await business_logic.calculer_pourcentage_consomme_async(
+            async_db_session, "alimentation", 1, 2026
+        )
+        stats = await business_logic.obtenir_statistiques_budget_async(
+            async_db_session, "alimentation", 1, 2026
+        )
+        periode = await business_logic.obtenir_statistiques_periode_async(async_db_session, 1, 2026)
+        tendance = await business_logic.obtenir_tendance_async(async_db_session, 2026, 12, ["alimentation"])
+        assert (total, restant, pourcentage) == (60.0, 40.0, 60.0)
+        assert tendance[0]["mois"][0]["montant_restant_centimes"] == 4000
+        assert stats["montant_restant"] == 40.0
+        assert periode == [stats]
+    
+    @pytest.mark.asyncio
+    async def test_depassements(self, async_db_session):
+        """Les vérifications de dépassement fonctionnent sur une AsyncSession"""
+        await self._remplir(async_db_session)
+        alerte = await business_logic.verifier_depassement_budget_async(
+            async_db_session, "alimentation", 1, 2026, 50.0
+        )
+        lot = await business_logic.verifier_depassements_lot_async(
+            async_db_session, [("alimentation", 1, 2026, 30.0), ("alimentation", 1, 2026, 20.0)]
+        )
+        periodes = await business_logic.verifier_depassements_periodes_async(
+            async_db_session, [("alimentation", 1, 2026)]
+        )
+        assert alerte["depasse"]
+        assert [a["depasse"] for a in lot] == [False, True]
+        assert periodes == []
@@ -0,0 +1,183 @@
+"""
+Tests du cache des statistiques de budget
+"""
+import pytest
+from datetime import date
+
+from sqlalchemy import text
+
+from app import business_logic, cache, versions
+from app.cache import CacheLRU
+from app.models import Transaction, Budget
+
+
+@pytest.fixture(autouse=True)
+def caches_vides():
+    """Chaque test part de caches vides"""
+    cache.cache_statistiques.vider()
+    cache.cache_periodes.vider()
+    yield
+    cache.cache_statistiques.vider()
+    cache.cache_periodes.vider()
+
+
+class TestCacheLRU:
+    """Tests pour CacheLRU"""
+    
+    def test_succes_et_echecs(self):
+        """Les compteurs distinguent les succès des échecs"""
+        lru = CacheLRU(2)
+        assert lru.obtenir("a") is None
+        lru.enregistrer("a", 1)
+        assert lru.obtenir("a") == 1
+        etat = lru.etat()
+        assert (etat["succes"], etat["echecs"], etat["taux_succes"]) == (1, 1, 0.5)
+    
+    def test_eviction_lru(self):
+        """L'entrée la moins récemment utilisée est évincée"""
+        lru = CacheLRU(2)
+        lru.enregistrer("a", 1)
+        lru.enregistrer("b", 2)
+        lru.obtenir("a")
+        lru.enregistrer("c", 3)
+        assert lru.obtenir("b") is None
+        assert lru.obtenir("a") == 1
+        assert lru.etat()["evictions"] == 1
+    
+    def test_version_differente(self):
+        """Une entrée lue avec une autre version est retirée"""
+        lru = CacheLRU(2)
+        lru.enregistrer("a", 1, version=(1, 1))
+        assert lru.obtenir("a", version=(1, 1)) == 1
+        assert lru.obtenir("a", version=(2, 1)) is None
+        assert lru.etat()["taille"] == 0
+        assert lru.etat()["invalidations"] == 1
+    
+    def test_taille_nulle_desactive(self):
+        """Une taille maximale nulle désactive le cache"""
+        lru = CacheLRU(0)
+        lru.enregistrer("a", 1)
+        assert lru.obtenir("a") is None
+
+
+class TestInvalidation:
+    """Tests de l'invalidation déclenchée par les écritures"""
+    
+    def test_statistiques_mises_en_cache(self, db_session, sample_transactions, sample_budgets,
+                                         compteur_requetes):
+        """Le second appel ne lit que la version de la clé"""
+        premier = cache.statistiques_budget(db_session, "alimentation", 1, 2026)
+        nombre = len(compteur_requetes)
+        assert cache.statistiques_budget(db_session, "alimentation", 1, 2026) == premier
+        assert len(compteur_requetes) == nombre + 1
+        assert "versions_statistiques" in compteur_requetes[-1]
+    
+    def test_transaction_invalide_seulement_sa_cle(self, db_session, sample_transactions, sample_budgets):
+        """Une dépense n'invalide que sa catégorie et son mois"""
+        cache.statistiques_periode(db_session, 1, 2026)
+        cache.statistiques_budget(db_session, "alimentation", 2, 2026)
+        db_session.add(Transaction(
+            montant=10.0, libelle="Pain", type="depense",
+            categorie="alimentation", date_transaction=date(2026, 1, 20)
+        ))
+        db_session.commit()
+        avant = cache.cache_statistiques.etat()
+        assert cache.statistiques_budget(db_session, "logement", 1, 2026)["montant_total_depense"] == 800.0
+        assert cache.statistiques_budget(db_session, "alimentation", 2, 2026)["budget_fixe"] == 0
+        assert cache.statistiques_budget(db_session, "alimentation", 1, 2026)["montant_total_depense"] == 85.50
+        apres = cache.cache_statistiques.etat()
+        assert apres["succes"] - avant["succes"] == 2
+        assert apres["echecs"] - avant["echecs"] == 1
+        assert apres["invalidations"] == avant["invalidations"]
+
+    def test_ecriture_d_une_autre_cle_sans_effet(self, db_session, sample_budgets):
+        """Une écriture dans un autre mois et une autre catégorie ne périme aucune entrée"""
+        cache.statistiques_periode(db_session, 1, 2026)
+        db_session.add(Budget(categorie="loisirs", montant_budget=50.0, mois=3, annee=2026))
+        db_session.add(Transaction(
+            montant=10.0, libelle="Cinéma", type="depense",
+            categorie="loisirs", date_transaction=date(2026, 3, 12)
+        ))
+        db_session.commit()
+        avant = cache.cache_statistiques.etat()
+        assert len(cache.statistiques_periode(db_session, 1, 2026)) == 2
+        apres = cache.cache_statistiques.etat()
+        assert apres["succes"] - avant["succes"] == 2
+        assert apres["echecs"] == avant["echecs"]
+        assert apres["invalidations"] == avant["invalidations"]
+    
+    def test_deplacement_invalide_ancienne_et_nouvelle_cle(self, db_session, sample_transactions,
+                                                           sample_budgets):
+        """Changer la catégorie d'une transaction invalide les deux catégories"""
+        cache.statistiques_periode(db_session, 1, 2026)
+        sample_transactions[1].categorie = "alimentation"
+        db_session.commit()
+        assert cache.cache_statistiques.obtenir(("logement", 1, 2026)) is None
+        assert cache.cache_statistiques.obtenir(("alimentation", 1, 2026)) is None
+    
+    def test_creation_budget_invalide_la_periode(self, db_session, sample_budgets):
+        """Un nouveau budget apparaît dans les statistiques de la période"""
+        assert len(cache.statistiques_periode(db_session, 1, 2026)) == 2
+        db_session.add(Budget(categorie="transport", montant_budget=100.0, mois=1, annee=2026))
+        db_session.commit()
+        assert [s["categorie"] for s in cache.statistiques_periode(db_session, 1, 2026)] == [
+            "alimentation", "logement", "transport"
+        ]
+    
+    def test_modification_montant_budget(self, db_session, sample_budgets):
+        """Modifier le montant d'un budget garde la liste des catégories de la période"""
+        cache.statistiques_periode(db_session, 1, 2026)
+        sample_budgets[0].montant_budget = 400.0
+        db_session.commit()
+        assert cache.cache_periodes.obtenir((1, 2026)) is not None
+        stats = cache.statistiques_periode(db_session, 1, 2026)
+        assert stats[0]["budget_fixe"] == 400.0
+    
+    def test_rollback_invalide(self, db_session, sample_transactions, sample_budgets):
+        """Une valeur lue pendant une écriture annulée n'est pas conservée"""
+        db_session.delete(sample_transactions[0])
+        db_session.flush()
+        assert cache.statistiques_budget(db_session, "alimentation", 1, 2026)["montant_total_depense"] == 50.0
+        db_session.rollback()
+        assert cache.statistiques_budget(db_session, "alimentation", 1, 2026)["montant_total_depense"] == 75.50
+
+
+
+def _ecriture_externe(db, montant_budget_centimes):
+    """Écriture d'un autre worker : ni l'ORM ni l'invalidation de ce processus"""
+    db.execute(text("UPDATE budgets SET montant_budget_centimes = :m"), {"m": montant_budget_centimes})
+    cles = db.execute(text("SELECT categorie_id, mois, annee FROM budgets")).all()
+    versions.incrementer_statistiques(db, cles)
+    db.commit()
+
+
+class TestVersions:
+    """Tests de la validation des entrées par la version des données"""
+    
+    def test_ecriture_d_un_autre_worker(self, db_session, sample_budgets):
+        """Une écriture qui n'a pas invalidé ce processus rend ses entrées périmées"""
+        assert cache.statistiques_periode(db_session, 1, 2026)[0]["budget_fixe"] == 300.0
+        _ecriture_externe(db_session, 40000)
+        assert cache.statistiques_budget(db_session, "alimentation", 1, 2026)["budget_fixe"] == 400.0
+        assert cache.statistiques_periode(db_session, 1, 2026)[0]["budget_fixe"] == 400.0
+    
+    def test_ecriture_pendant_le_calcul(self, db_session, sample_budgets, monkeypatch):
+        """Une valeur calculée avant une écriture concurrente n'est pas servie après elle"""
+        calcul = business_logic.obtenir_statistiques_budget
+        
+        def calcul_puis_ecriture(db, *cle):
+            stats = calcul(db, *cle)
+            _ecriture_externe(db, 40000)
+            return stats
+        
+        monkeypatch.setattr(business_logic, "obtenir_statistiques_budget", calcul_puis_ecriture)
+        assert cache.statistiques_budget(db_session, "alimentation", 1, 2026)["budget_fixe"] == 300.0
+        monkeypatch.setattr(business_logic, "obtenir_statistiques_budget", calcul)
+        assert cache.statistiques_budget(db_session, "alimentation", 1, 2026)["budget_fixe"] == 400.0
+    
+    def test_lecture_pendant_une_ecriture_non_enregistree(self, db_session, sample_budgets):
+        """Ce qu'une session lit avant de valider ses écritures n'entre pas en cache"""
+        sample_budgets[0].montant_budget = 400.0
+        db_session.flush()
+        cache.statistiques_budget(db_session, "alimentation", 1, 2026)
+        assert cache.cache_statistiques.etat()["taille"] == 0
@@ -0,0 +1,90 @@
+"""
+Tests du dictionnaire des catégories et de son cache nom <-> id
+"""
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+
+from app import categories
+from app.models import Budget, Categorie, Transaction
+
+
+@pytest.fixture(autouse=True)
+def cache_vide():
+    categories.cache.vider()
+    yield categories.cache
+    categories.cache.vider()
+
+
+class TestCacheCategories:
+    """Tests pour CacheCategories"""
+
+    def test_identifiant_lu_une_fois(self, db_session, sample_transactions, compteur_requetes):
+        """Un id lu en base est ensuite servi par le cache, sans requête"""
+        categories.cache.vider()
+        premier = categories.cache.identifiant(db_session, "logement")
+        nombre = len(compteur_requetes)
+        assert categories.cache.identifiant(db_session, "logement") == premier
+        assert categories.cache.nom(db_session, premier) == "logement"
+        assert len(compteur_requetes) == nombre
+
+    def test_inconnue_non_mise_en_cache(self, db_session):
+        """Une catégorie absente n'est pas mémorisée : elle peut être créée ensuite"""
+        assert categories.cache.identifiant(db_session, "voyage") is None
+        db_session.add(Categorie(nom="voyage"))
+        db_session.commit()
+        assert categories.cache.identifiant(db_session, "voyage") is not None
+
+    def test_creation_validee_au_commit(self, db_session):
+        """Une catégorie créée n'entre dans le cache qu'au commit"""
+        ids = categories.cache.identifiants(db_session, ["sante", "sport"], creer=True)
+        assert set(ids) == {"sante", "sport"}
+        assert categories.cache.noms(db_session, ids.values()) == {i: n for n, i in ids.items()}
+        db_session.rollback()
+        assert categories.cache.identifiant(db_session, "sante") is None
+        categories.cache.identifiants(db_session, ["sante"], creer=True)
+        db_session.commit()
+        assert db_session.scalar(select(Categorie.nom)) == "sante"
+
+    def test_remplacer_noms(self, db_session):
+        """Les lignes d'une insertion Core reçoivent categorie_id à la place du nom"""
+        lignes = categories.remplacer_noms(db_session, [{"categorie": "loisirs", "mois": 1}])
+        assert lignes == [{"mois": 1, "categorie_id": categories.cache.identifiant(db_session, "loisirs")}]
+
+
+class TestCategorieNommee:
+    """Tests de l'attribut categorie des transactions et des budgets"""
+
+    def test_creation_par_nom(self, db_session, sample_transactions):
+        """Les catégories nommées à la création sont créées une seule fois"""
+        assert db_session.query(Categorie).count() == 3
+        assert sample_transactions[0].categorie_id == sample_transactions[2].categorie_id
+        db_session.expire_all()
+        assert sample_transactions[1].categorie == "logement"
+
+    def test_changement_de_categorie(self, db_session, sample_transactions):
+        """Affecter un nouveau nom à un objet existant change son categorie_id au flush"""
+        transaction = sample_transactions[1]
+        transaction.categorie = "loisirs"
+        assert transaction.categorie == "loisirs"
+        db_session.commit()
+        assert transaction.categorie == "loisirs"
+        assert transaction.categorie_id == categories.cache.identifiant(db_session, "loisirs")
+
+    def test_filtre_par_id(self, db_session, sample_transactions, sample_budgets):
+        """id_par_nom filtre sur categorie_id ; une catégorie inconnue ne renvoie rien"""
+        requete = select(Transaction.libelle).where(Transaction.categorie_id == categories.id_par_nom("alimentation"))
+        assert sorted(db_session.scalars(requete)) == ["Courses Leclerc", "Restaurant"]
+        assert db_session.scalars(
+            select(Budget).where(Budget.categorie_id == categories.id_par_nom("inconnue"))
+        ).all() == []
+
+    def test_expression_par_nom(self, db_session, sample_transactions):
+        """En requête, categorie désigne encore le nom"""
+        db_session.add(Transaction(
+            montant_centimes=100, libelle="Cinéma", type="depense",
+            categorie="loisirs", date_transaction=date(2026, 2, 1)
+        ))
+        db_session.commit()
+        assert db_session.scalar(select(Transaction.libelle).where(Transaction.categorie == "loisirs")) == "Cinéma"
@@ -0,0 +1,217 @@
+"""
+Tests de la compression des réponses et des fichiers statiques précompressés
+"""
+import asyncio
+import gzip
+import os
+import zlib
+
+import brotli
+import pytest
+import zstandard
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+
+from app import compression
+from app.database import Base, engine
+from app.main import app
+
+GROS_JSON = [{"libelle": f"Opération {i}", "montant": i / 100} for i in range(500)]
+
+
+def _application(seuil=1024, encodages=("zstd", "br", "gzip")):
+    async def petit(request):
+        return JSONResponse({"ok": True})
+
+    async def gros(request):
+        return JSONResponse(GROS_JSON, headers={"ETag": '"v1"'})
+
+    async def flux(request):
+        async def morceaux():
+            for i in range(3):
+                yield f"ligne {i};" * 200
+        return StreamingResponse(morceaux(), media_type="text/csv")
+
+    async def image(request):
+        return Response(b"\x89PNG" * 1000, media_type="image/png")
+
+    async def non_modifie(request):
+        return Response(status_code=304, headers={"ETag": '"v1"'})
+
+    routes = [Route("/petit", petit), Route("/gros", gros), Route("/flux", flux),
+              Route("/image", image), Route("/non-modifie", non_modifie)]
+    return compression.MiddlewareCompression(Starlette(routes=routes), seuil=seuil, encodages=encodages)
+
+
+def _appeler(application, chemin, accept_encoding):
+    """Messages ASGI envoyés par l'application, sans décompression par un client HTTP"""
+    messages = []
+    requete_lue = False
+
+    async def recevoir():
+        nonlocal requete_lue
+        if requete_lue:
+            # Pas de déconnexion : StreamingResponse attend ce message jusqu'à la fin du flux
+            await asyncio.Event().wait()
+        requete_lue = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def envoyer(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http", "method": "GET", "path": chemin, "raw_path": chemin.encode(), "query_string": b"",
+        "headers": [(b"accept-encoding", accept_encoding.encode())], "scheme": "http",
+        "server": ("test", 80), "client": ("test", 1), "root_path": "", "http_version": "1.1",
+    }
+    asyncio.run(application(scope, recevoir, envoyer))
+    en_tetes = {cle.decode(): valeur.decode() for cle, valeur in messages[0]["headers"]}
+    return messages[0]["status"], en_tetes, [m.get("body", b"") for m in messages[1:]]
+
+
+class TestNegociation:
+    """Tests pour choisir_encodage et lire_configuration"""
+
+    @pytest.mark.parametrize("accept_encoding, attendu", [
+        ("gzip, deflate, br, zstd", "zstd"),
+        ("gzip, br", "br"),
+        ("gzip;q=1.0, br;q=0.5", "gzip"),
+        ("br;q=0, gzip", "gzip"),
+        ("*", "zstd"),
+        ("*;q=0", None),
+        ("identity", None),
+        ("", None),
+    ])
+    def test_choisir_encodage(self, accept_encoding, attendu):
+        """Qualité du client d'abord, préférence du serveur ensuite"""
+        assert compression.choisir_encodage(accept_encoding, ("zstd", "br", "gzip")) == attendu
+
+    def test_configuration_par_defaut(self):
+        """Compression active, seuil de 1 Ko, niveaux rapides"""
+        configuration = compression.lire_configuration({})
+        assert configuration["actif"] is True
+        assert configuration["seuil"] == 1024
+        assert configuration["encodages"] == ("zstd", "br", "gzip")
+        assert configuration["niveaux"] == {"gzip": 6, "br": 1, "zstd": 3}
+
+    @pytest.mark.parametrize("variable, valeur", [
+        ("BUDGET_COMPRESSION_ENCODAGES", "gzip,lzma"),
+        ("BUDGET_COMPRESSION_NIVEAU_ZSTD", "22"),
+        ("BUDGET_COMPRESSION_SEUIL", "-1"),
+    ])
+    def test_configuration_invalide(self, variable, valeur):
+        """Un encodage inconnu ou un niveau hors limites est refusé"""
+        with pytest.raises(ValueError):
+            compression.lire_configuration({variable: valeur})
+
+    def test_desactivee(self):
+        """BUDGET_COMPRESSION=0 n'installe pas le middleware"""
+        assert compression.activer(Starlette(), compression.lire_configuration({"BUDGET_COMPRESSION": "0"})) is False
+
+
+class TestMiddlewareCompression:
+    """Tests pour MiddlewareCompression"""
+
+    @pytest.mark.parametrize("encodage, decompresser", [
+        ("gzip", gzip.decompress),
+        ("br", brotli.decompress),
+        ("zstd", lambda donnees: zstandard.ZstdDecompressor().decompressobj().decompress(donnees)),
+    ])
+    def test_reponse_complete(self, encodage, decompresser):
+        """Au-delà du seuil, le corps est compressé et sa longueur mise à jour"""
+        statut, en_tetes, corps = _appeler(_application(), "/gros", encodage)
+        assert statut == 200
+        assert en_tetes["content-encoding"] == encodage
+        assert en_tetes["content-length"] == str(len(corps[0]))
+        assert en_tetes["vary"] == "Accept-Encoding"
+        assert en_tetes["etag"] == 'W/"v1"'
+        attendu = JSONResponse(GROS_JSON).body
+        assert decompresser(corps[0]) == attendu
+        assert len(corps[0]) < len(attendu) / 4
+
+    def test_sous_le_seuil(self):
+        """Un petit corps part tel quel, avec Vary"""
+        _, en_tetes, corps = _appeler(_application(), "/petit", "gzip")
+        assert "content-encoding" not in en_tetes
+        assert en_tetes["vary"] == "Accept-Encoding"
+        assert corps == [b'{"ok":true}']
+
+    def test_flux_morceau_par_morceau(self):
+        """Chaque morceau d'un flux est décodable dès sa réception"""
+        _, en_tetes, corps = _appeler(_application(), "/flux", "gzip")
+        assert en_tetes["content-encoding"] == "gzip"
+        assert "content-length" not in en_tetes
+        decompresseur = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        assert decompresseur.decompress(corps[0]) == ("ligne 0;" * 200).encode()
+        reste = b"".join(decompresseur.decompress(morceau) for morceau in corps[1:])
+        assert reste == ("ligne 1;" * 200 + "ligne 2;" * 200).encode()
+        assert decompresseur.eof
+
+    @pytest.mark.parametrize("chemin, accept_encoding", [
+        ("/image", "gzip"),
+        ("/non-modifie", "gzip"),
+        ("/gros", "identity"),
+    ])
+    def test_non_compresse(self, chemin, accept_encoding):
+        """Type binaire, 304 ou client sans encodage commun : réponse inchangée"""
+        _, en_tetes, _ = _appeler(_application(), chemin, accept_encoding)
+        assert "content-encoding" not in en_tetes
+
+    def test_export_csv_en_flux(self):
+        """L'export CSV de l'API est compressé en flux et reste identique une fois décodé"""
+        Base.metadata.create_all(bind=engine)
+        try:
+            client = TestClient(app)
+            for i in range(50):
+                client.post("/api/transactions", json={
+                    "montant": 10 + i, "libelle": f"Achat {i}", "type": "depense",
+                    "categorie": "alimentation", "date_transaction": "2026-01-06"
+                })
+            brut = client.get("/api/transactions/export/csv", headers={"Accept-Encoding": "identity"})
+            compresse = client.get("/api/transactions/export/csv", headers={"Accept-Encoding": "br"})
+            assert "content-encoding" not in brut.headers
+            assert compresse.headers["content-encoding"] == "br"
+            assert compresse.text == brut.text
+        finally:
+            Base.metadata.drop_all(bind=engine)
+
+
+class TestFichiersPrecompresses:
+    """Tests pour precompresser et FichiersStatiques"""
+
+    @pytest.fixture
+    def statiques(self, tmp_path):
+        (tmp_path / "app.js").write_text("function f() { return 1; }\n" * 200)
+        (tmp_path / "logo.png").write_bytes(b"\x89PNG" * 10)
+        tailles = compression.precompresser(tmp_path)
+        return tmp_path, tailles
+
+    def test_variantes_ecrites(self, statiques):
+        """Une variante par encodage pour les fichiers textuels seulement"""
+        repertoire, tailles = statiques
+        assert list(tailles) == [str(repertoire / "app.js")]
+        assert set(tailles[str(repertoire / "app.js")]) == {"identity", "gzip", "br", "zstd"}
+        contenu = (repertoire / "app.js").read_bytes()
+        assert brotli.decompress((repertoire / "app.js.br").read_bytes()) == contenu
+
+    def test_variante_servie(self, statiques):
+        """La variante acceptée est servie avec le type du fichier d'origine"""
+        repertoire, _ = statiques
+        client = TestClient(Starlette(routes=[Mount("/static", compression.FichiersStatiques(directory=repertoire))]))
+        reponse = client.get("/static/app.js", headers={"Accept-Encoding": "gzip, br"})
+        assert reponse.headers["content-encoding"] == "br"
+        assert reponse.headers["content-type"].startswith(("application/javascript", "text/javascript"))
+        assert reponse.headers["vary"] == "Accept-Encoding"
+        assert reponse.content == (repertoire / "app.js").read_bytes()
+        identite = client.get("/static/app.js", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in identite.headers
+
+    def test_variante_perimee_ignoree(self, statiques):
+        """Une variante plus ancienne que le fichier d'origine n'est pas servie"""
+        repertoire, _ = statiques
+        original = repertoire / "app.js"
+        os.utime(repertoire / "app.js.br", (0, 0))
+        chemin, encodage = compression.variante_precompressee(str(original), "br, gzip")
+        assert (chemin, encodage) == (str(original) + ".gz", "gzip")
@@ -0,0 +1,338 @@
+"""
+Tests de la configuration et de la mise à niveau de la base de données
+"""
+import threading
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+from app.database import (
+    abonner_attente_pool, abonner_duree_sql, creer_engine, desabonner_duree_sql, init_db,
+    lire_configuration, mettre_a_niveau_schema, migrer_categories, migrer_montants_en_centimes
+)
+from app.rollup import verifier_rollup
+
+
+SCHEMA_INITIAL = [
+    """CREATE TABLE transactions (
+        id INTEGER PRIMARY KEY, montant FLOAT NOT NULL, libelle VARCHAR NOT NULL,
+        type VARCHAR NOT NULL, categorie VARCHAR NOT NULL, date_transaction DATE NOT NULL
+    )""",
+    """CREATE TABLE budgets (
+        id INTEGER PRIMARY KEY, categorie VARCHAR NOT NULL, montant_budget FLOAT NOT NULL,
+        mois INTEGER NOT NULL, annee INTEGER NOT NULL
+    )""",
+]
+
+
+@pytest.fixture
+def base_existante(tmp_path):
+    """Base budget.db créée avec le schéma d'origine, sans index secondaires"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'budget.db'}")
+    with engine.begin() as conn:
+        for ddl in SCHEMA_INITIAL:
+            conn.execute(text(ddl))
+    yield engine
+    engine.dispose()
+
+
+class TestMiseANiveauSchema:
+    """Tests pour mettre_a_niveau_schema"""
+    
+    def test_ajoute_les_index(self, base_existante):
+        """Les index composites et l'index unique sont ajoutés à une base existante"""
+        mettre_a_niveau_schema(base_existante)
+        inspecteur = inspect(base_existante)
+        index_transactions = {i["name"] for i in inspecteur.get_indexes("transactions")}
+        index_budgets = {i["name"]: i for i in inspecteur.get_indexes("budgets")}
+        assert "ix_transactions_categorie_type_date" in index_transactions
+        assert "ix_transactions_date_transaction" in index_transactions
+        assert "ix_transactions_categorie_id" in index_transactions
+        assert index_budgets["uq_budgets_categorie_periode"]["unique"]
+    
+    def test_supprime_les_index_retires(self, base_existante):
+        """Un index retiré des modèles est supprimé, l'index sur la date est recréé"""
+        with base_existante.begin() as conn:
+            conn.execute(text(
+                "CREATE INDEX ix_transactions_date_categorie_type_montant "
+                "ON transactions (date_transaction, categorie, type, montant)"
+            ))
+        mettre_a_niveau_schema(base_existante)
+        index_transactions = {i["name"] for i in inspect(base_existante).get_indexes("transactions")}
+        assert "ix_transactions_date_categorie_type_montant" not in index_transactions
+        assert "ix_transactions_date_transaction" in index_transactions
+    
+    def test_idempotent(self, base_existante):
+        """La mise à niveau peut être rejouée à chaque démarrage"""
+        mettre_a_niveau_schema(base_existante)
+        mettre_a_niveau_schema(base_existante)
+    
+    def test_doublons_existants(self, base_existante):
+        """Des budgets en double empêchent la création de l'index unique"""
+        with base_existante.begin() as conn:
+            for _ in range(2):
+                conn.execute(text(
+                    "INSERT INTO budgets (categorie, montant_budget, mois, annee) "
+                    "VALUES ('alimentation', 300, 1, 2026)"
+                ))
+        with pytest.raises(RuntimeError, match="doublons"):
+            mettre_a_niveau_schema(base_existante)
+
+
+class TestMigrationCentimes:
+    """Tests pour migrer_montants_en_centimes"""
+    
+    def test_conversion_par_lots(self, base_existante):
+        """Les montants en euros deviennent des centimes exacts, l'ancienne colonne disparaît"""
+        with base_existante.begin() as conn:
+            for montant in (0.1, 0.2, 19.99, 1234.565):
+                conn.execute(text(
+                    "INSERT INTO transactions (montant, libelle, type, categorie, date_transaction) "
+                    "VALUES (:montant, 'x', 'depense', 'loisirs', '2026-01-10')"
+                ), {"montant": montant})
+            conn.execute(text(
+                "CREATE INDEX ix_ancien ON transactions (categorie, montant)"
+            ))
+        assert migrer_montants_en_centimes(base_existante, taille_lot=3)
+        with base_existante.connect() as conn:
+            centimes = conn.execute(text("SELECT montant_centimes FROM transactions ORDER BY id")).scalars().all()
+        assert centimes == [10, 20, 1999, 123457]
+        colonnes = {c["name"] for c in inspect(base_existante).get_columns("transactions")}
+        assert "montant" not in colonnes
+        assert not migrer_montants_en_centimes(base_existante)
+    
+    def test_rollup_en_euros_supprime(self, base_existante):
+        """Le rollup dont le total est en euros est supprimé pour être reconstruit"""
+        with base_existante.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE monthly_category_spend (categorie VARCHAR, annee INTEGER, "
+                "mois INTEGER, total FLOAT, PRIMARY KEY (categorie, annee, mois))"
+            ))
+        assert migrer_montants_en_centimes(base_existante)
+        assert not inspect(base_existante).has_table("monthly_category_spend")
+
+
+class TestMigrationCategories:
+    """Tests pour migrer_categories"""
+    
+    def test_noms_remplaces_par_ids(self, base_existante):
+        """Chaque nom devient l'id de sa ligne dans categories, l'ancienne colonne et ses index disparaissent"""
+        with base_existante.begin() as conn:
+            for categorie in ("loisirs", "alimentation", "loisirs", "logement", "alimentation"):
+                conn.execute(text(
+                    "INSERT INTO transactions (montant, libelle, type, categorie, date_transaction) "
+                    "VALUES (10, 'x', 'depense', :categorie, '2026-01-10')"
+                ), {"categorie": categorie})
+            conn.execute(text(
+                "INSERT INTO budgets (categorie, montant_budget, mois, annee) VALUES ('transport', 50, 1, 2026)"
+            ))
+            conn.execute(text("CREATE INDEX ix_ancien ON transactions (categorie, date_transaction)"))
+        migrer_montants_en_centimes(base_existante)
+        assert migrer_categories(base_existante, taille_lot=2)
+        with base_existante.connect() as conn:
+            noms = conn.execute(text(
+                "SELECT c.nom FROM transactions t JOIN categories c ON c.id = t.categorie_id ORDER BY t.id"
+            )).scalars().all()
+            budget = conn.execute(text(
+                "SELECT c.nom FROM budgets b JOIN categories c ON c.id = b.categorie_id"
+            )).scalar_one()
+        assert noms == ["loisirs", "alimentation", "loisirs", "logement", "alimentation"]
+        assert budget == "transport"
+        inspecteur = inspect(base_existante)
+        assert "categorie" not in {c["name"] for c in inspecteur.get_columns("transactions")}
+        assert "ix_ancien" not in {i["name"] for i in inspecteur.get_indexes("transactions")}
+        assert not migrer_categories(base_existante)
+    
+    def test_index_recrees_sur_ids(self, base_existante):
+        """Après la mise à niveau, les index composites portent sur categorie_id"""
+        mettre_a_niveau_schema(base_existante)
+        index = {i["name"]: i["column_names"] for i in inspect(base_existante).get_indexes("transactions")}
+        assert index["ix_transactions_categorie_type_date"][0] == "categorie_id"
+    
+    def test_rollup_par_nom_supprime(self, base_existante):
+        """Le rollup indexé par nom est supprimé pour être reconstruit"""
+        with base_existante.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE monthly_category_spend (categorie VARCHAR, type VARCHAR, annee INTEGER, "
+                "mois INTEGER, total_centimes BIGINT, nombre INTEGER, PRIMARY KEY (categorie, type, annee, mois))"
+            ))
+        assert migrer_categories(base_existante)
+        assert not inspect(base_existante).has_table("monthly_category_spend")
+
+
+class TestInitDb:
+    """Tests pour init_db sur une base existante"""
+    
+    @pytest.fixture
+    def base_avec_doublon(self, base_existante):
+        """Base d'origine avec des transactions et deux budgets sur la même période"""
+        with base_existante.begin() as conn:
+            for montant in (10, 25.5):
+                conn.execute(text(
+                    "INSERT INTO transactions (montant, libelle, type, categorie, date_transaction) "
+                    "VALUES (:montant, 'x', 'depense', 'loisirs', '2026-01-10')"
+                ), {"montant": montant})
+            for _ in range(2):
+                conn.execute(text(
+                    "INSERT INTO budgets (categorie, montant_budget, mois, annee) VALUES ('loisirs', 50, 1, 2026)"
+                ))
+        return base_existante
+    
+    def _rollup_coherent(self, engine):
+        db = sessionmaker(bind=engine)()
+        try:
+            return verifier_rollup(db) == []
+        finally:
+            db.close()
+    
+    def test_rollup_rempli_malgre_un_doublon(self, base_avec_doublon):
+        """L'échec de l'index unique des budgets laisse un rollup cohérent, puis le démarrage aboutit"""
+        with pytest.raises(RuntimeError):
+            init_db(base_avec_doublon)
+        assert self._rollup_coherent(base_avec_doublon)
+        with base_avec_doublon.begin() as conn:
+            conn.execute(text("DELETE FROM budgets WHERE id = 2"))
+        init_db(base_avec_doublon)
+        assert self._rollup_coherent(base_avec_doublon)
+    
+    def test_rollup_vide_reconstruit(self, base_avec_doublon):
+        """Un rollup vide laissé par un démarrage interrompu est reconstruit au suivant"""
+        with base_avec_doublon.begin() as conn:
+            conn.execute(text("DELETE FROM budgets WHERE id = 2"))
+        init_db(base_avec_doublon)
+        with base_avec_doublon.begin() as conn:
+            conn.execute(text("DELETE FROM monthly_category_spend"))
+        init_db(base_avec_doublon)
+        assert self._rollup_coherent(base_avec_doublon)
+        with base_avec_doublon.connect() as conn:
+            assert conn.execute(text("SELECT total_centimes FROM monthly_category_spend")).scalar_one() == 3550
+
+
+class TestConfigurationBase:
+    """Tests pour lire_configuration et creer_engine"""
+    
+    def test_profil_performance_par_defaut(self):
+        """Sans variable d'environnement, le profil performance (WAL) est appliqué"""
+        configuration = lire_configuration({})
+        assert configuration["url"] == "sqlite:///./budget.db"
+        assert configuration["pragmas"]["journal_mode"] == "WAL"
+        assert configuration["pragmas"]["synchronous"] == "NORMAL"
+        assert configuration["pool"] == {}
+    
+    def test_profil_standard(self):
+        """Le profil standard ne modifie aucun PRAGMA"""
+        assert lire_configuration({"BUDGET_DB_PROFIL": "standard"})["pragmas"] == {}
+    
+    def test_surcharges(self):
+        """Chaque PRAGMA, l'URL et le pool sont configurables individuellement"""
+        configuration = lire_configuration({
+            "BUDGET_DATABASE_URL": "sqlite:////var/lib/budget.db",
+            "BUDGET_SQLITE_SYNCHRONOUS": "full",
+            "BUDGET_SQLITE_BUSY_TIMEOUT": "250",
+            "BUDGET_DB_POOL_SIZE": "10",
+            "BUDGET_DB_MAX_OVERFLOW": "5",
+        })
+        assert configuration["url"] == "sqlite:////var/lib/budget.db"
+        assert configuration["pragmas"]["synchronous"] == "FULL"
+        assert configuration["pragmas"]["busy_timeout"] == 250
+        assert configuration["pool"] == {"pool_size": 10, "max_overflow": 5}
+    
+    def test_requetes_lentes(self):
+        """Seuil de lenteur, mode debug et taille du journal des requêtes lentes"""
+        assert lire_configuration({})["requetes_lentes"] == {"seuil_ms": 200.0, "explain": False, "taille": 100}
+        configuration = lire_configuration({
+            "BUDGET_SQL_LENTE_MS": "50", "BUDGET_SQL_LENTE_EXPLAIN": "1", "BUDGET_SQL_LENTE_TAILLE": "20"
+        })
+        assert configuration["requetes_lentes"] == {"seuil_ms": 50.0, "explain": True, "taille": 20}
+    
+    @pytest.mark.parametrize("environ", [
+        {"BUDGET_DB_PROFIL": "turbo"},
+        {"BUDGET_SQLITE_JOURNAL_MODE": "WAL; DROP TABLE budgets"},
+        {"BUDGET_SQLITE_CACHE_SIZE": "beaucoup"},
+        {"BUDGET_SQL_LENTE_MS": "-1"},
+        {"BUDGET_SQL_LENTE_TAILLE": "0"},
+    ])
+    def test_valeurs_invalides(self, environ):
+        """Une valeur invalide est refusée au démarrage plutôt qu'injectée dans un PRAGMA"""
+        with pytest.raises(ValueError):
+            lire_configuration(environ)
+    
+    def test_pragmas_appliques_a_la_connexion(self, tmp_path):
+        """Les PRAGMA du profil sont appliqués à chaque nouvelle connexion"""
+        configuration = lire_configuration({
+            "BUDGET_DATABASE_URL": f"sqlite:///{tmp_path / 'budget.db'}",
+            "BUDGET_DB_POOL_SIZE": "2",
+        })
+        engine = creer_engine(**configuration)
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+            assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+            assert conn.execute(text("PRAGMA temp_store")).scalar() == 2  # MEMORY
+        assert engine.pool.size() == 2
+        engine.dispose()
+
+
+class TestDureeSql:
+    """Tests pour abonner_duree_sql"""
+
+    def test_une_mesure_pour_tous_les_abonnes(self):
+        """Chaque abonné reçoit la même durée, un abonné n'est inscrit qu'une fois"""
+        engine = create_engine("sqlite://")
+        recues = {"a": [], "b": []}
+
+        def abonne_a(conn, statement, parameters, executemany, duree):
+            recues["a"].append((statement, duree))
+
+        def abonne_b(conn, statement, parameters, executemany, duree):
+            recues["b"].append((statement, duree))
+
+        abonner_duree_sql(engine, abonne_a)
+        abonner_duree_sql(engine, abonne_a)
+        abonner_duree_sql(engine, abonne_b)
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            desabonner_duree_sql(engine, abonne_b)
+            conn.execute(text("SELECT 2"))
+        assert [statement for statement, _ in recues["a"]] == ["SELECT 1", "SELECT 2"]
+        assert recues["b"] == recues["a"][:1]
+        engine.dispose()
+
+    def test_erreur_sans_mesure_en_suspens(self):
+        """Une requête en échec n'est pas publiée et ne décale pas les suivantes"""
+        engine = create_engine("sqlite://")
+        recues = []
+        abonner_duree_sql(engine, lambda conn, statement, *_: recues.append(statement))
+        with engine.connect() as conn:
+            with pytest.raises(Exception):
+                conn.execute(text("SELECT * FROM table_absente"))
+            conn.execute(text("SELECT 1"))
+            assert not conn.info["debuts_sql"]
+        assert recues == ["SELECT 1"]
+        engine.dispose()
+
+
+class TestAttentePool:
+    """Tests pour abonner_attente_pool"""
+
+    def test_attente_d_une_connexion_libre(self, tmp_path):
+        """Pool saturé : la durée publiée couvre l'attente, y compris après dispose()"""
+        engine = creer_engine(f"sqlite:///{tmp_path / 'budget.db'}", pool={"pool_size": 1, "max_overflow": 0})
+        attentes = []
+        abonner_attente_pool(engine, attentes.append)
+        engine.dispose()
+        occupee = engine.connect()
+        threading.Timer(0.2, occupee.close).start()
+        with engine.connect():
+            pass
+        assert len(attentes) == 2
+        assert attentes[-1] >= 0.15
+        engine.dispose()
+
+    def test_engine_hors_creer_engine(self):
+        """Un engine dont le pool ne mesure pas l'attente est refusé"""
+        engine = create_engine("sqlite://")
+        with pytest.raises(TypeError):
+            abonner_attente_pool(engine, print)
+        engine.dispose()
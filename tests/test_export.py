@@ -0,0 +1,64 @@
+"""
+Tests de l'export des transactions en flux
+"""
+import csv
+import io
+from datetime import date
+
+import pytest
+
+from app import export
+from app.models import Transaction
+
+
+class TestGenererCsv:
+    """Tests pour generer_csv"""
+    
+    def test_un_morceau_par_lot(self, db_session, sample_transactions):
+        """L'en-tête puis chaque lot de lignes forment un morceau distinct"""
+        morceaux = list(export.generer_csv(db_session, export.requete_transactions(), taille_lot=2))
+        assert morceaux[0] == "id,date,libelle,type,categorie,montant\r\n"
+        assert len(morceaux) == 3
+        lignes = list(csv.reader(io.StringIO("".join(morceaux))))
+        assert len(lignes) == 5
+    
+    def test_ordre_et_contenu(self, db_session, sample_transactions):
+        """Les lignes sont triées par date décroissante puis id décroissant"""
+        contenu = "".join(export.generer_csv(db_session, export.requete_transactions()))
+        lignes = list(csv.DictReader(io.StringIO(contenu)))
+        assert [l["date"] for l in lignes] == ["2026-01-15", "2026-01-06", "2026-01-01", "2026-01-01"]
+        assert lignes[2]["libelle"] == "Salaire"
+        assert lignes[0]["montant"] == "50.0"
+    
+    def test_filtres(self, db_session, sample_transactions):
+        """Les filtres catégorie et période sont appliqués"""
+        requete = export.requete_transactions("alimentation", date(2026, 1, 10), date(2026, 1, 31))
+        lignes = list(csv.DictReader(io.StringIO("".join(export.generer_csv(db_session, requete)))))
+        assert [l["libelle"] for l in lignes] == ["Restaurant"]
+    
+    def test_sans_transaction(self, db_session):
+        """Sans transaction, seul l'en-tête est produit"""
+        assert list(export.generer_csv(db_session, export.requete_transactions())) == [
+            "id,date,libelle,type,categorie,montant\r\n"
+        ]
+
+
+class TestGenererCsvAsync:
+    """Tests pour generer_csv_async"""
+    
+    @pytest.mark.asyncio
+    async def test_identique_a_la_version_synchrone(self, async_db_session):
+        """Le flux asynchrone produit les mêmes morceaux que generer_csv"""
+        async_db_session.add_all([
+            Transaction(montant_centimes=1000 + 100 * i, libelle=f"Achat {i}", type="depense",
+                        categorie="alimentation", date_transaction=date(2026, 1, 1 + i))
+            for i in range(5)
+        ])
+        await async_db_session.commit()
+        morceaux = [
+            morceau async for morceau in
+            export.generer_csv_async(async_db_session, export.requete_transactions(), taille_lot=2)
+        ]
+        assert len(morceaux) == 4
+        lignes = list(csv.DictReader(io.StringIO("".join(morceaux))))
+        assert [l["libelle"] for l in lignes] == [f"Achat {i}" for i in range(4, -1, -1)]
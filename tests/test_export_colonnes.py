@@ -0,0 +1,130 @@
+"""
+Tests de l'export des transactions en Parquet et en flux Arrow IPC
+"""
+import io
+from datetime import date
+from decimal import Decimal
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from fastapi.testclient import TestClient
+
+from app import export, export_colonnes
+from app.database import Base, engine
+from app.main import app
+from app.models import Transaction
+
+
+def _lire(contenu, format_export):
+    if format_export == export_colonnes.PARQUET:
+        return pq.read_table(io.BytesIO(contenu))
+    return pa.ipc.open_stream(contenu).read_all()
+
+
+class TestGenerer:
+    """Tests pour generer et lot_en_colonnes"""
+
+    @pytest.mark.parametrize("format_export", [export_colonnes.PARQUET, export_colonnes.ARROW])
+    def test_types_et_valeurs(self, db_session, sample_transactions, format_export):
+        """Dates, montants décimaux exacts et colonnes dictionnaire"""
+        contenu = b"".join(export_colonnes.generer(db_session, export.requete_transactions(), format_export))
+        table = _lire(contenu, format_export)
+        assert table.schema.equals(export_colonnes.SCHEMA)
+        assert table.column("date").to_pylist() == [
+            date(2026, 1, 15), date(2026, 1, 6), date(2026, 1, 1), date(2026, 1, 1)
+        ]
+        assert table.column("montant").to_pylist() == [
+            Decimal("50.00"), Decimal("25.50"), Decimal("2000.00"), Decimal("800.00")
+        ]
+        assert table.column("categorie").to_pylist() == ["alimentation", "alimentation", "salaire", "logement"]
+        assert table.column("type").combine_chunks().dictionary.to_pylist() == ["depense", "revenu"]
+
+    def test_un_row_group_par_lot(self, db_session, sample_transactions):
+        """Chaque lot du curseur devient un row group envoyé aussitôt"""
+        morceaux = list(export_colonnes.generer(
+            db_session, export.requete_transactions(), export_colonnes.PARQUET, taille_groupe=3
+        ))
+        assert len(morceaux) == 3
+        assert morceaux[0].startswith(b"PAR1")
+        assert morceaux[-1].endswith(b"PAR1")
+        fichier = pq.ParquetFile(io.BytesIO(b"".join(morceaux)))
+        assert [fichier.metadata.row_group(i).num_rows for i in range(fichier.num_row_groups)] == [3, 1]
+
+    def test_flux_arrow_par_lot(self, db_session, sample_transactions):
+        """Un RecordBatch par lot, lisible au fil de l'eau"""
+        contenu = b"".join(export_colonnes.generer(
+            db_session, export.requete_transactions(), export_colonnes.ARROW, taille_groupe=2
+        ))
+        lots = list(pa.ipc.open_stream(contenu))
+        assert [lot.num_rows for lot in lots] == [2, 2]
+
+    @pytest.mark.parametrize("format_export", [export_colonnes.PARQUET, export_colonnes.ARROW])
+    def test_sans_transaction(self, db_session, format_export):
+        """Sans transaction, un fichier valide et vide au bon schéma"""
+        contenu = b"".join(export_colonnes.generer(db_session, export.requete_transactions(), format_export))
+        table = _lire(contenu, format_export)
+        assert table.num_rows == 0
+        assert table.schema.equals(export_colonnes.SCHEMA)
+
+    def test_format_inconnu(self):
+        """Un format non prévu est refusé"""
+        with pytest.raises(ValueError):
+            export_colonnes.EcrivainColonnes("xlsx")
+
+
+class TestGenererAsync:
+    """Tests pour generer_async"""
+
+    @pytest.mark.asyncio
+    async def test_identique_a_la_version_synchrone(self, async_db_session):
+        """Le flux asynchrone produit les mêmes lignes, lot par lot"""
+        async_db_session.add_all([
+            Transaction(montant_centimes=1000 + i, libelle=f"Achat {i}", type="depense",
+                        categorie="alimentation", date_transaction=date(2026, 1, 1 + i))
+            for i in range(5)
+        ])
+        await async_db_session.commit()
+        morceaux = [
+            morceau async for morceau in export_colonnes.generer_async(
+                async_db_session, export.requete_transactions(), export_colonnes.PARQUET, taille_groupe=2
+            )
+        ]
+        assert len(morceaux) == 4
+        table = pq.read_table(io.BytesIO(b"".join(morceaux)))
+        assert table.column("libelle").to_pylist() == [f"Achat {i}" for i in range(4, -1, -1)]
+        assert table.column("montant").to_pylist()[0] == Decimal("10.04")
+
+
+class TestEndpointsExport:
+    """Tests des endpoints /api/transactions/export/parquet et /arrow"""
+
+    @pytest.fixture
+    def client(self):
+        Base.metadata.create_all(bind=engine)
+        try:
+            client = TestClient(app)
+            for jour in range(1, 11):
+                client.post("/api/transactions", json={
+                    "montant": 1.5 * jour, "libelle": f"Achat {jour}", "type": "depense",
+                    "categorie": "alimentation" if jour % 2 else "loisirs",
+                    "date_transaction": f"2026-02-{jour:02d}"
+                })
+            yield client
+        finally:
+            Base.metadata.drop_all(bind=engine)
+
+    @pytest.mark.parametrize("chemin, format_export", [
+        ("/api/transactions/export/parquet", export_colonnes.PARQUET),
+        ("/api/transactions/export/arrow", export_colonnes.ARROW),
+    ])
+    def test_filtres_et_en_tetes(self, client, chemin, format_export):
+        """Mêmes filtres que l'export CSV, type de contenu binaire non recompressé"""
+        reponse = client.get(chemin, params={"categorie": "loisirs", "date_fin": "2026-02-06"})
+        assert reponse.status_code == 200
+        assert reponse.headers["content-type"] == export_colonnes.TYPES_MEDIA[format_export]
+        assert "content-encoding" not in reponse.headers
+        assert reponse.headers["content-disposition"].endswith(f".{export_colonnes.EXTENSIONS[format_export]}")
+        table = _lire(reponse.content, format_export)
+        assert table.column("date").to_pylist() == [date(2026, 2, 6), date(2026, 2, 4), date(2026, 2, 2)]
+        assert table.column("montant").to_pylist() == [Decimal("9.00"), Decimal("6.00"), Decimal("3.00")]
@@ -0,0 +1,145 @@
+"""
+Tests de l'import CSV en masse
+"""
+import threading
+
+import pytest
+from datetime import date
+
+from app import business_logic, importation, rollup
+from app.importation import LecteurCsvIncremental, CsvInvalide, RapportImport
+from app.models import Transaction
+
+
+class TestLecteurCsvIncremental:
+    """Tests pour LecteurCsvIncremental"""
+    
+    def test_morceaux_coupes_en_milieu_de_ligne(self):
+        """Un enregistrement coupé entre deux morceaux est reconstitué"""
+        lecteur = LecteurCsvIncremental()
+        assert lecteur.alimenter(b"id,date\n1,2026-") == [["id", "date"]]
+        assert lecteur.alimenter(b"01-06\n2,2026-01-07") == [["1", "2026-01-06"]]
+        assert lecteur.alimenter(b"", final=True) == [["2", "2026-01-07"]]
+    
+    def test_libelle_multiligne(self):
+        """Un retour à la ligne entre guillemets ne termine pas l'enregistrement"""
+        lecteur = LecteurCsvIncremental()
+        assert lecteur.alimenter(b'1,"Courses\n') == []
+        assert lecteur.alimenter(b'du ""samedi""",25.5\r\n') == [["1", 'Courses\ndu "samedi"', "25.5"]]
+    
+    def test_caractere_multi_octets_coupe(self):
+        """Un caractère UTF-8 coupé entre deux morceaux est décodé correctement"""
+        lecteur = LecteurCsvIncremental()
+        octets = "Café\n".encode()
+        assert lecteur.alimenter(octets[:4]) == []
+        assert lecteur.alimenter(octets[4:]) == [["Café"]]
+    
+    def test_bom_ignore(self):
+        """Le BOM d'un fichier enregistré par un tableur est ignoré"""
+        lecteur = LecteurCsvIncremental()
+        assert lecteur.alimenter("﻿id,date\n".encode()) == [["id", "date"]]
+    
+    def test_encodage_invalide(self):
+        """Un fichier non UTF-8 est rejeté"""
+        with pytest.raises(CsvInvalide):
+            LecteurCsvIncremental().alimenter("Café\n".encode("latin-1"), final=True)
+
+
+class TestValidationEtInsertion:
+    """Tests de la validation et de l'insertion par lots"""
+    
+    COLONNES = importation.indexer_en_tete(["id", "date", "libelle", "type", "categorie", "montant"])
+    
+    def test_en_tete_incomplet(self):
+        """Un en-tête sans les colonnes de l'export est rejeté"""
+        with pytest.raises(CsvInvalide, match="montant"):
+            importation.indexer_en_tete(["date", "libelle", "type", "categorie"])
+    
+    def test_erreurs_par_ligne(self):
+        """Chaque ligne invalide est signalée avec son numéro"""
+        rapport = RapportImport()
+        valides = importation.valider_lot([
+            (2, ["", "2026-01-06", "Courses", "depense", "alimentation", "25.5"]),
+            (3, ["", "2026-01-06", "Courses", "achat", "alimentation", "-3"]),
+            (4, ["", "2026-01-06"]),
+        ], self.COLONNES, rapport)
+        assert len(valides) == 1
+        assert [e["ligne"] for e in rapport.erreurs] == [3, 4]
+        assert len(rapport.erreurs[0]["erreurs"]) == 2
+    
+    def test_insertion_met_a_jour_le_rollup(self, db_session, sample_transactions, sample_budgets):
+        """L'insertion en masse alimente le rollup et signale les dépassements"""
+        rapport = RapportImport()
+        importation.traiter_lot(db_session, [
+            (2, ["", "2026-01-20", "Traiteur", "depense", "alimentation", "200"]),
+            (3, ["", "2026-01-21", "Épicerie", "depense", "alimentation", "100"]),
+            (4, ["", "2026-01-21", "Prime", "revenu", "salaire", "100"]),
+        ], self.COLONNES, rapport)
+        assert rapport.transactions_importees == 3
+        assert rollup.verifier_rollup(db_session) == []
+        reponse = importation.conclure(db_session, rapport)
+        assert [a["categorie"] for a in reponse["alertes"]] == ["alimentation"]
+        assert reponse["alertes"][0]["depassement"] == 75.50
+
+
+class TestImporterCsv:
+    """Tests pour importer_csv sur une session asynchrone"""
+
+    @pytest.mark.asyncio
+    async def test_validation_hors_de_la_boucle(self, async_db_session, monkeypatch):
+        """La validation des lots passe dans le pool de threads, pas sur la boucle d'événements"""
+        threads = []
+        valider = importation.valider_lot
+
+        def valider_lot(*args):
+            threads.append(threading.get_ident())
+            return valider(*args)
+
+        monkeypatch.setattr(importation, "valider_lot", valider_lot)
+
+        async def flux():
+            yield b"id,date,libelle,type,categorie,montant\n"
+            yield b",2026-01-20,Traiteur,depense,alimentation,20\n,2026-01-21,Prime,revenu,salaire,100\n"
+
+        reponse = await importation.importer_csv(async_db_session, flux(), taille_lot=1)
+        assert reponse["transactions_importees"] == 2
+        assert len(threads) == 2
+        assert threading.get_ident() not in threads
+
+
+class TestEcrireTransactions:
+    """Tests pour ecrire_transactions"""
+    
+    def test_identifiants_dans_l_ordre_des_lignes(self, db_session):
+        """Chaque identifiant renvoyé correspond à la ligne de même position"""
+        lignes = [
+            {"montant_centimes": 100 * m, "libelle": l, "type": "depense",
+             "categorie": "alimentation", "date_transaction": date(2026, 1, 5)}
+            for m, l in [(3, "C"), (1, "A"), (3, "C"), (2, "B")]
+        ]
+        ids = importation.ecrire_transactions(db_session, lignes, retourner_ids=True)
+        db_session.commit()
+        assert len(set(ids)) == 4
+        for transaction_id, ligne in zip(ids, lignes):
+            assert db_session.get(Transaction, transaction_id).libelle == ligne["libelle"]
+        assert rollup.verifier_rollup(db_session) == []
+
+
+class TestVerifierDepassementsPeriodes:
+    """Tests pour verifier_depassements_periodes"""
+    
+    def test_seuls_les_budgets_depasses(self, db_session, sample_transactions, sample_budgets):
+        """Seuls les budgets dont le total dépasse le montant sont retournés"""
+        db_session.add(Transaction(montant=1.0, libelle="Charges", type="depense",
+                                   categorie="logement", date_transaction=date(2026, 1, 2)))
+        db_session.commit()
+        alertes = business_logic.verifier_depassements_periodes(
+            db_session, [("alimentation", 1, 2026), ("logement", 1, 2026), ("loisirs", 1, 2026)]
+        )
+        assert len(alertes) == 1
+        assert alertes[0]["periode"] == "01/2026"
+        assert "Dépassement du budget logement" in alertes[0]["message_alerte"]
+    
+    def test_sans_cle(self, db_session):
+        """Aucune clé à vérifier -> aucune requête utile, aucune alerte"""
+        assert business_logic.verifier_depassements_periodes(db_session, []) == []
@@ -0,0 +1,120 @@
+"""
+Tests des métriques Prometheus (GET /metrics)
+"""
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+
+from app import cache, metriques
+from app.database import Base, creer_engine, engine
+from app.main import app
+
+
+def _valeur(nom, **etiquettes):
+    return REGISTRY.get_sample_value(nom, etiquettes) or 0.0
+
+
+@pytest.fixture
+def client():
+    Base.metadata.create_all(bind=engine)
+    cache.cache_statistiques.vider()
+    cache.cache_periodes.vider()
+    yield TestClient(app)
+    Base.metadata.drop_all(bind=engine)
+
+
+class TestEndpointMetrics:
+    """Tests pour GET /metrics"""
+
+    def test_format_prometheus(self, client):
+        """La réponse est au format d'exposition texte de Prometheus"""
+        reponse = client.get("/metrics")
+        assert reponse.status_code == 200
+        assert reponse.headers["content-type"].startswith("text/plain")
+        assert "# TYPE budget_http_request_duration_seconds histogram" in reponse.text
+        assert "budget_sql_duration_seconds_bucket" in reponse.text
+
+    def test_latence_par_gabarit_de_route(self, client):
+        """Les requêtes sont étiquetées par gabarit de route, pas par chemin"""
+        etiquettes = {"method": "GET", "route": "/api/transactions/{transaction_id}", "status": "404"}
+        avant = _valeur("budget_http_request_duration_seconds_count", **etiquettes)
+        client.get("/api/transactions/123456")
+        client.get("/api/transactions/654321")
+        assert _valeur("budget_http_request_duration_seconds_count", **etiquettes) == avant + 2
+        assert 'route="/api/transactions/123456"' not in client.get("/metrics").text
+
+    def test_route_inconnue(self, client):
+        """Un chemin sans route partage une seule série"""
+        etiquettes = {"method": "GET", "route": metriques.ROUTE_INCONNUE, "status": "404"}
+        avant = _valeur("budget_http_request_duration_seconds_count", **etiquettes)
+        client.get("/inexistant/1")
+        assert _valeur("budget_http_request_duration_seconds_count", **etiquettes) == avant + 1
+
+    def test_alertes_depassement(self, client):
+        """Chaque dépense contrôlée est comptée, et les alertes à part"""
+        verifications = _valeur("budget_overrun_checks_total")
+        alertes = _valeur("budget_overrun_alerts_total")
+        client.post("/api/budgets", json={
+            "categorie": "alimentation", "montant_budget": 50.0, "mois": 1, "annee": 2026
+        })
+        for montant in (30.0, 40.0):
+            client.post("/api/transactions", json={
+                "montant": montant, "libelle": "Courses", "type": "depense",
+                "categorie": "alimentation", "date_transaction": "2026-01-10"
+            })
+        assert _valeur("budget_overrun_checks_total") == verifications + 2
+        assert _valeur("budget_overrun_alerts_total") == alertes + 1
+
+    def test_octets_export(self, client):
+        """Les octets envoyés par l'export CSV sont comptés"""
+        client.post("/api/transactions", json={
+            "montant": 12.5, "libelle": "Café", "type": "depense",
+            "categorie": "loisirs", "date_transaction": "2026-01-10"
+        })
+        avant = _valeur("budget_export_csv_bytes_total")
+        reponse = client.get("/api/transactions/export/csv")
+        assert _valeur("budget_export_csv_bytes_total") == avant + len(reponse.content)
+
+
+class TestInstrumenter:
+    """Tests pour instrumenter (requêtes SQL et pool de connexions)"""
+
+    def test_sql_et_pool(self):
+        """Les requêtes, emprunts au pool et attentes sont mesurés par engine"""
+        moteur = creer_engine("sqlite://")
+        metriques.instrumenter(moteur, "test")
+        try:
+            with moteur.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                conn.execute(text("SELECT 2"))
+                assert _valeur("budget_db_pool_checked_out", engine="test") == 1
+            assert _valeur("budget_sql_duration_seconds_count", engine="test") == 2
+            assert _valeur("budget_db_pool_checkouts_total", engine="test") == 1
+            assert _valeur("budget_db_pool_wait_seconds_count", engine="test") == 1
+            assert _valeur("budget_db_pool_checked_out", engine="test") == 0
+        finally:
+            moteur.dispose()
+
+    def test_erreur_sql(self):
+        """Une requête en échec n'est pas mesurée, les suivantes le sont"""
+        moteur = creer_engine("sqlite://")
+        metriques.instrumenter(moteur, "erreur")
+        try:
+            with moteur.connect() as conn:
+                with pytest.raises(Exception):
+                    conn.execute(text("SELECT * FROM table_absente"))
+                conn.execute(text("SELECT 1"))
+            assert _valeur("budget_sql_duration_seconds_count", engine="erreur") == 1
+        finally:
+            moteur.dispose()
+
+
+class TestMultiprocessus:
+    """Tests pour l'exposition agrégée entre workers"""
+
+    def test_exposer_multiprocessus(self, tmp_path, monkeypatch):
+        """Avec PROMETHEUS_MULTIPROC_DIR, /metrics lit les fichiers des workers"""
+        monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+        assert isinstance(metriques.exposer(), bytes)
+        metriques.processus_termine()
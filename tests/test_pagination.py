@@ -0,0 +1,27 @@
+"""
+Tests de la pagination par curseur
+"""
+import pytest
+from datetime import date
+
+from app import pagination
+
+
+class TestCurseur:
+    """Tests pour encoder_curseur et decoder_curseur"""
+    
+    def test_aller_retour(self):
+        """Un curseur encodé se décode en la même clé de tri"""
+        curseur = pagination.encoder_curseur(date(2026, 1, 6), 42)
+        assert pagination.decoder_curseur(curseur) == (date(2026, 1, 6), 42)
+    
+    def test_curseur_opaque(self):
+        """Le curseur ne contient que des caractères sûrs pour une URL"""
+        curseur = pagination.encoder_curseur(date(2026, 1, 6), 42)
+        assert all(c.isalnum() or c in "-_" for c in curseur)
+    
+    @pytest.mark.parametrize("curseur", ["", "!!!", "bm9uLXZhbGlkZQ", "MjAyNi0xMy0wMXwx"])
+    def test_curseur_invalide(self, curseur):
+        """Un curseur mal formé lève CurseurInvalide"""
+        with pytest.raises(pagination.CurseurInvalide):
+            pagination.decoder_curseur(curseur)
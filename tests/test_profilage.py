@@ -0,0 +1,101 @@
+"""
+Tests du middleware de profilage (Server-Timing, journal, profils cProfile)
+"""
+import json
+import logging
+import pstats
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import cache, profilage
+from app.database import Base, async_engine, desabonner_duree_sql, engine
+from app.main import app
+
+
+@pytest.fixture
+def client_profile(tmp_path):
+    """Application enveloppée par le middleware, engines instrumentés"""
+    Base.metadata.create_all(bind=engine)
+    cache.cache_statistiques.vider()
+    cache.cache_periodes.vider()
+    profilage.instrumenter(async_engine.sync_engine)
+    yield TestClient(profilage.MiddlewareProfilage(app, echantillon=1.0, repertoire=str(tmp_path / "profils")))
+    desabonner_duree_sql(async_engine.sync_engine, profilage._duree_sql)
+    Base.metadata.drop_all(bind=engine)
+
+
+def _server_timing(reponse):
+    return {
+        element.split(";")[0].strip(): element
+        for element in reponse.headers["Server-Timing"].split(",")
+    }
+
+
+class TestMiddlewareProfilage:
+    """Tests pour MiddlewareProfilage"""
+    
+    def test_server_timing(self, client_profile):
+        """L'en-tête donne la durée totale, le temps SQL et le nombre de requêtes SQL"""
+        client_profile.post("/api/budgets", json={
+            "categorie": "alimentation", "montant_budget": 300.0, "mois": 1, "annee": 2026
+        })
+        reponse = client_profile.get("/api/budgets/stats/alimentation?mois=1&annee=2026")
+        assert reponse.status_code == 200
+        timing = _server_timing(reponse)
+        assert set(timing) == {"total", "sql", "app"}
+        # Version des données (ETag), version qui valide le cache, puis statistiques
+        assert 'desc="3 requetes"' in timing["sql"]
+    
+    def test_sans_sql(self, client_profile):
+        """Une requête servie sans base compte zéro requête SQL"""
+        reponse = client_profile.get("/api/admin/cache")
+        assert 'desc="0 requetes"' in _server_timing(reponse)["sql"]
+    
+    def test_journal_structure(self, client_profile, caplog):
+        """Chaque requête produit une ligne de journal JSON"""
+        with caplog.at_level(logging.INFO, logger="budget.profilage"):
+            client_profile.get("/api/transactions?categorie=alimentation")
+        entree = json.loads(caplog.records[-1].getMessage())
+        assert entree["methode"] == "GET"
+        assert entree["chemin"] == "/api/transactions"
+        assert entree["statut"] == 200
+        assert entree["sql_requetes"] == 2
+        assert entree["duree_ms"] >= entree["sql_ms"]
+    
+    def test_profil_ecrit(self, client_profile, tmp_path, caplog):
+        """Une requête échantillonnée écrit un profil cProfile lisible par pstats"""
+        with caplog.at_level(logging.INFO, logger="budget.profilage"):
+            client_profile.get("/api/transactions")
+        fichier = json.loads(caplog.records[-1].getMessage())["profil"]
+        assert fichier.startswith(str(tmp_path / "profils"))
+        assert fichier.endswith("_GET_api_transactions.prof")
+        assert pstats.Stats(fichier).total_calls > 0
+
+
+class TestConfigurationProfilage:
+    """Tests pour lire_configuration et activer"""
+    
+    def test_desactive_par_defaut(self):
+        """Sans variable d'environnement, le profilage est désactivé"""
+        configuration = profilage.lire_configuration({})
+        assert configuration == {"actif": False, "echantillon": 0.0, "repertoire": "profils"}
+        application = FastAPI()
+        assert not profilage.activer(application, [], configuration)
+        assert application.user_middleware == []
+    
+    def test_active(self):
+        """BUDGET_PROFILAGE=1 installe le middleware"""
+        configuration = profilage.lire_configuration({
+            "BUDGET_PROFILAGE": "1", "BUDGET_PROFILAGE_ECHANTILLON": "0.05"
+        })
+        application = FastAPI()
+        assert profilage.activer(application, [], configuration)
+        assert application.user_middleware[0].cls is profilage.MiddlewareProfilage
+        assert application.user_middleware[0].options["echantillon"] == 0.05
+    
+    def test_echantillon_invalide(self):
+        """Une fraction hors de [0, 1] est refusée"""
+        with pytest.raises(ValueError):
+            profilage.lire_configuration({"BUDGET_PROFILAGE_ECHANTILLON": "5"})
@@ -0,0 +1,118 @@
+"""
+Tests du journal des requêtes SQL lentes
+"""
+import json
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app import requetes_lentes
+from app.main import app
+
+
+@pytest.fixture(autouse=True)
+def journal_vide():
+    requetes_lentes.journal.vider()
+    yield requetes_lentes.journal
+    requetes_lentes.journal.vider()
+
+
+@pytest.fixture
+def moteur():
+    moteur = create_engine("sqlite://")
+    with moteur.begin() as conn:
+        conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY, categorie TEXT)"))
+        conn.execute(text("CREATE INDEX ix_t_categorie ON t (categorie)"))
+    yield moteur
+    moteur.dispose()
+
+
+class TestSurveiller:
+    """Tests pour surveiller (seuil, paramètres, plan d'exécution)"""
+
+    def test_requete_lente_journalisee(self, moteur, journal_vide, caplog):
+        """Au-delà du seuil, SQL, paramètres et durée sont conservés et journalisés"""
+        requetes_lentes.surveiller(moteur, seuil_ms=0)
+        with caplog.at_level(logging.WARNING, logger="budget.requetes_lentes"):
+            with moteur.connect() as conn:
+                conn.execute(text("SELECT * FROM t WHERE categorie = :c"), {"c": "loisirs"})
+        entree = journal_vide.entrees()[0]
+        assert entree["sql"] == "SELECT * FROM t WHERE categorie = ?"
+        assert entree["parametres"] == "('loisirs',)"
+        assert entree["duree_ms"] >= 0
+        assert entree["endpoint"] is None
+        assert entree["plan"] is None
+        assert json.loads(caplog.records[-1].getMessage())["sql"] == entree["sql"]
+
+    def test_sous_le_seuil(self, moteur, journal_vide):
+        """Une requête plus rapide que le seuil n'est pas conservée"""
+        requetes_lentes.surveiller(moteur, seuil_ms=60_000)
+        with moteur.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        assert journal_vide.entrees() == []
+
+    def test_plan_en_mode_debug(self, moteur, journal_vide):
+        """En mode debug, le plan distingue parcours complet et recherche par index"""
+        requetes_lentes.surveiller(moteur, seuil_ms=0, explain=True)
+        with moteur.connect() as conn:
+            conn.execute(text("SELECT * FROM t WHERE categorie = :c"), {"c": "loisirs"}).fetchall()
+            conn.execute(text("SELECT * FROM t WHERE categorie LIKE '%sirs'")).fetchall()
+        par_index, parcours = journal_vide.entrees()[1], journal_vide.entrees()[0]
+        assert any(ligne.strip().startswith("SEARCH t") for ligne in par_index["plan"])
+        assert any(ligne.strip().startswith("SCAN t") for ligne in parcours["plan"])
+
+    def test_pas_de_plan_pour_executemany(self, moteur, journal_vide):
+        """Un executemany n'a pas de plan, et ses paramètres sont tronqués"""
+        requetes_lentes.surveiller(moteur, seuil_ms=0, explain=True)
+        with moteur.begin() as conn:
+            conn.execute(text("INSERT INTO t (categorie) VALUES (:c)"), [{"c": "x" * 50}] * 100)
+        entree = journal_vide.entrees()[0]
+        assert entree["plan"] is None
+        assert len(entree["parametres"]) == requetes_lentes.TAILLE_PARAMETRES + 3
+
+
+class TestJournal:
+    """Tests pour JournalRequetesLentes"""
+
+    def test_tampon_borne(self):
+        """Seules les entrées les plus récentes sont conservées, de la plus récente à la plus ancienne"""
+        journal = requetes_lentes.JournalRequetesLentes(taille=2)
+        for i in range(3):
+            journal.ajouter({"sql": str(i)})
+        assert [entree["sql"] for entree in journal.entrees()] == ["2", "1"]
+        journal.redimensionner(1)
+        assert journal.taille_max == 1
+        assert [entree["sql"] for entree in journal.entrees()] == ["2"]
+
+
+class TestEndpoints:
+    """Tests de l'origine des requêtes et des endpoints d'administration"""
+
+    def test_endpoint_d_origine(self):
+        """Pendant une requête HTTP, l'endpoint est le gabarit de la route"""
+        application = FastAPI()
+
+        @application.get("/api/elements/{element_id}")
+        async def lire_element(element_id: int):
+            return {"endpoint": requetes_lentes.endpoint_courant()}
+
+        client = TestClient(requetes_lentes.MiddlewareOrigine(application))
+        assert client.get("/api/elements/42").json() == {"endpoint": "GET /api/elements/{element_id}"}
+        assert requetes_lentes.endpoint_courant() is None
+
+    def test_consulter_et_vider(self, journal_vide):
+        """GET liste les requêtes lentes conservées, DELETE vide le journal"""
+        journal_vide.ajouter({
+            "horodatage": "2026-01-06T10:00:00.000", "duree_ms": 250.0,
+            "endpoint": "GET /api/transactions", "sql": "SELECT 1", "parametres": "()", "plan": ["SCAN t"]
+        })
+        client = TestClient(app)
+        reponse = client.get("/api/admin/requetes-lentes")
+        assert reponse.status_code == 200
+        assert reponse.json()[0]["endpoint"] == "GET /api/transactions"
+        assert reponse.json()[0]["plan"] == ["SCAN t"]
+        assert client.delete("/api/admin/requetes-lentes").status_code == 204
+        assert client.get("/api/admin/requetes-lentes").json() == []
@@ -0,0 +1,118 @@
+"""
+Tests du rollup mensuel monthly_category_spend
+"""
+import pytest
+from datetime import date
+from sqlalchemy import insert
+
+from app import business_logic, categories, rollup
+from app.models import Transaction, MonthlyCategorySpend
+
+
+def _ligne_rollup(db, categorie, type_transaction, mois, annee):
+    categorie_id = categories.cache.identifiant(db, categorie)
+    return db.get(MonthlyCategorySpend, (categorie_id, type_transaction, annee, mois))
+
+
+class TestMaintenanceIncrementale:
+    """Tests de la tenue à jour du rollup lors des écritures ORM"""
+    
+    def test_insertion(self, db_session, sample_transactions):
+        """Les insertions alimentent le rollup par catégorie, type et mois"""
+        ligne = _ligne_rollup(db_session, "alimentation", "depense", 1, 2026)
+        assert ligne.total_centimes == 7550
+        assert ligne.nombre == 2
+        assert _ligne_rollup(db_session, "salaire", "revenu", 1, 2026).total_centimes == 200000
+    
+    def test_modification_montant(self, db_session, sample_transactions):
+        """Une modification du montant ajuste le total du même mois"""
+        sample_transactions[0].montant = 30.0
+        db_session.commit()
+        ligne = _ligne_rollup(db_session, "alimentation", "depense", 1, 2026)
+        assert ligne.total_centimes == 8000
+        assert ligne.nombre == 2
+    
+    def test_modification_change_categorie_et_mois(self, db_session, sample_transactions):
+        """Déplacer une transaction ajuste l'ancien et le nouveau mois/catégorie"""
+        restaurant = sample_transactions[2]
+        restaurant.categorie = "loisirs"
+        restaurant.date_transaction = date(2026, 2, 3)
+        db_session.commit()
+        ancienne = _ligne_rollup(db_session, "alimentation", "depense", 1, 2026)
+        nouvelle = _ligne_rollup(db_session, "loisirs", "depense", 2, 2026)
+        assert (ancienne.total_centimes, ancienne.nombre) == (2550, 1)
+        assert (nouvelle.total_centimes, nouvelle.nombre) == (5000, 1)
+    
+    def test_modification_sans_effet(self, db_session, sample_transactions, compteur_requetes):
+        """Modifier le libellé ne touche pas au rollup"""
+        sample_transactions[0].libelle = "Courses Lidl"
+        db_session.commit()
+        assert not any("monthly_category_spend" in r for r in compteur_requetes)
+    
+    def test_suppression(self, db_session, sample_transactions):
+        """Une suppression retire la contribution de la transaction"""
+        db_session.delete(sample_transactions[0])
+        db_session.commit()
+        ligne = _ligne_rollup(db_session, "alimentation", "depense", 1, 2026)
+        assert (ligne.total_centimes, ligne.nombre) == (5000, 1)
+    
+    def test_rollback(self, db_session, sample_transactions):
+        """Le rollup est annulé avec la transaction qui l'a modifié"""
+        db_session.delete(sample_transactions[0])
+        db_session.flush()
+        db_session.rollback()
+        ligne = _ligne_rollup(db_session, "alimentation", "depense", 1, 2026)
+        assert (ligne.total_centimes, ligne.nombre) == (7550, 2)
+        assert rollup.verifier_rollup(db_session) == []
+
+
+class TestVerificationReconstruction:
+    """Tests de verifier_rollup et reconstruire_rollup"""
+    
+    def test_coherent(self, db_session, sample_transactions):
+        """Un rollup tenu par l'ORM est cohérent"""
+        assert rollup.verifier_rollup(db_session) == []
+    
+    def test_insertion_core_detectee_puis_reconstruite(self, db_session, sample_transactions):
+        """Une insertion qui contourne l'ORM est détectée puis corrigée"""
+        db_session.execute(insert(Transaction), categories.remplacer_noms(db_session, [{
+            "montant_centimes": 1000, "libelle": "Import", "type": "depense",
+            "categorie": "alimentation", "date_transaction": date(2026, 1, 20)
+        }]))
+        db_session.commit()
+        ecarts = rollup.verifier_rollup(db_session)
+        assert len(ecarts) == 1
+        assert ecarts[0]["categorie"] == "alimentation"
+        assert ecarts[0]["total_attendu_centimes"] == 8550
+        assert ecarts[0]["total_rollup_centimes"] == 7550
+        
+        assert rollup.reconstruire_rollup(db_session) == 3
+        assert rollup.verifier_rollup(db_session) == []
+        assert business_logic.calculer_total_depense_par_categorie(
+            db_session, "alimentation", 1, 2026
+        ) == 85.50
+    
+    def test_appliquer_variations(self, db_session, sample_transactions):
+        """Les variations d'un lot sont agrégées par clé avant l'UPSERT"""
+        lot = categories.remplacer_noms(db_session, [
+            {"montant_centimes": 500, "type": "depense", "categorie": "transport",
+             "date_transaction": date(2026, 3, d)}
+            for d in (1, 2, 3)
+        ])
+        db_session.execute(insert(Transaction), [dict(l, libelle="Ticket") for l in lot])
+        variations = rollup.cumuler_variations(lot)
+        transport = lot[0]["categorie_id"]
+        assert variations == {(transport, "depense", 2026, 3): (1500, 3)}
+        rollup.appliquer_variations(db_session, variations)
+        db_session.commit()
+        assert rollup.verifier_rollup(db_session) == []
+    
+    @pytest.mark.parametrize("commande,code", [("verifier", 0), ("reconstruire", 0)])
+    def test_commande(self, monkeypatch, capsys, db_session, commande, code):
+        """La commande python -m app.rollup utilise la base configurée"""
+        import app.database
+        from tests.conftest import engine, TestingSessionLocal
+        monkeypatch.setattr(app.database, "engine", engine)
+        monkeypatch.setattr(app.database, "SessionLocal", TestingSessionLocal)
+        assert rollup.main([commande]) == code
+        assert "Rollup" in capsys.readouterr().out
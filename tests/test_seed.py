@@ -0,0 +1,171 @@
+"""
+Tests du remplissage en masse (app.seed)
+"""
+from collections import Counter
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, func, inspect, select, text
+from sqlalchemy.orm import sessionmaker
+
+from app import seed
+from app.importation import CsvInvalide
+from app.models import Budget, Transaction
+from app.rollup import verifier_rollup
+
+
+CATEGORIES = {"alimentation": 3, "loisirs": 1}
+
+
+def _toutes(lots):
+    return [ligne for lot in lots for ligne in lot]
+
+
+class TestLireCategories:
+    """Tests pour lire_categories"""
+    
+    def test_poids(self):
+        """Les poids sont lus, une catégorie sans poids compte pour 1"""
+        assert seed.lire_categories("alimentation:30, loisirs") == {"alimentation": 30.0, "loisirs": 1.0}
+    
+    @pytest.mark.parametrize("texte", ["", "alimentation:beaucoup", "loisirs:0"])
+    def test_invalide(self, texte):
+        """Liste vide, poids non numérique ou nul refusés"""
+        with pytest.raises(ValueError):
+            seed.lire_categories(texte)
+
+
+class TestGenererTransactions:
+    """Tests pour generer_transactions"""
+    
+    def test_deterministe(self):
+        """Une même graine produit les mêmes lignes, quelle que soit la taille des lots"""
+        a = _toutes(seed.generer_transactions(1000, CATEGORIES, date(2026, 1, 1), date(2026, 12, 31), taille_lot=100))
+        b = _toutes(seed.generer_transactions(1000, CATEGORIES, date(2026, 1, 1), date(2026, 12, 31), taille_lot=333))
+        assert a == b
+        assert len(a) == 1000
+    
+    def test_distributions(self):
+        """Part de revenus, poids des catégories, montants et période respectés"""
+        lignes = _toutes(seed.generer_transactions(
+            20000, CATEGORIES, date(2025, 1, 1), date(2026, 12, 31),
+            depense_min=5, depense_max=50, part_revenus=0.2
+        ))
+        revenus = [l for l in lignes if l["type"] == "revenu"]
+        depenses = Counter(l["categorie"] for l in lignes if l["type"] == "depense")
+        assert 0.18 < len(revenus) / len(lignes) < 0.22
+        assert {l["categorie"] for l in revenus} == {"salaire"}
+        assert 2.7 < depenses["alimentation"] / depenses["loisirs"] < 3.3
+        assert all(500 <= l["montant_centimes"] <= 5000 for l in lignes if l["type"] == "depense")
+        assert all(date(2025, 1, 1) <= l["date_transaction"] <= date(2026, 12, 31) for l in lignes)
+    
+    def test_saisonnalite(self):
+        """Avec une saisonnalité, décembre reçoit nettement plus de transactions que juin"""
+        lignes = _toutes(seed.generer_transactions(
+            20000, CATEGORIES, date(2026, 1, 1), date(2026, 12, 31), saisonnalite=0.5
+        ))
+        par_mois = Counter(l["date_transaction"].month for l in lignes)
+        assert par_mois[12] > 2 * par_mois[6]
+    
+    def test_parametres_invalides(self):
+        """Période inversée ou proportions hors bornes refusées"""
+        with pytest.raises(ValueError):
+            next(seed.generer_transactions(10, CATEGORIES, date(2026, 2, 1), date(2026, 1, 1)))
+        with pytest.raises(ValueError):
+            next(seed.generer_transactions(10, CATEGORIES, date(2026, 1, 1), date(2026, 2, 1), part_revenus=2))
+
+
+class TestGenererBudgets:
+    """Tests pour generer_budgets"""
+    
+    def test_un_budget_par_categorie_et_par_mois(self):
+        """Chaque mois couvert par la période reçoit un budget par catégorie"""
+        budgets = seed.generer_budgets(CATEGORIES, date(2025, 11, 15), date(2026, 2, 1), 300.0)
+        assert len(budgets) == 2 * 4
+        assert {(b["mois"], b["annee"]) for b in budgets} == {(11, 2025), (12, 2025), (1, 2026), (2, 2026)}
+
+
+class TestRejouer:
+    """Tests pour lire_csv et rejouer"""
+    
+    def test_rejeu_decale(self, tmp_path):
+        """Chaque copie est décalée de la durée couverte par le fichier"""
+        fichier = tmp_path / "export.csv"
+        fichier.write_text(
+            "id,date,libelle,type,categorie,montant\n"
+            "1,2026-01-01,Courses,depense,alimentation,25.5\n"
+            "2,2026-01-10,Cinéma,depense,loisirs,12.0\n",
+            encoding="utf-8"
+        )
+        lignes = _toutes(seed.rejouer(seed.lire_csv(str(fichier)), 3, taille_lot=4))
+        assert len(lignes) == 6
+        assert [l["date_transaction"] for l in lignes[::2]] == [
+            date(2026, 1, 1), date(2026, 1, 11), date(2026, 1, 21)
+        ]
+        assert lignes[5]["libelle"] == "Cinéma"
+    
+    def test_csv_invalide(self, tmp_path):
+        """Une ligne invalide interrompt le rejeu avant toute écriture"""
+        fichier = tmp_path / "export.csv"
+        fichier.write_text("date,libelle,type,categorie,montant\n2026-01-01,X,depense,autre,-3\n", encoding="utf-8")
+        with pytest.raises(CsvInvalide, match="ligne 2"):
+            seed.lire_csv(str(fichier))
+
+
+class TestCharger:
+    """Tests pour charger et la commande python -m app.seed"""
+    
+    def test_charger(self, tmp_path):
+        """Transactions et budgets écrits, index recréés et rollup cohérent"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'budget.db'}")
+        lots = seed.generer_transactions(5000, CATEGORIES, date(2026, 1, 1), date(2026, 12, 31), taille_lot=1000)
+        budgets = seed.generer_budgets(CATEGORIES, date(2026, 1, 1), date(2026, 12, 31), 400.0)
+        assert seed.charger(engine, lots, budgets) == 5000
+        # Les budgets déjà présents sont conservés lors d'un second chargement
+        assert seed.charger(engine, [], budgets) == 0
+        
+        db = sessionmaker(bind=engine)()
+        assert db.scalar(select(func.count()).select_from(Transaction)) == 5000
+        assert db.scalar(select(func.count()).select_from(Budget)) == 24
+        assert verifier_rollup(db) == []
+        db.close()
+        index = {i["name"] for i in inspect(engine).get_indexes("transactions")}
+        assert "ix_transactions_categorie_type_date" in index
+        engine.dispose()
+    
+    def test_charger_sur_base_migree(self, tmp_path):
+        """Sur une base aux catégories en texte, un budget déjà présent n'est pas dupliqué"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'budget.db'}")
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE budgets (id INTEGER PRIMARY KEY, categorie VARCHAR NOT NULL, "
+                "montant_budget FLOAT NOT NULL, mois INTEGER NOT NULL, annee INTEGER NOT NULL)"
+            ))
+            conn.execute(text(
+                "INSERT INTO budgets (categorie, montant_budget, mois, annee) VALUES ('loisirs', 50, 1, 2026)"
+            ))
+        lots = seed.generer_transactions(500, CATEGORIES, date(2026, 1, 1), date(2026, 3, 31))
+        budgets = seed.generer_budgets(CATEGORIES, date(2026, 1, 1), date(2026, 3, 31), 400.0)
+        assert seed.charger(engine, lots, budgets) == 500
+        
+        db = sessionmaker(bind=engine)()
+        assert db.scalar(select(func.count()).select_from(Budget)) == 6
+        assert verifier_rollup(db) == []
+        db.close()
+        engine.dispose()
+    
+    def test_main(self, tmp_path, capsys):
+        """La commande generer remplit la base désignée par --url"""
+        url = f"sqlite:///{tmp_path / 'budget.db'}"
+        code = seed.main([
+            "--url", url, "generer", "--transactions", "2000", "--categories", "alimentation,loisirs",
+            "--debut", "2026-01-01", "--fin", "2026-06-30", "--budgets", "100"
+        ])
+        assert code == 0
+        assert "2000 transactions et 12 budgets" in capsys.readouterr().out
+    
+    def test_main_erreur(self, tmp_path, capsys):
+        """Une erreur de paramètre est signalée sans trace d'appel"""
+        code = seed.main(["--url", f"sqlite:///{tmp_path / 'budget.db'}", "rejouer", str(tmp_path / "absent.csv")])
+        assert code == 1
+        assert "Erreur" in capsys.readouterr().err
@@ -0,0 +1,94 @@
+"""
+Tests de la sérialisation directe des listes en JSON
+"""
+import json
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import serialisation
+from app.database import Base, engine
+from app.main import app
+from app.models import Budget, Transaction
+from app.schemas import BudgetResponse, TransactionResponse
+
+
+class TestSerialisation:
+    """Le JSON produit est celui des schémas de réponse"""
+
+    def test_transactions_identiques_au_schema(self, db_session, sample_transactions):
+        """Mêmes champs, même ordre et mêmes valeurs que TransactionResponse"""
+        db_session.add(Transaction(
+            montant_centimes=10, libelle="Café « noir » ☕", type="depense",
+            categorie="loisirs", date_transaction=date(2026, 2, 28)
+        ))
+        db_session.commit()
+        ordre = (Transaction.date_transaction.desc(), Transaction.id.desc())
+        lignes = db_session.execute(serialisation.selection_transactions().order_by(*ordre)).all()
+        attendu = [
+            TransactionResponse.model_validate(t).model_dump(mode="json")
+            for t in db_session.query(Transaction).order_by(*ordre)
+        ]
+        contenu = serialisation.transactions_json(lignes)
+        assert json.loads(contenu) == attendu
+        assert list(json.loads(contenu)[0]) == list(TransactionResponse.model_fields)
+
+    def test_budgets_identiques_au_schema(self, db_session, sample_budgets):
+        """Mêmes champs, même ordre et mêmes valeurs que BudgetResponse"""
+        lignes = db_session.execute(serialisation.selection_budgets().order_by(Budget.id)).all()
+        attendu = [
+            BudgetResponse.model_validate(b).model_dump(mode="json")
+            for b in db_session.query(Budget).order_by(Budget.id)
+        ]
+        contenu = serialisation.budgets_json(lignes)
+        assert json.loads(contenu) == attendu
+        assert list(json.loads(contenu)[0]) == list(BudgetResponse.model_fields)
+
+    def test_liste_vide(self):
+        """Une liste vide est encodée []"""
+        assert serialisation.transactions_json([]) == b"[]"
+
+    def test_ndjson_une_transaction_par_ligne(self, db_session, sample_transactions):
+        """Chaque ligne du NDJSON est l'élément correspondant de la liste JSON"""
+        lignes = db_session.execute(serialisation.selection_transactions().order_by(Transaction.id)).all()
+        contenu = serialisation.transactions_ndjson(lignes)
+        assert contenu.endswith(b"\n")
+        assert [json.loads(ligne) for ligne in contenu.splitlines()] == json.loads(serialisation.transactions_json(lignes))
+
+    @pytest.mark.asyncio
+    async def test_flux_ndjson_par_lot(self, async_db_session):
+        """Un morceau par lot lu sur le curseur"""
+        async_db_session.add_all([
+            Transaction(montant_centimes=100 + i, libelle=f"Achat {i}", type="depense",
+                        categorie="alimentation", date_transaction=date(2026, 1, 1 + i))
+            for i in range(5)
+        ])
+        await async_db_session.commit()
+        requete = serialisation.selection_transactions().order_by(Transaction.id)
+        morceaux = [m async for m in serialisation.generer_ndjson_async(async_db_session, requete, taille_lot=2)]
+        assert [m.count(b"\n") for m in morceaux] == [2, 2, 1]
+        assert json.loads(morceaux[-1])["montant"] == 1.04
+
+
+class TestEndpointsListes:
+    """Les listes de l'API passent par la sérialisation directe"""
+
+    def test_en_tetes_conserves(self):
+        """Type de contenu, ETag et curseur de pagination restent présents"""
+        Base.metadata.create_all(bind=engine)
+        try:
+            client = TestClient(app)
+            for jour in ("2026-01-06", "2026-01-07"):
+                client.post("/api/transactions", json={
+                    "montant": 12.3, "libelle": "x", "type": "depense",
+                    "categorie": "alimentation", "date_transaction": jour
+                })
+            reponse = client.get("/api/transactions", params={"limit": 1})
+            assert reponse.headers["content-type"] == "application/json"
+            assert reponse.headers["etag"].startswith('W/"')
+            assert "x-next-cursor" in reponse.headers
+            assert reponse.json()[0]["montant"] == 12.3
+            assert reponse.json()[0]["date_transaction"] == "2026-01-07"
+        finally:
+            Base.metadata.drop_all(bind=engine)
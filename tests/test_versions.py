@@ -0,0 +1,142 @@
+"""
+Tests des versions de données et des GET conditionnels (ETag / If-None-Match)
+"""
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app import cache, importation, versions
+from app.database import Base, async_engine, engine
+from app.main import app
+
+
+@pytest.fixture
+def compteur_requetes_api():
+    """Requêtes SQL émises par l'API (engine asynchrone)"""
+    requetes = []
+
+    def enregistrer(conn, cursor, statement, parameters, context, executemany):
+        requetes.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", enregistrer)
+    try:
+        yield requetes
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", enregistrer)
+
+
+class TestVersions:
+    """Tests des compteurs de version"""
+
+    def test_table_jamais_ecrite(self, db_session):
+        """Une table sans écriture est en version 0"""
+        assert versions.lire(db_session, [versions.TRANSACTIONS]) == {"transactions": 0}
+
+    def test_ecriture_orm(self, db_session, sample_transactions):
+        """Chaque flush qui écrit une transaction incrémente sa version, pas celle des budgets"""
+        avant = versions.lire(db_session, [versions.TRANSACTIONS, versions.BUDGETS])
+        assert avant["transactions"] > 0 and avant["budgets"] == 0
+        sample_transactions[0].libelle = "Courses Carrefour"
+        db_session.commit()
+        db_session.delete(sample_transactions[1])
+        db_session.commit()
+        assert versions.lire(db_session, [versions.TRANSACTIONS])["transactions"] == avant["transactions"] + 2
+
+    def test_annulee_avec_l_ecriture(self, db_session, sample_budgets):
+        """Un rollback annule aussi l'incrément"""
+        avant = versions.lire(db_session, [versions.BUDGETS])
+        sample_budgets[0].montant_budget_centimes = 1
+        db_session.flush()
+        assert versions.lire(db_session, [versions.BUDGETS])["budgets"] == avant["budgets"] + 1
+        db_session.rollback()
+        assert versions.lire(db_session, [versions.BUDGETS]) == avant
+
+    def test_insertion_core(self, db_session):
+        """Les insertions en masse de l'import incrémentent la version"""
+        importation.ecrire_transactions(db_session, [{
+            "montant_centimes": 100, "libelle": "x", "type": "depense",
+            "categorie": "loisirs", "date_transaction": date(2026, 1, 1)
+        }])
+        db_session.commit()
+        assert versions.lire(db_session, [versions.TRANSACTIONS])["transactions"] > 0
+
+    @pytest.mark.parametrize("if_none_match, attendu", [
+        (None, False),
+        ('W/"abc"', True),
+        ('"abc"', True),
+        ('W/"autre", W/"abc"', True),
+        ("*", True),
+        ('W/"autre"', False),
+    ])
+    def test_correspond(self, if_none_match, attendu):
+        """Comparaison faible, liste de validateurs et joker"""
+        assert versions.correspond(if_none_match, 'W/"abc"') is attendu
+
+
+class TestGetConditionnels:
+    """Tests des ETag renvoyés par l'API"""
+
+    @pytest.fixture
+    def client(self):
+        Base.metadata.create_all(bind=engine)
+        cache.cache_statistiques.vider()
+        cache.cache_periodes.vider()
+        client = TestClient(app)
+        client.post("/api/budgets", json={"categorie": "alimentation", "montant_budget": 300, "mois": 1, "annee": 2026})
+        client.post("/api/transactions", json={
+            "montant": 25.5, "libelle": "x", "type": "depense",
+            "categorie": "alimentation", "date_transaction": "2026-01-06"
+        })
+        yield client
+        Base.metadata.drop_all(bind=engine)
+
+    @pytest.mark.parametrize("url", [
+        "/api/transactions?categorie=alimentation",
+        "/api/budgets",
+        "/api/budgets/stats?mois=1&annee=2026",
+        "/api/budgets/stats/alimentation?mois=1&annee=2026",
+        "/api/reports/monthly?annee_debut=2026",
+        "/api/reports/trend?annee=2026",
+    ])
+    def test_304_sans_modification(self, client, url):
+        """Un ETag encore valide donne un 304 sans corps"""
+        reponse = client.get(url)
+        assert reponse.status_code == 200
+        etag = reponse.headers["etag"]
+        assert etag.startswith('W/"')
+        non_modifie = client.get(url, headers={"If-None-Match": etag})
+        assert non_modifie.status_code == 304
+        assert non_modifie.content == b""
+        assert non_modifie.headers["etag"] == etag
+
+    def test_304_sans_requete(self, client, compteur_requetes_api):
+        """Le 304 ne lit que les versions"""
+        url = "/api/budgets/stats?mois=1&annee=2026"
+        etag = client.get(url).headers["etag"]
+        compteur_requetes_api.clear()
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+        assert len(compteur_requetes_api) == 1
+        assert "versions_donnees" in compteur_requetes_api[0]
+
+    def test_etag_par_parametres(self, client):
+        """Des paramètres différents donnent des ETag différents"""
+        tous = client.get("/api/transactions").headers["etag"]
+        filtres = client.get("/api/transactions?categorie=alimentation").headers["etag"]
+        assert tous != filtres
+        assert client.get("/api/transactions?categorie=alimentation", headers={"If-None-Match": tous}).status_code == 200
+
+    def test_ecriture_invalide_l_etag(self, client):
+        """Une écriture de transaction change l'ETag des statistiques, pas celui des budgets"""
+        stats = client.get("/api/budgets/stats?mois=1&annee=2026")
+        budgets = client.get("/api/budgets")
+        client.post("/api/transactions", json={
+            "montant": 10, "libelle": "y", "type": "depense",
+            "categorie": "alimentation", "date_transaction": "2026-01-07"
+        })
+        apres = client.get("/api/budgets/stats?mois=1&annee=2026", headers={"If-None-Match": stats.headers["etag"]})
+        assert apres.status_code == 200
+        assert apres.json()[0]["montant_total_depense"] == 35.5
+        assert client.get("/api/budgets", headers={"If-None-Match": budgets.headers["etag"]}).status_code == 304
+